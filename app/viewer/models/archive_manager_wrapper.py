@@ -8,7 +8,7 @@ import os
 import sys
 import time
 import traceback
-from typing import List, Dict, Any, Optional, Tuple
+from typing import BinaryIO, Iterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 # 親パッケージからインポートできるようにパスを調整
@@ -312,6 +312,58 @@ class ArchiveManagerWrapper(ViewerDebugMixin):
             self.debug_error(f"ファイルの読み込みに失敗しました: {file_path} - {e}", trace=self._debug_mode)
             return None
 
+    def extract_files(self, file_paths: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        複数のファイルの内容をまとめて抽出
+        
+        同じ書庫に入っているファイルは、書庫を1回だけ開いて読み込む（見開きの2ページなど）。
+        結果は読み込んだものから順に返すため、順序は file_paths と一致しない。
+        
+        Args:
+            file_paths: ファイルパスのリスト (カレントディレクトリからの相対パスまたは絶対パス)
+        
+        Yields:
+            (file_pathsのパス, 内容) のタプル。読み込みに失敗したファイルの内容はNone
+        """
+        # 正規化したパスから呼び出し元のパスに戻すための対応表
+        requested = {normalize_path(file_path): file_path for file_path in file_paths}
+        
+        self.debug_info(f"{len(requested)} 件のファイルをまとめて読み込み中")
+        done = set()
+        try:
+            for norm_path, content in self._manager.read_files(list(requested)):
+                done.add(norm_path)
+                yield requested.get(norm_path, norm_path), content
+        except Exception as e:
+            self.debug_error(f"ファイルの一括読み込みに失敗しました: {e}", trace=self._debug_mode)
+        
+        # 返せなかったものは失敗として返す
+        for norm_path, file_path in requested.items():
+            if norm_path not in done:
+                yield file_path, None
+
+    def open_file_stream(self, file_path: str) -> Optional[BinaryIO]:
+        """
+        ファイルを読み込み用のストリームとして開く
+        
+        ZIP内のファイルなどは展開しながら読み進めるため、ファイル全体をメモリに読み込まない。
+        
+        Args:
+            file_path: ファイルパス (カレントディレクトリからの相対パスまたは絶対パス)
+            
+        Returns:
+            Optional[BinaryIO]: 読み込み用のストリーム（呼び出し元が閉じる）、失敗した場合はNone
+        """
+        try:
+            # パスを正規化
+            norm_path = normalize_path(file_path)
+            
+            self.debug_info(f"ファイルストリームを取得中: {norm_path} (相対パス)")
+            return self._manager.get_stream(norm_path)
+        except Exception as e:
+            self.debug_error(f"ファイルストリームの取得に失敗しました: {file_path} - {e}", trace=self._debug_mode)
+            return None
+
     def extract_item(self, item_name: str) -> Optional[bytes]:
         """
         現在のディレクトリからアイテムを抽出する
@@ -0,0 +1,370 @@
+"""
+サムネイルストア
+
+生成したサムネイルを、メモリ上のLRUキャッシュとSQLiteのデータベースに保存します。
+サムネイルは (開いたパス, エントリのパス, サイズ, 更新日時, サムネイルのサイズ) で識別するため、
+別の書庫にある同じ名前のファイルを取り違えず、次回の起動時にも生成し直さずに使えます。
+
+データベースにはJPEG（透過のある画像はPNG）に圧縮して保存します。
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from logutils import log_print, DEBUG, INFO, WARNING
+from decoder.cache import CachedImage, DecodedImageCache
+from decoder.decoder import (
+    PIXEL_FORMAT_GRAY8, PIXEL_FORMAT_RGB888, PIXEL_FORMAT_BGR888,
+    PIXEL_FORMAT_RGBA8888, PIXEL_FORMAT_BGRA8888
+)
+
+
+class ThumbnailKey(NamedTuple):
+    """サムネイルを識別するキー"""
+    source: str  # 開いたパス（フォルダまたは書庫ファイル）
+    entry: str  # 開いたパスからのエントリの相対パス
+    size: int  # エントリのサイズ
+    mtime: str  # エントリの更新日時
+    width: int  # サムネイルの幅
+    height: int  # サムネイルの高さ
+
+
+def make_thumbnail_key(source_path: str, entry_path: str, size: Optional[int], mtime: Optional[object],
+                       thumbnail_size: Tuple[int, int]) -> ThumbnailKey:
+    """
+    サムネイルのキーを作成する
+
+    Args:
+        source_path: 開いたパス（フォルダまたは書庫ファイル）
+        entry_path: 開いたパスからのエントリの相対パス
+        size: エントリのサイズ（不明ならNone）
+        mtime: エントリの更新日時（不明ならNone。文字列にして比較する）
+        thumbnail_size: サムネイルのサイズ (幅, 高さ)
+
+    Returns:
+        サムネイルのキー
+    """
+    return ThumbnailKey(source_path.replace('\\', '/'), entry_path.replace('\\', '/').lstrip('/'),
+                        int(size or 0), str(mtime or ''), int(thumbnail_size[0]), int(thumbnail_size[1]))
+
+
+class ThumbnailStore:
+    """
+    サムネイルストアクラス
+
+    メモリ上のLRUキャッシュ（件数とバイト数で制限）に見つからなければデータベースから読み込む。
+    ワーカースレッドから同時に呼ばれるため、データベースへのアクセスはロックで直列化する。
+    """
+
+    # 保存形式のバージョン（形式を変えたら上げる。異なるバージョンの記録は使わない）
+    STORE_VERSION = 1
+
+    # データベースに保持するサムネイルの最大数（超えたら最後に使われた日時が古いものから削除する）
+    MAX_THUMBNAILS = 200000
+
+    # 何件保存するごとに保持数の上限を確認するか
+    PRUNE_INTERVAL = 1000
+
+    # 最後に使われた日時の更新を何件までためてからまとめて書き込むか
+    TOUCH_FLUSH_SIZE = 256
+
+    # メモリ上のキャッシュの上限
+    DEFAULT_MEMORY_ENTRIES = 4000
+    DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+    # JPEGで保存するときの品質
+    JPEG_QUALITY = 85
+
+    # デフォルトの保存先
+    DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".supraview", "thumbnails.sqlite3")
+
+    def __init__(self, db_path: Optional[str] = None, memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 memory_bytes: int = DEFAULT_MEMORY_BYTES):
+        """
+        サムネイルストアを初期化する
+
+        Args:
+            db_path: データベースファイルのパス（省略時はDEFAULT_DB_PATH）
+            memory_entries: メモリ上に保持するサムネイルの件数の上限
+            memory_bytes: メモリ上に保持するサムネイルのバイト数の上限
+        """
+        self._db_path = db_path or self.DEFAULT_DB_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._memory = DecodedImageCache(memory_bytes, memory_entries)
+        self._puts_since_prune = 0
+        # データベースから読み込んだサムネイルの最後に使われた日時（書き込み待ち。ロックで保護）
+        self._touched: Dict[Tuple[str, str, int, int], float] = {}
+        # Falseにするとデータベースを使わない（開けない場合も無効になる）。メモリ上のキャッシュは使う
+        self.enabled = True
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """
+        データベースに接続する（ロック取得済みで呼ぶこと）
+
+        Returns:
+            接続。開けない場合はNone（以降データベースは無効）
+        """
+        if self._conn is not None:
+            return self._conn
+        try:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            conn = sqlite3.connect(self._db_path, timeout=5.0, check_same_thread=False)
+            # サムネイルは作り直せるため、書き込みの同期は緩めて保存を速くする
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS thumbnails ("
+                " source TEXT NOT NULL,"
+                " entry TEXT NOT NULL,"
+                " width INTEGER NOT NULL,"
+                " height INTEGER NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " mtime TEXT NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " data BLOB NOT NULL,"
+                " PRIMARY KEY (source, entry, width, height))"
+            )
+            conn.commit()
+            self._conn = conn
+            log_print(INFO, f"サムネイルストアを開きました: {self._db_path}")
+            return conn
+        except (sqlite3.Error, OSError) as e:
+            log_print(WARNING, f"サムネイルストアを開けないため無効にします: {self._db_path} - {e}")
+            self.enabled = False
+            return None
+
+    def contains(self, key: ThumbnailKey) -> bool:
+        """
+        サムネイルが保存されているかどうか（データベースの記録は展開しない）
+
+        Args:
+            key: サムネイルのキー
+
+        Returns:
+            保存されている場合はTrue
+        """
+        if self._memory.get(key) is not None:
+            return True
+        if not self.enabled:
+            return False
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False
+            try:
+                row = conn.execute(
+                    "SELECT 1 FROM thumbnails WHERE source = ? AND entry = ? AND width = ? AND height = ?"
+                    " AND size = ? AND mtime = ? AND version = ?",
+                    (key.source, key.entry, key.width, key.height, key.size, key.mtime, self.STORE_VERSION)
+                ).fetchone()
+            except sqlite3.Error as e:
+                log_print(WARNING, f"サムネイルの確認に失敗しました: {key.entry} - {e}")
+                return False
+        return row is not None
+
+    def get(self, key: ThumbnailKey) -> Optional[CachedImage]:
+        """
+        サムネイルを取得する
+
+        Args:
+            key: サムネイルのキー
+
+        Returns:
+            サムネイルの画像（array と pixel_format）。なければNone
+        """
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT data FROM thumbnails WHERE source = ? AND entry = ? AND width = ? AND height = ?"
+                    " AND size = ? AND mtime = ? AND version = ?",
+                    (key.source, key.entry, key.width, key.height, key.size, key.mtime, self.STORE_VERSION)
+                ).fetchone()
+                if row is None:
+                    return None
+            except sqlite3.Error as e:
+                log_print(WARNING, f"サムネイルの読み込みに失敗しました: {key.entry} - {e}")
+                return None
+            # 最後に使われた日時はためておき、次の保存などでまとめて書き込む
+            self._touched[(key.source, key.entry, key.width, key.height)] = time.time()
+            if len(self._touched) >= self.TOUCH_FLUSH_SIZE:
+                self._flush_touches_locked(conn, commit=True)
+
+        decoded = self._decode(row[0])
+        if decoded is None:
+            log_print(WARNING, f"保存されたサムネイルを展開できませんでした: {key.entry}")
+            return None
+        array, pixel_format = decoded
+        return self._memory.put(key, array, pixel_format=pixel_format)
+
+    def put(self, key: ThumbnailKey, array: np.ndarray, pixel_format: str) -> CachedImage:
+        """
+        サムネイルを保存する
+
+        Args:
+            key: サムネイルのキー
+            array: サムネイルの画像配列
+            pixel_format: 配列の画素形式（PIXEL_FORMAT_*）
+
+        Returns:
+            保存したサムネイル（配列はC連続にそろえたもの）
+        """
+        cached = self._memory.put(key, array, pixel_format=pixel_format)
+        if not self.enabled:
+            return cached
+        data = self._encode(cached.array, cached.pixel_format)
+        if data is None:
+            return cached
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return cached
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO thumbnails"
+                    " (source, entry, width, height, size, mtime, version, last_used, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key.source, key.entry, key.width, key.height, key.size, key.mtime,
+                     self.STORE_VERSION, time.time(), data)
+                )
+                # ためておいた日時の更新も同じトランザクションで書き込む
+                self._flush_touches_locked(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                log_print(WARNING, f"サムネイルの保存に失敗しました: {key.entry} - {e}")
+                return cached
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= self.PRUNE_INTERVAL:
+                self._puts_since_prune = 0
+                self._prune_locked(conn)
+        return cached
+
+    def _flush_touches_locked(self, conn: sqlite3.Connection, commit: bool = False) -> None:
+        """
+        ためておいた最後に使われた日時をまとめて書き込む（ロック取得済みで呼ぶこと）
+
+        Args:
+            conn: データベース接続
+            commit: 書き込んだ後にコミットするかどうか（Falseなら呼び出し元のトランザクションに含める）
+        """
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            conn.executemany(
+                "UPDATE thumbnails SET last_used = ? WHERE source = ? AND entry = ? AND width = ? AND height = ?",
+                [(last_used,) + key for key, last_used in touched.items()]
+            )
+            if commit:
+                conn.commit()
+        except sqlite3.Error as e:
+            # 日時は整理の順序にしか使わないため、書き込めなくても捨てる
+            log_print(WARNING, f"サムネイルの使用日時の更新に失敗しました: {e}")
+
+    def flush(self) -> None:
+        """ためておいた最後に使われた日時をデータベースに書き込む"""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches_locked(self._conn, commit=True)
+
+    def _prune_locked(self, conn: sqlite3.Connection) -> None:
+        """保持数の上限を超えた古い記録を削除する（ロック取得済みで呼ぶこと）"""
+        try:
+            self._flush_touches_locked(conn)
+            conn.execute(
+                "DELETE FROM thumbnails WHERE rowid NOT IN"
+                " (SELECT rowid FROM thumbnails ORDER BY last_used DESC LIMIT ?)",
+                (self.MAX_THUMBNAILS,)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            log_print(WARNING, f"サムネイルストアの整理に失敗しました: {e}")
+
+    def _encode(self, array: np.ndarray, pixel_format: str) -> Optional[bytes]:
+        """
+        サムネイルを圧縮する（透過のある画像はPNG、それ以外はJPEG）
+
+        Args:
+            array: サムネイルの画像配列
+            pixel_format: 配列の画素形式
+
+        Returns:
+            圧縮したデータ。対応していない画素形式の場合はNone
+        """
+        if pixel_format == PIXEL_FORMAT_RGB888:
+            array = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+        elif pixel_format == PIXEL_FORMAT_RGBA8888:
+            array = cv2.cvtColor(array, cv2.COLOR_RGBA2BGRA)
+        elif pixel_format not in (PIXEL_FORMAT_GRAY8, PIXEL_FORMAT_BGR888, PIXEL_FORMAT_BGRA8888):
+            log_print(DEBUG, f"サムネイルを保存できない画素形式です: {pixel_format}")
+            return None
+        if array.ndim == 3 and array.shape[2] == 4:
+            ok, buf = cv2.imencode('.png', array)
+        else:
+            ok, buf = cv2.imencode('.jpg', array, [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY])
+        return buf.tobytes() if ok else None
+
+    @staticmethod
+    def _decode(data: bytes) -> Optional[Tuple[np.ndarray, str]]:
+        """
+        保存したサムネイルを展開する
+
+        Returns:
+            (画像配列, 画素形式)。展開できない場合はNone
+        """
+        array = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+        if array is None:
+            return None
+        channels = 1 if array.ndim == 2 else array.shape[2]
+        pixel_format = {1: PIXEL_FORMAT_GRAY8, 3: PIXEL_FORMAT_BGR888, 4: PIXEL_FORMAT_BGRA8888}.get(channels)
+        if pixel_format is None:
+            return None
+        return array, pixel_format
+
+    def close(self) -> None:
+        """データベース接続を閉じる（ためておいた日時の更新は書き込んでから閉じる）"""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches_locked(self._conn, commit=True)
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
+
+
+# シングルトンインスタンス
+_thumbnail_store = None
+_thumbnail_store_lock = threading.Lock()
+
+
+def get_thumbnail_store() -> ThumbnailStore:
+    """
+    プロセス全体で共有するサムネイルストアを取得する
+
+    Returns:
+        ThumbnailStoreのインスタンス
+    """
+    global _thumbnail_store
+    if _thumbnail_store is None:
+        with _thumbnail_store_lock:
+            if _thumbnail_store is None:
+                _thumbnail_store = ThumbnailStore()
+    return _thumbnail_store
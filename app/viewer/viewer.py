@@ -376,6 +376,13 @@ class ViewerWindow(QMainWindow, ViewerDebugMixin):
             path = urls[0].toLocalFile()
             self._handle_open_path(path)
     
+    def closeEvent(self, event):
+        """ウィンドウを閉じるときの処理"""
+        # サムネイル生成を止め、一括デコードのワーカープロセスを停止する
+        self.file_view.thumbnail_generator.cancel_current_task(explicit_cancel=True)
+        self.file_view.thumbnail_generator.shutdown()
+        super().closeEvent(event)
+    
     def _handle_open_path(self, path: str):
         """パスを開く処理のハンドラ"""
         self.debug_info(f"パスを開きます: {path}")
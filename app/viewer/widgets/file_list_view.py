@@ -24,7 +24,7 @@ try:
         QListView, QAbstractItemView, QMenu, QStyle, QApplication, QFileDialog
     )
     from PySide6.QtCore import (
-        Qt, Signal, QSize, QPoint, QModelIndex
+        Qt, Signal, QSize, QPoint, QModelIndex, QTimer
     )
     from PySide6.QtGui import (
         QStandardItemModel, QStandardItem, QContextMenuEvent, QIcon
@@ -134,6 +134,13 @@ class FileListView(QListView):
         # サムネイル生成状態の追跡
         self._thumbnail_generation_active = False
         
+        # スクロールが止まったら表示中のファイルのサムネイルを優先して生成する
+        self._thumbnail_priority_timer = QTimer(self)
+        self._thumbnail_priority_timer.setSingleShot(True)
+        self._thumbnail_priority_timer.setInterval(50)
+        self._thumbnail_priority_timer.timeout.connect(self._prioritize_visible_thumbnails)
+        self.verticalScrollBar().valueChanged.connect(lambda value: self._thumbnail_priority_timer.start())
+        
         # シグナルをスロットに接続
         self.doubleClicked.connect(self._handle_item_activated)
         
@@ -291,7 +298,10 @@ class FileListView(QListView):
                     file_items.append({
                         'name': name,
                         'path': path,
-                        'is_dir': False
+                        'is_dir': False,
+                        # サムネイルストアのキーに使う（更新されたファイルのサムネイルは作り直す）
+                        'size': self.model().data(index, Qt.UserRole + 2),
+                        'modified': self.model().data(index, Qt.UserRole + 3)
                     })
             
             log_print(INFO, f"FileListView: サムネイル対象ファイル数: {len(file_items)}")
@@ -311,7 +321,8 @@ class FileListView(QListView):
                 on_thumbnail_ready=self._update_thumbnail_callback,
                 on_all_completed=on_all_completed,  # 完了時コールバックを追加
                 thumbnail_size=QSize(64, 64),
-                current_directory=self.archive_manager.current_directory  # 現在のディレクトリ情報を追加
+                current_directory=self.archive_manager.current_directory,  # 現在のディレクトリ情報を追加
+                priority_files=self._visible_file_names()  # 表示中のファイルから生成する
             )
             
             if self.debug_mode:
@@ -320,6 +331,36 @@ class FileListView(QListView):
             log_print(ERROR, f"サムネイル生成の開始中にエラーが発生しました: {e}")
             self._thumbnail_generation_active = False
     
+    def _visible_file_names(self) -> List[str]:
+        """
+        表示中のファイル名を取得（表示範囲の次の1画面分も含む）
+        
+        Returns:
+            List[str]: 表示中のファイル名のリスト（表示順）
+        """
+        area = self.viewport().rect()
+        area = area.adjusted(0, 0, 0, area.height())
+        names = []
+        for row in range(self.model().rowCount()):
+            index = self.model().index(row, 0)
+            
+            # ディレクトリはスキップ
+            if self.model().data(index, Qt.UserRole + 1):
+                continue
+            
+            if self.visualRect(index).intersects(area):
+                names.append(self.model().itemFromIndex(index).text())
+        return names
+    
+    def _prioritize_visible_thumbnails(self):
+        """スクロール後に表示中のファイルのサムネイルを優先して生成する"""
+        if not self._thumbnail_generation_active:
+            return
+        names = self._visible_file_names()
+        if self.debug_mode:
+            log_print(DEBUG, f"表示中の {len(names)} ファイルのサムネイルを優先します")
+        self.thumbnail_generator.prioritize(names)
+    
     def _update_thumbnail_callback(self, filename: str, icon: QIcon):
         """
         サムネイル更新のコールバック
@@ -6,13 +6,15 @@
 
 import os
 from typing import Optional, Dict, List, Tuple, Any
-from PySide6.QtWidgets import QScrollArea, QLabel, QSizePolicy, QFrame
+from PySide6.QtWidgets import QScrollArea, QSizePolicy, QFrame
 from PySide6.QtCore import Qt, QSize, QMetaObject, Signal, Slot, QObject
 from PySide6.QtGui import QPixmap, QResizeEvent
 from logutils import log_print, INFO, WARNING, ERROR, DEBUG
 
 # 画像モデルをインポート
 from .image_model import ImageModel
+# タイル表示対応の画像ラベル
+from .tiled_label import TiledImageLabel
 
 
 class ImageScrollArea(QScrollArea):
@@ -26,8 +28,8 @@ class ImageScrollArea(QScrollArea):
         # 背景色を黒に設定
         self.setStyleSheet("background-color: black;")
         
-        # 画像ラベルの作成
-        self.image_label = QLabel("画像が読み込まれていません")
+        # 画像ラベルの作成（大きな画像はタイルで表示する）
+        self.image_label = TiledImageLabel("画像が読み込まれていません")
         self.image_label.setAlignment(Qt.AlignCenter)
         self.image_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.image_label.setStyleSheet("color: white; background-color: black; font-size: 14px;")  # テキスト色を白に設定
@@ -46,6 +48,10 @@ class ImageScrollArea(QScrollArea):
         self._is_right_side = False  # 右側表示かどうかのフラグ
         self._is_dual_mode = False   # デュアルモードかどうかのフラグ
         
+        # タイル表示する大きな画像と、そのプレビューのピクスマップのキー
+        self._tiled_image = None
+        self._tiled_pixmap_key = None
+        
         # スクロールバーのポリシーを設定 (常に表示)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
@@ -61,6 +67,8 @@ class ImageScrollArea(QScrollArea):
     def reset_state(self):
         """内部状態をリセット"""
         self._current_pixmap = None
+        self._tiled_image = None
+        self._tiled_pixmap_key = None
         self._zoom_factor = 1.0
         self._fit_to_window = True  # デフォルトはウィンドウに合わせる
         self.image_label.setText("画像が読み込まれていません")
@@ -76,6 +84,32 @@ class ImageScrollArea(QScrollArea):
         if self._current_pixmap:
             self._adjust_image_size()
     
+    def set_tiled_image(self, tiled_image, pixmap: Optional[QPixmap]):
+        """
+        タイル表示する大きな画像を設定
+        
+        pixmapは画像のプレビュー。_current_pixmapがこのピクスマップの間だけタイル表示を使い、
+        超解像の結果などに差し替えられた場合は通常どおりピクスマップを表示する。
+        
+        Args:
+            tiled_image: タイル表示する画像（decoder.tiled.TiledImage）。Noneなら解除
+            pixmap: 画像のプレビューのピクスマップ
+        """
+        if tiled_image is None or pixmap is None:
+            self._tiled_image = None
+            self._tiled_pixmap_key = None
+            return
+        self._tiled_image = tiled_image
+        self._tiled_pixmap_key = pixmap.cacheKey()
+    
+    def _active_tiled_image(self):
+        """表示中のピクスマップに対応するタイル表示の画像（なければNone）"""
+        if self._tiled_image is None or not self._current_pixmap:
+            return None
+        if self._current_pixmap.cacheKey() != self._tiled_pixmap_key:
+            return None
+        return self._tiled_image
+    
     def set_pixmap(self, pixmap: QPixmap):
         """画像を設定"""
         if pixmap is None:
@@ -139,6 +173,11 @@ class ImageScrollArea(QScrollArea):
             
                 # 画像のサイズを取得
                 img_size = latest_pixmap.size()
+                
+                # タイル表示の画像は、元の解像度のサイズに対する倍率で表示サイズを決める
+                tiled_image = self._active_tiled_image()
+                if tiled_image is not None:
+                    img_size = QSize(tiled_image.width, tiled_image.height)
             
                 if self._fit_to_window:
                     # スクロールバーを一時的に無効化してちらつきを防止
@@ -147,8 +186,14 @@ class ImageScrollArea(QScrollArea):
                     self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
                     self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
                 
+                    # ウィンドウに合わせたときの倍率
+                    fit_scale = min(viewport_size.width() / img_size.width(),
+                                    viewport_size.height() / img_size.height())
+                    use_tiles = tiled_image is not None and tiled_image.needs_tiles(fit_scale)
+                    
                     # スケーリングされた画像を作成 - 最新のpixmapを使用
-                    scaled_pixmap = latest_pixmap.scaled(
+                    # （プレビューの解像度では足りないタイル表示の画像はタイルで描画する）
+                    scaled_pixmap = None if use_tiles else latest_pixmap.scaled(
                         viewport_size.width(), viewport_size.height(),
                         Qt.KeepAspectRatio,
                         Qt.SmoothTransformation
@@ -157,8 +202,8 @@ class ImageScrollArea(QScrollArea):
                     # デュアルモードの場合、左右の画像をそれぞれの側に寄せる
                     if self._is_dual_mode:
                         # スケーリング後のサイズを取得
-                        scaled_width = scaled_pixmap.width()
-                        scaled_height = scaled_pixmap.height()
+                        scaled_width = int(img_size.width() * fit_scale) if use_tiles else scaled_pixmap.width()
+                        scaled_height = int(img_size.height() * fit_scale) if use_tiles else scaled_pixmap.height()
                     
                         # 必ず出力されるようにログレベルをINFOに上げる
                         log_print(INFO, f"デュアル配置: スケーリングサイズ={scaled_width}x{scaled_height}, dual={self._is_dual_mode}, right={self._is_right_side}")
@@ -178,8 +223,11 @@ class ImageScrollArea(QScrollArea):
                         self.image_label.setAlignment(Qt.AlignCenter)
                 
                     # スケーリングされた画像を設定
-                    self.image_label.setPixmap(scaled_pixmap)
-                    log_print(DEBUG, f"スケーリングされた画像を設定: {scaled_pixmap.width()}x{scaled_pixmap.height()}")
+                    if use_tiles:
+                        self.image_label.show_tiled(tiled_image, latest_pixmap, fit_scale)
+                    else:
+                        self.image_label.setPixmap(scaled_pixmap)
+                        log_print(DEBUG, f"スケーリングされた画像を設定: {scaled_pixmap.width()}x{scaled_pixmap.height()}")
                 
                     # スクロールエリアの内容を明示的に更新
                
@@ -195,7 +243,9 @@ class ImageScrollArea(QScrollArea):
                 scaled_height = int(img_size.height() * self._zoom_factor)
             
                 # スケーリングされた画像を作成 - 最新のpixmapを使用
-                scaled_pixmap = latest_pixmap.scaled(
+                # （プレビューの解像度では足りないタイル表示の画像は、画像全体を拡大せずにタイルで描画する）
+                use_tiles = tiled_image is not None and tiled_image.needs_tiles(self._zoom_factor)
+                scaled_pixmap = None if use_tiles else latest_pixmap.scaled(
                     scaled_width, scaled_height, 
                     Qt.KeepAspectRatio, 
                     Qt.SmoothTransformation
@@ -216,10 +266,13 @@ class ImageScrollArea(QScrollArea):
             
                 # 原寸大表示の場合は、ビューポートサイズに関係なく、そのまま表示
                 # この修正により、原寸大表示が正しく機能するようになる
-                self.image_label.setPixmap(scaled_pixmap)
+                if use_tiles:
+                    self.image_label.show_tiled(tiled_image, latest_pixmap, self._zoom_factor)
+                else:
+                    self.image_label.setPixmap(scaled_pixmap)
             
                 # スクロールエリアの内容を明示的に更新
-                self.image_label.resize(scaled_pixmap.size())
+                self.image_label.resize(QSize(scaled_width, scaled_height) if use_tiles else scaled_pixmap.size())
                 self.image_label.adjustSize()
                 log_print(DEBUG, f"原寸大表示: ラベルサイズ={self.image_label.size().width()}x{self.image_label.size().height()}")
                 self.widget().update()
@@ -443,6 +496,7 @@ class DisplayHandler:
                 if pixmap:
                     # pixmapを設定
                     self._image_areas[0]._current_pixmap = pixmap
+                    self._apply_tiled_image(self._image_areas[0], 0, pixmap)
                     
                     # 表示モードに応じて適切なメソッドを呼び出し
                     if current_fit_mode:
@@ -488,6 +542,7 @@ class DisplayHandler:
                 if pixmap:
                     # pixmapを設定
                     self._image_areas[1]._current_pixmap = pixmap
+                    self._apply_tiled_image(self._image_areas[1], 1, pixmap)
                     
                     # 表示モードに応じて適切なメソッドを呼び出し
                     if current_fit_mode:
@@ -503,6 +558,18 @@ class DisplayHandler:
                     self._image_areas[1].image_label.setStyleSheet("color: white; background-color: black; font-size: 14px;")
                     self._image_areas[1].image_label.setPixmap(QPixmap())  # 空のピクスマップを明示的にセット
 
+    def _apply_tiled_image(self, area: ImageScrollArea, index: int, pixmap: QPixmap):
+        """
+        画像モデルの情報にタイル表示の画像があれば画像エリアに設定する
+        
+        Args:
+            area: 画像エリア
+            index: 画像のインデックス
+            pixmap: 画像エリアに設定したピクスマップ
+        """
+        info = self._image_model.get_info(index) if self._image_model else {}
+        area.set_tiled_image((info or {}).get('tiled_image'), pixmap)
+
     def set_image(self, pixmap: QPixmap, data: bytes, numpy_array: Any, info: Dict, path: str, index: int = 0):
         """
         画像情報をセット
@@ -552,6 +619,7 @@ class DisplayHandler:
         
         # 画像エリアの内部状態を更新
         self._image_areas[index]._current_pixmap = pixmap
+        self._image_areas[index].set_tiled_image((info or {}).get('tiled_image'), pixmap)
         self._image_areas[index]._fit_to_window = current_fit_mode
         self._image_areas[index]._zoom_factor = current_zoom
         
@@ -1214,6 +1282,7 @@ class DisplayHandler:
                 try:
                     # ピクスマップを更新
                     area._current_pixmap = pixmap
+                    self._apply_tiled_image(area, index, pixmap)
                     
                     # 設定を更新
                     area._fit_to_window = fit_to_window
@@ -24,11 +24,16 @@ except ImportError:
     sys.exit(1)
 
 # 内部モジュールをインポート
-from .image_processor import load_image_from_bytes, format_image_info
+from .image_processor import (
+    load_image_from_bytes, format_image_info, array_to_pixmap, image_to_pixmap, make_archive_image_key,
+)
+# 非同期読み込み
+from .image_loader import AsyncImageLoader, LoadResult
 # 画像モデルをインポート
 from .image_model import ImageModel
 # 直接decoderモジュールからインポート
-from decoder.interface import get_supported_image_extensions
+from decoder.interface import get_supported_image_extensions, select_image_decoder
+from decoder.decoder import to_rgb_array
 
 
 class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェクトライフサイクルを管理
@@ -66,6 +71,20 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
         # 現在の画像パス（インデックスごと）を保存するディクショナリを追加
         self._current_image_paths = {0: None, 1: None}
         
+        # アニメーションGIFの再生状態（インデックスごと）
+        # {'stream': GIFFrameStream, 'timer': QTimer, 'frame': 表示中のフレーム番号, 'plays': 再生回数, 'path': パス}
+        self._animations = {0: None, 1: None}
+        
+        # ページ先読みへの参照（初期はNone）
+        self.prefetcher = None
+        
+        # 画像の非同期読み込み（書庫からの取り出しとデコードはワーカースレッドで行う）
+        self.loader = AsyncImageLoader(archive_manager, self)
+        self.loader.loaded.connect(self._on_async_images_loaded)
+        # 読み込み中の画像 {index: path} と、先に用意できた画像 {index: LoadResult}（どちらも最新の要求の分だけ）
+        self._loading = {}
+        self._ready = {}
+        
         log_print(DEBUG, f"ImageHandler: 初期化完了 (モデル参照: {self.image_model is not None})")
     
     def load_image_from_path(self, path: str, index: int = 0, use_browser_path: bool = False) -> bool:
@@ -90,6 +109,9 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
             log_print(ERROR, f"無効なインデックス: {index} (0または1のみ有効)")
             return False
         
+        # 表示中のアニメーションを止める
+        self.stop_animation(index)
+        
         try:
             # 新しい画像読み込み時には、まず過去のエラー情報をクリアする
             if self.image_model:
@@ -121,9 +143,19 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
                 # エラーが発生したので超解像処理は行わない
                 return False
             
+            # 先読み済みのページがあれば、取り出しとデコードを省略する
+            prefetched = None
+            if use_browser_path and self.prefetcher:
+                prefetched = self.prefetcher.get(path)
+                if prefetched is not None and prefetched.pixmap is None:
+                    prefetched = None
+            
             # パスの解釈に基づいて適切なメソッドで画像データを取得
             try:
-                if use_browser_path:
+                if prefetched is not None:
+                    log_print(INFO, f"先読み済みの画像を使用: {path}")
+                    image_data = prefetched.data
+                elif use_browser_path:
                     log_print(INFO, f"ブラウザパスから画像を読み込み中: {path}")
                     image_data = self.archive_manager.extract_file(path)
                 else:
@@ -150,7 +182,8 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
                 # エラーが発生したので超解像処理は行わない
                 return False
             
-            if not image_data:
+            # ストリームからデコードした先読み済みのページは画像データを持たない
+            if prefetched is None and not image_data:
                 log_print(ERROR, f"画像データの読み込みに失敗しました: {path}")
                 self._show_status_message(f"画像データの読み込みに失敗しました: {path}")
                 
@@ -172,7 +205,11 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
             
             # 画像処理モジュールを使用して画像を読み込み
             try:
-                pixmap, numpy_array, info = load_image_from_bytes(image_data, path)
+                if prefetched is not None:
+                    pixmap, numpy_array, info = prefetched.pixmap, prefetched.numpy_array, dict(prefetched.info)
+                else:
+                    pixmap, numpy_array, info = load_image_from_bytes(
+                        image_data, path, cache_key=make_archive_image_key(self.archive_manager, path))
             except ValueError as e:
                 log_print(ERROR, f"画像のデコードに失敗しました: {e}")
                 self._show_status_message(f"画像のデコードエラー: {str(e)}")
@@ -214,47 +251,8 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
                 # エラーが発生したので超解像処理は行わない
                 return False
             
-            # 画像モデルに画像情報を設定
-            if self.image_model:
-                # 画像モデルに情報を設定（内部でmodifiedとdisplay_update_neededフラグが立つ）
-                self.image_model.set_image(index, pixmap, image_data, numpy_array, info, path)
-                
-                # 現在のパスを保存（後で整合性チェックに使用）
-                self._current_image_paths[index] = path
-                
-                # 画像モデルにもパス情報を保存
-                if self.image_model:
-                    self.image_model.set_image_property(index, 'path', path)
-                
-                # 既存の超解像リクエストがあればキャンセル
-                if self.sr_manager and self.image_model.has_sr_request(index):
-                    old_request_id = self.image_model.get_sr_request(index)
-                    if old_request_id:
-                        self.sr_manager.cancel_superres(old_request_id)
-                        log_print(DEBUG, f"既存の超解像リクエスト {old_request_id} をキャンセルしました")
-                
-                # エラーがないことを確認してから自動超解像処理をスケジュール
-                if self.sr_manager and numpy_array is not None and self.sr_manager.auto_process:
-                    # エラー情報があるか確認
-                    if not self.image_model.has_error(index):
-                        # 既に実行中のタイマーをキャンセル
-                        if self.sr_delay_timer.isActive():
-                            self.sr_delay_timer.stop()
-                        # 遅延リクエストを登録
-                        self._schedule_delayed_superres(index, path)
-                    else:
-                        log_print(INFO, f"インデックス {index} にエラーが発生しているため、自動超解像処理をスキップします")
-                
-                # 親ウィンドウに表示更新が必要なことを通知
-                if self.parent_widget and hasattr(self.parent_widget, '_refresh_display_after_load'):
-                    # MVCパターンに従い、親に通知するだけで表示層に直接介入しない
-                    self.parent_widget._refresh_display_after_load(index)
-                    log_print(DEBUG, f"画像読み込み後に更新を通知: index={index}, path={os.path.basename(path)}")
-            
-            # 画像情報をステータスバーに表示
-            status_msg = self.get_status_info()
-            if status_msg:
-                self._show_status_message(status_msg)
+            # 画像モデルに設定して表示を更新
+            self._apply_loaded_image(index, path, image_data, pixmap, numpy_array, info)
             
             return True
             
@@ -282,6 +280,205 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
             # エラーが発生したので超解像処理は行わない
             return False
     
+    def _apply_loaded_image(self, index: int, path: str, image_data: bytes, pixmap: QPixmap,
+                            numpy_array, info: Dict[str, Any]):
+        """
+        読み込んだ画像を画像モデルに設定し、アニメーションと超解像処理を開始して表示の更新を通知する
+        
+        Args:
+            index: 画像を表示するインデックス
+            path: 画像ファイルパス
+            image_data: 画像データのバイト列
+            pixmap: 表示用のQPixmap
+            numpy_array: デコードされた画像配列
+            info: メタデータ情報
+        """
+        # 画像モデルに画像情報を設定
+        if self.image_model:
+            # 画像モデルに情報を設定（内部でmodifiedとdisplay_update_neededフラグが立つ）
+            self.image_model.set_image(index, pixmap, image_data, numpy_array, info, path)
+            
+            # 現在のパスを保存（後で整合性チェックに使用）
+            self._current_image_paths[index] = path
+            
+            # 画像モデルにもパス情報を保存
+            if self.image_model:
+                self.image_model.set_image_property(index, 'path', path)
+            
+            # アニメーションGIFなら再生を開始
+            self._start_animation(index, path, image_data)
+            
+            # 既存の超解像リクエストがあればキャンセル
+            if self.sr_manager and self.image_model.has_sr_request(index):
+                old_request_id = self.image_model.get_sr_request(index)
+                if old_request_id:
+                    self.sr_manager.cancel_superres(old_request_id)
+                    log_print(DEBUG, f"既存の超解像リクエスト {old_request_id} をキャンセルしました")
+            
+            # エラーがないことを確認してから自動超解像処理をスケジュール
+            if self.sr_manager and numpy_array is not None and self.sr_manager.auto_process:
+                # エラー情報があるか確認
+                if not self.image_model.has_error(index):
+                    # 既に実行中のタイマーをキャンセル
+                    if self.sr_delay_timer.isActive():
+                        self.sr_delay_timer.stop()
+                    # 遅延リクエストを登録
+                    self._schedule_delayed_superres(index, path)
+                else:
+                    log_print(INFO, f"インデックス {index} にエラーが発生しているため、自動超解像処理をスキップします")
+            
+            # 親ウィンドウに表示更新が必要なことを通知
+            if self.parent_widget and hasattr(self.parent_widget, '_refresh_display_after_load'):
+                # MVCパターンに従い、親に通知するだけで表示層に直接介入しない
+                self.parent_widget._refresh_display_after_load(index)
+                log_print(DEBUG, f"画像読み込み後に更新を通知: index={index}, path={os.path.basename(path)}")
+        
+        # 画像情報をステータスバーに表示
+        status_msg = self.get_status_info()
+        if status_msg:
+            self._show_status_message(status_msg)
+    
+    def request_images_from_browser(self, pages: List[Tuple[int, str]]) -> int:
+        """
+        ブラウザパスの画像を非同期で読み込む
+        
+        先読み済みの画像はそのまま使い、残りは書庫からの取り出しとデコードをワーカースレッドで行う。
+        要求した画像がすべてそろってから、まとめて画像モデルに設定する（見開きの片方だけが
+        先に切り替わらないようにする）。画像ごとに親の _on_image_loaded(index, path, success) を、
+        最後に _on_images_loaded() を呼ぶ。前回の要求で読み込み中の画像は取り消す。
+        
+        Args:
+            pages: (表示するインデックス, ブラウザパス) のリスト
+            
+        Returns:
+            非同期で読み込む画像の数（0ならすべて表示済み）
+        """
+        if not self.archive_manager:
+            log_print(ERROR, "アーカイブマネージャが設定されていません")
+            self._show_status_message("エラー: アーカイブマネージャが設定されていません")
+            return 0
+        
+        ready = {}
+        remaining = []
+        for index, path in pages:
+            # 拡張子チェック - すべて小文字化して比較
+            _, ext = os.path.splitext(path.lower())
+            if ext not in [e.lower() for e in self.SUPPORTED_EXTENSIONS]:
+                ready[index] = LoadResult(path, error_type='format_error',
+                                          message=f"サポートされていない画像形式です: {ext}")
+                continue
+            
+            # 先読み済みならそのまま使う（ワーカーが処理中なら待たずに非同期で読み込む）
+            prefetched = self.prefetcher.get(path, wait=False) if self.prefetcher else None
+            if prefetched is not None and prefetched.pixmap is not None:
+                log_print(INFO, f"先読み済みの画像を使用: {path}")
+                ready[index] = LoadResult(path, prefetched.data, prefetched.numpy_array, dict(prefetched.info),
+                                          pixmap=prefetched.pixmap)
+                continue
+            
+            remaining.append((index, path))
+        
+        # 残りを要求する（空でも要求して、前回の読み込みを取り消す）
+        self._ready = ready
+        self._loading = dict(remaining)
+        self.loader.request(remaining)
+        if not remaining:
+            self._apply_load_results({})
+        return len(remaining)
+    
+    def cancel_loading(self):
+        """非同期で読み込み中の画像をすべて取り消す"""
+        self._ready = {}
+        self._loading = {}
+        self.loader.cancel()
+    
+    def stop_loading(self):
+        """非同期読み込みを止める（ウィンドウを閉じるときに呼ぶ）"""
+        self._ready = {}
+        self._loading = {}
+        self.loader.stop()
+    
+    def is_loading(self) -> bool:
+        """非同期で読み込み中の画像があるかどうか"""
+        return bool(self._loading)
+    
+    def _on_async_images_loaded(self, generation: int, results: Dict[int, LoadResult]):
+        """ワーカースレッドで読み込みが終わった画像を表示する（GUIスレッド）"""
+        if not self.loader.is_current(generation) or set(results) != set(self._loading):
+            log_print(DEBUG, f"古い読み込み結果を破棄: 世代={generation}")
+            return
+        self._loading = {}
+        self._apply_load_results(results)
+    
+    def _apply_load_results(self, results: Dict[int, LoadResult]):
+        """
+        要求した画像（先読み済みのものと非同期で読み込んだもの）をまとめて画像モデルに設定する
+        
+        Args:
+            results: 非同期で読み込んだ結果 {インデックス: LoadResult}
+        """
+        loaded = dict(self._ready)
+        loaded.update(results)
+        self._ready = {}
+        
+        for index in sorted(loaded):
+            result = loaded[index]
+            pixmap = result.pixmap
+            
+            if self.image_model:
+                self.image_model.clear_error_info(index)
+            self.stop_animation(index)
+            
+            if result.error_type is None and pixmap is None:
+                try:
+                    pixmap = image_to_pixmap(result.numpy_array, result.info)
+                except Exception as e:
+                    log_print(ERROR, f"画像の表示に失敗しました: {result.path}: {e}")
+                    result = result._replace(error_type='display_error', message="画像の表示に失敗しました")
+            
+            if result.error_type is not None:
+                self._report_load_error(index, result.path, result.error_type, result.message)
+                self._notify_image_loaded(index, result.path, False)
+            else:
+                self._apply_loaded_image(index, result.path, result.data, pixmap, result.numpy_array, result.info)
+                self._notify_image_loaded(index, result.path, True)
+        
+        self._notify_images_loaded()
+    
+    def _report_load_error(self, index: int, path: str, error_type: str, message: str):
+        """
+        読み込みエラーをステータスバーに表示し、画像モデルに保存して表示の更新を通知する
+        
+        Args:
+            index: 画像のインデックス
+            path: 画像ファイルパス
+            error_type: エラーの種類（'format_error', 'io_error' など）
+            message: エラーメッセージ
+        """
+        log_print(ERROR, f"{message}: {path}")
+        self._show_status_message(message)
+        
+        if self.image_model:
+            self.image_model.set_error_info(index, {
+                'type': error_type,
+                'message': message,
+                'path': path
+            })
+            
+            # 親ウィンドウに表示更新が必要なことを通知
+            if self.parent_widget and hasattr(self.parent_widget, '_refresh_display_after_load'):
+                self.parent_widget._refresh_display_after_load(index)
+    
+    def _notify_image_loaded(self, index: int, path: str, success: bool):
+        """非同期読み込みで1枚の画像の処理が終わったことを親に通知する"""
+        if self.parent_widget and hasattr(self.parent_widget, '_on_image_loaded'):
+            self.parent_widget._on_image_loaded(index, path, success)
+    
+    def _notify_images_loaded(self):
+        """非同期読み込みで要求した画像がすべてそろったことを親に通知する"""
+        if self.parent_widget and hasattr(self.parent_widget, '_on_images_loaded'):
+            self.parent_widget._on_images_loaded()
+    
     def _schedule_delayed_superres(self, index: int, path: str):
         """超解像処理リクエストを遅延スケジュールする"""
         # エラーがある場合は超解像処理をスケジュールしない
@@ -340,6 +537,9 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
             log_print(ERROR, f"無効なインデックス: {index}")
             return
         
+        # 表示中のアニメーションを止める
+        self.stop_animation(index)
+        
         # モデル内の画像情報をクリア
         if self.image_model:
             self.image_model.clear_image(index)
@@ -348,6 +548,98 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
             if self.parent_widget and hasattr(self.parent_widget, '_refresh_display_after_load'):
                 self.parent_widget._refresh_display_after_load(index)
     
+    def _start_animation(self, index: int, path: str, image_data: bytes):
+        """
+        アニメーション画像（フレームストリームに対応したデコーダーの画像）であれば再生を開始する
+        
+        フレームは表示するたびに1枚ずつデコードし、すべてのフレームを展開しない。
+        
+        Args:
+            index: 画像のインデックス
+            path: 画像のパス
+            image_data: 画像データ
+        """
+        decoder = select_image_decoder(path, image_data)
+        if not hasattr(decoder, 'open_frames'):
+            return
+        
+        try:
+            stream = decoder.open_frames(image_data)
+            if not stream.is_animated:
+                stream.close()
+                return
+            duration = stream.get_frame(0).duration
+        except Exception as e:
+            log_print(WARNING, f"アニメーションGIFを開けませんでした: {e}")
+            return
+        
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.timeout.connect(lambda: self._advance_animation(index))
+        self._animations[index] = {'stream': stream, 'timer': timer, 'frame': 0, 'plays': 0, 'path': path}
+        timer.start(duration)
+        log_print(INFO, f"アニメーションGIFの再生を開始: {os.path.basename(path)} ({stream.frame_count}フレーム)")
+    
+    def _advance_animation(self, index: int):
+        """
+        アニメーションを次のフレームに進める
+        
+        Args:
+            index: 画像のインデックス
+        """
+        state = self._animations.get(index)
+        if not state or not self.image_model:
+            return
+        
+        # 別の画像に切り替わっていたら止める
+        if self.image_model.get_image_property(index, 'path') != state['path'] or self.image_model.has_error(index):
+            self.stop_animation(index)
+            return
+        
+        stream = state['stream']
+        next_frame = state['frame'] + 1
+        if next_frame >= stream.frame_count:
+            # ループ回数の指定がなければ1回、0なら無限に再生する
+            # （NETSCAPE拡張のループ回数は繰り返す回数なので、最初の再生と合わせて loop + 1 回再生する）
+            state['plays'] += 1
+            if stream.loop is None or (stream.loop != 0 and state['plays'] > stream.loop):
+                self.stop_animation(index)
+                return
+            next_frame = 0
+        
+        try:
+            frame = stream.get_frame(next_frame)
+        except Exception as e:
+            log_print(WARNING, f"アニメーションGIFのフレーム {next_frame} を読み込めませんでした: {e}")
+            self.stop_animation(index)
+            return
+        
+        pixmap = array_to_pixmap(frame.image)
+        if pixmap is None or not self.image_model.set_frame_pixmap(index, pixmap):
+            # 画像がクリアされた場合など
+            self.stop_animation(index)
+            return
+        state['frame'] = next_frame
+        if self.parent_widget and hasattr(self.parent_widget, '_refresh_display_after_frame'):
+            self.parent_widget._refresh_display_after_frame(index)
+        state['timer'].start(frame.duration)
+    
+    def stop_animation(self, index: int):
+        """
+        アニメーションの再生を止める
+        
+        Args:
+            index: 画像のインデックス
+        """
+        state = self._animations.get(index)
+        if not state:
+            return
+        self._animations[index] = None
+        state['timer'].stop()
+        state['timer'].deleteLater()
+        state['stream'].close()
+        log_print(DEBUG, f"インデックス {index} のアニメーションを停止しました")
+    
     def get_image_info(self, index: int) -> Dict[str, Any]:
         """
         指定されたインデックスの画像情報を取得
@@ -386,6 +678,7 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
             archive_manager: 画像データを取得するためのアーカイブマネージャ
         """
         self.archive_manager = archive_manager
+        self.loader.archive_manager = archive_manager
         log_print(INFO, "アーカイブマネージャを設定しました")
     
     def set_image_model(self, image_model: ImageModel):
@@ -398,7 +691,17 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
         self.image_model = image_model
         log_print(INFO, "画像モデルを設定しました")
         # 初期化段階では画像はないため、表示更新通知は不要
-    
+
+    def set_prefetcher(self, prefetcher):
+        """
+        ページ先読みを設定
+
+        Args:
+            prefetcher: ページを先読みするオブジェクト（PagePrefetcher）。Noneなら先読みを使わない
+        """
+        self.prefetcher = prefetcher
+        log_print(INFO, "ページ先読みを設定しました")
+
     def is_image_loaded(self, index: int) -> bool:
         """
         指定されたインデックスに画像が読み込まれているかを確認
@@ -524,7 +827,7 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
             return False
             
         # NumPy配列形式の画像データを取得
-        _, _, numpy_array, _, path = self.image_model.get_image(index)
+        _, _, numpy_array, info, path = self.image_model.get_image(index)
         
         if numpy_array is None:
             log_print(ERROR, f"画像データが無効です: {path}")
@@ -577,8 +880,9 @@ class ImageHandler(QObject):  # QObjectを継承して明示的にオブジェ
                     import traceback
                     log_print(DEBUG, traceback.format_exc())
             
-            # 超解像処理をリクエスト
-            request_id = self.sr_manager.add_image_to_superres(numpy_array, _internal_callback)
+            # 超解像処理をリクエスト（表示用の画素形式の配列はRGB(A)に変換して渡す）
+            rgb_array = to_rgb_array(numpy_array, (info or {}).get('pixel_format'))
+            request_id = self.sr_manager.add_image_to_superres(rgb_array, _internal_callback)
             
             # リクエストIDをモデルに保存
             self.image_model.set_sr_request(index, request_id)
@@ -0,0 +1,230 @@
+"""
+画像の非同期読み込みモジュール
+
+書庫からの取り出しとデコードをワーカースレッドで行い、結果をシグナルでGUIスレッドに返す。
+新しい要求が来ると、まだ処理していない古い要求は捨てる（キーリピートで連続してページを
+めくったときに、途中のページを読み込まずに最後のページだけを読み込む）。
+
+1回の要求で複数の画像（見開きの2ページ）を読み込む場合は、同じ書庫の画像をまとめて取り出し、
+取り出せた画像から並列にデコードする。結果はすべてそろってから1回で通知する。
+PNGは取り出さずに、書庫のストリームから展開しながらデコードする（画像データ全体をメモリに読み込まない）。
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from logutils import log_print, INFO, WARNING, DEBUG
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QPixmap
+
+from .image_processor import (
+    decode_image_from_bytes, decode_image_from_archive, can_decode_from_stream, make_archive_image_key,
+)
+
+# デコードを並列に行うスレッド数（見開きの2ページを同時にデコードする）
+DEFAULT_DECODE_WORKERS = 2
+
+
+class LoadResult(NamedTuple):
+    """1枚の画像の読み込み結果"""
+
+    path: str
+    data: Optional[bytes] = None  # 画像データ
+    numpy_array: Optional[np.ndarray] = None  # デコード結果
+    info: Optional[Dict] = None  # メタデータ情報
+    error_type: Optional[str] = None  # 失敗した場合のエラーの種類（'io_error' など）
+    message: str = ""  # 失敗した場合のメッセージ
+    pixmap: Optional[QPixmap] = None  # 作成済みのQPixmap（先読み済みの画像。GUIスレッドで作ったもの）
+
+
+class _LoaderSignals(QObject):
+    """ワーカースレッドからGUIスレッドへ通知するシグナル"""
+
+    # (世代, {インデックス: LoadResult})
+    loaded = Signal(int, object)
+
+
+class AsyncImageLoader(QObject):
+    """
+    画像を非同期で読み込むクラス
+
+    request のたびに世代を1つ進め、それより前の世代の要求は取り消す。ワーカーは書庫からの取り出しと
+    デコードの間でも世代を確認し、取り消された要求の結果は通知しない。
+    QPixmapの作成は通知を受け取ったGUIスレッドで行う。
+    """
+
+    def __init__(self, archive_manager, parent=None, decode_workers: int = DEFAULT_DECODE_WORKERS):
+        """
+        非同期読み込みの初期化
+
+        Args:
+            archive_manager: 画像データを取得するためのアーカイブマネージャ
+                （extract_file を使い、extract_files があれば複数の画像をまとめて取り出す）
+            parent: 親オブジェクト
+            decode_workers: デコードを並列に行うスレッド数
+        """
+        super().__init__(parent)
+        self.archive_manager = archive_manager
+
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending: List[Tuple[int, str]] = []  # (インデックス, パス)
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="ImageDecode")
+
+        # シグナルはGUIスレッドのオブジェクトから発行する（接続先はキュー経由で呼ばれる）
+        self._signals = _LoaderSignals()
+        self.loaded = self._signals.loaded
+
+    @property
+    def generation(self) -> int:
+        """最新の要求の世代"""
+        return self._generation
+
+    def request(self, pages: List[Tuple[int, str]]) -> int:
+        """
+        ブラウザパスの画像の読み込みを要求する（まだ処理していない以前の要求は取り消す）
+
+        Args:
+            pages: (表示するインデックス, ブラウザパス) のリスト
+
+        Returns:
+            要求の世代（通知に含まれる世代と比べて、最新の要求の結果かどうかを判断する）
+        """
+        with self._cond:
+            self._generation += 1
+            self._pending = list(pages)
+            if self._pending and self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name="AsyncImageLoader", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            log_print(DEBUG, f"画像の非同期読み込みを要求: 世代={self._generation}, {[path for _, path in pages]}")
+            return self._generation
+
+    def cancel(self):
+        """読み込み中と未処理の要求をすべて取り消す"""
+        with self._cond:
+            self._generation += 1
+            self._pending = []
+
+    def is_current(self, generation: int) -> bool:
+        """指定した世代が最新の要求かどうか"""
+        return generation == self._generation
+
+    def stop(self):
+        """読み込みを止める（処理中の画像は読み終えてから止まる）"""
+        with self._cond:
+            self._stopped = True
+            self._generation += 1
+            self._pending = []
+            self._cond.notify_all()
+        self._executor.shutdown(wait=False)
+
+    def _next_request(self) -> Optional[Tuple[int, List[Tuple[int, str]]]]:
+        """次の要求を取り出す（なければ要求が来るまで待つ。停止したらNone）"""
+        with self._cond:
+            while not self._stopped and not self._pending:
+                self._cond.wait()
+            if self._stopped:
+                return None
+            pages, self._pending = self._pending, []
+            return self._generation, pages
+
+    def _extract(self, paths: List[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        画像データを取り出す（取り出せたものから順に返す）
+
+        複数の画像は extract_files でまとめて取り出す（同じ書庫なら書庫を開くのは1回になる）。
+        """
+        if len(paths) > 1 and hasattr(self.archive_manager, 'extract_files'):
+            yield from self.archive_manager.extract_files(paths)
+        else:
+            for path in paths:
+                yield path, self.archive_manager.extract_file(path)
+
+    def _decode(self, generation: int, path: str, data: Optional[bytes]) -> Optional[LoadResult]:
+        """画像データをデコードする（デコード用のスレッドで呼ばれる。取り消された場合はNone）"""
+        if not self.is_current(generation):
+            return None
+        if not data:
+            return LoadResult(path, error_type='empty_data', message="画像データの読み込みに失敗しました")
+        numpy_array, info = decode_image_from_bytes(data, path, cache_key=make_archive_image_key(self.archive_manager, path))
+        if numpy_array is None:
+            return LoadResult(path, data, error_type='decode_error', message=f"画像のデコードに失敗しました: {path}")
+        return LoadResult(path, data, numpy_array, info)
+
+    def _decode_stream(self, generation: int, path: str) -> Optional[LoadResult]:
+        """書庫のストリームから展開しながらデコードする（デコード用のスレッドで呼ばれる。取り消された場合はNone）"""
+        if not self.is_current(generation):
+            return None
+        numpy_array, info, data = decode_image_from_archive(self.archive_manager, path)
+        if numpy_array is None:
+            return LoadResult(path, data, error_type='decode_error', message=f"画像のデコードに失敗しました: {path}")
+        return LoadResult(path, data, numpy_array, info)
+
+    def _load(self, generation: int, pages: List[Tuple[int, str]]) -> Optional[Dict[int, LoadResult]]:
+        """
+        要求された画像を読み込む（取り消された場合はNone）
+
+        取り出しはワーカースレッドで行い、取り出せた画像から順にデコード用のスレッドに渡す
+        （2ページ目を取り出している間に1ページ目のデコードが進む）。
+        ストリームからデコードする画像は取り出さずに、そのままデコード用のスレッドに渡す。
+        """
+        futures: Dict[str, Future] = {}
+        error: Optional[LoadResult] = None
+        try:
+            extract_paths = []
+            for _, path in pages:
+                if can_decode_from_stream(self.archive_manager, path):
+                    futures[path] = self._executor.submit(self._decode_stream, generation, path)
+                else:
+                    extract_paths.append(path)
+            for path, data in self._extract(extract_paths):
+                if not self.is_current(generation):
+                    break
+                futures[path] = self._executor.submit(self._decode, generation, path, data)
+        except IOError as e:
+            log_print(WARNING, f"画像ファイルの読み込みにIOエラーが発生しました: {e}")
+            error = LoadResult("", error_type='io_error', message=f"ファイル読み込みエラー: {e}")
+        except RuntimeError as e:
+            # 停止後にデコード用のスレッドへ渡そうとした場合
+            log_print(DEBUG, f"画像の読み込みを中断しました: {e}")
+            return None
+
+        results = {}
+        for index, path in pages:
+            future = futures.get(path)
+            if future is None:
+                result = (error._replace(path=path) if error is not None else
+                          LoadResult(path, error_type='empty_data', message="画像データの読み込みに失敗しました"))
+            else:
+                result = future.result()
+            if result is None or not self.is_current(generation):
+                return None
+            results[index] = result
+        return results
+
+    def _run(self):
+        """ワーカースレッドの処理"""
+        while True:
+            request = self._next_request()
+            if request is None:
+                break
+            generation, pages = request
+            try:
+                results = self._load(generation, pages)
+            except Exception as e:
+                log_print(WARNING, f"画像の非同期読み込みに失敗しました: {e}")
+                message = f"画像の読み込み中にエラーが発生しました: {e}"
+                results = {index: LoadResult(path, error_type='unknown_error', message=message)
+                           for index, path in pages}
+
+            if results is None or not self.is_current(generation):
+                log_print(DEBUG, f"取り消された読み込みを破棄: 世代={generation}")
+                continue
+            self._signals.loaded.emit(generation, results)
+        log_print(INFO, "画像の非同期読み込みを停止しました")
@@ -101,6 +101,9 @@ class ImageModel:
         # 書き込み時はインデックスの反転を行わない
         actual_index = index
         
+        # 置き換える画像のタイル表示用の配列を解放
+        self._release_tiled_image(actual_index, info)
+        
         # 画像設定時にエラー情報を明示的にクリア
         self._images[actual_index]['error'] = None
         
@@ -135,6 +138,8 @@ class ImageModel:
             actual_index = 1 - index  # 0は1に、1は0に反転
             log_print(DEBUG, f"RTLモードのため、インデックスを反転: {index} → {actual_index}")
         
+        self._release_tiled_image(actual_index)
+        
         self._images[actual_index]['pixmap'] = None
         self._images[actual_index]['data'] = None
         self._images[actual_index]['numpy_array'] = None
@@ -149,6 +154,24 @@ class ImageModel:
         log_print(DEBUG, f"ImageModel: インデックス {index} の画像をクリアしました")
         return True
     
+    def _release_tiled_image(self, actual_index: int, new_info: Optional[Dict] = None) -> None:
+        """
+        画像を置き換える・クリアするときに、タイル表示用の画像の元の解像度の配列を解放する
+        
+        同じ画像を設定し直す場合や、もう一方の画像として表示中の場合（見開きのずらしなど）は解放しない。
+        
+        Args:
+            actual_index: 置き換える・クリアする画像のインデックス
+            new_info: 新しく設定する画像の情報（クリアする場合はNone）
+        """
+        tiled_image = self._images[actual_index]['info'].get('tiled_image')
+        if tiled_image is None or (new_info or {}).get('tiled_image') is tiled_image:
+            return
+        if self._images[1 - actual_index]['info'].get('tiled_image') is tiled_image:
+            return
+        tiled_image.release()
+        log_print(DEBUG, f"ImageModel: タイル表示用の画像を解放しました - {self._images[actual_index]['path']}")
+    
     def get_image(self, index: int) -> Tuple[Optional[QPixmap], Optional[bytes], Any, Dict, str]:
         """
         指定インデックスの画像情報を取得
@@ -306,7 +329,9 @@ class ImageModel:
                     filename = os.path.basename(path) if path else "画像"
                     width = pixmap.width()
                     height = pixmap.height()
-                    size_kb = len(data) / 1024 if data else 0
+                    # ストリームからデコードした画像は画像データを持たないため、メタデータのサイズを使う
+                    file_size = len(data) if data else self._images[actual_index]['info'].get('file_size', 0)
+                    size_kb = file_size / 1024
                     
                     # NumPy情報があれば追加
                     numpy_array = self._images[actual_index]['numpy_array']
@@ -456,6 +481,8 @@ class ImageModel:
                 'channels': channels,
                 'superres': True,  # 超解像処理されたことを示すフラグ
             })
+            # 超解像の結果は画像全体のピクスマップで表示するため、タイル表示の画像は外す
+            info.pop('tiled_image', None)
 
             if not sr_array.flags['C_CONTIGUOUS']:
                 sr_array = np.ascontiguousarray(sr_array)
@@ -494,6 +521,33 @@ class ImageModel:
             log_print(ERROR, traceback.format_exc())
             return False
     
+    def set_frame_pixmap(self, index: int, pixmap: QPixmap) -> bool:
+        """
+        アニメーション画像の表示フレームを差し替える
+        
+        元の画像データや画像情報はそのままで、表示用のピクスマップだけを更新する。
+        
+        Args:
+            index: 画像インデックス
+            pixmap: 表示するフレームのピクスマップ
+            
+        Returns:
+            bool: 成功したかどうか
+        """
+        if index not in [0, 1] or pixmap is None:
+            return False
+        
+        # 書き込み時はインデックスの反転を行わない
+        actual_index = index
+        
+        # クリアされた画像やエラーの画像には設定しない
+        if self._images[actual_index]['pixmap'] is None or self._images[actual_index].get('error') is not None:
+            return False
+        
+        self._images[actual_index]['pixmap'] = pixmap
+        self._images[actual_index]['display_update_needed'] = True
+        return True
+    
     def set_sr_request(self, index: int, request_id: str) -> bool:
         """
         超解像処理リクエストIDを設定
@@ -5,7 +5,7 @@
 """
 
 import os
-from typing import Tuple, Dict, Any, Optional
+from typing import Tuple, Dict, Any, Hashable, Optional
 import numpy as np
 from logutils import log_print, INFO, WARNING, ERROR, DEBUG
 
@@ -16,27 +16,118 @@ except ImportError:
 
 # decoderモジュールをインポート
 try:
-    from decoder import select_image_decoder, decode_image
+    from decoder import (
+        select_image_decoder, decode_image, decode_image_stream_for_display, get_decoded_image_cache, make_image_key,
+        probe_image,
+    )
+    from decoder.probe import probe_image_header, PROBE_SIZE
+    from decoder.stream import peek_stream
+    from decoder.tiled import TiledImage, open_tiled_image, TILED_MIN_PIXELS, PREVIEW_SIZE
+    from decoder.decoder import (
+        DisplayImage, pixel_format_for_array, PIXEL_FORMAT_GRAY8, PIXEL_FORMAT_RGB888, PIXEL_FORMAT_BGR888,
+        PIXEL_FORMAT_RGBA8888, PIXEL_FORMAT_BGRA8888,
+    )
     DECODER_AVAILABLE = True
 except ImportError:
     log_print(ERROR, "decoderモジュールがインポートできません。このアプリケーションの実行には必須です。")
     DECODER_AVAILABLE = False
 
+# 書庫から展開しながらデコードする形式
+# （GIFはアニメーションの再生で画像データ全体を使うため、画像データを読み込んでデコードする）
+STREAM_DECODE_EXTENSIONS = ('.png',)
 
-def load_image_from_bytes(image_data: bytes, file_path: str = "") -> Tuple[Optional[QPixmap], Optional[np.ndarray], Dict[str, Any]]:
+
+def load_image_from_bytes(image_data: bytes, file_path: str = "", use_cache: bool = True,
+                          cache_key: Optional[Hashable] = None) -> Tuple[Optional[QPixmap], Optional[np.ndarray], Dict[str, Any]]:
     """
     バイトデータから画像をロードし、QtのPixmapとNumpyの配列とメタデータ情報を返す
     
+    デコードは decode_image_from_bytes で行い、その配列からQPixmapを作る。
+    QPixmapはGUIスレッドでしか作れないため、別スレッドでは decode_image_from_bytes を使うこと。
+    
     Args:
         image_data: 画像データのバイト列
         file_path: 画像のファイルパス（メタデータ取得用）
+        use_cache: デコード済み画像キャッシュを使うかどうか
+        cache_key: デコード済み画像キャッシュのキー（省略時は画像データの内容から作る）
         
     Returns:
         (QPixmap, Numpy配列, メタデータ情報) のタプル
         失敗した場合は (None, None, {})
     """
+    numpy_array, info = decode_image_from_bytes(image_data, file_path, use_cache, cache_key)
+    if numpy_array is None:
+        return None, None, info
+    
+    try:
+        pixmap = image_to_pixmap(numpy_array, info)
+        log_print(DEBUG, f"QPixmap作成完了: {pixmap.width()}x{pixmap.height()}")
+        return pixmap, numpy_array, info
+    except Exception as e:
+        log_print(ERROR, f"画像の読み込みに失敗しました: {e}")
+        import traceback
+        log_print(ERROR, traceback.format_exc())
+        return None, None, info
+
+
+def image_to_pixmap(numpy_array: np.ndarray, info: Dict[str, Any]) -> QPixmap:
+    """
+    decode_image_from_bytes の結果からQPixmapを作る（GUIスレッドで呼ぶこと）
+    
+    Args:
+        numpy_array: デコードされた画像配列
+        info: メタデータ情報（"pixel_format" を使う）
+        
+    Returns:
+        QPixmap
+        
+    Raises:
+        ValueError: 対応していない画素形式の場合
+    """
+    pixel_format = info.get("pixel_format")
+    
+    # NumPy配列からQImageを作成（配列のバッファをコピーせずに参照する）
+    img = array_to_qimage(numpy_array, pixel_format)
+    if img is None:
+        channels = 1 if len(numpy_array.shape) == 2 else numpy_array.shape[2]
+        raise ValueError(f"サポートされていない画素形式: {pixel_format} ({channels}チャンネル)")
+    
+    # QImageからQPixmapを作成（numpy_arrayはこの変換が終わるまで参照を保持している）
+    return QPixmap.fromImage(img)
+
+
+def decode_image_from_bytes(image_data: bytes, file_path: str = "", use_cache: bool = True,
+                            cache_key: Optional[Hashable] = None) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+    """
+    バイトデータから画像をデコードし、Numpyの配列とメタデータ情報を返す
+    
+    Qtのオブジェクトを作らないため、GUIスレッド以外（先読みなど）からも呼べる。
+    
+    デコード結果はプロセス全体のデコード済み画像キャッシュに保存し、同じ内容の画像を
+    再表示するときはデコードせずにキャッシュの配列を使う（返す配列はキャッシュと共有するため書き換えないこと）。
+    書庫やフォルダの画像は make_archive_image_key で作ったキーを cache_key に渡し、
+    decode_image_from_archive でストリームからデコードした結果と同じキーで保存する。
+    
+    画像はデコーダーの出力をそのまま表示できる画素形式（BGRなど）でデコードし、
+    QImageはその配列を直接参照する。返す配列の画素形式はメタデータの "pixel_format" に入る。
+    RGB(A)の配列が必要な場合は decoder.to_rgb_array で変換すること。
+    
+    画素数が TILED_MIN_PIXELS 以上の大きな画像は、縮小したプレビューだけをデコードして返し、
+    メタデータの "tiled_image" にタイル表示用の画像（decoder.tiled.TiledImage）を入れる。
+    このとき返す配列はプレビューのもので、"width" と "height" は元画像のサイズになる。
+    
+    Args:
+        image_data: 画像データのバイト列
+        file_path: 画像のファイルパス（メタデータ取得用）
+        use_cache: デコード済み画像キャッシュを使うかどうか
+        cache_key: デコード済み画像キャッシュのキー（省略時は画像データの内容から作る）
+        
+    Returns:
+        (Numpy配列, メタデータ情報) のタプル
+        失敗した場合は (None, メタデータ情報)
+    """
     if not image_data:
-        return None, None, {}
+        return None, {}
     
     # 基本情報の初期化
     info = {}
@@ -56,17 +147,43 @@ def load_image_from_bytes(image_data: bytes, file_path: str = "") -> Tuple[Optio
         # デコードの詳細ログを追加
         log_print(DEBUG, f"画像デコード開始: '{file_path}', サイズ: {len(image_data)} バイト")
         
-        # select_image_decoderを使用して適切なデコーダーを選択
-        decoder = select_image_decoder(file_path)
-        if not decoder:
-            raise ValueError(f"ファイル '{file_path}' に対応するデコーダーが見つかりません")
+        # キャッシュにあればデコードせずに使う
+        cache = get_decoded_image_cache() if use_cache else None
+        if cache is None:
+            cache_key = None
+        elif cache_key is None:
+            cache_key = make_image_key(file_path, image_data)
         
-        log_print(DEBUG, f"選択されたデコーダー: {decoder.__class__.__name__}")
+        # 大きな画像は画像全体をデコードせずにタイル表示にする
+        tiled_image = _open_tiled_image(image_data, file_path, cache, cache_key)
         
-        # デコーダーを使用して画像をデコード
-        numpy_array = decoder.decode(image_data)
-        if numpy_array is None:
-            raise ValueError(f"画像のデコードに失敗しました: {file_path}")
+        cached = cache.get(cache_key) if cache is not None and tiled_image is None else None
+        if tiled_image is not None:
+            numpy_array = tiled_image.preview.array
+            decoder_name = select_image_decoder(file_path, image_data).__class__.__name__
+            pixel_format = tiled_image.pixel_format
+        elif cached is not None:
+            log_print(DEBUG, f"デコード済み画像キャッシュを使用: '{file_path}'")
+            numpy_array = cached.array
+            decoder_name = cached.decoder_name
+            pixel_format = cached.pixel_format or None
+        else:
+            # select_image_decoderを使用して適切なデコーダーを選択
+            decoder = select_image_decoder(file_path, image_data)
+            if not decoder:
+                raise ValueError(f"ファイル '{file_path}' に対応するデコーダーが見つかりません")
+            decoder_name = decoder.__class__.__name__
+            
+            log_print(DEBUG, f"選択されたデコーダー: {decoder_name}")
+            
+            # デコーダーを使用して表示用の画素形式で画像をデコード
+            decoded = decoder.decode_display(image_data)
+            if decoded is None:
+                raise ValueError(f"画像のデコードに失敗しました: {file_path}")
+            numpy_array, pixel_format = decoded
+            if cache is not None:
+                # C連続にそろえて登録する（QImageはこのバッファを直接参照する）
+                numpy_array = cache.put(cache_key, numpy_array, decoder_name, pixel_format).array
         # numpy_arrayから画像情報を取得
         height, width = numpy_array.shape[:2]
         channels = 1 if len(numpy_array.shape) == 2 else numpy_array.shape[2]
@@ -78,30 +195,244 @@ def load_image_from_bytes(image_data: bytes, file_path: str = "") -> Tuple[Optio
             "height": height,
             "channels": channels,
             "format": ext[1:].upper() if ext else "Unknown",
-            "decoder": decoder.__class__.__name__
+            "decoder": decoder_name,
+            "pixel_format": pixel_format
         })
+        if tiled_image is not None:
+            # サイズは元画像のもの（配列はプレビュー）
+            info.update({
+                "width": tiled_image.width,
+                "height": tiled_image.height,
+                "tiled_image": tiled_image
+            })
+        
+        return numpy_array, info
+            
+    except Exception as e:
+        log_print(ERROR, f"画像の読み込みに失敗しました: {e}")
+        import traceback
+        log_print(ERROR, traceback.format_exc())
+        return None, info
+
+
+def can_decode_from_stream(archive_manager, file_path: str) -> bool:
+    """
+    画像をストリームから展開しながらデコードするかどうか
+    
+    Args:
+        archive_manager: 画像データを取得するためのアーカイブマネージャ
+        file_path: 画像のファイルパス
+        
+    Returns:
+        ストリームからデコードする形式で、マネージャがストリームを開ける場合はTrue
+    """
+    _, ext = os.path.splitext(file_path.lower())
+    return (DECODER_AVAILABLE and ext in STREAM_DECODE_EXTENSIONS
+            and hasattr(archive_manager, 'open_file_stream'))
+
+
+def make_archive_image_key(archive_manager, file_path: str) -> Optional[Hashable]:
+    """
+    書庫（またはフォルダ）の画像のデコード済み画像キャッシュのキーを作る
+    
+    ストリームからデコードした場合も画像データからデコードした場合も同じキーになるよう、
+    (書庫パス, パス, サイズ, 更新日時) をキーにする（画像データを読まずに作れる）。
+    
+    Args:
+        archive_manager: 画像を含むアーカイブマネージャ
+        file_path: 画像のファイルパス
         
-        # NumPy配列からQImageを作成
-        if channels == 1:  # グレースケール
-            img = QImage(numpy_array.data, width, height, width, QImage.Format_Grayscale8)
-        elif channels == 3:  # RGB
-            img = QImage(numpy_array.data, width, height, width * 3, QImage.Format_RGB888)
-        elif channels == 4:  # RGBA
-            img = QImage(numpy_array.data, width, height, width * 4, QImage.Format_RGBA8888)
+    Returns:
+        キャッシュキー。エントリの更新日時が分からない場合はNone（画像データの内容から作ること）
+    """
+    if not DECODER_AVAILABLE or not hasattr(archive_manager, 'get_entry_info'):
+        return None
+    entry = archive_manager.get_entry_info(file_path)
+    if entry is None or entry.modified_time is None:
+        return None
+    return make_image_key(file_path, size=entry.size, mtime=entry.modified_time.timestamp(),
+                          archive_path=getattr(archive_manager, 'current_path', None))
+
+
+def decode_image_from_archive(archive_manager, file_path: str,
+                              use_cache: bool = True) -> Tuple[Optional[np.ndarray], Dict[str, Any], Optional[bytes]]:
+    """
+    書庫（またはフォルダ）の画像をストリームから展開しながらデコードする
+    
+    画像データ全体をメモリに読み込まないため、大きなPNGを開くときの最大メモリ使用量が減る。
+    デコード結果は make_archive_image_key のキーでデコード済み画像キャッシュに保存し、
+    キャッシュにあればストリームも開かない。
+    
+    タイル表示にする大きな画像や、ストリームを開けない場合は、画像データを読み込んで
+    decode_image_from_bytes でデコードする（このときだけ読み込んだデータを返す）。
+    GUIスレッド以外から呼べる。
+    
+    Args:
+        archive_manager: 画像データを取得するためのアーカイブマネージャ（open_file_stream と extract_file を使う）
+        file_path: 画像のファイルパス
+        use_cache: デコード済み画像キャッシュを使うかどうか
+        
+    Returns:
+        (Numpy配列, メタデータ情報, 画像データ) のタプル。画像データはストリームからデコードした場合はNone
+        失敗した場合の配列はNone
+    """
+    info = {"file_name": os.path.basename(file_path)}
+    _, ext = os.path.splitext(file_path.lower())
+    
+    def decode_bytes():
+        image_data = archive_manager.extract_file(file_path)
+        if not image_data:
+            return None, info, None
+        numpy_array, bytes_info = decode_image_from_bytes(image_data, file_path, use_cache, cache_key)
+        return numpy_array, bytes_info, image_data
+    
+    try:
+        entry = archive_manager.get_entry_info(file_path) if hasattr(archive_manager, 'get_entry_info') else None
+        if entry is not None:
+            info["file_size"] = entry.size
+        # 更新日時が分かればキャッシュキーにする（データを読まずにキャッシュを引ける）
+        cache = get_decoded_image_cache() if use_cache else None
+        cache_key = make_archive_image_key(archive_manager, file_path) if cache is not None else None
+        
+        cached = cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            log_print(DEBUG, f"デコード済み画像キャッシュを使用: '{file_path}'")
+            numpy_array = cached.array
+            decoder_name = cached.decoder_name
+            pixel_format = cached.pixel_format or pixel_format_for_array(numpy_array)
         else:
-            raise ValueError(f"サポートされていないチャンネル数: {channels}")
+            stream = archive_manager.open_file_stream(file_path)
+            if stream is None:
+                return decode_bytes()
+            try:
+                # 大きな画像はタイル表示にするため、画像データを読み込んでデコードする
+                head, stream = peek_stream(stream, PROBE_SIZE)
+                size = probe_image_header(head)
+                if size is not None and size[0] * size[1] >= TILED_MIN_PIXELS:
+                    stream.close()
+                    return decode_bytes()
                 
-        # QImageからQPixmapを作成
-        pixmap = QPixmap.fromImage(img)
-        log_print(DEBUG, f"QPixmap作成完了: {pixmap.width()}x{pixmap.height()}")
+                decoder = select_image_decoder(file_path, head)
+                if not decoder:
+                    raise ValueError(f"ファイル '{file_path}' に対応するデコーダーが見つかりません")
+                decoder_name = decoder.__class__.__name__
+                log_print(DEBUG, f"画像デコード開始（ストリーム）: '{file_path}', デコーダー: {decoder_name}")
+                
+                # 表示用の画素形式でデコードする（グレースケールは1チャンネルのまま）
+                decoded = decode_image_stream_for_display(file_path, stream)
+            finally:
+                stream.close()
+            if decoded is None:
+                raise ValueError(f"画像のデコードに失敗しました: {file_path}")
+            numpy_array, pixel_format = decoded
+            if cache_key is not None:
+                numpy_array = cache.put(cache_key, numpy_array, decoder_name, pixel_format).array
         
-        return pixmap, numpy_array, info
-            
+        height, width = numpy_array.shape[:2]
+        channels = 1 if len(numpy_array.shape) == 2 else numpy_array.shape[2]
+        log_print(DEBUG, f"デコード成功: {width}x{height}, チャンネル数: {channels}")
+        
+        info.update({
+            "width": width,
+            "height": height,
+            "channels": channels,
+            "format": ext[1:].upper() if ext else "Unknown",
+            "decoder": decoder_name,
+            "pixel_format": pixel_format
+        })
+        return numpy_array, info, None
+    
     except Exception as e:
         log_print(ERROR, f"画像の読み込みに失敗しました: {e}")
         import traceback
         log_print(ERROR, traceback.format_exc())
-        return None, None, info
+        return None, info, None
+
+
+def _open_tiled_image(image_data: bytes, file_path: str, cache, cache_key) -> Optional["TiledImage"]:
+    """
+    画素数が TILED_MIN_PIXELS 以上の画像をタイル表示用に開く
+    
+    プレビューはデコード済み画像キャッシュに縮小デコードのキーで登録し、
+    同じ画像を開き直すときはプレビューのデコードも省く。
+    
+    Args:
+        image_data: 画像データのバイト列
+        file_path: 画像のファイルパス
+        cache: デコード済み画像キャッシュ（使わない場合はNone）
+        cache_key: 画像のキャッシュキー（タイルキャッシュのキーにも使う）
+        
+    Returns:
+        TiledImage。小さな画像や、サイズが分からない画像はNone
+    """
+    info = probe_image(file_path, image_data)
+    if info is None or info[0] * info[1] < TILED_MIN_PIXELS:
+        return None
+    
+    # 縮小デコードのキーは、元の画像のキーの目標サイズ（末尾の要素）だけを置き換えて作る
+    preview_key = cache_key[:-1] + (PREVIEW_SIZE,) if cache is not None else None
+    cached = cache.get(preview_key) if cache is not None else None
+    if cached is not None:
+        log_print(DEBUG, f"デコード済み画像キャッシュのプレビューを使用: '{file_path}'")
+        return TiledImage(file_path, image_data, info[0], info[1],
+                          DisplayImage(cached.array, cached.pixel_format), key=cache_key)
+    
+    tiled_image = open_tiled_image(file_path, image_data, info=info, key=cache_key)
+    if tiled_image is not None and cache is not None:
+        cache.put(preview_key, tiled_image.preview.array, "TiledImage", tiled_image.pixel_format)
+    return tiled_image
+
+
+def array_to_qimage(array: np.ndarray, pixel_format: Optional[str] = None) -> Optional[QImage]:
+    """
+    NumPy配列の画像を、バッファをコピーせずに参照するQImageにする
+    
+    返すQImageは配列のメモリを直接参照するため、QImageを使い終わる（QPixmap.fromImageなどで
+    変換する）まで、呼び出し側で配列への参照を保持すること。
+    
+    Args:
+        array: C連続のuint8配列
+        pixel_format: 配列の画素形式（Noneならチャンネル数からRGB(A)として扱う）
+        
+    Returns:
+        QImage。対応していない画素形式の場合はNone
+    """
+    if pixel_format is None:
+        pixel_format = pixel_format_for_array(array)
+    formats = {
+        PIXEL_FORMAT_GRAY8: QImage.Format_Grayscale8,
+        PIXEL_FORMAT_RGB888: QImage.Format_RGB888,
+        PIXEL_FORMAT_BGR888: QImage.Format_BGR888,
+        PIXEL_FORMAT_RGBA8888: QImage.Format_RGBA8888,
+        # メモリ上のBGRAの並びはリトルエンディアンのARGB32と同じ
+        PIXEL_FORMAT_BGRA8888: QImage.Format_ARGB32,
+    }
+    if pixel_format not in formats:
+        log_print(WARNING, f"サポートされていない画素形式: {pixel_format}")
+        return None
+    if not array.flags['C_CONTIGUOUS']:
+        raise ValueError("QImageに渡す配列はC連続である必要があります")
+    height, width = array.shape[:2]
+    return QImage(array.data, width, height, array.strides[0], formats[pixel_format])
+
+
+def array_to_pixmap(array: np.ndarray, pixel_format: Optional[str] = None) -> Optional[QPixmap]:
+    """
+    NumPy配列の画像をQPixmapに変換する
+    
+    Args:
+        array: グレースケール、RGB、RGBAなどのuint8配列
+        pixel_format: 配列の画素形式（Noneならチャンネル数からRGB(A)として扱う）
+        
+    Returns:
+        QPixmap。対応していない画素形式の場合はNone
+    """
+    if not array.flags['C_CONTIGUOUS']:
+        array = np.ascontiguousarray(array)
+    img = array_to_qimage(array, pixel_format)
+    if img is None:
+        return None
+    return QPixmap.fromImage(img)
 
 
 def format_image_info(info: Dict[str, Any]) -> str:
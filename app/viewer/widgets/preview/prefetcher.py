@@ -0,0 +1,238 @@
+"""
+ページ先読みモジュール
+
+アーカイブブラウザのカレント位置と移動方向から次に表示されるページを予測し、
+別スレッドで書庫からの取り出しとデコードを済ませておく。ページをめくったときは
+ImageHandler が先読み済みの結果（QPixmapまで作成済み）をそのまま使う。
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from logutils import log_print, INFO, WARNING, DEBUG
+
+from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtGui import QPixmap
+
+from .image_processor import (
+    decode_image_from_bytes, decode_image_from_archive, can_decode_from_stream, image_to_pixmap, make_archive_image_key,
+)
+
+# 進む方向に先読みする移動回数（見開きでは1回で2ページ）
+DEFAULT_AHEAD = 4
+# 逆方向に先読みする移動回数
+DEFAULT_BEHIND = 1
+# 先読みしたページの合計バイト数の上限（画像データ、デコード結果、QPixmapの合計）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class PrefetchedPage:
+    """先読み済みのページ"""
+    
+    __slots__ = ('path', 'data', 'numpy_array', 'info', 'pixmap')
+    
+    def __init__(self, path: str, data: Optional[bytes], numpy_array: np.ndarray, info: Dict):
+        self.path = path
+        self.data = data  # 画像データ（アニメーションGIFの再生などで使う。ストリームからデコードした画像はNone）
+        self.numpy_array = numpy_array  # デコード結果（デコード済み画像キャッシュと共有）
+        self.info = info  # メタデータ情報
+        self.pixmap: Optional[QPixmap] = None  # GUIスレッドで作成したQPixmap
+    
+    @property
+    def nbytes(self) -> int:
+        """先読みに使っているバイト数（QPixmapは1画素4バイトとして見積もる）"""
+        height, width = self.numpy_array.shape[:2]
+        return len(self.data or b'') + self.numpy_array.nbytes + width * height * 4
+
+
+class _PrefetchSignals(QObject):
+    """先読みスレッドからGUIスレッドへ通知するシグナル"""
+    
+    page_ready = Signal(str)  # デコードが終わったページのパス
+
+
+class PagePrefetcher(QObject):
+    """
+    ページを先読みするクラス
+    
+    update でカレント位置が変わるたびに先読みするページを決め直し、範囲外になった
+    ページは破棄する。書庫からの取り出しとデコードは1本のワーカースレッドで近いページから順に行い、
+    QPixmapはデコードが終わったときにGUIスレッドで作成する。
+    """
+    
+    def __init__(self, archive_manager, parent=None, ahead: int = DEFAULT_AHEAD,
+                 behind: int = DEFAULT_BEHIND, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        先読みの初期化
+        
+        Args:
+            archive_manager: 画像データを取得するためのアーカイブマネージャ（extract_fileを使う）
+            parent: 親オブジェクト
+            ahead: 進む方向に先読みする移動回数
+            behind: 逆方向に先読みする移動回数
+            max_bytes: 先読みしたページの合計バイト数の上限
+        """
+        super().__init__(parent)
+        self.archive_manager = archive_manager
+        self.ahead = ahead
+        self.behind = behind
+        self.max_bytes = max_bytes
+        
+        self._cond = threading.Condition()
+        self._pages: Dict[str, PrefetchedPage] = {}
+        self._total_bytes = 0
+        self._wanted: List[str] = []  # 保持するページ（表示中と先読み範囲）
+        self._pending: List[str] = []  # これから先読みするページ（近い順）
+        self._in_flight: Optional[str] = None  # ワーカーが処理中のページ
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        
+        self._signals = _PrefetchSignals()
+        self._signals.page_ready.connect(self._on_page_ready)
+    
+    def update(self, browser, current_paths: List[str], forward: bool = True):
+        """
+        カレント位置に合わせて先読みするページを決め直す
+        
+        右左表示（RTL）は表示する位置が入れ替わるだけで、ブラウザ上の移動方向は変わらないため
+        forward には next/prev のどちらで移動したかを渡す。
+        
+        Args:
+            browser: アーカイブブラウザ
+            current_paths: 表示中のページのパス
+            forward: 直前の移動が次の方向ならTrue、前の方向ならFalse
+        """
+        ahead = browser.peek(self.ahead, forward)
+        behind = browser.peek(self.behind, not forward)
+        
+        # 進む方向を優先し、残りを逆方向から埋める
+        order = []
+        for path in ahead + behind:
+            if path not in order and path not in current_paths:
+                order.append(path)
+        
+        with self._cond:
+            if self._stopped:
+                return
+            self._wanted = list(current_paths) + order
+            # 範囲外になったページを破棄する
+            for path in [path for path in self._pages if path not in self._wanted]:
+                self._total_bytes -= self._pages.pop(path).nbytes
+            self._pending = [path for path in order if path not in self._pages]
+            if self._pending and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="PagePrefetcher", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        
+        log_print(DEBUG, f"先読み: 方向={'次' if forward else '前'}, 対象={len(order)}件, "
+                         f"未処理={len(self._pending)}件, 使用量={self._total_bytes // (1024 * 1024)}MB")
+    
+    def get(self, path: str, wait: bool = True) -> Optional[PrefetchedPage]:
+        """
+        先読み済みのページを取得する（GUIスレッドで呼ぶこと）
+        
+        wait がTrueで、ワーカーがちょうどそのページを処理中の場合は、終わるまで待ってから返す
+        （最初から読み込み直すより早い）。
+        
+        Args:
+            path: ページのパス（ブラウザのパス）
+            wait: 処理中のページを待つかどうか
+        
+        Returns:
+            先読み済みのページ。なければNone
+        """
+        with self._cond:
+            while wait and self._in_flight == path and not self._stopped:
+                self._cond.wait()
+            page = self._pages.get(path)
+            tiled_image = page.info.get('tiled_image') if page is not None else None
+            if tiled_image is not None and tiled_image.released:
+                # 一度表示して解放したタイル表示の画像は使えないため、読み込み直させる
+                self._total_bytes -= self._pages.pop(path).nbytes
+                page = None
+        if page is None:
+            return None
+        if page.pixmap is None:
+            self._create_pixmap(page)
+        log_print(DEBUG, f"先読み済みのページを使用: {path}")
+        return page
+    
+    def clear(self):
+        """先読みしたページをすべて破棄する"""
+        with self._cond:
+            self._pages.clear()
+            self._total_bytes = 0
+            self._wanted = []
+            self._pending = []
+    
+    def stop(self):
+        """先読みを止める（処理中のページは読み終えてから止まる）"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self.clear()
+    
+    def _create_pixmap(self, page: PrefetchedPage):
+        """ページのQPixmapを作成する（GUIスレッドで呼ぶこと）"""
+        try:
+            page.pixmap = image_to_pixmap(page.numpy_array, page.info)
+        except Exception as e:
+            log_print(WARNING, f"先読みしたページのQPixmapを作成できませんでした: {page.path}: {e}")
+    
+    @Slot(str)
+    def _on_page_ready(self, path: str):
+        """デコードが終わったページのQPixmapをGUIスレッドで作成する"""
+        with self._cond:
+            page = self._pages.get(path)
+        if page is not None and page.pixmap is None:
+            self._create_pixmap(page)
+    
+    def _next_path(self) -> Optional[str]:
+        """次に先読みするページを取り出す（なければ要求が来るまで待つ。停止したらNone）"""
+        with self._cond:
+            self._in_flight = None
+            self._cond.notify_all()
+            while not self._stopped and not self._pending:
+                self._cond.wait()
+            if self._stopped:
+                return None
+            self._in_flight = self._pending.pop(0)
+            return self._in_flight
+    
+    def _run(self):
+        """ワーカースレッドの処理"""
+        while True:
+            path = self._next_path()
+            if path is None:
+                break
+            try:
+                with self._cond:
+                    if self._total_bytes >= self.max_bytes:
+                        # 上限に達したら、範囲が変わるまで残りは先読みしない
+                        log_print(DEBUG, f"先読みの上限に達しました: {self._total_bytes // (1024 * 1024)}MB")
+                        self._pending = []
+                        continue
+                
+                if can_decode_from_stream(self.archive_manager, path):
+                    numpy_array, info, data = decode_image_from_archive(self.archive_manager, path)
+                else:
+                    data = self.archive_manager.extract_file(path)
+                    if not data:
+                        continue
+                    numpy_array, info = decode_image_from_bytes(
+                        data, path, cache_key=make_archive_image_key(self.archive_manager, path))
+                if numpy_array is None:
+                    continue
+                page = PrefetchedPage(path, data, numpy_array, info)
+                
+                with self._cond:
+                    # 処理中に範囲外になったページは捨てる
+                    if self._stopped or path not in self._wanted:
+                        continue
+                    self._pages[path] = page
+                    self._total_bytes += page.nbytes
+                self._signals.page_ready.emit(path)
+            except Exception as e:
+                log_print(WARNING, f"ページの先読みに失敗しました: {path}: {e}")
+        log_print(INFO, "ページの先読みを停止しました")
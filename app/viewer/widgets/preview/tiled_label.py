@@ -0,0 +1,156 @@
+"""
+タイル表示対応の画像ラベル
+
+大きな画像（decoder.tiled.TiledImage）を、画像全体のQPixmapを作らずに表示するQLabelです。
+見えている範囲のタイルだけをTileLoaderで別スレッドで作り、できるまではプレビューを
+拡大して仮に表示します。setPixmapやsetTextを呼ぶと通常のQLabelの表示に戻ります。
+"""
+
+from typing import Optional
+
+from PySide6.QtWidgets import QLabel, QStyle
+from PySide6.QtCore import QObject, QRect, QRectF, QSize, Signal, Slot
+from PySide6.QtGui import QPainter, QPixmap
+from logutils import log_print, DEBUG
+
+from decoder.tiled import TiledImage, TileKey, TileLoader, level_for_scale
+from .image_processor import array_to_qimage
+
+
+class _TileSignals(QObject):
+    """ローダーのスレッドからUIスレッドにタイルの完成を通知するシグナル"""
+    
+    tile_loaded = Signal(object, object)  # (TiledImage, タイル)
+
+
+class TiledImageLabel(QLabel):
+    """タイル表示に対応した画像ラベル"""
+    
+    def __init__(self, text: str = "", parent=None):
+        super().__init__(text, parent)
+        
+        # タイル表示中の画像と表示倍率
+        self._tiled_image: Optional[TiledImage] = None
+        self._preview_pixmap: Optional[QPixmap] = None
+        self._scale = 1.0
+        self._image_size = QSize()
+        
+        # タイルは別スレッドで作り、完成したらシグナルでUIスレッドに戻す
+        self._signals = _TileSignals()
+        self._signals.tile_loaded.connect(self._on_tile_loaded)
+        self._loader = TileLoader(self._signals.tile_loaded.emit)
+        self.destroyed.connect(self._loader.stop)
+    
+    def is_tiled(self) -> bool:
+        """タイル表示中かどうか"""
+        return self._tiled_image is not None
+    
+    def show_tiled(self, image: TiledImage, preview_pixmap: QPixmap, scale: float):
+        """
+        画像をタイルで表示する
+        
+        Args:
+            image: 表示する画像
+            preview_pixmap: 画像のプレビューのQPixmap（タイルができるまで拡大して表示する）
+            scale: 元の解像度に対する表示倍率
+        """
+        if image is not self._tiled_image:
+            self._loader.cancel()
+        self._tiled_image = image
+        self._preview_pixmap = preview_pixmap
+        self._scale = scale
+        self._image_size = QSize(max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        
+        # 通常の表示内容をクリアし、スクロールエリアには画像の表示サイズを伝える
+        super().setPixmap(QPixmap())
+        super().setText("")
+        self.setMinimumSize(self._image_size)
+        self.resize(self._image_size.expandedTo(self.size()))
+        self.update()
+        log_print(DEBUG, f"タイル表示: {image.width}x{image.height}, 倍率={scale:.3f}, レベル={level_for_scale(scale)}")
+    
+    def clear_tiled(self):
+        """タイル表示をやめる"""
+        if self._tiled_image is None:
+            return
+        self._loader.cancel()
+        self._tiled_image = None
+        self._preview_pixmap = None
+        self.setMinimumSize(0, 0)
+    
+    def setPixmap(self, pixmap: QPixmap):
+        """通常のピクスマップ表示に戻して設定"""
+        self.clear_tiled()
+        super().setPixmap(pixmap)
+    
+    def setText(self, text: str):
+        """メッセージを表示する場合は通常の表示に戻す"""
+        if text:
+            self.clear_tiled()
+        super().setText(text)
+    
+    def sizeHint(self) -> QSize:
+        if self._tiled_image is not None:
+            return self._image_size
+        return super().sizeHint()
+    
+    def _image_rect(self) -> QRect:
+        """ラベル内で画像を描画する矩形（ラベルの配置設定に従う）"""
+        return QStyle.alignedRect(self.layoutDirection(), self.alignment(), self._image_size, self.contentsRect())
+    
+    def _tiles_for(self, rect: QRect, target: QRect):
+        """ラベル座標の矩形に重なるタイルを列挙する"""
+        image = self._tiled_image
+        rect = rect.intersected(target)
+        if rect.isEmpty():
+            return []
+        scale = self._scale
+        return image.tiles_in_rect(level_for_scale(scale),
+                                   (rect.x() - target.x()) / scale, (rect.y() - target.y()) / scale,
+                                   rect.width() / scale, rect.height() / scale)
+    
+    def _tile_dest(self, tile: TileKey, target: QRect) -> QRectF:
+        """タイルを描画する矩形（ラベル座標）"""
+        x, y, w, h = self._tiled_image.tile_rect(*tile)
+        scale = self._scale
+        return QRectF(target.x() + x * scale, target.y() + y * scale, w * scale, h * scale)
+    
+    def paintEvent(self, event):
+        """タイル表示中は、再描画する範囲のタイル（なければプレビュー）を描画する"""
+        if self._tiled_image is None:
+            super().paintEvent(event)
+            return
+        
+        image = self._tiled_image
+        target = self._image_rect()
+        preview_scale = image.preview_scale
+        
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        try:
+            for tile in self._tiles_for(event.rect(), target):
+                dest = self._tile_dest(tile, target)
+                array = image.peek_tile(tile)
+                if array is not None:
+                    # arrayはdrawImageが終わるまでこのループで参照を保持している
+                    painter.drawImage(dest, array_to_qimage(array, image.pixel_format))
+                else:
+                    # タイルができるまではプレビューの同じ範囲を拡大して描画する
+                    x, y, w, h = image.tile_rect(*tile)
+                    source = QRectF(x * preview_scale, y * preview_scale, w * preview_scale, h * preview_scale)
+                    painter.drawPixmap(dest, self._preview_pixmap, source)
+        finally:
+            painter.end()
+        
+        # ビューポートに見えている範囲のうち、まだないタイルを作る（見えなくなったタイルの要求は破棄される）
+        missing = [tile for tile in self._tiles_for(self.visibleRegion().boundingRect(), target)
+                   if image.peek_tile(tile) is None]
+        if missing:
+            self._loader.request(image, missing)
+    
+    @Slot(object, object)
+    def _on_tile_loaded(self, image: TiledImage, tile: TileKey):
+        """タイルができたら、その範囲だけを再描画する"""
+        if image is not self._tiled_image or tile[0] != level_for_scale(self._scale):
+            return
+        self.update(self._tile_dest(tile, self._image_rect()).toAlignedRect())
@@ -6,7 +6,6 @@
 
 import os
 import sys
-from time import sleep
 from typing import Optional, Dict, Any, List, Tuple
 
 # プロジェクトルートへのパスを追加
@@ -30,6 +29,7 @@ except ImportError:
 from .image_processor import load_image_from_bytes, format_image_info
 # 画像ハンドラをインポート
 from .image_handler import ImageHandler
+from .prefetcher import PagePrefetcher
 # 新しい画像モデルをインポート
 from .image_model import ImageModel
 # 直接decoderモジュールからインポート
@@ -60,9 +60,12 @@ class ImagePreviewWindow(QMainWindow):
         """
         super().__init__(parent)
         
-        # イベント処理をブロックするためのフラグ
+        # イベント処理をブロックするためのフラグ（ブラウザの移動と読み込みの要求の間だけ立てる）
         self._is_updating_images = False
         
+        # ブラウザから読み込みを要求した画像のパス（先読みの基準にする）
+        self._displayed_paths = []
+        
         # ウィンドウの基本設定
         self.setWindowTitle("画像プレビュー")
         self.resize(1024, 768)
@@ -95,6 +98,11 @@ class ImagePreviewWindow(QMainWindow):
             self.image_handler.set_superres_manager(sr_manager)
             log_print(INFO, "超解像マネージャをプレビューウィンドウに設定しました")
         
+        # ページ先読みの初期化（ブラウザの移動方向に合わせて前後のページを読んでおく）
+        self.prefetcher = PagePrefetcher(archive_manager, self) if archive_manager else None
+        self.image_handler.set_prefetcher(self.prefetcher)
+        self._navigation_forward = True
+        
         # ハンドラクラスの初期化（画像モデルを渡す）
         self.display_handler = DisplayHandler(self, self.image_model)
         self.event_handler = EventHandler(self)
@@ -413,9 +421,6 @@ class ImagePreviewWindow(QMainWindow):
                 log_print(WARNING, "ブラウザが初期化されていません")
                 return
             
-            # 現在の表示モード（ウィンドウ合わせか原寸大か）を保存
-            fit_to_window_mode = self.image_model.is_fit_to_window()
-            
             # ブラウザから現在の画像パスを取得
             paths = self._browser.get_current()
             
@@ -436,7 +441,7 @@ class ImagePreviewWindow(QMainWindow):
                 
                 if len(paths) == 1:
                     # 1画面の場合は画面中央に表示
-                    self.load_image_from_path(paths[0], 0, use_browser_path=True)
+                    pages = [(0, paths[0])]
                     # 2画面目をクリア（デュアルビュー設定がONでも1画像だけなら2画面目はクリア）
                     if len(self.image_areas) > 1 and self.image_areas[1]:
                         log_print(DEBUG, "2画面目をクリアします（1画像のみ）")
@@ -446,29 +451,23 @@ class ImagePreviewWindow(QMainWindow):
                     # 右左設定に応じてインデックスを調整
                     if right_to_left:
                         # 右から左への表示（index 0:右側, 1:左側）
-                        self.load_image_from_path(paths[0], 0, use_browser_path=True)
-                        self.load_image_from_path(paths[1], 1, use_browser_path=True)
+                        pages = [(0, paths[0]), (1, paths[1])]
                     else:
                         # 左から右への表示（index 0:左側, 1:右側）
-                        self.load_image_from_path(paths[0], 0, use_browser_path=True)
-                        self.load_image_from_path(paths[1], 1, use_browser_path=True)
+                        pages = [(0, paths[0]), (1, paths[1])]
                     
                     log_print(DEBUG, f"デュアルモードで2画像を表示: RTL={right_to_left}")
                 else:
                     # デュアルビューが無効または2つ以上のパスがある場合は最初の画像のみ表示
-                    self.load_image_from_path(paths[0], 0, use_browser_path=True)
+                    pages = [(0, paths[0])]
                     if len(self.image_areas) > 1 and self.image_areas[1]:
                         log_print(DEBUG, "2画面目をクリアします（デュアルビュー無効または画像不足）")
                         self.display_handler.clear_image(1)
                 
-                # 以前の表示モードを引き継ぐ
-                # 明示的に表示モードを適用（_refresh_display_modeを使用して一貫性を保つ）
-                self._refresh_display_mode(fit_to_window_mode)
-                
-                # 画像更新時に必ずインフォメーションバーを表示
-                self._show_information_bar()
-                
-                log_print(DEBUG, f"画像更新後の表示モード: fit_to_window={fit_to_window_mode}")
+                # 画像の読み込みを要求する（取り出しとデコードは別スレッドで行い、
+                # そろったら _on_images_loaded で表示を仕上げる。読み込み中の前の要求は取り消される）
+                self._displayed_paths = [path for _, path in pages]
+                self.image_handler.request_images_from_browser(pages)
         except Exception as e:
             log_print(ERROR, f"ブラウザからの画像更新に失敗しました: {e}")
             import traceback
@@ -478,15 +477,52 @@ class ImagePreviewWindow(QMainWindow):
             self._is_updating_images = False
             
             # イベントハンドラのロックを解除する確実な場所
+            # （読み込みの完了は待たない。読み込み中に次の移動があれば、その要求で置き換える）
             if hasattr(self, 'event_handler') and self.event_handler:
-                log_print(INFO, "画像更新完了 - ナビゲーションロックを解除します")
-                # 少し待機して確実にフラグを反映してからロック解除
-                sleep(0.1)
+                log_print(INFO, "画像の読み込みを要求しました - ナビゲーションロックを解除します")
                 self.event_handler.unlock_navigation_events()
             
             # デバッグ出力
             log_print(INFO, "画像更新完了、キー操作を再開します")
     
+    def _on_image_loaded(self, index: int, path: str, success: bool):
+        """
+        画像1枚の読み込みが終わったときの処理（image_handlerから呼ばれる）
+        
+        Args:
+            index: 画像のインデックス
+            path: 画像ファイルパス
+            success: 読み込みに成功したかどうか
+        """
+        if not success:
+            return
+        
+        # ウィンドウタイトルを更新（1画面目のみ）
+        if index == 0:
+            self.setWindowTitle(f"画像プレビュー - {os.path.basename(path)}")
+        
+        # 画像情報をステータスバーに表示
+        self._update_status_info()
+        
+        # 画像読み込み後に表示を更新
+        self._refresh_display_after_load(index)
+    
+    def _on_images_loaded(self):
+        """ブラウザから要求した画像がすべてそろったときの処理（image_handlerから呼ばれる）"""
+        # 表示モードを引き継ぐ（読み込み中にモードが切り替わった場合もあるため、完了時点のモードを使う）
+        # 明示的に表示モードを適用（_refresh_display_modeを使用して一貫性を保つ）
+        fit_to_window_mode = self.image_model.is_fit_to_window()
+        self._refresh_display_mode(fit_to_window_mode)
+        
+        # 画像更新時に必ずインフォメーションバーを表示
+        self._show_information_bar()
+        
+        # 移動方向の先のページを先読みする
+        if self.prefetcher and self._browser:
+            self.prefetcher.update(self._browser, self._displayed_paths, self._navigation_forward)
+        
+        log_print(DEBUG, f"画像更新後の表示モード: fit_to_window={fit_to_window_mode}")
+    
     def load_image_from_path(self, path: str, index: int = 0, use_browser_path: bool = False) -> bool:
         """
         アーカイブ内の指定パスから画像を読み込む
@@ -505,18 +541,9 @@ class ImagePreviewWindow(QMainWindow):
         """
         # image_handlerに処理を委譲
         success = self.image_handler.load_image_from_path(path, index, use_browser_path)
+        self._on_image_loaded(index, path, success)
         
         if success:
-            # ウィンドウタイトルを更新（1画面目のみ）
-            if index == 0:
-                self.setWindowTitle(f"画像プレビュー - {os.path.basename(path)}")
-            
-            # 画像情報をステータスバーに表示
-            self._update_status_info()
-            
-            # 画像読み込み後に表示を更新
-            self._refresh_display_after_load(index)
-            
             # 画像読み込み成功後、ブラウザが未初期化の場合は現在のパスを基準に初期化
             if self.archive_manager and not self._browser:
                 try:
@@ -765,6 +792,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.prev()
+                self._navigation_forward = False
                 self.statusbar.showMessage(f"前の画像に移動: {path}")
                 # 更新前に現在のパス情報をログ出力
                 log_print(DEBUG, f"前の画像への移動: {path}, 現在のブラウザ状態: pages={self._browser._pages}, shift={self._browser._shift}")
@@ -785,6 +813,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.next()
+                self._navigation_forward = True
                 self.statusbar.showMessage(f"次の画像に移動: {path}")
                 # 更新前に現在のパス情報をログ出力
                 log_print(DEBUG, f"次の画像への移動: {path}, 現在のブラウザ状態: pages={self._browser._pages}, shift={self._browser._shift}")
@@ -815,6 +844,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.go_first()
+                self._navigation_forward = True
                 self.statusbar.showMessage(f"最初の画像に移動: {path}")
                 self._update_images_from_browser()
                 return True
@@ -831,6 +861,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.go_last()
+                self._navigation_forward = False
                 self.statusbar.showMessage(f"最後の画像に移動: {path}")
                 self._update_images_from_browser()
                 return True
@@ -847,6 +878,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.prev_folder()
+                self._navigation_forward = False
                 self.statusbar.showMessage(f"前のフォルダに移動: {path}")
                 self._update_images_from_browser()
                 return True
@@ -863,6 +895,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.next_folder()
+                self._navigation_forward = True
                 self.statusbar.showMessage(f"次のフォルダに移動: {path}")
                 self._update_images_from_browser()
                 return True
@@ -879,6 +912,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.go_top()
+                self._navigation_forward = True
                 self.statusbar.showMessage(f"フォルダ内の先頭画像に移動: {path}")
                 self._update_images_from_browser()
                 return True
@@ -895,6 +929,7 @@ class ImagePreviewWindow(QMainWindow):
         if self._browser:
             try:
                 path = self._browser.go_end()
+                self._navigation_forward = False
                 self.statusbar.showMessage(f"フォルダ内の最後の画像に移動: {path}")
                 self._update_images_from_browser()
                 return True
@@ -988,6 +1023,17 @@ class ImagePreviewWindow(QMainWindow):
                     self.information_bar._check_mouse_timer.stop()
                 log_print(DEBUG, "インフォメーションバーのタイマーを停止しました")
             
+            # アニメーションの再生を止める
+            if hasattr(self, 'image_handler') and self.image_handler:
+                for index in [0, 1]:
+                    self.image_handler.stop_animation(index)
+            
+            # 画像の読み込みとページの先読みを止める
+            if hasattr(self, 'image_handler') and self.image_handler:
+                self.image_handler.stop_loading()
+            if getattr(self, 'prefetcher', None):
+                self.prefetcher.stop()
+            
             # 実行中の超解像処理をキャンセル
             if hasattr(self, 'image_model') and self.image_model:
                 # 各画像の超解像リクエストをチェック
@@ -1037,6 +1083,11 @@ class ImagePreviewWindow(QMainWindow):
             self._update_status_info()
             log_print(DEBUG, f"超解像処理完了後に表示を更新しました: index={index}")
 
+    def _refresh_display_after_frame(self, index: int):
+        """アニメーションのフレーム切り替え後に表示を更新"""
+        if hasattr(self, 'display_handler') and self.display_handler:
+            self.display_handler.check_model_updates()
+
     def _refresh_display_after_load(self, index: int):
         """画像読み込み後に表示を更新"""
         # 画像モデルから表示更新フラグをチェックして更新
@@ -3,12 +3,17 @@
 
 画像ファイルからサムネイルを生成するユーティリティ。
 バックグラウンドでのサムネイル生成をサポートします。
+画像ファイルは表示中のものから優先して並列に抽出します。
+生成したサムネイルはサムネイルストアに保存し、次回からは画像を取り出さずにストアから読み込みます。
 """
 
 import os
 import sys
+import threading
 from typing import Dict, List, Optional, Callable, Any, Tuple
 
+import cv2
+
 # プロジェクトルートへのパスを追加
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
 if project_root not in sys.path:
@@ -17,14 +22,18 @@ if project_root not in sys.path:
 from logutils import log_print, DEBUG, INFO, WARNING, ERROR
 
 try:
-    from PySide6.QtGui import QPixmap, QImage, QIcon
-    from PySide6.QtCore import QSize, Qt, QByteArray
+    from PySide6.QtGui import QPixmap, QIcon
+    from PySide6.QtCore import QSize, QByteArray
 except ImportError:
     log_print(ERROR, "PySide6が必要です。pip install pyside6 でインストールしてください。")
     sys.exit(1)
 
 # デコーダーモジュールをインポート
-from decoder.interface import get_supported_image_extensions, decode_image
+from decoder.interface import get_supported_image_extensions, decode_image_for_display
+from decoder.batch import BatchDecoder
+from decoder.decoder import pixel_format_for_array
+from app.viewer.widgets.preview.image_processor import array_to_qimage
+from app.viewer.models.thumbnail_store import ThumbnailKey, get_thumbnail_store, make_thumbnail_key
 
 # スレッド処理モジュールをインポート
 from app.threads import WorkerManager
@@ -33,36 +42,100 @@ from app.threads import WorkerManager
 SUPPORTED_EXTENSIONS = get_supported_image_extensions()
 
 
-class SequentialExtractor:
+class ThumbnailExtractor:
     """
-    ファイルを順次抽出するクラス
+    サムネイル用のファイルを優先度付きで並列に抽出するクラス
     
-    アーカイブからファイルを一つずつ順番に抽出し、
-    抽出が完了するごとにコールバックを呼び出します。
+    抽出待ちのファイルをキューに持ち、複数のスレッドでキューの先頭から少しずつまとめて取り出して抽出します。
+    まとめて取り出したファイルは extract_files で読み込むため、同じ書庫のファイルは書庫を1回だけ開いて読み込みます。
+    表示中のファイルを prioritize でキューの先頭に移すと、スクロール後に見えているサムネイルから先に作られます。
     """
     
-    def __init__(self, archive_manager, file_paths, current_directory=''):
+    # 抽出を並列に行うスレッド数
+    DEFAULT_WORKERS = 3
+    
+    # 1回にまとめて抽出するファイル数（小さいほど優先度の変更がすぐに反映される）
+    DEFAULT_BATCH_SIZE = 4
+    
+    def __init__(self, archive_manager, file_paths, current_directory='',
+                 max_workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE):
         """
         初期化
         
         Args:
             archive_manager: アーカイブマネージャインスタンス
-            file_paths: 抽出するファイルパスのリスト
+            file_paths: 抽出するファイルパスのリスト（現在のディレクトリからの相対パス）
             current_directory: 現在のディレクトリ
+            max_workers: 抽出を並列に行うスレッド数
+            batch_size: 1回にまとめて抽出するファイル数
         """
         self.archive_manager = archive_manager
         self.file_paths = file_paths
         self.current_directory = current_directory
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
         self.debug_mode = False
+        
+        # 抽出待ちのファイル（先頭から抽出する）
+        self._lock = threading.Lock()
+        self._pending: List[str] = list(file_paths)
     
-    def extract_files(self, on_file_extracted, progress_callback=None, is_cancelled=None):
+    def prioritize(self, file_paths):
         """
-        ファイルをシーケンシャルに抽出
+        指定したファイルを抽出待ちのキューの先頭に移す（GUIスレッドから呼ばれる）
+        
+        Args:
+            file_paths: 優先するファイルパスのリスト（先頭ほど優先）。抽出済みのファイルは無視する
+        """
+        with self._lock:
+            pending = set(self._pending)
+            first = [path for path in dict.fromkeys(file_paths) if path in pending]
+            if not first:
+                return
+            moved = set(first)
+            self._pending = first + [path for path in self._pending if path not in moved]
+        if self.debug_mode:
+            log_print(DEBUG, f"サムネイルの抽出を優先: {len(first)}ファイル")
+    
+    def _take_batch(self) -> List[str]:
+        """抽出待ちのキューの先頭からまとめて取り出す（空ならキューは空）"""
+        with self._lock:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            return batch
+    
+    def _full_path(self, path: str) -> str:
+        """現在のディレクトリからの相対パスをベースパスからの相対パスにする"""
+        if self.current_directory:
+            return os.path.join(self.current_directory, path).replace('\\', '/')
+        return path
+    
+    def _extract_batch(self, paths: List[str]):
+        """
+        ファイルをまとめて抽出する（抽出できたものから順に返す）
+        
+        Yields:
+            (ファイルパス, 内容) のタプル。抽出に失敗したファイルの内容はNone
+        """
+        if len(paths) > 1 and hasattr(self.archive_manager, 'extract_files'):
+            requested = {self._full_path(path): path for path in paths}
+            for full_path, file_data in self.archive_manager.extract_files(list(requested)):
+                yield requested.get(full_path, full_path), file_data
+        else:
+            for path in paths:
+                yield path, self.archive_manager.extract_item(path)
+    
+    def extract_files(self, on_file_extracted, progress_callback=None, is_cancelled=None, is_cached=None):
+        """
+        ファイルを並列に抽出
+        
+        on_file_extracted は抽出を行うスレッドから呼ばれる。
         
         Args:
             on_file_extracted: 抽出完了時のコールバック(filename, file_data)
+                （サムネイルが保存済みで抽出を省略したファイルは file_data が None）
             progress_callback: 進捗通知用コールバック
             is_cancelled: キャンセル確認用関数
+            is_cached: サムネイルが保存済みかどうかを確認する関数(filename)。Trueなら抽出しない
         
         Returns:
             Dict: 処理結果の辞書
@@ -70,34 +143,61 @@ class SequentialExtractor:
         results = {}
         total = len(self.file_paths)
         
-        for i, path in enumerate(self.file_paths):
-            # キャンセルチェック
-            if is_cancelled and is_cancelled():
-                break
+        def cancelled():
+            return bool(is_cancelled and is_cancelled())
+        
+        def report(path, success, file_data):
+            with self._lock:
+                results[path] = success
+                done = len(results)
             
             # 進捗報告
             if progress_callback:
-                percent = int((i + 1) * 100 / total)
-                progress_callback(percent, f"ファイル抽出中: {i+1}/{total}")
-            
-            if self.debug_mode:
-                log_print(DEBUG, f"ファイル抽出中: '{path}'")
-            
-            # ファイルを抽出 - extract_fileからextract_itemに変更
-            try:
-                # extract_itemを使用して現在のディレクトリからの相対パスでファイルを抽出
-                file_data = self.archive_manager.extract_item(path)
+                percent = int(done * 100 / total)
+                progress_callback(percent, f"ファイル抽出中: {done}/{total}")
+            
+            # コールバックを呼び出し
+            if success and on_file_extracted and not cancelled():
+                on_file_extracted(path, file_data)
+        
+        def worker():
+            while not cancelled():
+                batch = self._take_batch()
+                if not batch:
+                    break
                 
-                # 抽出成功の記録
-                results[path] = file_data is not None
+                # サムネイルが保存済みなら抽出しない
+                to_extract = []
+                for path in batch:
+                    if is_cached and is_cached(path):
+                        report(path, True, None)
+                    else:
+                        to_extract.append(path)
+                if not to_extract or cancelled():
+                    continue
                 
-                # コールバックを呼び出し
-                if file_data and on_file_extracted:
-                    on_file_extracted(path, file_data)
-            except Exception as e:
                 if self.debug_mode:
-                    log_print(ERROR, f"ファイル抽出エラー ({path}): {e}")
-                results[path] = False
+                    log_print(DEBUG, f"ファイル抽出中: {to_extract}")
+                
+                try:
+                    for path, file_data in self._extract_batch(to_extract):
+                        report(path, bool(file_data), file_data)
+                        if cancelled():
+                            break
+                except Exception as e:
+                    if self.debug_mode:
+                        log_print(ERROR, f"ファイル抽出エラー ({to_extract}): {e}")
+                    for path in to_extract:
+                        if path not in results:
+                            report(path, False, None)
+        
+        workers = min(self.max_workers, max(1, (total + self.batch_size - 1) // self.batch_size))
+        threads = [threading.Thread(target=worker, name=f"ThumbnailExtractor-{i}", daemon=True)
+                   for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
         
         return results
 
@@ -108,6 +208,10 @@ class ThumbnailGenerator:
     バックグラウンドでの処理とタスクのキャンセルをサポートします。
     """
     
+    # 抽出済みでサムネイル生成を待っているファイルの上限
+    # （抽出が生成より先に進みすぎないようにし、優先度の変更がすぐに反映されるようにする）
+    MAX_PENDING_THUMBNAILS = 8
+    
     def __init__(self, debug_mode=False):
         """
         サムネイルジェネレータの初期化
@@ -117,15 +221,31 @@ class ThumbnailGenerator:
         """
         self.debug_mode = debug_mode
         
+        # 一括デコードサービス（複数のコアがある場合に、サムネイルのデコードをプロセスで並列に行う）
+        self._batch_decoder = self._create_batch_decoder()
+        
         # ワーカーマネージャの初期化（スレッド処理を管理）
-        self.worker_manager = WorkerManager(max_threads=4, debug_mode=debug_mode)
+        # 一括デコードを使う場合は、デコードを待つスレッドがワーカープロセスの数だけ並ぶようにする
+        max_threads = 4
+        if self._batch_decoder is not None:
+            max_threads = max(max_threads, self._batch_decoder.max_workers + 1)
+        self.worker_manager = WorkerManager(max_threads=max_threads, debug_mode=debug_mode)
         
         # 現在処理中のタスクIDを保存
         self.current_task_id = None
         self.extraction_task_id = None
         
-        # サムネイルキャッシュ
-        self.thumbnail_cache: Dict[str, QIcon] = {}
+        # 実行中の抽出（表示中のファイルを優先するために保持）
+        self._extractor: Optional[ThumbnailExtractor] = None
+        
+        # サムネイル生成を待っているファイルの枠（抽出したら取得し、生成が終わったら返す）
+        self._generation_slots = threading.Semaphore(max(self.MAX_PENDING_THUMBNAILS, max_threads * 2))
+        
+        # サムネイル生成の要求ごとに増える番号（キャンセルされた要求の抽出を止めるために使う）
+        self._generation = 0
+        
+        # サムネイルストア（メモリ上のLRUキャッシュとディスク上のデータベース）
+        self.thumbnail_store = get_thumbnail_store()
         
         # デフォルトアイコン（拡張子ごと）
         self.default_icons: Dict[str, QIcon] = {}
@@ -145,6 +265,62 @@ class ThumbnailGenerator:
         if self.debug_mode:
             log_print(DEBUG, f"ThumbnailGeneratorを初期化しました。サポート拡張子: {SUPPORTED_EXTENSIONS}")
     
+    @staticmethod
+    def _create_batch_decoder() -> Optional[BatchDecoder]:
+        """
+        サムネイルのデコードに使う一括デコードサービスを作成する
+        
+        Returns:
+            BatchDecoder。ワーカープロセスが1つしか使えない場合は、プロセス間の受け渡しの分だけ
+            遅くなるためNone（スレッドでデコードする）
+        """
+        try:
+            batch_decoder = BatchDecoder()
+        except Exception as e:
+            log_print(WARNING, f"一括デコードサービスを作成できないため、スレッドでデコードします: {e}")
+            return None
+        if batch_decoder.max_workers < 2:
+            return None
+        log_print(INFO, f"サムネイルのデコードに {batch_decoder.max_workers} プロセスを使用します")
+        return batch_decoder
+    
+    def _decode_thumbnail(self, filename: str, file_data: bytes, target_size: Tuple[int, int]):
+        """
+        サムネイル用に画像をデコードする（サムネイルサイズを下回らない範囲で縮小デコード）
+        
+        一括デコードサービスがあればワーカープロセスでデコードし、なければこのスレッドでデコードする。
+        一括デコードサービスが停止済み（停止と競合して結果が得られなかった場合も含む）なら、
+        このスレッドでデコードする。
+        
+        Args:
+            filename: ファイル名
+            file_data: 画像データのバイト列
+            target_size: サムネイルのサイズ (幅, 高さ)
+            
+        Returns:
+            (画像配列, 画素形式) のタプル、失敗した場合はNone
+        """
+        if self._batch_decoder is not None and not self._batch_decoder.closed:
+            results = self._batch_decoder.decode_all([(filename, file_data)], target_size)
+            array = results[0][1] if results else None
+            if array is not None:
+                return array, pixel_format_for_array(array)
+            if results and not self._batch_decoder.closed:
+                # ワーカープロセスでもデコードできなかった
+                return None
+        
+        # RGBへの並べ替えをせず、デコーダーの出力の画素形式のままQImageにする
+        decoded = decode_image_for_display(filename, file_data, target_size)
+        if decoded is None:
+            return None
+        return decoded.array, decoded.pixel_format
+    
+    def shutdown(self):
+        """一括デコードのワーカープロセスを停止し、サムネイルストアの書き込み待ちの更新を書き込む"""
+        if self._batch_decoder is not None:
+            self._batch_decoder.shutdown()
+        self.thumbnail_store.flush()
+    
     def _init_default_icons(self):
         """
         ファイル種別ごとのデフォルトアイコンを初期化
@@ -178,6 +354,8 @@ class ThumbnailGenerator:
         
         # キャンセル状態を設定
         self._is_cancelling = True
+        self._generation += 1
+        self._extractor = None
         
         if self.current_task_id:
             if self.debug_mode:
@@ -210,6 +388,16 @@ class ThumbnailGenerator:
         # キャンセル状態をリセット
         self._is_cancelling = False
     
+    def prioritize(self, filenames: List[str]):
+        """
+        指定したファイルのサムネイルを先に生成する（表示中のファイルなど）
+        
+        Args:
+            filenames: 優先するファイル名のリスト（先頭ほど優先）
+        """
+        if self._extractor is not None:
+            self._extractor.prioritize(filenames)
+    
     def generate_thumbnails(
         self,
         archive_manager,
@@ -217,7 +405,8 @@ class ThumbnailGenerator:
         on_thumbnail_ready: Callable[[str, QIcon], None],
         on_all_completed: Callable[[], None] = None,
         thumbnail_size: QSize = QSize(128, 128),
-        current_directory: str = ''  # 現在のディレクトリ情報を追加
+        current_directory: str = '',  # 現在のディレクトリ情報を追加
+        priority_files: Optional[List[str]] = None
     ):
         """
         ファイルリストからサムネイルを生成
@@ -229,6 +418,7 @@ class ThumbnailGenerator:
             on_all_completed: 全サムネイル生成完了時のコールバック
             thumbnail_size: サムネイルのサイズ
             current_directory: 現在表示中のディレクトリパス（相対パス）
+            priority_files: 先に生成するファイル名のリスト（表示中のファイルなど）
         """
         # 引数の検証とデバッグ情報
         if not archive_manager:
@@ -273,10 +463,20 @@ class ThumbnailGenerator:
             self._context_current_directory = current_directory
             
             # 画像ファイルだけをフィルタリング
-            image_files = [
-                item['name'] for item in file_items 
+            image_items = [
+                item for item in file_items
                 if not item.get('is_dir', False) and self.can_generate_thumbnail(item['name'])
             ]
+            image_files = [item['name'] for item in image_items]
+            
+            # サムネイルストアのキー（開いたパス + エントリのパス + サイズ + 更新日時 + サムネイルのサイズ）
+            source_path = getattr(archive_manager, 'current_path', '') or ''
+            size = (thumbnail_size.width(), thumbnail_size.height())
+            cache_keys: Dict[str, ThumbnailKey] = {}
+            for item in image_items:
+                entry_path = item.get('path') or '/'.join(p for p in (current_directory, item['name']) if p)
+                cache_keys[item['name']] = make_thumbnail_key(
+                    source_path, entry_path, item.get('size'), item.get('modified'), size)
             
             if not image_files:
                 # 画像ファイルがない場合は完了を通知して終了
@@ -295,18 +495,30 @@ class ThumbnailGenerator:
             return
         
         try:
-            # シーケンシャルエクストラクタを作成
-            extractor = SequentialExtractor(
+            # 並列エクストラクタを作成（表示中のファイルを先に抽出する）
+            extractor = ThumbnailExtractor(
                 archive_manager=archive_manager,
                 file_paths=image_files,
                 current_directory=current_directory
             )
             extractor.debug_mode = self.debug_mode
+            if priority_files:
+                extractor.prioritize(priority_files)
+            self._extractor = extractor
+            generation = self._generation
+            
+            # サムネイルが保存済みかどうかの確認（抽出タスクのスレッドで呼ばれる）
+            def is_cached(filename):
+                key = cache_keys.get(filename)
+                return key is not None and self.thumbnail_store.contains(key)
             
             # ファイル抽出完了時のコールバック
             def on_file_extracted(filename, file_data):
                 # デバッグ出力を強化
-                log_print(INFO, f"ファイル '{filename}' の抽出完了（{len(file_data)}バイト）、サムネイル生成を開始")
+                if file_data is None:
+                    log_print(INFO, f"ファイル '{filename}' のサムネイルは保存済み、ストアから読み込みを開始")
+                else:
+                    log_print(INFO, f"ファイル '{filename}' の抽出完了（{len(file_data)}バイト）、サムネイル生成を開始")
                 
                 # キャンセル中の場合は処理しない
                 if self._is_cancelling:
@@ -317,6 +529,11 @@ class ThumbnailGenerator:
                     log_print(WARNING, f"ディレクトリが変更されたためサムネイル生成をスキップします: {filename}")
                     return
                 
+                # サムネイル生成を待っているファイルが多い間は抽出を止めて待つ（キャンセルされたら中止）
+                while not self._generation_slots.acquire(timeout=0.1):
+                    if generation != self._generation:
+                        return
+                
                 # ワーカータスクに明示的にファイル名をキーワード引数として渡す
                 # context_directory は渡さず、ラムダ関数で _handle_thumbnail_result に渡す
                 task_id = self.worker_manager.start_task(
@@ -325,10 +542,14 @@ class ThumbnailGenerator:
                     thumbnail_size=thumbnail_size,
                     # 重要: filenameは引数ではなくキーワード引数としてワーカーに保存
                     filename=filename,
+                    cache_key=cache_keys.get(filename),
+                    # ストアから読めなかった場合に抽出し直すためのマネージャ
+                    archive_manager=archive_manager if file_data is None else None,
                     # コールバックを渡す - context_directoryはここで利用
                     on_result=lambda task_id, result: self._handle_thumbnail_result(task_id, result, on_thumbnail_ready, filename, current_directory),
                     on_error=lambda task_id, error_info: log_print(ERROR, f"サムネイル生成エラー ({filename}): {error_info[1]}")
                 )
+                # 枠は _generate_thumbnail_from_data の終了時に返す
                 log_print(INFO, f"サムネイル生成タスク開始: {task_id} - {filename}")
             
             # すべてのファイル抽出完了時のコールバック
@@ -365,7 +586,8 @@ class ThumbnailGenerator:
                 on_file_extracted=on_file_extracted,
                 on_result=on_extraction_completed,
                 on_error=on_extraction_error,
-                is_cancelled=is_extraction_cancelled  # キャンセル確認関数を追加
+                is_cancelled=is_extraction_cancelled,  # キャンセル確認関数を追加
+                is_cached=is_cached
             )
             
             log_print(INFO, f"ファイル抽出タスク開始: {self.extraction_task_id}")
@@ -382,18 +604,25 @@ class ThumbnailGenerator:
     def _generate_thumbnail_from_data(
         self,
         filename: str,
-        file_data: bytes,
+        file_data: Optional[bytes],
         thumbnail_size: QSize,
+        cache_key: Optional[ThumbnailKey] = None,
+        archive_manager=None,
         progress_callback=None,
         is_cancelled=None
     ) -> Optional[QIcon]:
         """
         バイトデータからサムネイルを生成
         
+        サムネイルストアに保存済みならそれを使い、なければデコードしてサムネイルサイズに縮小し、
+        ストアに保存する。
+        
         Args:
             filename: ファイル名
-            file_data: 画像データのバイト列
+            file_data: 画像データのバイト列（サムネイルが保存済みで抽出を省略した場合はNone）
             thumbnail_size: サムネイルのサイズ
+            cache_key: サムネイルストアのキー（Noneならストアを使わない）
+            archive_manager: file_dataがNoneで、ストアから読めなかった場合に抽出し直すためのマネージャ
             progress_callback: 進捗通知用コールバック
             is_cancelled: キャンセル確認用関数
             
@@ -409,20 +638,30 @@ class ThumbnailGenerator:
                 log_print(INFO, f"サムネイル生成がキャンセルされました: {filename}")
                 return None
             
-            # キャッシュにあればそれを使用
-            if filename in self.thumbnail_cache:
-                if self.debug_mode:
-                    log_print(DEBUG, f"キャッシュからサムネイルを取得: {filename}")
-                return self.thumbnail_cache[filename]
+            # サムネイルストアにあればそれを使用
+            if cache_key is not None:
+                cached = self.thumbnail_store.get(cache_key)
+                if cached is not None:
+                    if self.debug_mode:
+                        log_print(DEBUG, f"サムネイルストアからサムネイルを取得: {filename}")
+                    return self._icon_from_array(cached.array, cached.pixel_format)
+            
+            # 保存済みのはずのサムネイルが読めなかった場合は抽出し直す
+            if file_data is None and archive_manager is not None:
+                file_data = archive_manager.extract_item(filename)
+            if not file_data:
+                log_print(WARNING, f"サムネイルの画像データがありません: {filename}")
+                return None
             
             # 進捗報告
             if progress_callback:
                 progress_callback(10, f"画像デコード中: {filename}")
             
-            # デコーダーでファイルをデコード
-            img_array = decode_image(filename, file_data)
+            # デコーダーでファイルをデコード（サムネイルサイズを下回らない範囲で縮小デコード）
+            decoded = self._decode_thumbnail(filename, file_data,
+                                             (thumbnail_size.width(), thumbnail_size.height()))
             
-            if img_array is None:
+            if decoded is None:
                 if self.debug_mode:
                     log_print(WARNING, f"画像のデコードに失敗: {filename}")
                 return None
@@ -436,41 +675,23 @@ class ThumbnailGenerator:
             if progress_callback:
                 progress_callback(50, f"サムネイル変換中: {filename}")
             
-            # NumPy配列からQImageを作成
-            height, width = img_array.shape[:2]
-            channels = 1 if len(img_array.shape) == 2 else img_array.shape[2]
+            # サムネイルサイズに縮小（縦横比を保つ）
+            img_array, pixel_format = decoded
+            thumb_array = self._fit_array(img_array, thumbnail_size)
             
-            if channels == 1:  # グレースケール
-                img = QImage(img_array.data, width, height, width, QImage.Format_Grayscale8)
-            elif channels == 3:  # RGB
-                img = QImage(img_array.data, width, height, width * 3, QImage.Format_RGB888)
-            elif channels == 4:  # RGBA
-                img = QImage(img_array.data, width, height, width * 4, QImage.Format_RGBA8888)
-            else:
-                if self.debug_mode:
-                    log_print(WARNING, f"サポートされていないチャンネル数: {channels}")
-                return None
-            
-            # QImageからQPixmapを作成
-            pixmap = QPixmap.fromImage(img)
-            
-            # サムネイルサイズに縮小
-            thumb = pixmap.scaled(
-                thumbnail_size.width(), 
-                thumbnail_size.height(),
-                Qt.KeepAspectRatio, 
-                Qt.SmoothTransformation
-            )
+            # サムネイルストアに保存（圧縮して保存した配列ではなく、縮小した配列をそのまま表示に使う）
+            if cache_key is not None:
+                cached = self.thumbnail_store.put(cache_key, thumb_array, pixel_format)
+                thumb_array, pixel_format = cached.array, cached.pixel_format
             
             # 進捗報告
             if progress_callback:
                 progress_callback(90, f"サムネイル完成: {filename}")
             
             # QIconを作成
-            icon = QIcon(thumb)
-            
-            # キャッシュに保存
-            self.thumbnail_cache[filename] = icon
+            icon = self._icon_from_array(thumb_array, pixel_format)
+            if icon is None:
+                return None
             
             # 処理完了のログ
             log_print(INFO, f"サムネイル生成完了: {filename}")
@@ -482,6 +703,49 @@ class ThumbnailGenerator:
             import traceback
             traceback.print_exc()
             return None
+        finally:
+            # サムネイル生成を待っているファイルの枠を返す
+            self._generation_slots.release()
+    
+    @staticmethod
+    def _fit_array(array, thumbnail_size: QSize):
+        """
+        画像配列をサムネイルサイズに収まるように拡大縮小する（縦横比を保つ）
+        
+        Args:
+            array: 画像配列
+            thumbnail_size: サムネイルのサイズ
+            
+        Returns:
+            拡大縮小した画像配列
+        """
+        height, width = array.shape[:2]
+        scale = min(thumbnail_size.width() / width, thumbnail_size.height() / height)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if size == (width, height):
+            return array
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        return cv2.resize(array, size, interpolation=interpolation)
+    
+    @staticmethod
+    def _icon_from_array(array, pixel_format: str) -> Optional[QIcon]:
+        """
+        サムネイルの画像配列からQIconを作成
+        
+        Args:
+            array: サムネイルの画像配列
+            pixel_format: 配列の画素形式（PIXEL_FORMAT_*）
+            
+        Returns:
+            作成したQIcon、失敗した場合はNone
+        """
+        # NumPy配列からQImageを作成（配列のバッファをコピーせずに参照する）
+        img = array_to_qimage(array, pixel_format)
+        if img is None:
+            return None
+        
+        # QImageからQPixmapを作成（arrayはこの変換が終わるまで参照を保持している）
+        return QIcon(QPixmap.fromImage(img))
     
     def _handle_thumbnail_result(self, task_id: str, icon: Optional[QIcon], callback: Callable, filename: str, context_directory: str):
         """
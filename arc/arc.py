@@ -43,8 +43,25 @@ class EntryInfo:
     アーカイブ内のファイル/ディレクトリの情報を表すクラス
     
     エントリの基本情報（名前、パス、種別、サイズ、更新日時）を保持します。
+    
+    エントリキャッシュには数十万件のインスタンスが保持されるため、__slots__ で
+    インスタンス辞書を持たないようにしている。また、他の属性から導出できる値は保持しない。
+    
+    - abs_path: pathと同じならNoneとして保持
+    - name_in_arc: nameと同じならNone、pathの末尾と一致すればその長さだけを保持
+    - rel_path: pathの末尾と一致すれば、その長さだけを保持
+    - attrs: 空ならNoneとして保持し、初めて参照されたときに辞書を作る
+    - name: 書庫間で重複しやすいので sys.intern で共有する
+    
+    ネスト書庫のエントリには、書庫の内容を表す cache 属性が後から設定される
+    （設定されるまでは hasattr(entry, 'cache') が False になる）。
     """
     
+    __slots__ = (
+        '_name', '_path', '_rel_path', 'type', 'size', 'modified_time', 'created_time',
+        'is_hidden', '_name_in_arc', '_attrs', '_abs_path', 'status', 'cache',
+    )
+    
     def __init__(self, 
                  name: str,
                  path: str = "",  # path を非必須に変更
@@ -76,19 +93,118 @@ class EntryInfo:
             abs_path: 絶対パス（指定がなければpathが使用される）
             status: エントリの状態（READY, BROKEN, SCANNING）
         """
-        self.name = name
-        self.path = path
+        self._name = sys.intern(name) if isinstance(name, str) else name
+        self._path = path
         # rel_pathをそのまま使用（pathで置き換える処理を撤廃）
-        self.rel_path = rel_path
+        self._rel_path = self._pack_suffix(path, rel_path)
         self.type = type
         self.size = size
         self.modified_time = modified_time
         self.created_time = created_time
         self.is_hidden = is_hidden
-        self.name_in_arc = name if name_in_arc is None else name_in_arc  # None の場合のみ name を使用
-        self.attrs = attrs or {}
-        self.abs_path = abs_path if abs_path else path
+        # None の場合のみ name を使用（nameと同じ値は保持しない）
+        self._name_in_arc = None if name_in_arc is None or name_in_arc == name \
+            else self._pack_suffix(path, name_in_arc)
+        self._attrs = attrs or None
+        self._abs_path = abs_path if abs_path and abs_path != path else None
         self.status = status
+    
+    @staticmethod
+    def _pack_suffix(path: str, value: Optional[str]):
+        """
+        pathの末尾と一致しやすい文字列を保持用の値に変換する
+        
+        Args:
+            path: エントリのパス
+            value: 変換する文字列（rel_pathまたはname_in_arc）
+            
+        Returns:
+            pathの末尾と一致すればその長さ（int）、それ以外はvalueそのもの
+        """
+        if value and isinstance(path, str) and path.endswith(value):
+            return len(value)
+        return value
+    
+    def _unpack_suffix(self, value):
+        """_pack_suffixで変換した値を文字列に戻す"""
+        if value.__class__ is int:
+            return self._path[-value:]
+        return value
+    
+    @property
+    def name(self) -> str:
+        """エントリ名（ファイル名またはディレクトリ名）"""
+        return self._name
+    
+    @name.setter
+    def name(self, value: str) -> None:
+        name_in_arc = self.name_in_arc
+        self._name = sys.intern(value) if isinstance(value, str) else value
+        self.name_in_arc = name_in_arc
+    
+    @property
+    def path(self) -> str:
+        """エントリのパス"""
+        return self._path
+    
+    @path.setter
+    def path(self, value: str) -> None:
+        # pathから導出している値は、変更前のpathで確定させてから付け替える
+        rel_path = self.rel_path
+        abs_path = self.abs_path
+        name_in_arc = self.name_in_arc
+        self._path = value
+        self.rel_path = rel_path
+        self.abs_path = abs_path
+        self.name_in_arc = name_in_arc
+    
+    @property
+    def rel_path(self) -> Optional[str]:
+        """基準ディレクトリからの相対パス"""
+        rel_path = self._rel_path
+        if rel_path.__class__ is int:
+            return self._path[-rel_path:]
+        return rel_path
+    
+    @rel_path.setter
+    def rel_path(self, value: Optional[str]) -> None:
+        self._rel_path = self._pack_suffix(self._path, value)
+    
+    @property
+    def abs_path(self) -> str:
+        """絶対パス"""
+        return self._path if self._abs_path is None else self._abs_path
+    
+    @abs_path.setter
+    def abs_path(self, value: str) -> None:
+        self._abs_path = None if value == self._path else value
+    
+    @property
+    def name_in_arc(self) -> str:
+        """アーカイブ内での名前"""
+        if self._name_in_arc is None:
+            return self._name
+        return self._unpack_suffix(self._name_in_arc)
+    
+    @name_in_arc.setter
+    def name_in_arc(self, value: str) -> None:
+        self._name_in_arc = None if value == self._name else self._pack_suffix(self._path, value)
+    
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        """その他の属性（初めて参照されたときに空の辞書を作る）"""
+        if self._attrs is None:
+            self._attrs = {}
+        return self._attrs
+    
+    @attrs.setter
+    def attrs(self, value: Optional[Dict[str, Any]]) -> None:
+        self._attrs = value or None
+    
+    @property
+    def has_attrs(self) -> bool:
+        """その他の属性を持つかどうか（空の辞書を作らずに判定する）"""
+        return bool(self._attrs)
 
 # ArchiveManager クラスの宣言 (循環インポートを避けるため)
 class ArchiveManager:
@@ -6,12 +6,15 @@ import os
 from typing import List, Optional, Dict
 import re
 from arc.manager.enhanced import EnhancedArchiveManager
-from arc.arc import EntryInfo, EntryType
+from arc.arc import EntryInfo, EntryType, EntryStatus
 
 class ArchiveBrowser:
     """
     ブラウジングモジュール
     フォルダ/書庫内のディレクトリを横断してファイルエントリを返す
+    
+    未展開（SCANNING）のネスト書庫は仮のエントリとしてリストに置いておき、
+    ナビゲーションがその付近に来た時点で展開して中のファイルに置き換える。
     """
     
     def __init__(self, manager: EnhancedArchiveManager, path: str = "", exts: List[str] = None, pages: int = 1, shift: bool = False):
@@ -38,6 +41,8 @@ class ArchiveBrowser:
         self._folder_indices = {}  # フォルダごとの開始インデックスを記録
         self._pages = pages  # ページ数を設定
         self._shift = shift  # シフトフラグを設定
+        self._exts = []  # 正規化された対象拡張子リスト
+        self._pending = set()  # 未展開のネスト書庫（仮のエントリ）のパス
         
         # デバッグ情報追加
         cache = manager.get_entry_cache()
@@ -75,6 +80,7 @@ class ArchiveBrowser:
                 else:
                     normalized_ext = ext.lower()
                 normalized_exts.append(normalized_ext)
+        self._exts = normalized_exts
         
         print(f"正規化された拡張子リスト: {normalized_exts}")
         
@@ -83,29 +89,177 @@ class ArchiveBrowser:
             # ファイルエントリの場合のみ処理
             if entry.type == EntryType.FILE:
                 # 拡張子条件を満たすものだけを抽出
-                if not normalized_exts:
-                    # 拡張子リストが空または指定なしの場合は全ファイルを対象とする
+                if self._match_ext(path):
                     self._entries.append(path)
-                else:
-                    # ファイル拡張子を取得して小文字化
-                    _, ext = os.path.splitext(path.lower())
-                    # 拡張子リストに含まれるかチェック - 大文字小文字を区別しない比較
-                    if ext.lower() in normalized_exts:
-                        self._entries.append(path)
+            elif entry.type == EntryType.ARCHIVE and entry.status == EntryStatus.SCANNING:
+                # 未展開のネスト書庫は仮のエントリとして置いておく
+                self._entries.append(path)
+                self._pending.add(path)
+        
+        # 展開途中の書庫の中身が取得されていれば除外する（展開時にまとめて取得し直す）
+        if self._pending:
+            self._entries = [path for path in self._entries if not self._is_under_pending(path)]
         
-        print(f"収集されたエントリ数: {len(self._entries)}")
+        print(f"収集されたエントリ数: {len(self._entries)} (未展開の書庫: {len(self._pending)})")
         
         # 自然順ソート (数字を考慮したソート)
         self._entries = self._natural_sort(self._entries)
         
         # フォルダごとのインデックスを記録
+        self._rebuild_folder_indices()
+    
+    def _match_ext(self, path: str) -> bool:
+        """
+        パスが対象拡張子に該当するかどうか
+        
+        Args:
+            path: 判定するパス
+            
+        Returns:
+            拡張子リストが空か、リストに含まれる拡張子ならTrue
+        """
+        if not self._exts:
+            # 拡張子リストが空または指定なしの場合は全ファイルを対象とする
+            return True
+        # ファイル拡張子を取得して小文字化 - 大文字小文字を区別しない比較
+        _, ext = os.path.splitext(path.lower())
+        return ext in self._exts
+    
+    def _is_under_pending(self, path: str) -> bool:
+        """
+        パスが未展開の書庫の中にあるかどうか
+        
+        Args:
+            path: 判定するパス
+            
+        Returns:
+            いずれかの未展開の書庫の中にあればTrue
+        """
+        pos = path.find('/')
+        while pos >= 0:
+            if path[:pos] in self._pending:
+                return True
+            pos = path.find('/', pos + 1)
+        return False
+    
+    def _rebuild_folder_indices(self):
+        """フォルダごとの開始インデックスを作り直す"""
+        self._folder_indices = {}
         current_folder = None
         for i, entry in enumerate(self._entries):
-            folder = os.path.dirname(entry)
+            folder = self._folder_of(entry)
             if folder != current_folder:
                 current_folder = folder
                 self._folder_indices[folder] = i
     
+    def _folder_of(self, path: str) -> str:
+        """
+        エントリが属するフォルダを返す
+        
+        未展開の書庫は、展開後に中のファイルが属するフォルダとして書庫自身を返す
+        
+        Args:
+            path: エントリのパス
+            
+        Returns:
+            フォルダのパス
+        """
+        if path in self._pending:
+            return path
+        return os.path.dirname(path)
+    
+    def _collect_archive_files(self, path: str, result: List[str]):
+        """
+        書庫またはディレクトリ配下のファイルエントリを再帰的に集める
+        
+        未展開の書庫はマネージャーに展開させる。さらに中にある未展開の書庫は
+        展開せずに仮のエントリとして追加する。
+        
+        Args:
+            path: 書庫またはディレクトリのパス
+            result: エントリを追加するリスト
+        """
+        try:
+            children = self._manager.list_entries(path)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"書庫の展開に失敗しました: {path} - {e}")
+            return
+        for child in children:
+            child_path = child.rel_path.rstrip('/')
+            if child.type == EntryType.FILE:
+                if self._match_ext(child_path):
+                    result.append(child_path)
+            elif child.type == EntryType.ARCHIVE and child.status == EntryStatus.SCANNING:
+                result.append(child_path)
+                self._pending.add(child_path)
+            elif child.type in (EntryType.DIRECTORY, EntryType.ARCHIVE):
+                self._collect_archive_files(child_path, result)
+    
+    def _expand_pending(self, idx: int) -> int:
+        """
+        指定位置の未展開の書庫を展開し、中のファイルエントリに置き換える
+        
+        Args:
+            idx: 未展開の書庫のインデックス
+            
+        Returns:
+            置き換えたエントリ数（空の書庫なら0）
+        """
+        path = self._entries[idx]
+        self._pending.discard(path)
+        files = []
+        self._collect_archive_files(path, files)
+        files = self._natural_sort(files)
+        self._entries[idx:idx + 1] = files
+        
+        # カレント位置を補正（展開した書庫の位置なら、その先頭のまま）
+        if idx < self._current_idx:
+            self._current_idx += len(files) - 1
+        if self._current_idx >= len(self._entries):
+            self._current_idx = 0
+        self._rebuild_folder_indices()
+        print(f"書庫を展開しました: {path} ({len(files)} エントリ)")
+        return len(files)
+    
+    def _load_around(self, before: int, after: int) -> bool:
+        """
+        カレント位置の前後にある未展開の書庫を展開する
+        
+        Args:
+            before: カレント位置より前に確認するエントリ数
+            after: カレント位置より後に確認するエントリ数
+            
+        Returns:
+            展開後にエントリが残っていればTrue
+        """
+        while self._pending and self._entries:
+            count = len(self._entries)
+            for offset in range(-before, after + 1):
+                idx = (self._current_idx + offset) % count
+                if self._entries[idx] in self._pending:
+                    self._expand_pending(idx)
+                    break
+            else:
+                break
+        return bool(self._entries)
+    
+    def _load_path(self, path: str):
+        """
+        パスを含む未展開の書庫を展開する
+        
+        Args:
+            path: 末尾の/を除いたパス
+        """
+        while self._pending:
+            target = None
+            for idx, entry in enumerate(self._entries):
+                if entry in self._pending and (path == entry or path.startswith(entry + '/')):
+                    target = idx
+                    break
+            if target is None:
+                return
+            self._expand_pending(target)
+    
     def _natural_sort(self, entries: List[str]) -> List[str]:
         """
         自然順ソート (2020/2/8が2020/10/10より前に来るようにする)
@@ -131,7 +285,7 @@ class ArchiveBrowser:
         Returns:
             現在のフォルダパス
         """
-        return os.path.dirname(self._entries[self._current_idx])
+        return self._folder_of(self._entries[self._current_idx])
     
     def next(self) -> str:
         """
@@ -141,7 +295,7 @@ class ArchiveBrowser:
         Returns:
             移動後のエントリパス
         """
-        if not self._entries:
+        if not self._load_around(0, self._pages):
             return ""
             
         current_folder = self._get_current_folder()
@@ -151,15 +305,18 @@ class ArchiveBrowser:
         for _ in range(self._pages):
             target_idx = (target_idx + 1) % len(self._entries)
             # フォルダをまたいだかチェック
-            if os.path.dirname(self._entries[target_idx]) != current_folder:
+            if self._folder_of(self._entries[target_idx]) != current_folder:
                 # 新しいフォルダの先頭に移動
-                next_folder = os.path.dirname(self._entries[target_idx])
+                next_folder = self._folder_of(self._entries[target_idx])
                 # self._folder_indicesにフォルダ先頭のインデックスが記録されている場合はそれを使用
                 if next_folder in self._folder_indices:
                     target_idx = self._folder_indices[next_folder]
                 break
         
         self._current_idx = target_idx
+        # 移動先が未展開の書庫なら展開して、その先頭に移動する
+        if not self._load_around(0, self._pages):
+            return ""
         return self._entries[self._current_idx]
     
     def prev(self) -> str:
@@ -174,7 +331,7 @@ class ArchiveBrowser:
         Returns:
             移動後のエントリパス
         """
-        if not self._entries:
+        if not self._load_around(2, 0):
             return ""
             
         # 現在のフォルダを取得
@@ -192,16 +349,16 @@ class ArchiveBrowser:
         two_prev_idx = (self._current_idx - 2) % len(self._entries)
         
         # フォルダ情報を取得
-        one_prev_folder = os.path.dirname(self._entries[one_prev_idx])
+        one_prev_folder = self._folder_of(self._entries[one_prev_idx])
         
         # 2つ前と1つ前が現在のフォルダと同じ場合
-        if one_prev_folder == current_folder and os.path.dirname(self._entries[two_prev_idx]) == current_folder:
+        if one_prev_folder == current_folder and self._folder_of(self._entries[two_prev_idx]) == current_folder:
             # 2つ前に移動
             self._current_idx = two_prev_idx
             return self._entries[self._current_idx]
         
         # 2つ前と1つ前のフォルダが異なる場合
-        if os.path.dirname(self._entries[two_prev_idx]) != one_prev_folder:
+        if self._folder_of(self._entries[two_prev_idx]) != one_prev_folder:
             # 1つ前に移動
             self._current_idx = one_prev_idx
             return self._entries[self._current_idx]
@@ -209,11 +366,11 @@ class ArchiveBrowser:
         # 前2つが同一の別フォルダの場合
         # そのフォルダのファイル数をカウント
         folder_start_idx = one_prev_idx
-        while folder_start_idx > 0 and os.path.dirname(self._entries[folder_start_idx - 1]) == one_prev_folder:
+        while folder_start_idx > 0 and self._folder_of(self._entries[folder_start_idx - 1]) == one_prev_folder:
             folder_start_idx -= 1
             
         folder_end_idx = one_prev_idx
-        while (folder_end_idx + 1) < len(self._entries) and os.path.dirname(self._entries[folder_end_idx + 1]) == one_prev_folder:
+        while (folder_end_idx + 1) < len(self._entries) and self._folder_of(self._entries[folder_end_idx + 1]) == one_prev_folder:
             folder_end_idx += 1
             
         folder_files_count = folder_end_idx - folder_start_idx + 1
@@ -236,13 +393,17 @@ class ArchiveBrowser:
         """
         current_folder = self._get_current_folder()
         for i in range(self._current_idx + 1, len(self._entries)):
-            folder = os.path.dirname(self._entries[i])
+            folder = self._folder_of(self._entries[i])
             if folder != current_folder:
                 self._current_idx = i
-                return self._entries[self._current_idx]
-                
-        # 最後まで行ったら先頭フォルダの先頭へ
-        self._current_idx = 0
+                break
+        else:
+            # 最後まで行ったら先頭フォルダの先頭へ
+            self._current_idx = 0
+        
+        # 移動先が未展開の書庫なら展開して、その先頭に移動する
+        if not self._load_around(0, self._pages):
+            return ""
         return self._entries[self._current_idx]
     
     def prev_folder(self) -> str:
@@ -269,7 +430,7 @@ class ArchiveBrowser:
         """
         current_folder = self._get_current_folder()
         for i in range(len(self._entries)):
-            if os.path.dirname(self._entries[i]) == current_folder:
+            if self._folder_of(self._entries[i]) == current_folder:
                 self._current_idx = i
                 return self._entries[self._current_idx]
                 
@@ -298,6 +459,8 @@ class ArchiveBrowser:
             移動後のエントリパス
         """
         self._current_idx = 0
+        if not self._load_around(0, self._pages):
+            return ""
         return self._entries[self._current_idx]
     
     def go_last(self) -> str:
@@ -334,6 +497,9 @@ class ArchiveBrowser:
         # パスから末尾の/を削除
         clean_path = path.rstrip('/')
         
+        # パスを含む未展開の書庫があれば先に展開する
+        self._load_path(clean_path)
+        
         # 1. 完全一致を検索
         for i, entry in enumerate(self._entries):
             if entry == path or entry == clean_path:
@@ -376,7 +542,8 @@ class ArchiveBrowser:
         Returns:
             パスのリスト（1つまたは2つ）
         """
-        if not self._entries:
+        # 表示するエントリに未展開の書庫があれば展開する
+        if not self._load_around(1, self._pages):
             return []
             
         # pagesが1なら現在のパスだけのリストを返して終了
@@ -388,7 +555,7 @@ class ArchiveBrowser:
         
         # フォルダの先頭位置を特定
         folder_start_idx = self._current_idx
-        while folder_start_idx > 0 and os.path.dirname(self._entries[folder_start_idx - 1]) == current_folder:
+        while folder_start_idx > 0 and self._folder_of(self._entries[folder_start_idx - 1]) == current_folder:
             folder_start_idx -= 1
         
         # フォルダの末尾かどうかを判定
@@ -398,7 +565,7 @@ class ArchiveBrowser:
             is_folder_end = True
         else:
             # 次のエントリが異なるフォルダならフォルダの末尾
-            next_folder = os.path.dirname(self._entries[self._current_idx + 1])
+            next_folder = self._folder_of(self._entries[self._current_idx + 1])
             is_folder_end = (next_folder != current_folder)
         
         # フォルダ内での相対位置（0起点）
@@ -427,4 +594,37 @@ class ArchiveBrowser:
         
         # 現在のパスと次のパスのリストを返す
         return [self._entries[display_idx], self._entries[next_idx]]
-
+    
+    def peek(self, count: int, forward: bool = True) -> List[str]:
+        """
+        カレント位置を動かさずに、進む方向にある近いエントリを返す（先読み用）
+        
+        見開き（pagesが2）の場合は count 回分の移動で表示されるページ数（count * 2）を返す。
+        次の方向では、表示中のもう1ページ（カレント位置の次）も先頭に含める。
+        フォルダの境界では next/prev と同じく隣のフォルダに続けて進む。
+        未展開の書庫は展開せずに飛ばす（展開は実際に移動したときに行う）。
+        
+        Args:
+            count: 先読みする移動回数
+            forward: Trueなら次の方向、Falseなら前の方向
+            
+        Returns:
+            カレント位置に近い順のパスのリスト（カレント位置のエントリは含まない）
+        """
+        if not self._entries or count <= 0:
+            return []
+        
+        step = 1 if forward else -1
+        limit = count * self._pages
+        if forward:
+            # 見開きでは表示中のもう1ページがカレント位置の次にあるため、その分も数える
+            limit += self._pages - 1
+        limit = min(limit, len(self._entries) - 1)
+        result = []
+        for offset in range(1, len(self._entries)):
+            if len(result) >= limit:
+                break
+            path = self._entries[(self._current_idx + offset * step) % len(self._entries)]
+            if path not in self._pending:
+                result.append(path)
+        return result
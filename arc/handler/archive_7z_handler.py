@@ -9,12 +9,16 @@ import os
 import datetime
 import tempfile
 import shutil
-from typing import List, Optional, Dict, Any, BinaryIO, Tuple, Set
+from typing import List, Optional, Dict, Any, BinaryIO, Tuple, Set, Iterable, Iterator, Union
 
-from ..arc import ArchiveHandler, EntryInfo, EntryType
+from ..arc import EntryInfo, EntryType
+from .handler import ArchiveHandler
 from .archive_utils import (
-    find_executable, parse_7z_list_output, build_structure_from_files, run_command
+    find_executable, parse_7z_list_output, parse_7z_slt_output, build_structure_from_files,
+    run_command, run_command_binary
 )
+from .handle_pool import file_key as pool_file_key
+from .member_cache import MemberCache
 
 
 class Archive7zHandler(ArchiveHandler):
@@ -36,8 +40,27 @@ class Archive7zHandler(ArchiveHandler):
     # パイプモードをサポートするアーカイブ形式
     PIPE_SUPPORTED_FORMATS = ['.7z', '.gz', '.gzip']
     
+    # よく使われるアーカイブ形式のシグネチャ
+    ARCHIVE_SIGNATURES = {
+        b'PK\x03\x04': '.zip',    # ZIP
+        b'Rar!\x1a\x07': '.rar',  # RAR
+        b'7z\xbc\xaf\x27\x1c': '.7z',  # 7z
+        b'\x1f\x8b': '.gz',        # gzip
+        b'BZh': '.bz2',           # bzip2
+    }
+    
+    # 1回の7z起動でまとめて展開するメンバー数（要求されたファイル＋先読み分）
+    READAHEAD_COUNT = 32
+    # 展開済みメンバーを保持するキャッシュの上限バイト数
+    MEMBER_CACHE_BYTES = 256 * 1024 * 1024
+    
     def __init__(self):
         """アーカイブハンドラを初期化する"""
+        super().__init__()
+        # 展開済みメンバーのキャッシュと書庫ごとのメンバー一覧（書庫内の格納順）
+        self._member_cache = MemberCache(self.MEMBER_CACHE_BYTES)
+        self._member_lists: Dict[Tuple[str, int, int], List[str]] = {}
+        
         # 7-Zipの実行パスを検索
         self.seven_zip_path = self._find_7z_executable()
         if not self.seven_zip_path:
@@ -148,18 +171,8 @@ class Archive7zHandler(ArchiveHandler):
         if not data:
             return False
             
-        # バイトデータの場合は簡易的なシグネチャチェックを行う
-        # よく使われるアーカイブ形式のシグネチャ
-        signatures = {
-            b'PK\x03\x04': '.zip',    # ZIP
-            b'Rar!\x1a\x07': '.rar',  # RAR
-            b'7z\xbc\xaf\x27\x1c': '.7z',  # 7z
-            b'\x1f\x8b': '.gz',        # gzip
-            b'BZh': '.bz2',           # bzip2
-        }
-        
-        # 最初の数バイトをチェック
-        for sig, ext in signatures.items():
+        # バイトデータの場合は最初の数バイトで簡易的なシグネチャチェックを行う
+        for sig, ext in self.ARCHIVE_SIGNATURES.items():
             if data.startswith(sig) and ext in self._supported_formats:
                 return True
                 
@@ -766,6 +779,24 @@ class Archive7zHandler(ArchiveHandler):
         
         print(f"Archive7zHandler: アーカイブ内ファイル読み込み: {archive_path} -> {file_path}")
         
+        # まとめて展開したメンバーのキャッシュから読み込む
+        # キャッシュにない場合は後続のメンバーも含めて1回の7z起動で展開する
+        member = file_path.replace('\\', '/')
+        try:
+            archive_key = pool_file_key(archive_path)
+            content = self._member_cache.get(archive_key, member)
+            if content is not None:
+                print(f"Archive7zHandler: 展開済みキャッシュから読み込み: {member}")
+                return content
+            
+            batch = self._plan_readahead(archive_path, archive_key, member)
+            results = self.read_many(archive_path, batch)
+            if member in results:
+                print(f"Archive7zHandler: 一括展開で読み込み: {member} (同時展開 {len(results)} 件)")
+                return results[member]
+        except Exception as e:
+            print(f"Archive7zHandler: 一括展開で例外発生: {str(e)}")
+        
         # 直接7zコマンドでファイルを抽出できるか試みる
         try:
             # パスの正規化
@@ -775,13 +806,10 @@ class Archive7zHandler(ArchiveHandler):
             print(f"Archive7zHandler: 7zで直接ファイルを抽出: {file_path_for_cmd}")
             print(f"実行コマンド: {' '.join(cmd)}")
             
-            retcode, stdout, stderr = run_command(cmd)
+            # 標準出力はバイナリのまま受け取る（テキストとしてデコードすると内容が壊れる）
+            retcode, stdout, stderr = run_command_binary(cmd)
             
             if retcode == 0 and stdout:
-                # stdout が文字列なら、バイト配列に変換
-                if isinstance(stdout, str):
-                    stdout = stdout.encode('utf-8')
-                
                 print(f"Archive7zHandler: 直接抽出に成功: {len(stdout)}バイト")
                 return stdout
             else:
@@ -815,6 +843,193 @@ class Archive7zHandler(ArchiveHandler):
             print(f"Archive7zHandler: ファイル読み込みエラー: {str(e)}")
             return None
 
+    def read_many(self, archive_path: str, file_paths: List[str]) -> Dict[str, bytes]:
+        """
+        アーカイブ内の複数のファイルを1回の7z起動でまとめて読み込む
+        
+        ソリッド書庫でもブロックの展開が1回で済む。読み込んだ内容は
+        メンバーキャッシュに登録され、以降の read_archive_file はキャッシュから返される。
+        
+        Args:
+            archive_path: アーカイブファイルのパス
+            file_paths: アーカイブ内のファイルパスのリスト
+            
+        Returns:
+            書庫内パスをキー、内容を値とする辞書（読み込めなかったファイルは含まれない）
+        """
+        if not self.seven_zip_path:
+            return {}
+        
+        archive_key = pool_file_key(archive_path)
+        result: Dict[str, bytes] = {}
+        missing: List[str] = []
+        
+        # キャッシュ済みのものを先に集める
+        for path in file_paths:
+            member = path.replace('\\', '/')
+            content = self._member_cache.get(archive_key, member)
+            if content is not None:
+                result[member] = content
+            elif member not in missing:
+                missing.append(member)
+        
+        if missing:
+            extracted = self._extract_members(archive_path, missing)
+            for member, content in extracted.items():
+                self._member_cache.put(archive_key, member, content)
+                result[member] = content
+        
+        return result
+    
+    def read_files(self, archive: Union[str, bytes], file_paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """
+        アーカイブ内の複数のファイルを1回の7z起動で展開し、格納順に返す
+        
+        メモリ上の書庫データは一時ファイルに1回だけ書き出してから展開する。
+        
+        Args:
+            archive: アーカイブファイルのパス、またはアーカイブデータのバイト配列
+            file_paths: アーカイブ内のファイルパスのリスト
+            
+        Yields:
+            (書庫内パス, 内容) のタプル。読み込めなかったファイルは返さない
+        """
+        if not self.seven_zip_path:
+            return
+        
+        members = list(dict.fromkeys(p.replace('\\', '/') for p in file_paths))
+        if isinstance(archive, str):
+            contents = self.read_many(archive, members)
+            order = self._get_member_list(archive, pool_file_key(archive))
+        else:
+            # 一時ファイルの拡張子は渡されたデータのシグネチャから決める（他の呼び出しの状態は使わない）
+            ext = next((e for sig, e in self.ARCHIVE_SIGNATURES.items() if archive.startswith(sig)), '.7z')
+            temp_file = self.save_to_temp_file(bytes(archive), ext)
+            if not temp_file:
+                print(f"Archive7zHandler: 一時ファイルの作成に失敗: メモリ上の書庫 ({len(archive)} バイト, {ext})")
+                return
+            try:
+                contents = self._extract_members(temp_file, members)
+                order = []
+            finally:
+                try:
+                    os.unlink(temp_file)
+                except OSError:
+                    pass
+        
+        # 格納順が分かればその順で、分からなければ要求順で返す
+        position = {member: i for i, member in enumerate(order)}
+        members.sort(key=lambda m: position.get(m, len(position)))
+        for member in members:
+            if member in contents:
+                yield member, contents.pop(member)
+    
+    def _extract_members(self, archive_path: str, members: List[str]) -> Dict[str, bytes]:
+        """
+        指定したメンバーを1回の7z起動で一時ディレクトリに展開して読み込む
+        
+        Args:
+            archive_path: アーカイブファイルのパス
+            members: 展開する書庫内パスのリスト
+            
+        Returns:
+            書庫内パスをキー、内容を値とする辞書
+        """
+        result: Dict[str, bytes] = {}
+        extract_dir = tempfile.mkdtemp(prefix="7z_batch_", dir=self._cache_dir)
+        list_fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="7z_list_", dir=self._cache_dir)
+        try:
+            # 展開対象はリストファイルで渡す（コマンドライン長の制限を避ける）
+            with os.fdopen(list_fd, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(members))
+            
+            # -spd: ファイル名のワイルドカード解釈を無効化, -scsUTF-8: リストファイルの文字コード
+            cmd = [self.seven_zip_path, "x", "-y", "-spd", "-scsUTF-8", f"-o{extract_dir}",
+                   archive_path, f"@{list_path}"]
+            print(f"Archive7zHandler: {len(members)} 件のメンバーを一括展開: {archive_path}")
+            retcode, _, stderr = run_command_binary(cmd)
+            
+            # 終了コード1は警告（一部のファイルのみ失敗）なので、展開できた分は使う
+            if retcode not in (0, 1):
+                print(f"Archive7zHandler: 一括展開エラー (コード={retcode}): {stderr.decode('utf-8', errors='replace')}")
+            
+            for member in members:
+                extracted_path = os.path.join(extract_dir, member.replace('/', os.sep))
+                if os.path.isfile(extracted_path):
+                    with open(extracted_path, 'rb') as f:
+                        result[member] = f.read()
+            
+            print(f"Archive7zHandler: 一括展開完了: {len(result)}/{len(members)} 件")
+            return result
+        finally:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+            try:
+                os.unlink(list_path)
+            except OSError:
+                pass
+    
+    def _get_member_list(self, archive_path: str, archive_key: Tuple[str, int, int]) -> List[str]:
+        """
+        アーカイブ内のファイル一覧を格納順で取得する（先読み対象の決定に使用）
+        
+        Args:
+            archive_path: アーカイブファイルのパス
+            archive_key: アーカイブのキー（パス・更新日時・サイズ）
+            
+        Returns:
+            ファイルの書庫内パスのリスト（ディレクトリは含まない）
+        """
+        if archive_key in self._member_lists:
+            return self._member_lists[archive_key]
+        
+        members: List[str] = []
+        cmd = [self.seven_zip_path, "l", "-slt", "-sccUTF-8", archive_path]
+        retcode, stdout, stderr = run_command_binary(cmd)
+        if retcode == 0:
+            for record in parse_7z_slt_output(stdout.decode('utf-8', errors='replace')):
+                path = record.get('Path', '')
+                if not path or record.get('Folder') == '+' or record.get('Attributes', '').startswith('D'):
+                    continue
+                members.append(path.replace('\\', '/'))
+        else:
+            print(f"Archive7zHandler: メンバー一覧の取得に失敗: {stderr.decode('utf-8', errors='replace')}")
+        
+        self._member_lists[archive_key] = members
+        return members
+    
+    def _plan_readahead(self, archive_path: str, archive_key: Tuple[str, int, int], member: str) -> List[str]:
+        """
+        要求されたメンバーと、格納順で後に続く未キャッシュのメンバーを展開対象として選ぶ
+        
+        ビューアはページを順に読むため、後続のメンバーを同じ7z起動で展開しておく。
+        
+        Args:
+            archive_path: アーカイブファイルのパス
+            archive_key: アーカイブのキー
+            member: 要求された書庫内パス
+            
+        Returns:
+            展開対象の書庫内パスのリスト（先頭は要求されたメンバー）
+        """
+        batch = [member]
+        members = self._get_member_list(archive_path, archive_key)
+        try:
+            start = members.index(member) + 1
+        except ValueError:
+            return batch
+        
+        for candidate in members[start:]:
+            if len(batch) >= self.READAHEAD_COUNT:
+                break
+            if not self._member_cache.contains(archive_key, candidate):
+                batch.append(candidate)
+        return batch
+    
+    def close_handles(self) -> None:
+        """展開済みメンバーのキャッシュとメンバー一覧を破棄する"""
+        self._member_cache.clear()
+        self._member_lists.clear()
+
     def get_stream(self, path: str) -> Optional[BinaryIO]:
         """
         指定されたパスのファイルのストリームを取得する
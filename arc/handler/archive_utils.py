@@ -339,6 +339,50 @@ def _parse_7z_list_output_legacy(output: str) -> List[str]:
     return files
 
 
+def parse_7z_slt_output(output: str) -> List[Dict[str, str]]:
+    """
+    7zの`l -slt`（技術情報形式）の出力を解析する
+    
+    区切り線（----------）以降の「キー = 値」のブロックを、書庫内の格納順に返す。
+    
+    Args:
+        output: 7zコマンド出力のテキスト
+        
+    Returns:
+        エントリごとの属性辞書（'Path', 'Size', 'Folder', 'Attributes' など）のリスト
+    """
+    records = []
+    current: Dict[str, str] = {}
+    in_entries = False
+    
+    for line in output.splitlines():
+        line = line.rstrip('\r')
+        if not in_entries:
+            # 書庫自体の情報（ヘッダ部）は読み飛ばす
+            if line.startswith('----------'):
+                in_entries = True
+            continue
+        
+        if not line.strip():
+            # 空行でブロックが終わる
+            if current:
+                records.append(current)
+                current = {}
+            continue
+        
+        key, sep, value = line.partition(' = ')
+        if sep:
+            current[key.strip()] = value
+        elif line.endswith(' ='):
+            # 値が空のキー
+            current[line[:-2].strip()] = ""
+    
+    if current:
+        records.append(current)
+    
+    return records
+
+
 def build_structure_from_files(file_paths: List[str], remove_common_prefix: bool = False, flat_mode: bool = False) -> Dict[str, Dict]:
     """
     ファイルパスのリストからディレクトリ構造を構築する
@@ -0,0 +1,135 @@
+"""
+書庫データビュー
+
+ネスト書庫の内容を、bytesにコピーせずにハンドラへ渡すための読み取り専用ビュー。
+実体はメモリ上のバイト列・一時ファイル・物理ファイルの一部範囲のいずれでもよく、
+ハンドラは open() で得たシーク可能なストリームから必要な部分だけを読み込む。
+"""
+
+import io
+from typing import Optional, Tuple
+
+
+class ArchiveView:
+    """
+    書庫データの読み取り専用ビューの基底クラス
+
+    サブクラスは __len__ と read_at を実装する。
+    bytesの代わりに read_file_from_bytes などへ渡せるよう、
+    ハンドラが使う startswith などの最小限のメソッドを提供する。
+    """
+
+    def __len__(self) -> int:
+        """データのサイズ（バイト）"""
+        raise NotImplementedError
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """
+        指定した位置からデータを読み込む
+
+        Args:
+            offset: ビュー先頭からのオフセット
+            size: 読み込むバイト数
+
+        Returns:
+            読み込んだデータ（末尾を超える部分は切り詰められる）
+        """
+        raise NotImplementedError
+
+    def file_range(self) -> Optional[Tuple[str, int, int]]:
+        """
+        ビューの実体が物理ファイルの一部であればその範囲を返す
+
+        Returns:
+            (ファイルパス, オフセット, サイズ) のタプル。メモリ上のデータの場合はNone
+        """
+        return None
+
+    def startswith(self, prefix: bytes) -> bool:
+        """
+        データが指定したバイト列で始まるかどうか（シグネチャ判定用）
+
+        Args:
+            prefix: 比較するバイト列
+
+        Returns:
+            一致する場合はTrue
+        """
+        return self.read_at(0, len(prefix)) == prefix
+
+    def tobytes(self) -> bytes:
+        """
+        データ全体をbytesとして取得する（ビュー非対応の処理に渡す場合のみ使う）
+
+        Returns:
+            データ全体のコピー
+        """
+        return self.read_at(0, len(self))
+
+    def open(self) -> "ArchiveViewReader":
+        """
+        シーク可能な読み取りストリームを開く
+
+        Returns:
+            ビューを読み込むファイルライクオブジェクト
+        """
+        return ArchiveViewReader(self)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class ArchiveViewReader(io.RawIOBase):
+    """
+    ArchiveViewをファイルとして読むためのストリーム
+
+    zipfile.ZipFile などファイルオブジェクトを受け取る処理に渡す。
+    読み込みのたびに必要な範囲だけをビューから取り出す。
+    """
+
+    def __init__(self, view: ArchiveView):
+        super().__init__()
+        self._view = view
+        self._size = len(view)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"不正なwhence: {whence}")
+        if pos < 0:
+            raise ValueError(f"負の位置にはシークできません: {pos}")
+        self._pos = pos
+        return pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._size - self._pos
+        if size <= 0 or self._pos >= self._size:
+            return b""
+        data = self._view.read_at(self._pos, size)
+        self._pos += len(data)
+        return data
+
+    def readall(self) -> bytes:
+        return self.read(-1)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        return n
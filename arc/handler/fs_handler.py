@@ -301,21 +301,20 @@ class FileSystemHandler(ArchiveHandler):
             self.debug_error(f"エントリ情報取得エラー: {abs_path}, {e}")
             return None
     
-    def read_archive_file(self, archive_path: str, file_path: str) -> Optional[bytes]:
+    def _resolve_file_path(self, archive_path: str, file_path: str) -> str:
         """
-        ファイルシステム上のファイルを読み込む
+        read_archive_file / open_archive_file の引数から読み込むファイルの絶対パスを求める
         
         Args:
             archive_path: ファイルまたはディレクトリのパス
-            file_path: サブパス (空の場合はarchive_path自体を読み込む)
+            file_path: サブパス (空の場合はarchive_path自体)
             
         Returns:
-            ファイルの内容。読み込みに失敗した場合はNone
+            ファイルの絶対パス
             
         Raises:
             FileNotFoundError: 指定されたファイルが存在しない場合
-            PermissionError: ファイルへのアクセス権限がない場合
-            IOError: その他のファイル読み込みエラーの場合
+            IOError: 通常のファイルでない場合
         """
         # 両方のパスを正規化
         norm_archive_path = self.normalize_path(archive_path)
@@ -344,6 +343,26 @@ class FileSystemHandler(ArchiveHandler):
             self.debug_warning(error_msg)
             raise IOError(error_msg)
         
+        return abs_path
+    
+    def read_archive_file(self, archive_path: str, file_path: str) -> Optional[bytes]:
+        """
+        ファイルシステム上のファイルを読み込む
+        
+        Args:
+            archive_path: ファイルまたはディレクトリのパス
+            file_path: サブパス (空の場合はarchive_path自体を読み込む)
+            
+        Returns:
+            ファイルの内容。読み込みに失敗した場合はNone
+            
+        Raises:
+            FileNotFoundError: 指定されたファイルが存在しない場合
+            PermissionError: ファイルへのアクセス権限がない場合
+            IOError: その他のファイル読み込みエラーの場合
+        """
+        abs_path = self._resolve_file_path(archive_path, file_path)
+        
         # ファイルを読み込む
         try:
             with open(abs_path, 'rb') as f:
@@ -361,6 +380,32 @@ class FileSystemHandler(ArchiveHandler):
             self.debug_error(f"予期せぬエラー: {e}")
             raise IOError(f"ファイル読み込みエラー: {abs_path} - {str(e)}")
     
+    def open_archive_file(self, archive_path: str, file_path: str) -> Optional[BinaryIO]:
+        """
+        ファイルシステム上のファイルを読み込み用のストリームとして開く
+        
+        Args:
+            archive_path: ファイルまたはディレクトリのパス
+            file_path: サブパス (空の場合はarchive_path自体を開く)
+            
+        Returns:
+            ファイルストリーム（呼び出し元が閉じる）
+            
+        Raises:
+            FileNotFoundError: 指定されたファイルが存在しない場合
+            PermissionError: ファイルへのアクセス権限がない場合
+            IOError: その他のファイル読み込みエラーの場合
+        """
+        abs_path = self._resolve_file_path(archive_path, file_path)
+        try:
+            return open(abs_path, 'rb')
+        except PermissionError as e:
+            self.debug_error(f"ファイルへのアクセス権限がありません: {abs_path} - {str(e)}")
+            raise
+        except OSError as e:
+            self.debug_error(f"ファイルストリーム取得エラー: {abs_path} - {e}")
+            raise IOError(f"ファイル読み込みエラー: {abs_path} - {str(e)}")
+    
     def get_stream(self, path: str) -> Optional[BinaryIO]:
         """
         指定されたファイルのストリームを取得する
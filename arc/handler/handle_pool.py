@@ -0,0 +1,250 @@
+"""
+アーカイブハンドルプール
+
+開いたアーカイブオブジェクト（ZipFileなど）を再利用するためのLRUプール。
+同じ書庫からの連続読み込みで中央ディレクトリの再解析を避ける。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from logutils import log_print, DEBUG, WARNING
+
+# メモリ上の書庫データを表すキーの先頭要素
+MEMORY_KEY = '<memory>'
+
+
+def file_key(path: str) -> Tuple[str, int, int]:
+    """
+    物理ファイルのプールキーを作成する
+
+    パス・更新日時・サイズの組をキーとするため、ファイルが更新されると
+    別のキーになり、古いハンドルは再利用されない。
+
+    Args:
+        path: ファイルパス
+
+    Returns:
+        (正規化パス, 更新日時(ns), サイズ) のタプル
+
+    Raises:
+        OSError: ファイル情報を取得できない場合
+    """
+    norm_path = path.replace('\\', '/')
+    st = os.stat(norm_path)
+    return (norm_path, st.st_mtime_ns, st.st_size)
+
+
+def bytes_key(data: Any) -> Tuple[str, int, int]:
+    """
+    メモリ上の書庫データのプールキーを作成する
+
+    オブジェクトIDをキーに含めるため、プール側でデータへの参照を保持し、
+    取得時に同一オブジェクトであることを確認する（IDの再利用対策）。
+
+    Args:
+        data: 書庫データ（bytesなどのバッファ）
+
+    Returns:
+        (MEMORY_KEY, オブジェクトID, サイズ) のタプル
+    """
+    return (MEMORY_KEY, id(data), len(data))
+
+
+class _PoolItem:
+    """プールに格納される1ハンドル分の情報"""
+
+    __slots__ = ('handle', 'source', 'leases', 'evicted')
+
+    def __init__(self, handle: Any, source: Any):
+        self.handle = handle
+        # bytesキーの場合は元データへの参照（IDの再利用防止と同一性確認用）
+        self.source = source
+        # 貸し出し中の数
+        self.leases = 0
+        # プールから追い出されたかどうか（貸し出し終了時にクローズする）
+        self.evicted = False
+
+
+class HandlePool:
+    """
+    スレッドセーフなLRUハンドルプール
+
+    キーごとに開いたハンドルを保持し、上限を超えたら最も古いものから閉じる。
+    貸し出し中のハンドルは追い出されても、返却されるまでクローズを遅延する。
+    """
+
+    def __init__(self, max_handles: int = 8, name: str = "HandlePool",
+                 closer: Optional[Callable[[Any], None]] = None):
+        """
+        ハンドルプールを初期化する
+
+        Args:
+            max_handles: 保持するハンドルの最大数
+            name: ログ出力用の名前
+            closer: ハンドルを閉じる関数（省略時はhandle.close()を呼ぶ）
+        """
+        self.max_handles = max(1, max_handles)
+        self._name = name
+        self._closer = closer
+        self._items: "OrderedDict[Hashable, _PoolItem]" = OrderedDict()
+        self._lock = threading.RLock()
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+
+    def _log(self, level: int, message: str) -> None:
+        """ログ出力"""
+        log_print(level, message, name=f"arc.handler.{self._name}")
+
+    def _close_handle(self, item: _PoolItem) -> None:
+        """ハンドルを閉じる（例外は握りつぶす）"""
+        try:
+            if self._closer is not None:
+                self._closer(item.handle)
+            else:
+                item.handle.close()
+        except Exception as e:
+            self._log(WARNING, f"ハンドルのクローズに失敗しました: {e}")
+
+    def _discard(self, key: Hashable) -> None:
+        """
+        キーのハンドルをプールから外す（ロック取得済みで呼ぶこと）
+
+        貸し出し中であればクローズは返却時まで遅延する。
+        """
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        item.evicted = True
+        if item.leases == 0:
+            self._close_handle(item)
+
+    def _discard_stale(self, key: Hashable) -> None:
+        """
+        同じパスで更新日時/サイズが異なる古いハンドルを外す（ロック取得済みで呼ぶこと）
+        """
+        if not isinstance(key, tuple) or not key or key[0] == MEMORY_KEY:
+            return
+        stale = [k for k in self._items
+                 if k != key and isinstance(k, tuple) and k and k[0] == key[0]]
+        for k in stale:
+            self._log(DEBUG, f"更新された書庫の古いハンドルを破棄: {k[0]}")
+            self._discard(k)
+
+    def _lookup(self, key: Hashable, source: Any) -> Optional[_PoolItem]:
+        """
+        プールからハンドルを探し、見つかれば貸し出し数を増やして返す
+
+        Args:
+            key: プールキー
+            source: bytesキーの場合の元データ
+
+        Returns:
+            見つかったプール項目。なければNone
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item.source is not source:
+                # 同じIDの別オブジェクト - 古いハンドルは使わない
+                self._discard(key)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            item.leases += 1
+            return item
+
+    def _insert(self, key: Hashable, item: _PoolItem) -> None:
+        """
+        ハンドルを登録し、上限を超えた分を古い順に追い出す（ロック取得済みで呼ぶこと）
+
+        Args:
+            key: プールキー
+            item: 登録するプール項目
+        """
+        self._discard(key)
+        self._discard_stale(key)
+        self._items[key] = item
+        while len(self._items) > self.max_handles:
+            oldest = next(iter(self._items))
+            self._log(DEBUG, f"ハンドルを追い出します: {oldest[0] if isinstance(oldest, tuple) else oldest}")
+            self._discard(oldest)
+
+    @contextmanager
+    def acquire(self, key: Hashable, opener: Callable[[], Any],
+                source: Any = None) -> Iterator[Any]:
+        """
+        キーに対応するハンドルを貸し出す
+
+        プールに存在しなければopenerで開いて登録する。
+        withブロックを抜けるまでハンドルはクローズされない。
+
+        Args:
+            key: プールキー（file_key / bytes_key で作成）
+            opener: ハンドルを開く関数
+            source: bytesキーの場合の元データ（同一性確認用）
+
+        Yields:
+            開いているハンドル
+        """
+        item = self._lookup(key, source)
+        if item is None:
+            # オープン（書庫の解析）はロックの外で行い、他の書庫の読み込みを妨げない
+            # 例外はそのまま呼び出し元に伝播させる
+            new_item = _PoolItem(opener(), source)
+            with self._lock:
+                item = self._items.get(key)
+                if item is not None and item.source is source:
+                    # 他のスレッドが先に登録した - 自分で開いた方は閉じる
+                    self._close_handle(new_item)
+                    item.leases += 1
+                else:
+                    item = new_item
+                    self._insert(key, item)
+                    item.leases += 1
+
+        try:
+            yield item.handle
+        finally:
+            with self._lock:
+                item.leases -= 1
+                if item.evicted and item.leases == 0:
+                    self._close_handle(item)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        指定キーのハンドルを破棄する（壊れた書庫の再オープン用）
+
+        Args:
+            key: 破棄するプールキー
+        """
+        with self._lock:
+            self._discard(key)
+
+    def close_all(self) -> None:
+        """すべてのハンドルを閉じる"""
+        with self._lock:
+            count = len(self._items)
+            for key in list(self._items.keys()):
+                self._discard(key)
+        if count:
+            self._log(DEBUG, f"{count} 個のハンドルを閉じました")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        プールの統計情報を取得する
+
+        Returns:
+            保持数・ヒット数・ミス数の辞書
+        """
+        with self._lock:
+            return {'handles': len(self._items), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self) -> int:
+        return len(self._items)
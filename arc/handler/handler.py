@@ -3,9 +3,10 @@
 
 アーカイブハンドラの抽象基底クラスを定義
 """
+import io
 import os
 import tempfile
-from typing import List, Optional, BinaryIO, Dict, Any
+from typing import List, Optional, BinaryIO, Dict, Any, Tuple, Union, Iterable, Iterator
 
 from ..arc import EntryInfo, EntryType
 # loggingモジュールからlogutilsへの参照変更
@@ -23,6 +24,9 @@ class ArchiveHandler:
     # このハンドラがサポートするファイル拡張子のリスト
     supported_extensions = []
     
+    # *_from_bytes 系メソッドにbytesの代わりにArchiveViewを渡せるかどうか
+    supports_archive_view = False
+    
     def __init__(self):
         """ハンドラを初期化する"""
         self.current_path = ""
@@ -221,6 +225,87 @@ class ArchiveHandler:
         # サブクラスで実装
         return None
     
+    def read_files(self, archive: Union[str, Any], file_paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """
+        同じ書庫内の複数のファイルを順に読み込む
+        
+        書庫を1回だけ開き、格納順（書庫内のオフセット順）に読み込んだものから返す。
+        デフォルト実装は1件ずつ read_archive_file / read_file_from_bytes を呼ぶ。
+        書庫を開き直さずに済むハンドラはオーバーライドする。
+        
+        Args:
+            archive: 書庫ファイルのパス、またはメモリ上の書庫データ（bytes / ArchiveView）
+            file_paths: 書庫内のファイルパスのリスト
+            
+        Yields:
+            (書庫内パス, 内容) のタプル。読み込めなかったファイルは返さない
+            
+        Raises:
+            IOError: 書庫自体が壊れているなど、読み込みを続けられない場合
+        """
+        for file_path in dict.fromkeys(p.replace('\\', '/') for p in file_paths):
+            try:
+                if isinstance(archive, str):
+                    content = self.read_archive_file(archive, file_path)
+                else:
+                    content = self.read_file_from_bytes(archive, file_path)
+            except FileNotFoundError as e:
+                self.debug_warning(f"ファイルが見つかりません: {file_path} - {e}")
+                continue
+            if content is not None:
+                yield file_path, content
+    
+    def open_archive_file(self, archive: Union[str, Any], file_path: str) -> Optional[BinaryIO]:
+        """
+        書庫内のファイルを読み込み用のストリームとして開く
+        
+        展開しながら読めるハンドラは、ファイル全体をメモリに読み込まずに読み進めるストリームを返す。
+        デフォルト実装は read_archive_file / read_file_from_bytes で全体を読み込み、
+        メモリ上のストリームとして返す。
+        
+        Args:
+            archive: 書庫ファイルのパス、またはメモリ上の書庫データ（bytes / ArchiveView）
+            file_path: 書庫内のファイルパス
+            
+        Returns:
+            読み込み用のストリーム（呼び出し元が閉じる）。読み込めない場合はNone
+            
+        Raises:
+            FileNotFoundError: 指定されたファイルが存在しない場合
+            IOError: 書庫が壊れているなど読み込みに失敗した場合
+        """
+        if isinstance(archive, str):
+            content = self.read_archive_file(archive, file_path)
+        else:
+            content = self.read_file_from_bytes(archive, file_path)
+        if content is None:
+            return None
+        return io.BytesIO(content)
+    
+    def get_member_range(self, archive: Union[str, Any], file_path: str) -> Optional[Tuple[int, int]]:
+        """
+        書庫内ファイルが無圧縮で格納されている場合、そのデータ範囲を取得する
+        
+        範囲が分かれば、ネスト書庫をコピーせずに親書庫の一部として参照できる。
+        
+        Args:
+            archive: 書庫ファイルのパス、またはArchiveView（supports_archive_viewがTrueの場合）
+            file_path: 書庫内のファイルパス
+            
+        Returns:
+            (書庫先頭からのオフセット, サイズ) のタプル。無圧縮でない場合や未対応の場合はNone
+        """
+        # デフォルトでは範囲参照をサポートしない
+        return None
+    
+    def close_handles(self) -> None:
+        """
+        ハンドラが保持している書庫ハンドルなどのリソースを解放する
+        
+        マネージャのリセット時に呼ばれる。リソースを保持するハンドラはオーバーライドする。
+        """
+        pass
+    
     def get_stream(self, path: str) -> Optional[BinaryIO]:
         """
         指定されたパスのファイルのストリームを取得する
@@ -7,9 +7,11 @@ LZHアーカイブファイルへのアクセスを提供するハンドラ
 
 import os
 import datetime
-from typing import List, Optional, Dict, Any, BinaryIO, Tuple
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, BinaryIO, Tuple, Iterable, Iterator, Union
 
-from ..arc import ArchiveHandler, EntryInfo, EntryType
+from ..arc import EntryInfo, EntryType
+from .handler import ArchiveHandler
 
 # lhafileモジュールが必要（Pure Python実装）
 try:
@@ -35,6 +37,25 @@ class LzhHandler(ArchiveHandler):
         # LZH構造キャッシュの追加
         self.structure_cache: Dict[str, Dict[str, Dict]] = {}
         
+    @contextmanager
+    def _open_lhafile(self, lzh_path: str):
+        """
+        LZHファイルを開き、抜けるときに閉じるコンテキストマネージャ
+        
+        lhafile.Lhafile はコンテキストマネージャに対応していないため、ファイルをここで閉じる。
+        
+        Args:
+            lzh_path: LZHファイルのパス
+            
+        Yields:
+            lhafile.Lhafile オブジェクト
+        """
+        lf = lhafile.Lhafile(lzh_path, 'r')
+        try:
+            yield lf
+        finally:
+            lf.fp.close()
+    
     @property
     def supported_extensions(self) -> List[str]:
         """このハンドラがサポートするファイル拡張子のリスト"""
@@ -60,7 +81,7 @@ class LzhHandler(ArchiveHandler):
             
         # LZHファイルとして開けるかどうか確認
         try:
-            with lhafile.Lhafile(path) as lf:
+            with self._open_lhafile(path) as lf:
                 return True
         except:
             return False
@@ -83,7 +104,7 @@ class LzhHandler(ArchiveHandler):
         
         # LZHファイルを開く
         try:
-            with lhafile.Lhafile(lzh_path, 'r') as lf:
+            with self._open_lhafile(lzh_path) as lf:
                 # エントリリストを作成
                 
                 result_entries = []
@@ -264,7 +285,7 @@ class LzhHandler(ArchiveHandler):
             return structure
         finally:
             if should_close and lf:
-                lf.close()
+                lf.fp.close()
     
     def get_entry_info(self, path: str) -> Optional[EntryInfo]:
         """
@@ -299,7 +320,7 @@ class LzhHandler(ArchiveHandler):
         
         # LZHファイル内のエントリの情報を取得
         try:
-            with lhafile.Lhafile(lzh_path, 'r') as lf:
+            with self._open_lhafile(lzh_path) as lf:
                 # LZH構造を取得
                 structure = self._get_lzh_structure(lzh_path, lf)
                 
@@ -387,7 +408,7 @@ class LzhHandler(ArchiveHandler):
         
         # LZHファイル内のファイルを読み込む
         try:
-            with lhafile.Lhafile(lzh_path, 'r') as lf:
+            with self._open_lhafile(lzh_path) as lf:
                 # LZH構造を取得
                 structure = self._get_lzh_structure(lzh_path, lf)
                 
@@ -531,7 +552,7 @@ class LzhHandler(ArchiveHandler):
             # ファイルパスを正規化
             norm_file_path = self.normalize_path(file_path)
             
-            with lhafile.Lhafile(archive_path, 'r') as lzh_file:
+            with self._open_lhafile(archive_path) as lzh_file:
                 # LZH構造を取得
                 structure = self._get_lzh_structure(archive_path, lzh_file)
                 
@@ -564,6 +585,43 @@ class LzhHandler(ArchiveHandler):
             traceback.print_exc()
             return None
 
+    def read_files(self, archive: Union[str, bytes], file_paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """
+        アーカイブ内の複数のファイルを1回のオープンで格納順に読み込む
+        
+        LZHはヘッダとデータが交互に並ぶため、データ位置の順に読むとシークが前方向だけになる。
+        
+        Args:
+            archive: LZHファイルのパス
+            file_paths: アーカイブ内のファイルパスのリスト
+            
+        Yields:
+            (書庫内パス, 内容) のタプル。読み込めなかったファイルは返さない
+        """
+        if not isinstance(archive, str):
+            # メモリ上のデータは基底クラスの1件ずつの読み込みに任せる
+            yield from super().read_files(archive, file_paths)
+            return
+        
+        try:
+            with self._open_lhafile(archive) as lzh_file:
+                # 正規化した書庫内パスから格納時の名前とデータ位置を引けるようにする
+                infos = {self.normalize_path(info.filename): info for info in lzh_file.infolist()}
+                
+                targets = []
+                for member in dict.fromkeys(self.normalize_path(p) for p in file_paths):
+                    if member in infos:
+                        targets.append(member)
+                    else:
+                        print(f"LZHファイル内にファイルが見つかりません: {member}")
+                targets.sort(key=lambda m: infos[m].file_offset)
+                
+                for member in targets:
+                    yield member, lzh_file.read(infos[member].filename)
+        except Exception as e:
+            print(f"LZHアーカイブ内のファイル一括読み込みエラー: {e}")
+            raise IOError(f"LZHアーカイブ読み込みエラー: {archive} - {str(e)}")
+
     def get_stream(self, path: str) -> Optional[BinaryIO]:
         """
         指定されたパスのファイルのストリームを取得する
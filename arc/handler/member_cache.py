@@ -0,0 +1,129 @@
+"""
+書庫メンバーキャッシュ
+
+外部コマンドなどでまとめて展開した書庫内ファイルの内容を保持するLRUキャッシュ。
+連続したページ読み込みやサムネイル生成で、同じ書庫の展開をやり直さないために使う。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+# キャッシュキーの型（書庫キー, 書庫内パス）
+MemberKey = Tuple[Hashable, str]
+
+
+class MemberCache:
+    """
+    スレッドセーフなバイト数上限付きLRUキャッシュ
+
+    書庫ごとのキー（handle_pool.file_key など）と書庫内パスの組で内容を保持する。
+    合計サイズが上限を超えたら古いものから破棄する。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        メンバーキャッシュを初期化する
+
+        Args:
+            max_bytes: 保持する内容の合計バイト数の上限
+        """
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[MemberKey, bytes]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, archive_key: Hashable, member: str) -> Optional[bytes]:
+        """
+        キャッシュから内容を取得する
+
+        Args:
+            archive_key: 書庫のキー
+            member: 書庫内パス
+
+        Returns:
+            キャッシュされた内容。なければNone
+        """
+        key = (archive_key, member)
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def contains(self, archive_key: Hashable, member: str) -> bool:
+        """
+        内容がキャッシュされているか確認する（LRU順序と統計は変更しない）
+
+        Args:
+            archive_key: 書庫のキー
+            member: 書庫内パス
+
+        Returns:
+            キャッシュされていればTrue
+        """
+        with self._lock:
+            return (archive_key, member) in self._items
+
+    def put(self, archive_key: Hashable, member: str, data: bytes) -> bool:
+        """
+        内容をキャッシュに登録する
+
+        上限より大きい内容は登録しない。
+
+        Args:
+            archive_key: 書庫のキー
+            member: 書庫内パス
+            data: 内容
+
+        Returns:
+            登録した場合はTrue
+        """
+        size = len(data)
+        if size > self.max_bytes:
+            return False
+        key = (archive_key, member)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old)
+            self._items[key] = data
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._total_bytes -= len(evicted)
+        return True
+
+    def discard_archive(self, archive_key: Hashable) -> None:
+        """
+        指定した書庫の内容をすべて破棄する
+
+        Args:
+            archive_key: 書庫のキー
+        """
+        with self._lock:
+            for key in [k for k in self._items if k[0] == archive_key]:
+                self._total_bytes -= len(self._items.pop(key))
+
+    def clear(self) -> None:
+        """すべての内容を破棄する"""
+        with self._lock:
+            self._items.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        キャッシュの統計情報を取得する
+
+        Returns:
+            保持数・合計バイト数・ヒット数・ミス数の辞書
+        """
+        with self._lock:
+            return {'members': len(self._items), 'bytes': self._total_bytes,
+                    'hits': self.hits, 'misses': self.misses}
@@ -6,10 +6,12 @@ rarfileパッケージを使用してRARアーカイブ操作を行うハンド
 """
 import os
 import io
+import shutil
 import tempfile
 import traceback
 import datetime
-from typing import List, Optional, Dict, BinaryIO, Tuple
+from contextlib import contextmanager
+from typing import List, Optional, Dict, BinaryIO, Tuple, Iterable, Iterator, Union, Set
 
 try:
     import rarfile
@@ -24,6 +26,71 @@ except ImportError:
 
 from ..arc import EntryInfo, EntryType
 from .handler import ArchiveHandler
+from .handle_pool import HandlePool, file_key, bytes_key
+from .archive_utils import run_command_binary
+
+
+class RarSession:
+    """
+    開いたRAR書庫1つ分のセッション
+    
+    RarFileハンドル、メンバー情報の索引、メモリ上の書庫データを書き出した一時ファイルをまとめて保持し、
+    エントリ情報の取得と読み込みで使い回す。ハンドラのハンドルプール（LRU）で管理され、
+    追い出されるか書庫が更新されたときに close() で一時ファイルごと破棄される。
+    """
+    
+    def __init__(self, archive_path: str, temp_path: Optional[str] = None):
+        """
+        RAR書庫を開いてメンバー情報の索引を作る
+        
+        Args:
+            archive_path: 開くRARファイルのパス
+            temp_path: セッションが所有する一時ファイルのパス（close時に削除する）
+            
+        Raises:
+            rarfile.Error: 書庫を開けない場合
+        """
+        self.archive_path = archive_path
+        self.temp_path = temp_path
+        self.rf = rarfile.RarFile(archive_path)
+        self.solid = self.rf.is_solid()
+        # 書庫内パス -> RarInfo（ファイルのみ）
+        self.infos: Dict[str, 'rarfile.RarInfo'] = {}
+        # 書庫内パス -> 格納順
+        self.order: Dict[str, int] = {}
+        # 明示的なディレクトリと、ファイルのパスから分かる暗黙のディレクトリ（末尾の/なし）
+        self.dirs: Set[str] = set()
+        for index, info in enumerate(self.rf.infolist()):
+            name = info.filename.replace('\\', '/')
+            if info.isdir():
+                self.dirs.add(name.rstrip('/'))
+                continue
+            self.infos[name] = info
+            self.order[name] = index
+            parent = name.rpartition('/')[0]
+            while parent and parent not in self.dirs:
+                self.dirs.add(parent)
+                parent = parent.rpartition('/')[0]
+    
+    def getinfo(self, name: str) -> Optional['rarfile.RarInfo']:
+        """書庫内パスのファイル情報を返す（ディレクトリや存在しない場合はNone）"""
+        return self.infos.get(name.replace('\\', '/'))
+    
+    def is_dir(self, name: str) -> bool:
+        """書庫内パスがディレクトリかどうか"""
+        return name.replace('\\', '/').rstrip('/') in self.dirs
+    
+    def close(self) -> None:
+        """ハンドルを閉じ、所有している一時ファイルを削除する"""
+        try:
+            self.rf.close()
+        finally:
+            if self.temp_path:
+                try:
+                    os.unlink(self.temp_path)
+                except OSError:
+                    pass
+                self.temp_path = None
 
 
 class RarHandler(ArchiveHandler):
@@ -35,6 +102,9 @@ class RarHandler(ArchiveHandler):
     
     # RARファイルの拡張子
     SUPPORTED_FORMATS = ['.rar']
+    
+    # 同時に開いておくRARセッションの最大数
+    MAX_OPEN_SESSIONS = 8
 
     
     def __init__(self):
@@ -52,9 +122,10 @@ class RarHandler(ArchiveHandler):
         # rarfileの設定
         self._configure_rarfile()
         
-        # キャッシュとメタデータ
-        self._rar_cache: Dict[str, rarfile.RarFile] = {}
-        self._temp_files_cache: Dict[str, str] = {}
+        # 開いたRAR書庫のセッションを再利用するプール（一時ファイルもセッションと一緒に破棄される）
+        self._session_pool = HandlePool(self.MAX_OPEN_SESSIONS, name="RarHandler")
+        # 一括展開に使うUnRAR実行ファイル（見つからなければ1件ずつ読み込む）
+        self._unrar_path = shutil.which(rarfile.UNRAR_TOOL)
         
         # ハンドラが利用可能
         self._available = True
@@ -81,6 +152,67 @@ class RarHandler(ArchiveHandler):
         except Exception as e:
             self.debug_error(f"rarfileの設定中にエラーが発生しました: {e}")
     
+    @contextmanager
+    def _open_rar(self, archive_path: str) -> Iterator[RarSession]:
+        """
+        ハンドルプールからRAR書庫のセッションを借りる
+        
+        パス・更新日時・サイズが同じ間は同じセッションを使い回す。
+        
+        Args:
+            archive_path: RARファイルのパス
+            
+        Yields:
+            開いているセッション
+        """
+        with self._session_pool.acquire(file_key(archive_path), lambda: RarSession(archive_path)) as session:
+            yield session
+    
+    @contextmanager
+    def _open_rar_bytes(self, archive_data: bytes) -> Iterator[RarSession]:
+        """
+        ハンドルプールからメモリ上のRARデータのセッションを借りる
+        
+        同じバイトデータ（同一オブジェクト）に対しては一時ファイルへの書き出しを1回で済ませる。
+        
+        Args:
+            archive_data: RARデータのバイト配列
+            
+        Yields:
+            開いているセッション
+        """
+        def opener() -> RarSession:
+            temp_path = self.save_to_temp_file(bytes(archive_data), '.rar')
+            if not temp_path:
+                raise IOError("RARデータの一時ファイルを作成できません")
+            try:
+                return RarSession(temp_path, temp_path=temp_path)
+            except Exception:
+                self.cleanup_temp_file(temp_path)
+                raise
+        
+        with self._session_pool.acquire(bytes_key(archive_data), opener, source=archive_data) as session:
+            yield session
+    
+    def _open_session(self, archive: Union[str, bytes]):
+        """書庫のパスまたはバイトデータに応じてセッションを借りる"""
+        if isinstance(archive, str):
+            return self._open_rar(archive)
+        return self._open_rar_bytes(archive)
+    
+    def _invalidate(self, archive: Union[str, bytes]) -> None:
+        """壊れた書庫のセッションを破棄する（次回は開き直す）"""
+        try:
+            key = file_key(archive) if isinstance(archive, str) else bytes_key(archive)
+        except OSError:
+            return
+        self._session_pool.invalidate(key)
+    
+    def close_handles(self) -> None:
+        """プールしているRARセッションをすべて閉じる（一時ファイルも削除される）"""
+        if self._available:
+            self._session_pool.close_all()
+    
     @property
     def supported_extensions(self) -> List[str]:
         """このハンドラがサポートするファイル拡張子のリスト"""
@@ -161,12 +293,12 @@ class RarHandler(ArchiveHandler):
             
         try:
             self.debug_info(f"エントリ一覧を取得: {path}")
-            # RARファイルを開く
-            with rarfile.RarFile(path) as rf:
+            # RARファイルのセッションを借りる
+            with self._open_rar(path) as session:
                 self.debug_info(f"RARアーカイブパス: {path}, 内部パス: {internal_path}")
                 
                 # エントリ一覧を取得する共通関数を呼び出す
-                result = self._get_entries_from_rarfile(rf, internal_path)
+                result = self._get_entries_from_rarfile(session.rf, internal_path)
                 
                 self.debug_info(f"{len(result)} エントリを返します")
                 return result
@@ -284,22 +416,10 @@ class RarHandler(ArchiveHandler):
         try:
             self.debug_info(f"メモリ上のRARデータ ({len(data)} バイト) からエントリリスト取得")
             
-            # 一時ファイルを作成
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.rar') as tmp:
-                tmp_path = tmp.name
-                tmp.write(data)
-            
-            try:
-                # 一時ファイルからRARを開く
-                with rarfile.RarFile(tmp_path) as rf:
-                    # 共通関数を使用してエントリを取得
-                    result = self._get_entries_from_rarfile(rf, internal_path)
-            finally:
-                # 一時ファイルを削除
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
+            # セッションを借りる（一時ファイルへの書き出しは同じデータに対して1回だけ）
+            with self._open_rar_bytes(data) as session:
+                # 共通関数を使用してエントリを取得
+                result = self._get_entries_from_rarfile(session.rf, internal_path)
                     
             self.debug_info(f"{len(result)} エントリを返します")
             return result
@@ -328,34 +448,37 @@ class RarHandler(ArchiveHandler):
             if not archive_path:
                 return None
                 
-            # RARファイルを開いてエントリ情報を取得
-            with rarfile.RarFile(archive_path) as rf:
-                try:
-                    info = rf.getinfo(internal_path)
+            # セッションのメンバー索引からエントリ情報を取得（書庫を開き直さない）
+            with self._open_rar(archive_path) as session:
+                info = session.getinfo(internal_path)
+                if info is not None:
+                    try:
+                        mod_time = datetime.datetime(*info.date_time)
+                    except (TypeError, ValueError):
+                        mod_time = None
                     return self.create_entry_info(
                         name=os.path.basename(internal_path),
+                        rel_path=internal_path,
+                        name_in_arc=internal_path,
                         abs_path=internal_path,
                         size=info.file_size,
-                        modified_time=datetime.datetime(*info.date_time),
-                        type=EntryType.FILE if not info.is_dir() else EntryType.DIRECTORY
+                        modified_time=mod_time,
+                        type=EntryType.FILE
+                    )
+                
+                # ディレクトリの場合（RARは明示的なディレクトリエントリを持たない場合がある）
+                if internal_path and session.is_dir(internal_path):
+                    dir_path = internal_path.rstrip('/') + '/'
+                    return self.create_entry_info(
+                        name=os.path.basename(dir_path.rstrip('/')),
+                        rel_path=dir_path,
+                        name_in_arc=dir_path,
+                        abs_path=dir_path,
+                        size=0,
+                        type=EntryType.DIRECTORY
                     )
-                except:
-                    # 指定されたパスがディレクトリの場合（RARは明示的なディレクトリエントリを持たない場合がある）
-                    if not internal_path.endswith('/'):
-                        internal_path += '/'
                     
-                    # そのディレクトリ内に何かファイルがあるか確認
-                    for item in rf.infolist():
-                        if item.filename.startswith(internal_path):
-                            # ディレクトリとして存在する
-                            return self.create_entry_info(
-                                name=os.path.basename(internal_path.rstrip('/')),
-                                abs_path=internal_path,
-                                size=0,
-                                type=EntryType.DIRECTORY
-                            )
-                            
-                    return None
+                return None
         except Exception as e:
             if self.debug:
                 self.debug_error(f"エントリ情報取得エラー: {e}", trace=True)
@@ -381,9 +504,10 @@ class RarHandler(ArchiveHandler):
             if not archive_path or not internal_path:
                 return None
                 
-            # RARファイルを開いて内部ファイルを読み込む
-            with rarfile.RarFile(archive_path) as rf:
-                return rf.read(internal_path)
+            # セッションを借りて内部ファイルを読み込む
+            with self._open_rar(archive_path) as session:
+                info = session.getinfo(internal_path)
+                return session.rf.read(info) if info is not None else None
         except Exception as e:
             if self.debug:
                 self.debug_error(f"ファイル読み込みエラー: {e}", trace=True)
@@ -420,46 +544,34 @@ class RarHandler(ArchiveHandler):
         self.debug_info(f"アーカイブ内ファイル読み込み: {archive_path} -> {file_path}")
         
         try:
-            # RARファイルを開く
-            if archive_path in self._rar_cache:
-                rf = self._rar_cache[archive_path]
-            else:
-                rf = rarfile.RarFile(archive_path)
-                self._rar_cache[archive_path] = rf
-            
-            # 正規化されたパス
-            normal_path = file_path.replace('\\', '/')
-            
-            # まずエントリ情報を取得して、ディレクトリかファイルかを確認
-            entry_info = self.get_entry_info(self._join_paths(archive_path, file_path))
-            
-            # ディレクトリの場合は特別に処理
-            if entry_info and entry_info.type == EntryType.DIRECTORY:
-                # ディレクトリ内容は空バイトを返す
-                return b''
-            
-            # ファイルが存在するか確認
-            try:
-                info = rf.getinfo(normal_path)
-            except KeyError:
-                self.debug_error(f"ファイルが見つかりません: {normal_path}")
-                raise FileNotFoundError(f"RARファイル内のファイルが見つかりません: {normal_path}")
+            # セッションを借りる（書庫の解析とメンバー索引の作成は書庫ごとに1回だけ）
+            with self._open_rar(archive_path) as session:
+                # 正規化されたパス
+                normal_path = file_path.replace('\\', '/')
                 
-            # ディレクトリの場合は読み込みをスキップ
-            if info.isdir():
-                return b''
-            
-            # ファイルを読み込む
-            with rf.open(normal_path) as f:
-                content = f.read()
+                # ディレクトリの場合は空バイトを返す
+                info = session.getinfo(normal_path)
+                if info is None:
+                    if session.is_dir(normal_path):
+                        return b''
+                    self.debug_error(f"ファイルが見つかりません: {normal_path}")
+                    raise FileNotFoundError(f"RARファイル内のファイルが見つかりません: {normal_path}")
+                
+                # ファイルを読み込む
+                with session.rf.open(info) as f:
+                    content = f.read()
                 
             self.debug_info(f"ファイル読み込み成功: {len(content)} バイト")
             return content
             
+        except FileNotFoundError:
+            raise
         except rarfile.BadRarFile as e:
             # RAR書庫が壊れている場合
             error_msg = f"不正なRARファイル: {archive_path} - {str(e)}"
             self.debug_error(error_msg)
+            # 壊れたセッションは再利用しない
+            self._invalidate(archive_path)
             raise IOError(error_msg)
         except rarfile.RarCRCError as e:
             # CRCエラーの場合
@@ -586,13 +698,10 @@ class RarHandler(ArchiveHandler):
         
         # パスを分解して、RARファイルを含むかをチェック
         components = norm_path.split('/')
-        test_path = ''
         
         for i in range(len(components)):
-            # 現在のコンポーネントを追加
-            if test_path:
-                test_path += '/'
-            test_path += components[i]
+            # 先頭から現在のコンポーネントまでを結合（絶対パスの先頭の/も保つ）
+            test_path = '/'.join(components[:i + 1])
             
             # これがRARファイルかどうか確認
             if os.path.isfile(test_path):
@@ -635,10 +744,10 @@ class RarHandler(ArchiveHandler):
             # 内部パスを無視してアーカイブファイル全体を処理
         
         try:
-            # RARファイルを開く
-            with rarfile.RarFile(archive_path) as rf:
+            # RARファイルのセッションを借りる（続く読み込みでも同じセッションを使う）
+            with self._open_rar(archive_path) as session:
                 # 共通関数を使用してすべてのエントリを取得
-                all_entries = self._get_all_entries_from_rarfile(rf, archive_path)
+                all_entries = self._get_all_entries_from_rarfile(session.rf, archive_path)
                 self.debug_info(f"{archive_path} 内の全エントリ数: {len(all_entries)}")
                 return all_entries
         except rarfile.BadRarFile as e:
@@ -741,22 +850,12 @@ class RarHandler(ArchiveHandler):
                     
             self.debug_info(f"メモリデータからすべてのエントリを取得中 ({len(archive_data)} バイト)")
             
-            # 一時ファイルに保存
-            temp_file = self.save_to_temp_file(archive_data, '.rar')
-            if not temp_file:
-                self.debug_error(f"一時ファイル作成に失敗しました")
-                return []
-            
-            try:
-                # 一時ファイルを使用してRARを開く
-                with rarfile.RarFile(temp_file) as rf:
-                    # 共通関数を使用してすべてのエントリを取得
-                    all_entries = self._get_all_entries_from_rarfile(rf,"")
-                    self.debug_info(f"メモリデータから全 {len(all_entries)} エントリを取得しました")
-                    return all_entries
-            finally:
-                # 一時ファイルを削除
-                self.cleanup_temp_file(temp_file)
+            # セッションを借りる（一時ファイルはセッションが保持し、続く読み込みで再利用される）
+            with self._open_rar_bytes(archive_data) as session:
+                # 共通関数を使用してすべてのエントリを取得
+                all_entries = self._get_all_entries_from_rarfile(session.rf, "")
+                self.debug_info(f"メモリデータから全 {len(all_entries)} エントリを取得しました")
+                return all_entries
         
         except Exception as e:
             self.debug_error(f"メモリからの全エントリ取得エラー: {e}", trace=True)
@@ -786,58 +885,150 @@ class RarHandler(ArchiveHandler):
         
         self.debug_info(f"メモリ上のRARデータから '{file_path}' を読み込み中")
         
-        # 一時ファイルを使用して確実に処理
-        temp_file = None
+        # 正規化されたパス（相対パス）
+        normal_path = file_path.replace('\\', '/')
+        
         try:
-            # 一時ファイルに保存
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.rar') as tmp:
-                temp_file = tmp.name
-                tmp.write(archive_data)
-                
-            # RARファイルを開く
-            try:
-                rf = rarfile.RarFile(temp_file)
-                
-                # 正規化されたパス（相対パス）
-                normal_path = file_path.replace('\\', '/')
-                
-                # ファイルを読み込む
-                try:
-                    content = rf.read(normal_path)
-                    self.debug_info(f"ファイル読み込み成功: {len(content)} バイト")
-                    return content
-                except KeyError:
+            # セッションを借りる（同じデータなら一時ファイルとメンバー索引を再利用する）
+            with self._open_rar_bytes(archive_data) as session:
+                info = session.getinfo(normal_path)
+                if info is None:
                     self.debug_error(f"ファイルが見つかりません: {normal_path}")
                     raise FileNotFoundError(f"RARファイル内のファイルが見つかりません: {normal_path}")
-                except rarfile.BadRarFile as e:
-                    error_msg = f"不正なRARデータ: {str(e)}"
-                    self.debug_error(error_msg)
-                    raise IOError(error_msg)
-                except rarfile.RarCRCError as e:
-                    error_msg = f"RARデータのCRCエラー: {str(e)}"
-                    self.debug_error(error_msg)
-                    raise IOError(error_msg)
-                except rarfile.PasswordRequired as e:
-                    error_msg = f"パスワードで保護されたRARデータ: {str(e)}"
-                    self.debug_error(error_msg)
-                    raise IOError(error_msg)
-                except Exception as e:
-                    self.debug_error(f"ファイル読み込み中にエラー: {e}", trace=True)
-                    raise IOError(f"RARデータ読み込みエラー: {str(e)}")
-            except Exception as e:
-                self.debug_error(f"RARファイルをオープンできません: {e}", trace=True)
-                raise IOError(f"RARデータオープンエラー: {str(e)}")
+                content = session.rf.read(info)
+            self.debug_info(f"ファイル読み込み成功: {len(content)} バイト")
+            return content
+        except FileNotFoundError:
+            raise
+        except rarfile.BadRarFile as e:
+            error_msg = f"不正なRARデータ: {str(e)}"
+            self.debug_error(error_msg)
+            self._invalidate(archive_data)
+            raise IOError(error_msg)
+        except rarfile.RarCRCError as e:
+            error_msg = f"RARデータのCRCエラー: {str(e)}"
+            self.debug_error(error_msg)
+            raise IOError(error_msg)
+        except rarfile.PasswordRequired as e:
+            error_msg = f"パスワードで保護されたRARデータ: {str(e)}"
+            self.debug_error(error_msg)
+            raise IOError(error_msg)
         except Exception as e:
-            self.debug_error(f"メモリデータからの読み込みエラー: {e}")
+            self.debug_error(f"メモリデータからの読み込みエラー: {e}", trace=True)
             raise IOError(f"メモリ上のRARデータ処理エラー: {str(e)}")
-        finally:
-            # 一時ファイルを削除
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.unlink(temp_file)
-                except Exception as e:
-                    self.debug_warning(f"一時ファイル削除エラー: {e}")
 
+    def read_files(self, archive: Union[str, bytes], file_paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """
+        アーカイブ内の複数のファイルを格納順に読み込む
+        
+        ソリッド書庫の圧縮されたメンバーは、1件ずつ読むと毎回先頭から展開し直すことになるため、
+        UnRARが使える場合は1回の起動でまとめて展開する。それ以外のメンバーは
+        同じセッションから格納順に読み込み、読んだものから返す。
+        
+        Args:
+            archive: RARファイルのパス、またはRARデータのバイト配列
+            file_paths: アーカイブ内のファイルパスのリスト
+            
+        Yields:
+            (書庫内パス, 内容) のタプル。読み込めなかったファイルは返さない
+            
+        Raises:
+            IOError: 書庫が壊れているなど読み込みを続けられない場合
+        """
+        if not RARFILE_AVAILABLE or not self._available:
+            return
+        
+        count = 0
+        try:
+            with self._open_session(archive) as session:
+                # 書庫内に存在するファイルだけを格納順に並べる
+                members = [m for m in dict.fromkeys(p.replace('\\', '/') for p in file_paths)
+                           if m in session.infos]
+                members.sort(key=session.order.__getitem__)
+                
+                # ソリッド書庫の圧縮メンバーは1回の展開でまとめて取り出す
+                extracted: Dict[str, bytes] = {}
+                if session.solid and self._unrar_path:
+                    compressed = [m for m in members
+                                  if session.infos[m].compress_type != rarfile.RAR_M0]
+                    if len(compressed) > 1:
+                        extracted = self._extract_members(session, compressed)
+                
+                for member in members:
+                    content = extracted.pop(member, None)
+                    if content is None:
+                        try:
+                            content = session.rf.read(session.infos[member])
+                        except (rarfile.RarCRCError, rarfile.PasswordRequired) as e:
+                            self.debug_warning(f"一括読み込みでファイルを読めませんでした: {member} - {e}")
+                            continue
+                    count += 1
+                    yield member, content
+        except rarfile.Error as e:
+            self.debug_error(f"一括読み込みエラー: {e}")
+            if isinstance(e, rarfile.BadRarFile):
+                self._invalidate(archive)
+            raise IOError(f"RARファイルの一括読み込みエラー: {str(e)}")
+        
+        self.debug_info(f"一括読み込み完了: {count} 件")
+    
+    def read_many(self, archive: Union[str, bytes], file_paths: List[str]) -> Dict[str, bytes]:
+        """
+        アーカイブ内の複数のファイルをまとめて読み込む
+        
+        Args:
+            archive: RARファイルのパス、またはRARデータのバイト配列
+            file_paths: アーカイブ内のファイルパスのリスト
+            
+        Returns:
+            書庫内パスをキー、内容を値とする辞書（読み込めなかったファイルは含まれない）
+        """
+        try:
+            return dict(self.read_files(archive, file_paths))
+        except OSError as e:
+            self.debug_error(f"一括読み込みエラー: {e}")
+            return {}
+    
+    def _extract_members(self, session: RarSession, members: List[str]) -> Dict[str, bytes]:
+        """
+        指定したメンバーを1回のUnRAR起動で一時ディレクトリに展開して読み込む
+        
+        Args:
+            session: 対象書庫のセッション
+            members: 展開する書庫内パスのリスト
+            
+        Returns:
+            書庫内パスをキー、内容を値とする辞書
+        """
+        result: Dict[str, bytes] = {}
+        extract_dir = tempfile.mkdtemp(prefix="rar_batch_")
+        list_fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="rar_list_")
+        try:
+            # 展開対象はリストファイルで渡す（コマンドライン長の制限を避ける）
+            with os.fdopen(list_fd, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(session.infos[m].filename for m in members))
+            
+            # -idq: 出力を抑制, -p-: パスワードを問い合わせない, -scfl: リストファイルはUTF-8
+            cmd = [self._unrar_path, "x", "-y", "-idq", "-p-", "-scfl",
+                   session.archive_path, f"@{list_path}", extract_dir + os.sep]
+            self.debug_info(f"{len(members)} 件のメンバーを一括展開: {session.archive_path}")
+            retcode, _, stderr = run_command_binary(cmd)
+            if retcode != 0:
+                self.debug_warning(f"一括展開エラー (コード={retcode}): {stderr.decode('utf-8', errors='replace')}")
+            
+            # 展開できた分は使い、残りは呼び出し元で1件ずつ読み込む
+            for member in members:
+                extracted_path = os.path.join(extract_dir, member.replace('/', os.sep))
+                if os.path.isfile(extracted_path):
+                    with open(extracted_path, 'rb') as f:
+                        result[member] = f.read()
+            return result
+        finally:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+            try:
+                os.unlink(list_path)
+            except OSError:
+                pass
 
     def _join_paths(self, base_path: str, rel_path: str) -> str:
         """
@@ -5,13 +5,18 @@ ZIPアーカイブファイルへのアクセスを提供するハンドラ
 """
 import os
 import io
+import struct
 import zipfile
+import zlib
 import traceback
 import datetime
-from typing import List, Optional, Dict, Any, BinaryIO, Tuple, Set, Union
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, BinaryIO, Tuple, Set, Union, Iterable, Iterator
 
 from arc.arc import EntryInfo, EntryType
 from .handler import ArchiveHandler  # 重複import修正
+from .handle_pool import HandlePool, file_key, bytes_key
+from .archive_view import ArchiveView
 
 
 class ZipHandler(ArchiveHandler):
@@ -21,11 +26,109 @@ class ZipHandler(ArchiveHandler):
     ZIPアーカイブファイルの内容にアクセスするためのハンドラ実装
     """
     
+    # 開いたままにしておくZipFileハンドルの最大数
+    MAX_OPEN_HANDLES = 16
+    
+    # メモリ上のZIPデータとしてArchiveViewを受け付ける
+    supports_archive_view = True
+    
     def __init__(self):
         """ZIPアーカイブハンドラを初期化する"""
         super().__init__()  # 親クラス初期化を追加
         # ZIP構造キャッシュの追加
         self.structure_cache: Dict[str, Dict[str, Dict]] = {}
+        # 開いたZipFileを再利用するハンドルプール（中央ディレクトリの再解析を避ける）
+        self._handle_pool = HandlePool(self.MAX_OPEN_HANDLES, name="ZipHandler")
+    
+    @contextmanager
+    def _open_zip(self, zip_path: str) -> Iterator[zipfile.ZipFile]:
+        """
+        ハンドルプールからZIPファイルを借りる
+        
+        パス・更新日時・サイズが同じ間は同じZipFileを使い回す。
+        
+        Args:
+            zip_path: ZIPファイルのパス
+            
+        Yields:
+            開いているZipFileオブジェクト
+        """
+        with self._handle_pool.acquire(file_key(zip_path), lambda: zipfile.ZipFile(zip_path, 'r')) as zf:
+            yield zf
+    
+    @contextmanager
+    def _open_zip_bytes(self, archive_data: bytes) -> Iterator[zipfile.ZipFile]:
+        """
+        ハンドルプールからメモリ上のZIPデータを借りる
+        
+        同じバイトデータ（同一オブジェクト）に対しては中央ディレクトリの解析を1回で済ませる。
+        
+        Args:
+            archive_data: ZIPデータのバイト配列、またはArchiveView
+            
+        Yields:
+            開いているZipFileオブジェクト
+        """
+        key = bytes_key(archive_data)
+        if isinstance(archive_data, ArchiveView):
+            # ビューは全体をコピーせず、必要な範囲だけを読み込むストリームとして開く
+            opener = lambda: zipfile.ZipFile(archive_data.open())
+        else:
+            opener = lambda: zipfile.ZipFile(io.BytesIO(archive_data))
+        with self._handle_pool.acquire(key, opener, source=archive_data) as zf:
+            yield zf
+    
+    def close_handles(self) -> None:
+        """プールしているZipFileハンドルをすべて閉じる"""
+        self._handle_pool.close_all()
+    
+    def get_member_range(self, archive: Union[str, ArchiveView], file_path: str) -> Optional[Tuple[int, int]]:
+        """
+        無圧縮（STORED）で格納されたメンバーのデータ範囲を取得する
+        
+        ローカルファイルヘッダを読んで、データ本体の開始位置を求める。
+        暗号化されたメンバーや圧縮されたメンバーはNoneを返す。
+        
+        Args:
+            archive: ZIPファイルのパス、またはArchiveView
+            file_path: アーカイブ内のファイルパス
+            
+        Returns:
+            (書庫先頭からのオフセット, サイズ) のタプル。範囲参照できない場合はNone
+        """
+        norm_file_path = file_path.replace('\\', '/')
+        try:
+            if isinstance(archive, ArchiveView):
+                with self._open_zip_bytes(archive) as zf:
+                    info = zf.getinfo(norm_file_path)
+            else:
+                with self._open_zip(archive) as zf:
+                    info = zf.getinfo(norm_file_path)
+            
+            # 圧縮・暗号化されているメンバーはそのままでは参照できない
+            if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+                return None
+            
+            # ローカルファイルヘッダのファイル名長と拡張フィールド長からデータ位置を求める
+            if isinstance(archive, ArchiveView):
+                header = archive.read_at(info.header_offset, zipfile.sizeFileHeader)
+            else:
+                with open(archive, 'rb') as f:
+                    f.seek(info.header_offset)
+                    header = f.read(zipfile.sizeFileHeader)
+            if len(header) != zipfile.sizeFileHeader:
+                return None
+            fields = struct.unpack(zipfile.structFileHeader, header)
+            if fields[0] != zipfile.stringFileHeader:
+                self.debug_warning(f"ローカルファイルヘッダが不正です: {norm_file_path}")
+                return None
+            # fields[10]: ファイル名長, fields[11]: 拡張フィールド長
+            data_offset = info.header_offset + zipfile.sizeFileHeader + fields[10] + fields[11]
+            self.debug_info(f"無圧縮メンバーの範囲: {norm_file_path} -> offset={data_offset}, size={info.file_size}")
+            return data_offset, info.file_size
+        except (KeyError, zipfile.BadZipFile, OSError, struct.error) as e:
+            self.debug_warning(f"メンバー範囲の取得に失敗しました: {norm_file_path} - {e}")
+            return None
         
     @property
     def supported_extensions(self) -> List[str]:
@@ -94,7 +197,7 @@ class ZipHandler(ArchiveHandler):
         
         # ZIPファイルを開く
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
+            with self._open_zip(zip_path) as zf:
                 # 共通処理メソッドを呼び出し
                 return self._process_entries(zf, path, zip_path, internal_path, from_memory=False)
         except Exception as e:
@@ -458,7 +561,7 @@ class ZipHandler(ArchiveHandler):
         norm_file_path = file_path.replace('\\', '/')
         
         try:
-            with zipfile.ZipFile(archive_path, 'r') as zip_file:
+            with self._open_zip(archive_path) as zip_file:
                 try:
                     # 指定されたパスでファイルを直接読み込む
                     content = zip_file.read(norm_file_path)
@@ -473,6 +576,8 @@ class ZipHandler(ArchiveHandler):
             # ZIP書庫が壊れている場合、詳細なメッセージをつけてIOErrorをスロー
             error_msg = f"ZIPファイルが破損しています: {archive_path} - {str(e)}"
             self.debug_error(error_msg)
+            # 壊れたハンドルは再利用しない
+            self._handle_pool.invalidate(file_key(archive_path))
             raise IOError(error_msg)
         except PermissionError as e:
             # アクセス権限エラーの場合はそのまま再スロー
@@ -486,11 +591,91 @@ class ZipHandler(ArchiveHandler):
             self.debug_error(f"ZIPアーカイブ内のファイル読み込みエラー: {archive_path} - {str(e)}")
             raise IOError(f"ZIPアーカイブ読み込みエラー: {archive_path} - {str(e)}")
     
+    def read_files(self, archive: Union[str, bytes, ArchiveView], file_paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """
+        アーカイブ内の複数のファイルをローカルヘッダのオフセット順に読み込む
+        
+        プールのZipFileを1回だけ借り、書庫の先頭から順にシークするように読み込む。
+        
+        Args:
+            archive: ZIPファイルのパス、またはZIPデータのバイト配列かArchiveView
+            file_paths: アーカイブ内のファイルパスのリスト
+            
+        Yields:
+            (書庫内パス, 内容) のタプル。存在しないファイルや、暗号化されているなどで読めないファイルは返さない
+            
+        Raises:
+            IOError: ZIPファイルが破損しているなど読み込みを続けられない場合
+        """
+        is_file = isinstance(archive, str)
+        try:
+            with (self._open_zip(archive) if is_file else self._open_zip_bytes(archive)) as zf:
+                infos = []
+                for member in dict.fromkeys(p.replace('\\', '/') for p in file_paths):
+                    try:
+                        infos.append(zf.getinfo(member))
+                    except KeyError:
+                        self.debug_warning(f"  ファイルが見つかりません: {member}")
+                infos.sort(key=lambda info: info.header_offset)
+                
+                for info in infos:
+                    try:
+                        data = zf.read(info)
+                    except (RuntimeError, NotImplementedError, zlib.error) as e:
+                        # 暗号化されたファイルや対応していない圧縮方式のファイルは飛ばして残りを読む
+                        self.debug_warning(f"一括読み込みでファイルを読めませんでした: {info.filename} - {e}")
+                        continue
+                    yield info.filename, data
+        except zipfile.BadZipFile as e:
+            error_msg = f"ZIPファイルが破損しています: {archive if is_file else 'memory_zip'} - {str(e)}"
+            self.debug_error(error_msg)
+            # 壊れたハンドルは再利用しない
+            self._handle_pool.invalidate(file_key(archive) if is_file else bytes_key(archive))
+            raise IOError(error_msg)
+    
+    def open_archive_file(self, archive: Union[str, bytes, ArchiveView], file_path: str) -> Optional[BinaryIO]:
+        """
+        ZIP内のファイルを、展開しながら読み進めるストリームとして開く
+        
+        ファイル全体をメモリに読み込まない。ストリームはZipFileのファイルオブジェクトを参照しているため、
+        プールからZipFileが追い出されても、ストリームを閉じるまで書庫ファイルは開いたままになる。
+        
+        Args:
+            archive: ZIPファイルのパス、またはZIPデータのバイト配列かArchiveView
+            file_path: アーカイブ内のファイルパス
+            
+        Returns:
+            読み込み用のストリーム（呼び出し元が閉じる）
+            
+        Raises:
+            FileNotFoundError: 指定されたアーカイブやファイルが存在しない場合
+            IOError: アーカイブが壊れているなど読み込みに失敗した場合
+        """
+        is_file = isinstance(archive, str)
+        if is_file and not os.path.isfile(archive):
+            raise FileNotFoundError(f"指定されたアーカイブが存在しません: {archive}")
+        
+        norm_file_path = file_path.replace('\\', '/')
+        self.debug_info(f"ZIPファイル内のファイルをストリームで開く: {norm_file_path}")
+        try:
+            with (self._open_zip(archive) if is_file else self._open_zip_bytes(archive)) as zip_file:
+                try:
+                    return zip_file.open(norm_file_path)
+                except KeyError:
+                    self.debug_warning(f"  ファイルが見つかりません: {norm_file_path}")
+                    raise FileNotFoundError(f"ZIPファイル内のファイルが見つかりません: {norm_file_path}")
+        except zipfile.BadZipFile as e:
+            error_msg = f"ZIPファイルが破損しています: {archive if is_file else 'memory_zip'} - {str(e)}"
+            self.debug_error(error_msg)
+            # 壊れたハンドルは再利用しない
+            self._handle_pool.invalidate(file_key(archive) if is_file else bytes_key(archive))
+            raise IOError(error_msg)
+    
     def get_stream(self, path: str) -> Optional[BinaryIO]:
         """
         指定されたパスのファイルのストリームを取得する
         
-        ZIPファイル内のファイルの場合は、一時的にファイル全体を読み込んでメモリ上のストリームとして返す
+        ZIPファイル内のファイルの場合は、展開しながら読み進めるストリームを返す
         
         Args:
             path: ストリームを取得するファイルのパス
@@ -508,12 +693,8 @@ class ZipHandler(ArchiveHandler):
                     return open(zip_path, 'rb')
                 return None
                 
-            # ZIPファイル内のファイルの場合、そのファイル内容を取得してメモリストリームとして返す
-            file_content = self.read_file(path)
-            if file_content is not None:
-                return io.BytesIO(file_content)
-                
-            return None
+            # ZIPファイル内のファイルの場合、展開しながら読むストリームとして開く
+            return self.open_archive_file(zip_path, internal_path)
         except Exception as e:
             self.debug_error(f"ファイルストリーム取得エラー: {e}", trace=True)
             return None
@@ -548,8 +729,7 @@ class ZipHandler(ArchiveHandler):
                     self.debug_info(f"ZipHandler: ディレクトリパスに末尾スラッシュを追加: {internal_path}")
             
             # メモリ上のZIPを開く
-            bytes_io = io.BytesIO(archive_data)
-            with zipfile.ZipFile(bytes_io) as zf:
+            with self._open_zip_bytes(archive_data) as zf:
                 # 共通処理メソッドを呼び出し
                 entries = self._process_entries(zf, path, "memory_zip", internal_path, from_memory=True)
                 self.debug_info(f"ZipHandler: メモリデータから {len(entries)} 個のエントリを取得")
@@ -611,9 +791,8 @@ class ZipHandler(ArchiveHandler):
         self.debug_info(f"ZipHandler: メモリからファイル読み込み: {norm_file_path}")
         
         try:
-            # メモリ上でZIPを開く
-            bytes_io = io.BytesIO(archive_data)
-            with zipfile.ZipFile(bytes_io) as zip_file:
+            # メモリ上でZIPを開く（プール済みならそのまま再利用）
+            with self._open_zip_bytes(archive_data) as zip_file:
                 try:
                     # 指定されたパスでファイルを直接読み込む
                     content = zip_file.read(norm_file_path)
@@ -962,8 +1141,8 @@ class ZipHandler(ArchiveHandler):
             # 内部パスを無視してアーカイブファイル全体を処理
         
         try:
-            # ZIPファイルを開く
-            with zipfile.ZipFile(zip_path, 'r') as zf:
+            # ZIPファイルを開く（以降の読み込みでこのハンドルを再利用する）
+            with self._open_zip(zip_path) as zf:
                 # 共通処理メソッドを呼び出し
                 return self._process_all_entries(zf, zip_path)
         except zipfile.BadZipFile as e:
@@ -1005,11 +1184,9 @@ class ZipHandler(ArchiveHandler):
         self.debug_info(f"ZipHandler: メモリデータからすべてのエントリを取得中 ({len(archive_data)} バイト)")
         
         try:
-            # メモリ上のZIPを開く
-            bytes_io = io.BytesIO(archive_data)
-            
+            # メモリ上のZIPを開く（以降のread_file_from_bytesでこのハンドルを再利用する）
             try:
-                with zipfile.ZipFile(bytes_io) as zf:
+                with self._open_zip_bytes(archive_data) as zf:
                     # 共通処理メソッドを呼び出し（パスパラメータは不要）
                     return self._process_all_entries(zf, "memory_zip")
             except zipfile.BadZipFile as e:
@@ -5,7 +5,7 @@
 """
 
 import os
-from typing import List, Optional, BinaryIO, Dict
+from typing import List, Optional, BinaryIO, Dict, Iterable, Iterator, Tuple
 
 from .arc import EntryInfo, EntryType
 from .handler.handler import ArchiveHandler
@@ -51,8 +51,12 @@ def create_archive_manager():
 def reset_manager() -> None:
     """
     シングルトンのアーカイブマネージャーをリセットする（主にテスト用）
+    
+    ハンドラが開いたままにしている書庫ハンドルもここで閉じる
     """
     global _instance
+    if _instance is not None:
+        _instance.close_handles()
     _instance = None
 
 
@@ -111,6 +115,21 @@ def read_file(path: str) -> Optional[bytes]:
     return get_archive_manager().read_file(path)
 
 
+def read_files(paths: Iterable[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    複数のファイルの内容をまとめて読み込む
+    
+    同じ書庫内のファイルは書庫を1回だけ開き、格納順に読み込む。
+    
+    Args:
+        paths: 読み込むファイルのパスのリスト
+            
+    Yields:
+        (パス, 内容) のタプル。読み込みに失敗したファイルの内容はNone
+    """
+    return get_archive_manager().read_files(paths)
+
+
 def read_archive_file(archive_path: str, file_path: str) -> Optional[bytes]:
     """
     アーカイブファイル内のファイルの内容を読み込む
@@ -8,11 +8,11 @@ import os
 import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor
 import threading
-import queue
 from typing import List, Optional, Dict, Set, Tuple, Deque
 from collections import deque
 
 from ...arc import EntryInfo, EntryType, EntryStatus
+from ...handler.archive_view import ArchiveView
 from proc.util import get_cpu_count, get_optimal_worker_count
 
 class ArchiveProcessor:
@@ -26,9 +26,12 @@ class ArchiveProcessor:
     MAX_NEST_DEPTH = 20
     
     # マルチスレッド設定
-    MIN_ARCHIVES_FOR_THREADING = 3  # この数以上のアーカイブがある場合にマルチスレッドを使用
     MAX_THREADS = 8  # 最大スレッド数の上限
     
+    # 遅延展開設定
+    LAZY_EXPANSION = True  # ネスト書庫は一覧取得時に展開せず、必要になった時点かバックグラウンドで展開する
+    EXPANSION_SCAN_SCOPE = "background-expansion"  # バックグラウンド展開のスキャンの識別子
+    
     def __init__(self, manager):
         """
         アーカイブプロセッサーを初期化する
@@ -39,6 +42,22 @@ class ArchiveProcessor:
         self._manager = manager
         # パス解析用のスレッドローカルストレージ
         self._thread_local = threading.local()
+        # ネスト書庫の内容を後から用意する処理の排他用
+        self._nested_view_lock = threading.RLock()
+        
+        # ネスト書庫の遅延展開の状態（_expand_condのロックで保護）
+        self.lazy_expansion = self.LAZY_EXPANSION
+        self._expand_cond = threading.Condition(threading.Lock())
+        self._expanding: Dict[str, threading.Event] = {}  # 展開中の書庫パス -> 完了通知
+        self._expand_queue: Deque[EntryInfo] = deque()  # バックグラウンドで展開する書庫
+        self._expander_thread: Optional[threading.Thread] = None
+        self._expander_cancel = False
+        self._foreground_requests = 0  # 要求に応じて展開中の数（バックグラウンド展開はこれが0になるまで待つ）
+        self._expansion_done = threading.Event()
+        self._expansion_done.set()
+        self._base_path = ""
+        # パス深度キャッシュの世代（list_all_entriesごとに進める）
+        self._scan_generation = 0
         
         # 最適なスレッド数を計算
         self._thread_count = min(
@@ -59,8 +78,10 @@ class ArchiveProcessor:
         Returns:
             ネスト深度（書庫の中に書庫がある回数）
         """
-        if not hasattr(self._thread_local, 'archive_path_depths'):
+        # ワーカースレッドはスキャンをまたいで使い回されるため、前のスキャンのキャッシュは捨てる
+        if getattr(self._thread_local, 'scan_generation', None) != self._scan_generation:
             self._thread_local.archive_path_depths = {}
+            self._thread_local.scan_generation = self._scan_generation
             
         # パスの深度がキャッシュされていればそれを返す
         if path in self._thread_local.archive_path_depths:
@@ -144,6 +165,9 @@ class ArchiveProcessor:
                                 for entry in entries:
                                     # エントリをファイナライズ
                                     finalized_entry = self._manager.finalize_entry(entry, archive_path)
+                                    # 遅延展開ではネスト書庫を未展開（SCANNING）として登録する
+                                    if self.lazy_expansion and finalized_entry.type == EntryType.ARCHIVE:
+                                        finalized_entry.status = EntryStatus.SCANNING
                                     # ファイナライズしたエントリをキャッシュに追加
                                     entry_key = finalized_entry.rel_path.rstrip('/')
                                     if entry_key or entry_key == "":  # 空文字列キー（ルート）も登録可能に
@@ -174,8 +198,6 @@ class ArchiveProcessor:
 
             # 1. 親書庫のタイプと場所を判別
             parent_archive_path = None
-            parent_archive_bytes = None
-            parent_archive_temp_path = None
             
             # パスを詳細に分析して親書庫と内部パスを特定
             parent_path, internal_path = self._manager._path_resolver._analyze_path(archive_path)
@@ -200,25 +222,27 @@ class ArchiveProcessor:
                 self._manager.debug_warning(f"親書庫のハンドラが見つかりません: {parent_archive_path}")
                 return []
             
-            # 3. ネスト書庫のコンテンツを取得
+            # 3. ネスト書庫の内容をストアに登録
+            _, ext = os.path.splitext(archive_path)
+            if not ext:
+                ext = '.bin'  # デフォルト拡張子
             self._manager.debug_info(f"親書庫からネスト書庫のコンテンツを取得: {parent_archive_path} -> {internal_path}")
             try:
-                nested_archive_content = parent_handler.read_archive_file(parent_archive_path, internal_path)
+                nested_view = self._store_nested_archive(parent_handler, parent_archive_path, internal_path, archive_path, ext)
             except (IOError, PermissionError) as e:
                 # IO/Permissionエラーの場合はエントリステータスをBROKENに設定し処理を続行
                 self._manager.debug_error(f"親書庫からネスト書庫のコンテンツ取得中にIO/Permissionエラー: {e}")
-                if hasattr(arc_entry, 'status'):
-                    arc_entry.status = EntryStatus.BROKEN
-                else:
-                    arc_entry.status = EntryStatus.BROKEN
+                arc_entry.status = EntryStatus.BROKEN
                 # このアーカイブは処理できないので空リストを返す
                 return []
             
-            if not nested_archive_content:
+            if not nested_view:
                 self._manager.debug_warning(f"親書庫からネスト書庫のコンテンツ取得に失敗")
                 return []
             
-            self._manager.debug_info(f"親書庫からネスト書庫のコンテンツを取得成功: {len(nested_archive_content)} バイト")
+            self._manager.debug_info(f"親書庫からネスト書庫のコンテンツを取得成功: {len(nested_view)} バイト")
+            # 書庫エントリにはストア内のビューを保持する（内容そのものは保持しない）
+            arc_entry.cache = nested_view
 
             # 4. ネスト書庫のハンドラを取得
             handler = self._manager.get_handler(archive_path)
@@ -226,69 +250,26 @@ class ArchiveProcessor:
                 self._manager.debug_warning(f"書庫のハンドラが見つかりません: {archive_path}")
                 return []
             
-            # 5. ネスト書庫のコンテンツの処理方法を決定
-            # バイトデータからエントリリストを取得できるか確認
-            can_process_bytes = handler.can_handle_bytes(nested_archive_content, archive_path)
-
-            # 現在のエントリにcacheプロパティがあるか確認
-            if not hasattr(arc_entry, 'cache'):
-                self._manager.debug_info(f"エントリにcacheプロパティがありません。作成します。")
-                arc_entry.cache = None
-
-            # キャッシュ処理 - 重要: ネスト書庫自身のコンテンツをキャッシュする
-            if can_process_bytes:
-                # バイトデータを直接処理できる場合、バイトデータをキャッシュ
-                self._manager.debug_info(f"ネスト書庫のバイトデータをキャッシュします ({len(nested_archive_content)} バイト)")
-                arc_entry.cache = nested_archive_content
-                self._manager.debug_info(f"ネスト書庫のバイトデータをキャッシュしました ({arc_entry.path} )")
-            else:
-                # バイトデータを直接処理できない場合は一時ファイルを作成してパスをキャッシュ
-                self._manager.debug_info(f"ネスト書庫の一時ファイルパスをキャッシュします")
-                
-                # 拡張子を取得
-                _, ext = os.path.splitext(archive_path)
-                if not ext:
-                    ext = '.bin'  # デフォルト拡張子
-                
-                # 一時ファイルに書き込む
-                try:
-                    temp_file_path = self._manager._temp_file_manager.save_to_temp_file(nested_archive_content, ext)
-                    if not temp_file_path:
-                        self._manager.debug_error(f"一時ファイル作成に失敗しました")
-                        return []
-                    
-                    self._manager.debug_info(f"一時ファイルを作成: {temp_file_path}")
-                    # 一時ファイルパスをキャッシュ
-                    arc_entry.cache = temp_file_path
-                    self._manager._temp_files.add(temp_file_path)  # 後でクリーンアップするためにリストに追加
-                except Exception as e:
-                    self._manager.debug_error(f"一時ファイル処理中にエラー: {e}", trace=True)
-                    if 'temp_file_path' in locals() and temp_file_path and os.path.exists(temp_file_path):
-                        try:
-                            self._manager._temp_file_manager.remove_temp_file(temp_file_path)
-                        except Exception as e2:
-                            self._manager.debug_error(f"一時ファイル削除中にエラー: {e2}")
-                    return []
-            
-            # 6. エントリリストを取得
+            # 5. エントリリストを取得
             entries = None
             
             try:
-                # バイトデータから直接エントリリストを取得
-                if can_process_bytes:
-                    entries = handler.list_all_entries_from_bytes(nested_archive_content)
-                    self._manager.debug_info(f"バイトデータから {len(entries) if entries else 0} エントリを取得")
-                # 一時ファイルからエントリリストを取得
-                elif 'temp_file_path' in locals() and temp_file_path:
-                    entries = handler.list_all_entries(temp_file_path)
+                if handler.supports_archive_view and handler.can_handle_bytes(nested_view, archive_path):
+                    # ビューから直接エントリリストを取得
+                    entries = handler.list_all_entries_from_bytes(nested_view)
+                    self._manager.debug_info(f"ネスト書庫のビューから {len(entries) if entries else 0} エントリを取得")
+                else:
+                    # ビュー非対応のハンドラにはファイルとして渡す
+                    nested_file_path = self._manager._nested_store.get_path(nested_view)
+                    if not nested_file_path:
+                        self._manager.debug_error(f"一時ファイル作成に失敗しました")
+                        return []
+                    entries = handler.list_all_entries(nested_file_path)
                     self._manager.debug_info(f"一時ファイルから {len(entries) if entries else 0} エントリを取得")
             except (IOError, PermissionError) as e:
                 # IO/Permissionエラーの場合はエントリステータスをBROKENに設定し処理を続行
                 self._manager.debug_error(f"エントリリスト取得中にIO/Permissionエラー: {e}", trace=True)
-                if hasattr(arc_entry, 'status'):
-                    arc_entry.status = EntryStatus.BROKEN
-                else:
-                    arc_entry.status = EntryStatus.BROKEN
+                arc_entry.status = EntryStatus.BROKEN
                 # このアーカイブは処理できないので空リストを返す
                 return []
             except Exception as e:
@@ -324,12 +305,15 @@ class ArchiveProcessor:
                     created_time=entry.created_time,
                     is_hidden=entry.is_hidden,
                     name_in_arc=entry.name_in_arc,
-                    attrs=entry.attrs,
+                    attrs=entry.attrs if entry.has_attrs else None,
                     path=entry_path  # pathにもentry_pathを設定
                 )
                 
                 # 作成したエントリを即座にファイナライズ
                 finalized_entry = self._manager.finalize_entry(new_entry, arc_entry.path)
+                # 遅延展開ではネスト書庫を未展開（SCANNING）として登録する
+                if self.lazy_expansion and finalized_entry.type == EntryType.ARCHIVE:
+                    finalized_entry.status = EntryStatus.SCANNING
                 
                 # ファイナライズしたエントリをすぐにキャッシュに登録（マルチスレッドセーフに）
                 with cache_lock:
@@ -370,6 +354,106 @@ class ArchiveProcessor:
             self._manager.debug_error(f"_process_archive_for_all_entries でエラー: {e}", trace=True)
             return []
     
+    def _store_nested_archive(self, parent_handler, parent_archive_path: str, internal_path: str,
+                              archive_path: str, ext: str) -> Optional[ArchiveView]:
+        """
+        ネスト書庫の内容を親書庫から取り出してネスト書庫ストアに登録する
+        
+        親書庫が物理ファイルか、ストアに登録済みのネスト書庫であれば、
+        無圧縮で格納されたメンバーはコピーせずに範囲として登録する。
+        
+        Args:
+            parent_handler: 親書庫のハンドラ
+            parent_archive_path: 親書庫のパス（物理パスまたは仮想パス）
+            internal_path: 親書庫内でのネスト書庫のパス
+            archive_path: ネスト書庫の仮想パス（ストアのキー）
+            ext: ネスト書庫の拡張子
+            
+        Returns:
+            登録したネスト書庫のビュー。取得できなかった場合はNone
+            
+        Raises:
+            IOError: 親書庫の読み込みに失敗した場合
+            PermissionError: 親書庫へのアクセス権限がない場合
+        """
+        store = self._manager._nested_store
+        
+        # 親書庫の実体を特定（物理ファイルか、ストアに登録済みのネスト書庫か）
+        parent_source = None
+        if os.path.isfile(parent_archive_path):
+            parent_source = parent_archive_path
+        else:
+            parent_view = store.get(parent_archive_path)
+            if parent_view is not None:
+                if parent_handler.supports_archive_view:
+                    parent_source = parent_view
+                else:
+                    parent_source = store.get_path(parent_view)
+        
+        if parent_source is None:
+            # 親書庫の実体が分からない場合は従来通りハンドラに任せる
+            content = parent_handler.read_archive_file(parent_archive_path, internal_path)
+            return store.put_bytes(archive_path, content, ext) if content else None
+        
+        # 無圧縮メンバーは親書庫の範囲として参照する
+        member_range = parent_handler.get_member_range(parent_source, internal_path)
+        if member_range is not None:
+            offset, size = member_range
+            return store.put_range(archive_path, parent_source, offset, size, ext)
+        
+        # 圧縮されている場合は展開してストアに登録する（上限を超えれば一時ファイルに退避される）
+        if isinstance(parent_source, ArchiveView):
+            content = parent_handler.read_file_from_bytes(parent_source, internal_path)
+        else:
+            content = parent_handler.read_archive_file(parent_source, internal_path)
+        if not content:
+            return None
+        return store.put_bytes(archive_path, content, ext)
+    
+    def ensure_nested_view(self, arc_entry: EntryInfo) -> Optional[ArchiveView]:
+        """
+        ネスト書庫の内容がストアになければ、親書庫から取り出して登録する
+        
+        インデックスから復元したエントリはネスト書庫の内容を持たないため、
+        最初に読み込むときにこのメソッドで用意する。親もネスト書庫であれば先に親を用意する。
+        
+        Args:
+            arc_entry: ネスト書庫のエントリ
+            
+        Returns:
+            ネスト書庫のビュー。用意できなかった場合はNone
+        """
+        with self._nested_view_lock:
+            cache = getattr(arc_entry, 'cache', None)
+            if cache is not None:
+                return cache if isinstance(cache, ArchiveView) else None
+            
+            archive_path = arc_entry.path.rstrip('/')
+            parent_path, internal_path = self._manager._path_resolver._analyze_path(archive_path)
+            if not parent_path or parent_path == archive_path:
+                return None
+            if self._manager.current_path and not os.path.isabs(parent_path):
+                parent_path = os.path.join(self._manager.current_path, parent_path).replace('\\', '/')
+            
+            # 親もネスト書庫であれば先に用意する
+            if not os.path.isfile(parent_path):
+                root_path = self._manager.current_path.replace('\\', '/').rstrip('/')
+                parent_key = parent_path[len(root_path):].strip('/') if parent_path.startswith(root_path) else ""
+                parent_entry = self._manager._path_resolver._find_archive_entry_in_cache(parent_key)
+                if parent_entry is None or self.ensure_nested_view(parent_entry) is None:
+                    self._manager.debug_warning(f"親書庫の内容を用意できません: {parent_path}")
+                    return None
+            
+            parent_handler = self._manager.get_handler(parent_path)
+            if not parent_handler:
+                return None
+            _, ext = os.path.splitext(archive_path)
+            self._manager.debug_info(f"ネスト書庫の内容を用意します: {archive_path}")
+            nested_view = self._store_nested_archive(parent_handler, parent_path, internal_path,
+                                                     archive_path, ext or '.bin')
+            arc_entry.cache = nested_view
+            return nested_view
+    
     def list_all_entries(self, path: str) -> List[EntryInfo]:
         """
         指定されたパスの配下にあるすべてのエントリを再帰的に取得する
@@ -395,14 +479,22 @@ class ArchiveProcessor:
         self._manager._processing_paths.add(norm_path)
         
         try:
+            # 前のパスのバックグラウンド展開を止める（リセット後のキャッシュに登録させないため）
+            self.cancel_background_expansion()
+            self._base_path = path
+            
             # 探索済みエントリとプロセス済みパスをリセット
             # キャッシュをリセットし、保持している一時ファイルも削除
             self._manager._entry_cache.reset_all_entries()
             self._manager._processed_paths = set()
+            # 前のフォルダで開いた書庫ハンドルを閉じる
+            self._manager.close_handles()
+            # ネスト書庫の内容も破棄する（ハンドルを閉じた後に行う）
+            self._manager._nested_store.clear()
+            self._manager._persistent_index.reset()
             
-            # パス深度のキャッシュをリセット
-            if hasattr(self._thread_local, 'archive_path_depths'):
-                self._thread_local.archive_path_depths = {}
+            # パス深度のキャッシュをリセット（各スレッドは世代が変わったことで自分のキャッシュを捨てる）
+            self._scan_generation += 1
             
             try:
                 # ルートエントリを取得（この処理で全エントリが取得され、キャッシュに登録される）
@@ -419,12 +511,25 @@ class ArchiveProcessor:
                 self._manager.debug_info(f"ルートエントリ処理で {len(nested_archives)} 個のネスト書庫候補を検出")
                 
                 # ネストされたアーカイブを処理 - 初期キューにルート処理で見つかったネスト書庫を使用
-                if nested_archives:
-                    # ネスト書庫処理（キャッシュにエントリを追加するだけで結果は直接使わない）
-                    self._process_nested_archives_with_initial_queue(path, [], nested_archives)
-                    self._manager.debug_info(f"ネスト書庫の処理が完了しました")
+                if nested_archives and self.lazy_expansion:
+                    # 遅延展開: 未展開として登録だけ行い、展開は要求時とバックグラウンドに任せる
+                    # （インデックスへの保存はバックグラウンド展開の完了時に行う）
+                    self._start_background_expansion(nested_archives)
+                    self._manager.debug_info(f"{len(nested_archives)} 個のネスト書庫を未展開として登録しました")
                 else:
-                    self._manager.debug_info("ネスト書庫候補が見つからなかったため、ネスト処理をスキップします")
+                    completed = True
+                    if nested_archives:
+                        # ネスト書庫処理（キャッシュにエントリを追加するだけで結果は直接使わない）
+                        completed = self._process_nested_archives_with_initial_queue(path, [], nested_archives)
+                        self._manager.debug_info(f"ネスト書庫の処理が{'完了しました' if completed else '中止されました'}")
+                    else:
+                        self._manager.debug_info("ネスト書庫候補が見つからなかったため、ネスト処理をスキップします")
+                    
+                    # 今回読み込んだ書庫のエントリを永続インデックスに保存（中止された場合は不完全なので保存しない）
+                    if completed:
+                        saved = self._manager._persistent_index.save_all()
+                        if saved:
+                            self._manager.debug_info(f"{saved} 個の書庫のエントリをインデックスに保存しました")
                 
                 # 最終的にキャッシュから全エントリリストを取得して返す
                 all_entries = list(self._manager._entry_cache.get_all_entries().values())
@@ -449,7 +554,214 @@ class ArchiveProcessor:
             # このパスの処理が完了したのでマークを解除
             self._manager._processing_paths.discard(norm_path)
     
-    def _process_nested_archives_with_initial_queue(self, base_path: str, entries: List[EntryInfo], initial_archives: List[EntryInfo]) -> None:
+    def expand_archive(self, arc_entry: EntryInfo, foreground: bool = True) -> bool:
+        """
+        未展開（SCANNING）のネスト書庫を展開してエントリをキャッシュに登録する
+        
+        同じ書庫を別のスレッドが展開中であれば、その完了を待つ。
+        展開中に見つかったネスト書庫は未展開のままバックグラウンド展開のキューに追加する。
+        要求に応じた展開（foreground=True）で見つかったものはキューの先頭に追加する。
+        
+        Args:
+            arc_entry: 展開する書庫エントリ
+            foreground: 要求に応じた展開ならTrue、バックグラウンド展開ならFalse
+            
+        Returns:
+            展開済み（または展開不要）ならTrue、書庫が壊れている場合はFalse
+        """
+        return self._expand_archive(arc_entry, foreground)[0]
+    
+    def _expand_archive(self, arc_entry: EntryInfo, foreground: bool) -> Tuple[bool, List[EntryInfo]]:
+        """
+        expand_archive の本体
+        
+        バックグラウンド展開で見つかったネスト書庫はキューに追加せずに返す
+        （スキャンエンジンのワーカーが自分のキューに追加する）。
+        
+        Args:
+            arc_entry: 展開する書庫エントリ
+            foreground: 要求に応じた展開ならTrue、バックグラウンド展開ならFalse
+            
+        Returns:
+            (展開済みならTrue, 見つかった未展開のネスト書庫のリスト) のタプル
+            要求に応じた展開で見つかった書庫はキューに追加するため、リストは空になる
+        """
+        archive_path = arc_entry.path
+        with self._expand_cond:
+            if arc_entry.status != EntryStatus.SCANNING:
+                return arc_entry.status != EntryStatus.BROKEN, []
+            event = self._expanding.get(archive_path)
+            is_owner = event is None
+            if is_owner:
+                event = threading.Event()
+                self._expanding[archive_path] = event
+            if foreground:
+                self._foreground_requests += 1
+        
+        new_archives = []
+        try:
+            if not is_owner:
+                # 他のスレッドが展開中なので完了を待つ
+                event.wait()
+                return arc_entry.status != EntryStatus.BROKEN, []
+            
+            self._manager.debug_info(f"ネスト書庫を展開: {archive_path} ({'要求' if foreground else 'バックグラウンド'})")
+            nested_entries = self.process_archive_for_all_entries(self._base_path, arc_entry)
+            new_archives = [e for e in nested_entries if e.type == EntryType.ARCHIVE
+                            and e.status == EntryStatus.SCANNING]
+            return arc_entry.status != EntryStatus.BROKEN, ([] if foreground else new_archives)
+        finally:
+            with self._expand_cond:
+                if is_owner:
+                    if arc_entry.status == EntryStatus.SCANNING:
+                        arc_entry.status = EntryStatus.READY
+                    del self._expanding[archive_path]
+                    event.set()
+                    if foreground and new_archives and not self._expander_cancel:
+                        self._expand_queue.extendleft(reversed(new_archives))
+                        self._ensure_expander_locked()
+                if foreground:
+                    self._foreground_requests -= 1
+                self._expand_cond.notify_all()
+    
+    def ensure_path_expanded(self, path: str) -> bool:
+        """
+        パスがキャッシュになければ、途中にある未展開のネスト書庫を順に展開する
+        
+        Args:
+            path: キャッシュキー（ベースパスからの相対パス）
+            
+        Returns:
+            展開後にパスがキャッシュに存在すればTrue
+        """
+        key = path.replace('\\', '/').strip('/')
+        all_entries = self._manager._entry_cache.get_all_entries()
+        while key not in all_entries:
+            # キャッシュにある最も深い祖先を探す
+            ancestor = key
+            ancestor_entry = None
+            while ancestor_entry is None and '/' in ancestor:
+                ancestor = ancestor.rsplit('/', 1)[0]
+                ancestor_entry = all_entries.get(ancestor)
+            if ancestor_entry is None or ancestor_entry.type != EntryType.ARCHIVE \
+                    or ancestor_entry.status != EntryStatus.SCANNING:
+                return False
+            if not self.expand_archive(ancestor_entry):
+                return False
+            all_entries = self._manager._entry_cache.get_all_entries()
+        return True
+    
+    def _start_background_expansion(self, archives: List[EntryInfo]) -> None:
+        """
+        ネスト書庫を未展開として登録し、バックグラウンド展開を開始する
+        
+        Args:
+            archives: 未展開として登録するネスト書庫エントリのリスト
+        """
+        with self._expand_cond:
+            for arc_entry in archives:
+                arc_entry.status = EntryStatus.SCANNING
+            self._expand_queue.extend(archives)
+            self._ensure_expander_locked()
+    
+    def _ensure_expander_locked(self) -> None:
+        """バックグラウンド展開スレッドが動いていなければ開始する（_expand_condのロック取得済みで呼ぶこと）"""
+        if self._expander_thread is not None or not self._expand_queue:
+            return
+        self._expansion_done.clear()
+        self._expander_thread = threading.Thread(target=self._background_expander,
+                                                 name="NestedArchiveExpander")
+        self._expander_thread.daemon = True
+        self._expander_thread.start()
+    
+    def _background_expander(self) -> None:
+        """
+        キューにあるネスト書庫をスキャンエンジンで並列に展開するバックグラウンドスレッド
+        
+        キューの書庫をまとめてマネージャーのスキャンエンジンに渡し、展開中に見つかったネスト書庫は
+        エンジンのキューに追加する（進捗は get_scan_progress で取得でき、中止は EXPANSION_SCAN_SCOPE を指定してエンジン経由で行う）。
+        各ワーカーは要求に応じた展開が実行中の間は待機して、そちらを優先させる。
+        要求に応じた展開で見つかった書庫は、次に書庫を展開し終えたワーカーが最優先で引き取る。
+        キューが空になったら、展開が完了した書庫のエントリを永続インデックスに保存する。
+        """
+        processed_count = 0
+        
+        def process(arc_entry: EntryInfo) -> List[EntryInfo]:
+            nonlocal processed_count
+            with self._expand_cond:
+                while self._foreground_requests > 0 and not self._expander_cancel:
+                    self._expand_cond.wait()
+                if self._expander_cancel:
+                    return []
+            _, found = self._expand_archive(arc_entry, foreground=False)
+            with self._expand_cond:
+                processed_count += 1
+                if self._expander_cancel:
+                    return []
+                # ワーカーは返した書庫を後ろから処理するため、キューの先頭の書庫を最後に並べる
+                found.extend(reversed(self._expand_queue))
+                self._expand_queue.clear()
+            return found
+        
+        while True:
+            with self._expand_cond:
+                if self._expander_cancel or not self._expand_queue:
+                    cancelled = self._expander_cancel
+                    break
+                archives = list(self._expand_queue)
+                self._expand_queue.clear()
+            if not self._manager._scan_engine.run(archives, process, key=lambda e: e.path,
+                                                  scope=self.EXPANSION_SCAN_SCOPE):
+                cancelled = True
+                break
+        
+        if not cancelled:
+            self._manager.debug_info(f"バックグラウンド展開完了: {processed_count} 個のネスト書庫を展開")
+            saved = self._manager._persistent_index.save_all()
+            if saved:
+                self._manager.debug_info(f"{saved} 個の書庫のエントリをインデックスに保存しました")
+        
+        with self._expand_cond:
+            self._expander_thread = None
+            # 保存中に新しい書庫が追加されていれば続けて展開する
+            if not self._expander_cancel:
+                self._ensure_expander_locked()
+            if self._expander_thread is None:
+                self._expansion_done.set()
+    
+    def cancel_background_expansion(self) -> None:
+        """
+        バックグラウンド展開を中止し、展開中の書庫の処理が終わるまで待つ
+        """
+        with self._expand_cond:
+            self._expand_queue.clear()
+            thread = self._expander_thread
+            if thread is None:
+                return
+            self._expander_cancel = True
+            self._expand_cond.notify_all()
+        # 展開はスキャンエンジンのワーカーで行っているため、展開のスキャンのキューも破棄する
+        # （同じエンジンで実行中の他のスキャンは中止しない）
+        self._manager._scan_engine.cancel(self.EXPANSION_SCAN_SCOPE)
+        if thread is not threading.current_thread():
+            thread.join()
+        with self._expand_cond:
+            self._expander_cancel = False
+        self._manager.debug_info("バックグラウンド展開を中止しました")
+    
+    def wait_for_expansion(self, timeout: Optional[float] = None) -> bool:
+        """
+        バックグラウンド展開の完了を待つ
+        
+        Args:
+            timeout: 最大待ち時間（秒）。Noneなら完了まで待つ
+            
+        Returns:
+            完了した場合はTrue、タイムアウトした場合はFalse
+        """
+        return self._expansion_done.wait(timeout)
+    
+    def _process_nested_archives_with_initial_queue(self, base_path: str, entries: List[EntryInfo], initial_archives: List[EntryInfo]) -> bool:
         """
         ルートエントリ処理で見つかったネスト書庫をキューの初期値として処理する
         
@@ -457,6 +769,9 @@ class ArchiveProcessor:
             base_path: 基準となるパス
             entries: 処理するエントリリスト（使用されない）
             initial_archives: 初期キューとして使用するネスト書庫リスト
+            
+        Returns:
+            すべて処理した場合はTrue、中止された場合はFalse
         """
         # 処理済みアーカイブのパスを追跡するセット
         processed_archives = set()
@@ -468,17 +783,13 @@ class ArchiveProcessor:
         # 初期キューを使用するので、エントリからアーカイブを抽出する必要はない
         if not initial_archives:
             self._manager.debug_info("初期ネスト書庫キューが空です")
-            return
+            return True
             
         self._manager.debug_info(f"初期キューに {len(initial_archives)} 個のネスト書庫があります")
         
-        # アーカイブ処理に同期または非同期処理のどちらを使うか決定
-        if len(initial_archives) < self.MIN_ARCHIVES_FOR_THREADING:
-            self._manager.debug_info(f"単一スレッドのキューベース処理を使用します (書庫数: {len(initial_archives)})")
-            self._process_nested_archives_with_queue(base_path, [], initial_archives, processed_archives)
-        else:
-            self._manager.debug_info(f"マルチスレッドのキューベース処理を使用します (書庫数: {len(initial_archives)}, スレッド数: {self._thread_count})")
-            self._process_nested_archives_with_thread_pool(base_path, [], initial_archives, processed_archives)
+        # 初期の書庫が少なくても、中から見つかる書庫は並列に処理できるため常にスキャンエンジンを使う
+        self._manager.debug_info(f"スキャンエンジンで処理します (書庫数: {len(initial_archives)}, ワーカー数: {self._manager._scan_engine.max_workers})")
+        return self._process_nested_archives_with_thread_pool(base_path, [], initial_archives, processed_archives)
     
     # 以下の方法は後方互換性のために維持し、内部で新しいメソッドを呼び出す
     def _process_nested_archives(self, base_path: str, entries: List[EntryInfo]) -> List[EntryInfo]:
@@ -524,13 +835,10 @@ class ArchiveProcessor:
             
         self._manager.debug_info(f"{len(archive_entries)} 個のネスト書庫を検出")
         
-        # アーカイブ処理に同期または非同期処理のどちらを使うか決定
-        if len(archive_entries) < self.MIN_ARCHIVES_FOR_THREADING:
-            self._manager.debug_info(f"単一スレッドのキューベース処理を使用します (書庫数: {len(archive_entries)})")
-            return self._process_nested_archives_with_queue(base_path, all_entries, archive_entries, processed_archives)
-        else:
-            self._manager.debug_info(f"マルチスレッドのキューベース処理を使用します (書庫数: {len(archive_entries)}, スレッド数: {self._thread_count})")
-            return self._process_nested_archives_with_thread_pool(base_path, all_entries, archive_entries, processed_archives)
+        # 初期の書庫が少なくても、中から見つかる書庫は並列に処理できるため常にスキャンエンジンを使う
+        self._manager.debug_info(f"スキャンエンジンで処理します (書庫数: {len(archive_entries)}, ワーカー数: {self._manager._scan_engine.max_workers})")
+        self._process_nested_archives_with_thread_pool(base_path, all_entries, archive_entries, processed_archives)
+        return all_entries
     
     def _process_nested_archives_with_queue(
         self, base_path: str, entries: List[EntryInfo], 
@@ -588,85 +896,37 @@ class ArchiveProcessor:
     def _process_nested_archives_with_thread_pool(
         self, base_path: str, entries: List[EntryInfo], 
         archive_entries: List[EntryInfo], processed_archives: Set[str]
-    ) -> None:
+    ) -> bool:
         """
-        スレッドプールとキューを使用してネストされたアーカイブを並列処理する
+        スキャンエンジンを使用してネストされたアーカイブを並列処理する
+        
+        ワーカーはマネージャーのスキャンエンジンが持つ長寿命のスレッドプール上で動き、
+        処理中の書庫から新しいネスト書庫が見つかる可能性がある間は終了しない。
         
         Args:
             base_path: 基準となるパス
             entries: 処理するエントリリスト（使用されない）
             archive_entries: 処理するアーカイブエントリリスト（初期キュー）
-            processed_archives: 処理済みアーカイブパスのセット
+            processed_archives: 処理済みアーカイブパスのセット（処理した書庫のパスが追加される）
+            
+        Returns:
+            すべて処理した場合はTrue、別のフォルダを開くなどして中止された場合はFalse
         """
-        # スレッド間で共有するキューとロック
-        task_queue = queue.Queue()
-        results_lock = threading.Lock()
+        processed_lock = threading.Lock()
         
-        # 初期アーカイブをキューに追加
-        for arc_entry in archive_entries:
-            if arc_entry.path not in processed_archives:
-                task_queue.put(arc_entry)
+        def process(arc_entry: EntryInfo) -> List[EntryInfo]:
+            with processed_lock:
                 processed_archives.add(arc_entry.path)
-                
-        # スレッドプールとワーカー関数を定義
-        def worker():
-            while True:
-                try:
-                    # キューから次のタスクを取得（非ブロッキング）
-                    try:
-                        arc_entry = task_queue.get(block=False)
-                    except queue.Empty:
-                        # キューが空になったら終了
-                        break
-                    
-                    # アーカイブ情報の表示
-                    thread_id = threading.get_ident()
-                    depth = self._get_archive_path_depth(arc_entry.path)
-                    self._manager.debug_info(f"スレッド処理: ネスト書庫 {arc_entry.path} (スレッドID: {thread_id}, 階層: {depth})")
-                    
-                    # アーカイブ内のエントリを処理
-                    try:
-                        nested_entries = self.process_archive_for_all_entries(base_path, arc_entry)
-                        
-                        if nested_entries:
-                            # エントリはprocess_archive_for_all_entriesの中でキャッシュに登録済み
-                            self._manager.debug_info(f"スレッド {thread_id}: ネスト書庫から {len(nested_entries)} エントリを処理: {arc_entry.path}")
-                            
-                            # 新しく見つかったアーカイブをキューに追加（深度制限なし）
-                            for nested_entry in nested_entries:
-                                if nested_entry.type == EntryType.ARCHIVE:
-                                    # 処理済みかどうかをチェック（ロックで保護）
-                                    with results_lock:
-                                        if nested_entry.path not in processed_archives:
-                                            # キューに追加し、処理済みとしてマーク
-                                            task_queue.put(nested_entry)
-                                            processed_archives.add(nested_entry.path)
-                                            self._manager.debug_info(f"スレッド {thread_id}: 新しいネスト書庫をキューに追加: {nested_entry.path}")
-                    except Exception as e:
-                        self._manager.debug_warning(f"スレッド {thread_id}: ネスト書庫の処理でエラー: {arc_entry.path} - {e}")
-                    
-                    # タスク完了を通知
-                    task_queue.task_done()
-                    
-                except Exception as e:
-                    self._manager.debug_error(f"ワーカースレッドでエラー: {e}", trace=True)
-                    # エラーが発生しても処理を継続
-        
-        # スレッドプールを作成して処理を開始
-        self._manager.debug_info(f"スレッドプールを作成: {self._thread_count} スレッド")
-        threads = []
-        for _ in range(self._thread_count):
-            thread = threading.Thread(target=worker)
-            thread.daemon = True  # メインスレッドが終了したら一緒に終了するように
-            thread.start()
-            threads.append(thread)
-        
-        # すべてのスレッドが終了するまで待機
-        for thread in threads:
-            thread.join()
-            
-        processed_count = len(processed_archives) - len(entries)  # 元のエントリは除外
-        self._manager.debug_info(f"並列処理完了: {processed_count} 個のアーカイブを処理")
+            nested_entries = self.process_archive_for_all_entries(base_path, arc_entry)
+            # エントリはprocess_archive_for_all_entriesの中でキャッシュに登録済み
+            # 新しく見つかったアーカイブを返すと、同じワーカーのキューに追加される
+            return [e for e in nested_entries if e.type == EntryType.ARCHIVE]
+        
+        # 処理済みの書庫（ルート書庫など）は最初から除く
+        initial = [e for e in archive_entries if e.path not in processed_archives]
+        completed = self._manager._scan_engine.run(initial, process, key=lambda e: e.path)
+        self._manager.debug_info(f"並列処理{'完了' if completed else '中止'}: {len(processed_archives)} 個のアーカイブを処理")
+        return completed
     
     # 以下のメソッドは非推奨としてマーク
     def _process_nested_archives_sequential(
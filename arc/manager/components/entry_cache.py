@@ -26,6 +26,8 @@ class EntryCacheManager:
         self._manager = manager
         # すべてのエントリを格納する辞書
         self._all_entries: Dict[str, EntryInfo] = {}
+        # 親キーから子キーへのインデックス（登録順を保持するためdictを順序付き集合として使う）
+        self._children: Dict[str, Dict[str, None]] = {}
     
     def __del__(self):
         """
@@ -48,6 +50,38 @@ class EntryCacheManager:
             # デコンストラクタのエラーをログに記録できない場合にもプログラムを停止させないよう、例外を無視
             pass
     
+    @staticmethod
+    def _parent_key(key: str) -> str:
+        """
+        キャッシュキーから親のキャッシュキーを求める
+        
+        Args:
+            key: キャッシュキー（末尾のスラッシュなしの相対パス）
+            
+        Returns:
+            親のキャッシュキー。ルート直下の場合は空文字列
+        """
+        slash = key.rfind('/')
+        return key[:slash] if slash >= 0 else ""
+    
+    def _index_entry(self, key: str) -> None:
+        """
+        キーを親子インデックスに追加する
+        
+        Args:
+            key: 追加するキャッシュキー
+        """
+        # ルートエントリ自身は誰の子でもない
+        if key == "":
+            return
+        self._children.setdefault(self._parent_key(key), {})[key] = None
+    
+    def _rebuild_index(self) -> None:
+        """現在のキャッシュ内容から親子インデックスを作り直す"""
+        self._children = {}
+        for key in self._all_entries:
+            self._index_entry(key)
+    
     def get_entry_info(self, path: str) -> Optional[EntryInfo]:
         """
         指定されたパスのエントリ情報を取得する
@@ -79,6 +113,11 @@ class EntryCacheManager:
             self._manager.debug_info(f"キャッシュでエントリを発見: {norm_path}")
             return self._all_entries[norm_path]
         
+        # 未展開のネスト書庫の中のパスであれば、書庫を展開してから探し直す
+        if self._manager._archive_processor.ensure_path_expanded(norm_path):
+            self._manager.debug_info(f"ネスト書庫を展開してエントリを発見: {norm_path}")
+            return self._all_entries[norm_path]
+        
         self._manager.debug_info(f"キャッシュにエントリが見つかりませんでした: {norm_path}")
         
         # キャッシュに見つからない場合はNoneを返す
@@ -104,6 +143,7 @@ class EntryCacheManager:
         # old_enhanced.pyでは直接self._all_entries[key] = entryを使用していたが、
         # このメソッドを通して同じ処理を行うようにする
         self._all_entries[key] = entry
+        self._index_entry(key)
         self._manager.debug_debug(f"エントリ \"{key}\" をキャッシュに登録: {entry.name} ({entry.type.name})")
     
     def add_entry_to_cache(self, entry: EntryInfo) -> None:
@@ -125,6 +165,7 @@ class EntryCacheManager:
     def clear_cache(self) -> None:
         """キャッシュをクリアする"""
         self._all_entries = {}
+        self._children = {}
         self._manager.debug_info("エントリキャッシュをクリアしました")
     
     def reset_all_entries(self) -> None:
@@ -152,6 +193,7 @@ class EntryCacheManager:
         
         # キャッシュをクリア
         self._all_entries = {}
+        self._children = {}
         
         if hasattr(self, '_manager') and self._manager:
             if temp_files_deleted > 0:
@@ -176,6 +218,7 @@ class EntryCacheManager:
             entries: 新しいエントリキャッシュ
         """
         self._all_entries = entries
+        self._rebuild_index()
     
     def list_entries(self, path: str) -> List[EntryInfo]:
         """
@@ -216,21 +259,13 @@ class EntryCacheManager:
         result = []
         
         if is_root:
-            # ルートの場合、直接の子エントリのみを返す
-            seen_paths = set()  # 重複回避用
-            
-            for entry_key, entry in self._all_entries.items():
-                # EntryInfoオブジェクトの場合のみ処理
-                if isinstance(entry, EntryInfo):
-                    # 修正：キャッシュのキーを使って子エントリかどうかを判断
-                    # 1. キーが空文字でない（ルートエントリ自身を除外）
-                    # 2. キーに'/'が含まれていない（直接の子のみ）
-                    if entry_key != "" and '/' not in entry_key:
-                        if entry.path not in seen_paths:
-                            result.append(entry)
-                            seen_paths.add(entry.path)
-                            self._manager.debug_info(f"  発見 (ルート直下): {entry.name} ({entry.rel_path})")
+            # ルートの場合、直接の子エントリのみを返す（親子インデックスを使用）
+            self._collect_children("", result)
         else:
+            # 未展開のネスト書庫の中のパスであれば、先に書庫を展開する
+            if norm_path not in self._all_entries:
+                self._manager._archive_processor.ensure_path_expanded(norm_path)
+            
             # ファイルエントリかどうかのチェック
             if norm_path in self._all_entries:
                 entry = self._all_entries[norm_path]
@@ -244,25 +279,11 @@ class EntryCacheManager:
             if norm_path in self._all_entries:
                 parent_entry = self._all_entries[norm_path]
                 if isinstance(parent_entry, EntryInfo) and parent_entry.type in [EntryType.DIRECTORY, EntryType.ARCHIVE]:
-                    # 重複回避用のセット
-                    seen_paths = set()
-                    # パスプレフィックスを構築（明示的に'/'を使用）
-                    prefix = f"{norm_path}/"
-                    
-                    for child_key, child_entry in self._all_entries.items():
-                        if isinstance(child_entry, EntryInfo):
-                            # このパスの子エントリかどうかを正確に判断
-                            # 1. エントリがディレクトリ自体でないこと
-                            # 2. エントリキーがプレフィックスで始まること
-                            if (child_key != norm_path and child_key.startswith(prefix)):
-                                # プレフィックス後の部分を抽出
-                                rest_path = child_key[len(prefix):]
-                                # 直接の子エントリ（それ以上ネストしていない）のみを対象
-                                if '/' not in rest_path:
-                                    if child_entry.path not in seen_paths:
-                                        result.append(child_entry)
-                                        seen_paths.add(child_entry.path)
-                                        self._manager.debug_info(f"  発見: {child_entry.name} ({child_entry.rel_path})")
+                    # 未展開のネスト書庫であれば、ここで展開する（バックグラウンド展開より優先）
+                    if parent_entry.status == EntryStatus.SCANNING:
+                        self._manager._archive_processor.expand_archive(parent_entry)
+                    # 親子インデックスから直接の子エントリだけを取り出す
+                    self._collect_children(norm_path, result)
                     return result
             
             # 見つからない場合
@@ -271,6 +292,26 @@ class EntryCacheManager:
         
         return result
 
+    def _collect_children(self, parent_key: str, result: List[EntryInfo]) -> None:
+        """
+        親子インデックスから直接の子エントリを結果リストに追加する
+        
+        キャッシュ全体を走査せず、子の数に比例する時間で処理する。
+        
+        Args:
+            parent_key: 親のキャッシュキー（ルートは空文字列）
+            result: エントリを追加するリスト
+        """
+        # 重複回避用
+        seen_paths = set()
+        # バックグラウンド展開による追加と競合しないよう、キーの複製を走査する
+        for child_key in list(self._children.get(parent_key, ())):
+            child_entry = self._all_entries.get(child_key)
+            if isinstance(child_entry, EntryInfo) and child_entry.path not in seen_paths:
+                result.append(child_entry)
+                seen_paths.add(child_entry.path)
+                self._manager.debug_info(f"  発見: {child_entry.name} ({child_entry.rel_path})")
+    
     def set_entry_status(self, path: str, status: EntryStatus) -> bool:
         """
         指定されたパスのエントリのステータスを設定する
@@ -0,0 +1,398 @@
+"""
+ネスト書庫ストアコンポーネント
+
+書庫内書庫の内容を保持し、ハンドラにArchiveViewとして提供します。
+メモリ上に保持する量には上限があり、超えた分は古いものから一時ファイルに退避して
+mmapで参照します。無圧縮で格納されたネスト書庫は親書庫ファイルの範囲として参照し、
+内容をコピーしません。
+"""
+
+import os
+import mmap
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+from ...handler.archive_view import ArchiveView
+
+
+class StoredArchive(ArchiveView):
+    """
+    ストアに登録されたネスト書庫
+
+    実体はメモリ上のbytesか、ファイルの一部範囲（一時ファイルまたは親書庫ファイル）のどちらか。
+    メモリから一時ファイルへの退避は読み込み中でも安全に行える。
+    """
+
+    def __init__(self, key: str, size: int, ext: str):
+        """
+        ネスト書庫を初期化する
+
+        Args:
+            key: ストア内のキー（ネスト書庫の仮想パス）
+            size: データのサイズ（バイト）
+            ext: 書庫の拡張子（一時ファイル作成時に使用）
+        """
+        self.key = key
+        self.ext = ext
+        self._size = size
+        # メモリ上のデータ（ファイル参照の場合はNone）
+        self._data: Optional[bytes] = None
+        # ファイル参照の場合のパスとオフセット
+        self._path: Optional[str] = None
+        self._offset = 0
+        # ストアが作成した一時ファイルかどうか（解放時に削除する）
+        self._owns_file = False
+        self._mmap: Optional[mmap.mmap] = None
+        self._released = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def in_memory(self) -> bool:
+        """メモリ上にデータを保持しているかどうか"""
+        return self._data is not None
+
+    def _set_memory(self, data: bytes) -> None:
+        """メモリ上のデータを実体とする"""
+        self._data = data
+
+    def _set_file(self, path: str, offset: int, owns_file: bool) -> None:
+        """
+        ファイルの一部範囲を実体とする（メモリ上のデータは手放す）
+
+        Args:
+            path: ファイルパス
+            offset: ファイル先頭からのオフセット
+            owns_file: ストアが作成した一時ファイルかどうか
+        """
+        with self._lock:
+            self._path = path
+            self._offset = offset
+            self._owns_file = owns_file
+            self._data = None
+            # 以前のマップは閉じずに手放す（読み込み中のスレッドが使い終われば解放される）
+            self._mmap = None
+
+    def _get_buffer(self) -> Tuple[Union[bytes, mmap.mmap], int]:
+        """
+        現在の実体とその中でのオフセットを取得する
+
+        Returns:
+            (bytesまたはmmap, オフセット) のタプル
+
+        Raises:
+            ValueError: 解放済みの場合
+        """
+        with self._lock:
+            if self._released:
+                raise ValueError(f"解放済みのネスト書庫です: {self.key}")
+            if self._data is not None:
+                return self._data, 0
+            if self._mmap is None:
+                # ファイルは必要になった時点で読み取り専用でマップする
+                with open(self._path, 'rb') as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._mmap, self._offset
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """
+        指定した位置からデータを読み込む
+
+        Args:
+            offset: ビュー先頭からのオフセット
+            size: 読み込むバイト数
+
+        Returns:
+            読み込んだデータ（末尾を超える部分は切り詰められる）
+        """
+        if offset >= self._size or size <= 0:
+            return b""
+        end = min(offset + size, self._size)
+        buffer, base = self._get_buffer()
+        # スライスで必要な範囲だけをコピーする（全体はコピーしない）
+        return buffer[base + offset:base + end]
+
+    def file_range(self) -> Optional[Tuple[str, int, int]]:
+        """
+        ファイル参照であればその範囲を返す
+
+        Returns:
+            (ファイルパス, オフセット, サイズ) のタプル。メモリ上のデータの場合はNone
+        """
+        with self._lock:
+            if self._data is not None or self._path is None:
+                return None
+            return self._path, self._offset, self._size
+
+    def _release(self) -> Optional[str]:
+        """
+        マップを閉じてデータを手放す
+
+        Returns:
+            削除すべき一時ファイルのパス（ストアが作成したものでなければNone）
+        """
+        with self._lock:
+            self._released = True
+            self._data = None
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                except Exception:
+                    pass
+                self._mmap = None
+            return self._path if self._owns_file else None
+
+
+class NestedArchiveStore:
+    """
+    ネスト書庫ストアクラス
+
+    ネスト書庫の内容をキー（仮想パス）ごとに保持する。
+    メモリ上の合計サイズが上限を超えたら、最も長く使われていないものから一時ファイルに退避する。
+    """
+
+    # メモリ上に保持するネスト書庫の合計サイズの上限
+    MAX_MEMORY_BYTES = 256 * 1024 * 1024
+
+    # 範囲をファイルにコピーする際のチャンクサイズ
+    COPY_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, manager, max_memory_bytes: Optional[int] = None):
+        """
+        ネスト書庫ストアを初期化する
+
+        Args:
+            manager: 親となるEnhancedArchiveManagerインスタンス
+            max_memory_bytes: メモリ上に保持する合計サイズの上限（省略時はMAX_MEMORY_BYTES）
+        """
+        self._manager = manager
+        self.max_memory_bytes = self.MAX_MEMORY_BYTES if max_memory_bytes is None else max_memory_bytes
+        # すべてのネスト書庫（順序はメモリ上のものの退避順に使う）
+        self._items: "OrderedDict[str, StoredArchive]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        # 統計情報
+        self.spilled = 0
+
+    def put_bytes(self, key: str, data: bytes, ext: str = '.bin') -> StoredArchive:
+        """
+        ネスト書庫の内容を登録する
+
+        上限を超える場合は古いものから一時ファイルに退避する。
+        単体で上限を超える内容は直接一時ファイルに書き出す。
+
+        Args:
+            key: ネスト書庫の仮想パス
+            data: 書庫の内容
+            ext: 書庫の拡張子
+
+        Returns:
+            登録したネスト書庫
+        """
+        item = StoredArchive(key, len(data), ext)
+        item._set_memory(data)
+        with self._lock:
+            self._discard(key)
+            self._items[key] = item
+            self._memory_bytes += len(data)
+            self._manager.debug_info(f"ネスト書庫をストアに登録: {key} ({len(data)} バイト)")
+            if len(data) > self.max_memory_bytes:
+                # 単体で上限を超えるものは他を退避させずに自分を書き出す
+                self._spill(item)
+            self._enforce_budget()
+        return item
+
+    def put_range(self, key: str, source: Union[str, ArchiveView], offset: int, size: int,
+                  ext: str = '.bin') -> StoredArchive:
+        """
+        親書庫の一部範囲をネスト書庫として登録する（内容はコピーしない）
+
+        Args:
+            key: ネスト書庫の仮想パス
+            source: 親書庫のファイルパス、または親書庫のArchiveView
+            offset: 親書庫先頭からのオフセット
+            size: ネスト書庫のサイズ
+            ext: 書庫の拡張子
+
+        Returns:
+            登録したネスト書庫
+        """
+        if isinstance(source, ArchiveView):
+            parent_range = source.file_range()
+            if parent_range is None:
+                # 親がメモリ上にある場合は該当範囲だけをコピーする
+                return self.put_bytes(key, source.read_at(offset, size), ext)
+            path, base, _ = parent_range
+            offset += base
+        else:
+            path = source
+
+        item = StoredArchive(key, size, ext)
+        item._set_file(path, offset, owns_file=False)
+        with self._lock:
+            self._discard(key)
+            self._items[key] = item
+        self._manager.debug_info(f"ネスト書庫を範囲参照で登録: {key} -> {path} (offset={offset}, size={size})")
+        return item
+
+    def get(self, key: str) -> Optional[StoredArchive]:
+        """
+        ネスト書庫を取得する
+
+        Args:
+            key: ネスト書庫の仮想パス
+
+        Returns:
+            ネスト書庫。登録されていなければNone
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def touch(self, item: StoredArchive) -> None:
+        """
+        ネスト書庫を最近使ったものとして記録する
+
+        Args:
+            item: 使用したネスト書庫
+        """
+        with self._lock:
+            if self._items.get(item.key) is item:
+                self._items.move_to_end(item.key)
+
+    def get_path(self, item: StoredArchive) -> Optional[str]:
+        """
+        ネスト書庫の内容だけを持つファイルのパスを取得する
+
+        ArchiveViewに対応していないハンドラにはファイルパスで渡す。
+        メモリ上のものは一時ファイルに退避し、親書庫の範囲参照は一時ファイルにコピーする。
+
+        Args:
+            item: 対象のネスト書庫
+
+        Returns:
+            ファイルパス。作成に失敗した場合はNone
+        """
+        with self._lock:
+            if item.in_memory:
+                self._spill(item)
+            file_range = item.file_range()
+            if file_range is None:
+                return None
+            path, offset, size = file_range
+            if offset == 0 and os.path.getsize(path) == size:
+                return path
+
+            # 親書庫の一部範囲なので、その範囲だけを一時ファイルにコピーし、以降はそちらを参照する
+            temp_path = self._copy_range_to_temp(path, offset, size, item.ext)
+            if temp_path is None:
+                return None
+            item._set_file(temp_path, 0, owns_file=True)
+            return temp_path
+
+    def _copy_range_to_temp(self, path: str, offset: int, size: int, ext: str) -> Optional[str]:
+        """
+        ファイルの一部範囲を一時ファイルにコピーする
+
+        Args:
+            path: コピー元のファイルパス
+            offset: コピー元のオフセット
+            size: コピーするサイズ
+            ext: 一時ファイルの拡張子
+
+        Returns:
+            作成した一時ファイルのパス。失敗した場合はNone
+        """
+        try:
+            fd, temp_path = tempfile.mkstemp(suffix=ext)
+            with os.fdopen(fd, 'wb') as dst, open(path, 'rb') as src:
+                src.seek(offset)
+                remaining = size
+                while remaining > 0:
+                    chunk = src.read(min(self.COPY_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    remaining -= len(chunk)
+            self._manager._temp_file_manager.register_temp_file(temp_path)
+            self._manager.debug_info(f"ネスト書庫の範囲を一時ファイルにコピー: {temp_path} ({size} バイト)")
+            return temp_path
+        except Exception as e:
+            self._manager.debug_error(f"ネスト書庫の一時ファイル作成中にエラー: {e}", trace=True)
+            return None
+
+    def _spill(self, item: StoredArchive) -> bool:
+        """
+        メモリ上のネスト書庫を一時ファイルに退避する（ロック取得済みで呼ぶこと）
+
+        Args:
+            item: 退避するネスト書庫
+
+        Returns:
+            退避に成功した場合はTrue
+        """
+        data = item._data
+        if data is None:
+            return True
+        temp_path = self._manager._temp_file_manager.create_temp_file(data, item.ext)
+        if not temp_path:
+            return False
+        item._set_file(temp_path, 0, owns_file=True)
+        self._memory_bytes -= len(data)
+        self.spilled += 1
+        self._manager.debug_info(f"ネスト書庫を一時ファイルに退避: {item.key} -> {temp_path}")
+        return True
+
+    def _enforce_budget(self) -> None:
+        """メモリ上の合計サイズが上限以下になるまで古いものから退避する（ロック取得済みで呼ぶこと）"""
+        if self._memory_bytes <= self.max_memory_bytes:
+            return
+        for item in list(self._items.values()):
+            if self._memory_bytes <= self.max_memory_bytes:
+                break
+            if item.in_memory and not self._spill(item):
+                # 退避できない場合はメモリ上に残す
+                self._manager.debug_warning(f"ネスト書庫を退避できませんでした: {item.key}")
+
+    def _discard(self, key: str) -> None:
+        """
+        ネスト書庫を破棄する（ロック取得済みで呼ぶこと）
+
+        Args:
+            key: 破棄するネスト書庫の仮想パス
+        """
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        if item.in_memory:
+            self._memory_bytes -= len(item)
+        temp_path = item._release()
+        if temp_path:
+            self._manager._temp_file_manager.remove_temp_file(temp_path)
+
+    def clear(self) -> None:
+        """すべてのネスト書庫を破棄し、一時ファイルを削除する"""
+        with self._lock:
+            count = len(self._items)
+            for key in list(self._items.keys()):
+                self._discard(key)
+            self._memory_bytes = 0
+        if count:
+            self._manager.debug_info(f"{count} 個のネスト書庫をストアから破棄しました")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        ストアの統計情報を取得する
+
+        Returns:
+            保持数・メモリ上の合計サイズ・退避回数の辞書
+        """
+        with self._lock:
+            return {'archives': len(self._items), 'memory_bytes': self._memory_bytes,
+                    'spilled': self.spilled}
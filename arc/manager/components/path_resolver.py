@@ -5,10 +5,11 @@
 """
 
 import os
-from typing import Optional, Tuple, List, Any
+from typing import Optional, Tuple, List, Any, Union
 
 from ...arc import EntryInfo, EntryType
 from ...handler.handler import ArchiveHandler
+from ...handler.archive_view import ArchiveView
 
 class PathResolver:
     """
@@ -133,7 +134,7 @@ class PathResolver:
         self._manager.debug_warning(f"No handler found for: {norm_path}")
         return None
     
-    def resolve_file_source(self, path: str) -> Tuple[str, str, Optional[bytes]]:
+    def resolve_file_source(self, path: str) -> Tuple[str, str, Optional[Union[bytes, ArchiveView]]]:
         """
         パスからアーカイブパス、内部パス、キャッシュされたバイトデータを導き出す
         
@@ -141,9 +142,13 @@ class PathResolver:
             path: 処理対象のパス
             
         Returns:
-            (アーカイブパス, 内部パス, キャッシュされたバイト) のタプル
+            (アーカイブパス, 内部パス, キャッシュされたバイトまたはビュー) のタプル
             - アーカイブが見つからない場合は (current_path, "", None)
             - バイトデータが直接キャッシュされている場合は (仮想パス, internal_path, bytes)
+            - ネスト書庫ストアに保持されていて、ハンドラがビューに対応している場合は
+              (仮想パス, internal_path, ArchiveView)
+            - ネスト書庫ストアに保持されていて、ハンドラがビューに対応していない場合は
+              (一時ファイルのパス, internal_path, None)
             - 一時ファイルでキャッシュされている場合は (cache_path, internal_path, None)
             - 通常のアーカイブ内ファイルの場合は (archive_path, internal_path, None)
         """
@@ -173,9 +178,26 @@ class PathResolver:
             # 親アーカイブエントリをキャッシュから探す
             parent_entry = self._find_archive_entry_in_cache(parent_archive_path)
             
+            # インデックスから復元したネスト書庫は内容を持たないので、ここで用意する
+            if (parent_entry and getattr(parent_entry, 'cache', None) is None
+                    and not os.path.isfile(parent_entry.path)):
+                self._manager._archive_processor.ensure_nested_view(parent_entry)
+            
             if parent_entry and hasattr(parent_entry, 'cache') and parent_entry.cache is not None:
                 cache = parent_entry.cache
-                if isinstance(cache, bytes):
+                if isinstance(cache, ArchiveView):
+                    # ネスト書庫ストアの内容 - 全体をコピーせずにビューのまま渡す
+                    self._manager._nested_store.touch(cache)
+                    handler = self._manager.get_handler(parent_entry.path)
+                    if handler and handler.supports_archive_view:
+                        self._manager.debug_info(f"アーカイブエントリからネスト書庫のビューを返します: {len(cache)} バイト")
+                        return parent_entry.path, internal_path, cache
+                    # ビュー非対応のハンドラにはファイルとして渡す
+                    cache_path = self._manager._nested_store.get_path(cache)
+                    if cache_path:
+                        self._manager.debug_info(f"ネスト書庫をファイルとして返します: {cache_path}")
+                        return cache_path, internal_path, None
+                elif isinstance(cache, bytes):
                     self._manager.debug_info(f"アーカイブエントリからキャッシュされたバイトデータを返します: {len(cache)} バイト")
                     return parent_entry.path, internal_path, cache
                 elif isinstance(cache, str) and os.path.exists(cache):
@@ -0,0 +1,373 @@
+"""
+永続エントリインデックスコンポーネント
+
+物理書庫ファイルごとに、ファイナライズ済みのエントリ一覧をSQLiteに保存します。
+次回同じ書庫（パス・サイズ・更新日時が一致）を開いたときは、書庫やネスト書庫を
+開き直さずに保存済みのエントリをキャッシュに登録します。
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import datetime
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from ...arc import EntryInfo, EntryType, EntryStatus
+
+
+class PersistentEntryIndex:
+    """
+    永続エントリインデックスクラス
+
+    書庫ごとのエントリ一覧を、書庫からの相対パスで保存する。
+    ルートのパスに依存しないため、フォルダを開いた場合も書庫を直接開いた場合も同じ記録を使える。
+    """
+
+    # 保存形式のバージョン（形式を変えたら上げる。異なるバージョンの記録は使わない）
+    INDEX_VERSION = 1
+
+    # 保持する書庫の最大数（超えたら最後に使われた日時が古いものから削除する）
+    MAX_ARCHIVES = 10000
+
+    # デフォルトの保存先
+    DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".supraview", "entry_index.sqlite3")
+
+    def __init__(self, manager, db_path: Optional[str] = None):
+        """
+        永続エントリインデックスを初期化する
+
+        Args:
+            manager: 親となるEnhancedArchiveManagerインスタンス
+            db_path: データベースファイルのパス（省略時はDEFAULT_DB_PATH）
+        """
+        self._manager = manager
+        self._db_path = db_path or self.DEFAULT_DB_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Falseにするとインデックスを使わない（データベースを開けない場合も無効になる）
+        self.enabled = True
+        # 現在のセッションでインデックスから復元した書庫のパス
+        self._restored: Set[str] = set()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """
+        データベースに接続する（ロック取得済みで呼ぶこと）
+
+        Returns:
+            接続。開けない場合はNone（以降インデックスは無効）
+        """
+        if self._conn is not None:
+            return self._conn
+        try:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            conn = sqlite3.connect(self._db_path, timeout=5.0, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS archives ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " entry_count INTEGER NOT NULL,"
+                " data BLOB NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._manager.debug_info(f"永続エントリインデックスを開きました: {self._db_path}")
+            return conn
+        except (sqlite3.Error, OSError) as e:
+            self._manager.debug_warning(f"永続エントリインデックスを開けないため無効にします: {self._db_path} - {e}")
+            self.enabled = False
+            return None
+
+    @staticmethod
+    def _archive_key(archive_path: str) -> Optional[Tuple[str, int, int]]:
+        """
+        書庫ファイルのキー（正規化パス, サイズ, 更新日時）を取得する
+
+        Args:
+            archive_path: 書庫ファイルのパス
+
+        Returns:
+            キーのタプル。ファイル情報を取得できない場合はNone
+        """
+        norm_path = archive_path.replace('\\', '/')
+        try:
+            st = os.stat(norm_path)
+        except OSError:
+            return None
+        return norm_path, st.st_size, st.st_mtime_ns
+
+    def reset(self) -> None:
+        """セッションの復元記録をリセットする（エントリキャッシュのリセット時に呼ぶ）"""
+        self._restored = set()
+
+    def is_restored(self, archive_path: str) -> bool:
+        """
+        書庫が現在のセッションでインデックスから復元されたかどうか
+
+        Args:
+            archive_path: 書庫ファイルのパス
+
+        Returns:
+            復元された場合はTrue
+        """
+        return archive_path.replace('\\', '/') in self._restored
+
+    def restore(self, archive_path: str, rel_prefix: str) -> bool:
+        """
+        保存済みのエントリをエントリキャッシュに登録する
+
+        Args:
+            archive_path: 書庫ファイルのパス
+            rel_prefix: 書庫内エントリの相対パスの前に付けるプレフィックス
+                        （書庫がルートなら空文字列、フォルダ内の書庫なら "書庫の相対パス/"）
+
+        Returns:
+            復元した場合はTrue。記録がない、または書庫が変更されている場合はFalse
+        """
+        if not self.enabled:
+            return False
+        key = self._archive_key(archive_path)
+        if key is None:
+            return False
+        norm_path, size, mtime_ns = key
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False
+            try:
+                row = conn.execute(
+                    "SELECT data FROM archives WHERE path = ? AND size = ? AND mtime_ns = ? AND version = ?",
+                    (norm_path, size, mtime_ns, self.INDEX_VERSION)
+                ).fetchone()
+                if row is None:
+                    return False
+                conn.execute("UPDATE archives SET last_used = ? WHERE path = ?", (time.time(), norm_path))
+                conn.commit()
+                records = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+            except (sqlite3.Error, zlib.error, ValueError) as e:
+                self._manager.debug_warning(f"インデックスの読み込みに失敗しました: {norm_path} - {e}")
+                return False
+
+        for record in records:
+            self._manager._entry_cache.add_entry_to_cache(self._record_to_entry(norm_path, rel_prefix, record))
+        self._restored.add(norm_path)
+        self._manager.debug_info(f"インデックスから {len(records)} エントリを復元: {norm_path}")
+        return True
+
+    def save_all(self) -> int:
+        """
+        エントリキャッシュ内の物理書庫のうち、今回新たに読み込んだものを保存する
+
+        書庫自身またはネスト書庫が壊れている（BROKEN）場合は、次回読み直すため保存しない。
+        未展開（SCANNING）のネスト書庫を含む場合も、エントリが揃っていないため保存しない。
+
+        Returns:
+            保存した書庫の数
+        """
+        if not self.enabled:
+            return 0
+
+        # バックグラウンド展開からも呼ばれるため、キャッシュの複製を走査する
+        all_entries = list(self._manager._entry_cache.get_all_entries().items())
+        # 物理書庫のキャッシュキー -> 書庫ファイルのパス
+        owners: Dict[str, str] = {}
+        for cache_key, entry in all_entries:
+            if entry.type == EntryType.ARCHIVE and os.path.isfile(entry.path):
+                norm_path = entry.path.replace('\\', '/')
+                if norm_path not in self._restored:
+                    owners[cache_key] = norm_path
+        if not owners:
+            return 0
+
+        # 各エントリを所属する物理書庫ごとに分類（キャッシュの登録順を保つ）
+        grouped: Dict[str, List[EntryInfo]] = {key: [] for key in owners}
+        broken: Set[str] = set()
+        pending: Set[str] = set()
+        for cache_key, entry in all_entries:
+            owner = self._find_owner(cache_key, owners)
+            if owner is None:
+                continue
+            if entry.status == EntryStatus.BROKEN:
+                broken.add(owner)
+            elif entry.status == EntryStatus.SCANNING:
+                pending.add(owner)
+            if cache_key != owner:
+                grouped[owner].append(entry)
+
+        saved = 0
+        for owner_key, entries in grouped.items():
+            if owner_key in broken:
+                self._manager.debug_info(f"壊れたエントリを含むためインデックスに保存しません: {owners[owner_key]}")
+                continue
+            if owner_key in pending:
+                self._manager.debug_info(f"未展開のネスト書庫を含むためインデックスに保存しません: {owners[owner_key]}")
+                continue
+            if self._save(owners[owner_key], entries):
+                saved += 1
+        if saved:
+            self._prune()
+        return saved
+
+    @staticmethod
+    def _find_owner(cache_key: str, owners: Dict[str, str]) -> Optional[str]:
+        """
+        キャッシュキーが所属する物理書庫のキャッシュキーを探す
+
+        Args:
+            cache_key: エントリのキャッシュキー
+            owners: 物理書庫のキャッシュキーの辞書
+
+        Returns:
+            所属する物理書庫のキャッシュキー。なければNone
+        """
+        if "" in owners:
+            # ルートが書庫の場合はすべてのエントリがルートに所属する
+            return ""
+        if cache_key in owners:
+            return cache_key
+        pos = cache_key.find('/')
+        while pos >= 0:
+            prefix = cache_key[:pos]
+            if prefix in owners:
+                return prefix
+            pos = cache_key.find('/', pos + 1)
+        return None
+
+    def _save(self, archive_path: str, entries: List[EntryInfo]) -> bool:
+        """
+        書庫のエントリ一覧を保存する
+
+        Args:
+            archive_path: 書庫ファイルのパス
+            entries: 書庫内のすべてのエントリ（ネスト書庫の中身を含む）
+
+        Returns:
+            保存した場合はTrue
+        """
+        key = self._archive_key(archive_path)
+        if key is None:
+            return False
+        norm_path, size, mtime_ns = key
+        records = [self._entry_to_record(norm_path, entry) for entry in entries]
+        data = zlib.compress(json.dumps(records, ensure_ascii=False, default=str).encode('utf-8'))
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO archives (path, size, mtime_ns, version, last_used, entry_count, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (norm_path, size, mtime_ns, self.INDEX_VERSION, time.time(), len(records), data)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                self._manager.debug_warning(f"インデックスの保存に失敗しました: {norm_path} - {e}")
+                return False
+        self._manager.debug_info(f"インデックスに {len(records)} エントリを保存: {norm_path}")
+        return True
+
+    def _prune(self) -> None:
+        """保持数の上限を超えた古い記録を削除する"""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "DELETE FROM archives WHERE path NOT IN"
+                    " (SELECT path FROM archives ORDER BY last_used DESC LIMIT ?)",
+                    (self.MAX_ARCHIVES,)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                self._manager.debug_warning(f"インデックスの整理に失敗しました: {e}")
+
+    def invalidate(self, archive_path: str) -> None:
+        """
+        書庫の記録を削除する
+
+        Args:
+            archive_path: 書庫ファイルのパス
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM archives WHERE path = ?", (archive_path.replace('\\', '/'),))
+                conn.commit()
+            except sqlite3.Error as e:
+                self._manager.debug_warning(f"インデックスの削除に失敗しました: {archive_path} - {e}")
+
+    def close(self) -> None:
+        """データベース接続を閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
+
+    @staticmethod
+    def _to_timestamp(value: Optional[datetime.datetime]) -> Optional[float]:
+        """日時をタイムスタンプに変換する"""
+        return value.timestamp() if value is not None else None
+
+    @staticmethod
+    def _from_timestamp(value: Optional[float]) -> Optional[datetime.datetime]:
+        """タイムスタンプを日時に変換する"""
+        return datetime.datetime.fromtimestamp(value) if value is not None else None
+
+    def _entry_to_record(self, archive_path: str, entry: EntryInfo) -> list:
+        """
+        エントリを書庫からの相対パスによる記録に変換する
+
+        Args:
+            archive_path: 書庫ファイルのパス
+            entry: 変換するエントリ
+
+        Returns:
+            [書庫内パス, 名前, name_in_arc, 種別, サイズ, 更新日時, 作成日時, 隠し属性, 属性] のリスト
+        """
+        sub_path = entry.path.replace('\\', '/')[len(archive_path) + 1:]
+        return [sub_path, entry.name, entry.name_in_arc, entry.type.value, entry.size,
+                self._to_timestamp(entry.modified_time), self._to_timestamp(entry.created_time),
+                entry.is_hidden, entry.attrs if entry.has_attrs else None]
+
+    def _record_to_entry(self, archive_path: str, rel_prefix: str, record: list) -> EntryInfo:
+        """
+        記録からエントリを復元する
+
+        Args:
+            archive_path: 書庫ファイルのパス
+            rel_prefix: 相対パスのプレフィックス
+            record: _entry_to_record で作成した記録
+
+        Returns:
+            復元したエントリ
+        """
+        sub_path, name, name_in_arc, type_value, size, mtime, ctime, is_hidden, attrs = record
+        path = f"{archive_path}/{sub_path}"
+        return EntryInfo(
+            name=name,
+            path=path,
+            rel_path=rel_prefix + sub_path,
+            type=EntryType(type_value),
+            size=size,
+            modified_time=self._from_timestamp(mtime),
+            created_time=self._from_timestamp(ctime),
+            is_hidden=is_hidden,
+            name_in_arc=name_in_arc,
+            attrs=attrs,
+            abs_path=path,
+            status=EntryStatus.READY
+        )
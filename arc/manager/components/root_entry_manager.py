@@ -277,6 +277,11 @@ class RootEntryManager:
             # コンテナ（ディレクトリまたはアーカイブ）種類の説明
             container_type = "ディレクトリ" if root_info.type == EntryType.DIRECTORY else "アーカイブ"
             
+            # 書庫が前回から変更されていなければ、永続インデックスから復元して書庫を開かない
+            if root_info.type == EntryType.ARCHIVE and self._manager._persistent_index.restore(path, ""):
+                self._manager.debug_info(f"アーカイブのエントリをインデックスから復元しました: {path}")
+                return
+            
             # ハンドラの list_all_entries を使用して再帰的にすべてのエントリを取得
             self._manager.debug_info(f"{container_type}の再帰的なエントリを取得中: {path}")
             try:
@@ -299,6 +304,12 @@ class RootEntryManager:
                         # ファイナライズ後、即時にキャッシュに登録（二重ループ防止のため）
                         self._manager._entry_cache.add_entry_to_cache(finalized_entry)
                         
+                        # フォルダ内の書庫は、インデックスから復元できればネスト書庫の処理は不要
+                        if (finalized_entry.type == EntryType.ARCHIVE and os.path.isfile(finalized_entry.path)
+                                and self._manager._persistent_index.restore(
+                                    finalized_entry.path, finalized_entry.rel_path.rstrip('/') + '/')):
+                            continue
+                        
                         # アーカイブタイプのエントリは無条件にネスト書庫候補リストに追加
                         if finalized_entry.type == EntryType.ARCHIVE:
                             self._nested_archives.append(finalized_entry)
@@ -0,0 +1,263 @@
+"""
+スキャンエンジンコンポーネント
+
+ネスト書庫の走査を複数のワーカーで並列に行います。
+ワーカーは長寿命のスレッドプール上で動き、それぞれが自分のタスク両端キューを持ちます。
+自分のキューが空になったワーカーは他のワーカーのキューからタスクを盗むため、
+深いネスト構造でも処理が1スレッドに偏りません。
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Set
+
+from proc.util import get_optimal_worker_count
+
+
+class _ScanState:
+    """1回のスキャンの状態（condのロックで保護）"""
+
+    def __init__(self, worker_count: int, scope: Optional[Hashable] = None):
+        self.cond = threading.Condition(threading.Lock())
+        self.scope = scope  # cancelで中止する対象を絞るための識別子
+        self.queues: List[Deque[Any]] = [deque() for _ in range(worker_count)]
+        self.seen: Set[Hashable] = set()
+        self.running = 0  # 処理中のタスク数
+        self.discovered = 0  # キューに追加したタスクの総数
+        self.completed = 0  # 処理が終わったタスク数
+        self.failed = 0  # 処理中に例外が発生したタスク数
+        self.stolen = 0  # 他のワーカーから盗んだタスク数
+        self.cancelled = False
+
+    def pending(self) -> int:
+        """キューで待っているタスク数"""
+        return sum(len(q) for q in self.queues)
+
+    def take(self, index: int) -> Optional[Any]:
+        """
+        次のタスクを取り出す
+
+        自分のキューからは後ろ（最後に見つけたもの）から取り、深さ優先で処理する。
+        自分のキューが空なら、他のワーカーのキューの先頭（最も古いもの）から盗む。
+
+        Args:
+            index: ワーカー番号
+
+        Returns:
+            タスク。キューがすべて空ならNone
+        """
+        own = self.queues[index]
+        if own:
+            return own.pop()
+        count = len(self.queues)
+        for offset in range(1, count):
+            victim = self.queues[(index + offset) % count]
+            if victim:
+                self.stolen += 1
+                return victim.popleft()
+        return None
+
+
+class ScanEngine:
+    """
+    ワークスティーリング方式の並列スキャンエンジン
+
+    タスクの処理関数は、処理中に見つかった新しいタスクを返す。
+    ワーカーは、キューにタスクがなくても他のワーカーが処理中であれば終了せずに待ち、
+    処理中のタスクがすべて終わった時点でスキャンが完了する。
+    """
+
+    # ワーカー数の上限
+    MAX_WORKERS = 8
+
+    def __init__(self, manager, max_workers: Optional[int] = None):
+        """
+        スキャンエンジンを初期化する
+
+        Args:
+            manager: 親となるEnhancedArchiveManagerインスタンス
+            max_workers: ワーカー数。Noneなら環境に合わせて決める
+        """
+        self._manager = manager
+        if max_workers is None:
+            max_workers = min(get_optimal_worker_count(cpu_intensive=False, io_bound=True),
+                              self.MAX_WORKERS)
+        self.max_workers = max(1, max_workers)
+
+        # スレッドプールはスキャンをまたいで使い回す（ワーカー数が変わったときだけ作り直す）
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_workers = 0
+        self._lock = threading.Lock()
+        # 実行中のスキャンと、最後に実行したスキャン（進捗の取得用）
+        self._active: Set[_ScanState] = set()
+        self._last: Optional[_ScanState] = None
+
+    def _get_executor(self, workers: int) -> ThreadPoolExecutor:
+        """指定したワーカー数のスレッドプールを取得する（_lock取得済みで呼ぶこと）"""
+        if self._executor is None or self._executor_workers != workers:
+            if self._executor is not None:
+                # 実行中のスキャンがあればそれが終わってから止まる
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ArchiveScan")
+            self._executor_workers = workers
+            self._manager.debug_info(f"スキャン用スレッドプールを作成: {workers} スレッド")
+        return self._executor
+
+    def run(self, tasks: Iterable[Any], process: Callable[[Any], Optional[Iterable[Any]]],
+            key: Callable[[Any], Hashable] = lambda task: task,
+            scope: Optional[Hashable] = None) -> bool:
+        """
+        タスクを並列に処理し、新しく見つかったタスクも含めてすべて終わるまで待つ
+
+        同じキーのタスクは1回だけ処理する。
+
+        Args:
+            tasks: 最初に処理するタスク
+            process: タスクを処理し、新しく見つかったタスクを返す関数
+            key: タスクの重複判定に使うキーを返す関数
+            scope: スキャンの識別子（cancel(scope) でこのスキャンだけを中止できる）
+
+        Returns:
+            すべて処理した場合はTrue、cancelで中止された場合はFalse
+        """
+        workers = self.max_workers
+        state = _ScanState(workers, scope)
+        for task in tasks:
+            task_key = key(task)
+            if task_key in state.seen:
+                continue
+            state.seen.add(task_key)
+            # 最初のタスクはワーカーに均等に配る
+            state.queues[state.discovered % workers].append(task)
+            state.discovered += 1
+
+        with self._lock:
+            self._active.add(state)
+            self._last = state
+            executor = self._get_executor(workers) if workers > 1 else None
+
+        try:
+            if executor is None:
+                # ワーカー1つなら呼び出し元のスレッドで処理する
+                self._worker(state, 0, process, key)
+            else:
+                futures = [executor.submit(self._worker, state, i, process, key) for i in range(workers)]
+                wait(futures)
+        finally:
+            with self._lock:
+                self._active.discard(state)
+
+        self._manager.debug_info(
+            f"スキャン{'中止' if state.cancelled else '完了'}: {state.completed}/{state.discovered} タスク "
+            f"(ワーカー: {workers}, 盗んだタスク: {state.stolen}, エラー: {state.failed})")
+        return not state.cancelled
+
+    def _worker(self, state: _ScanState, index: int,
+                process: Callable[[Any], Optional[Iterable[Any]]],
+                key: Callable[[Any], Hashable]) -> None:
+        """
+        タスクを取り出して処理するワーカー
+
+        Args:
+            state: スキャンの状態
+            index: ワーカー番号（自分のキューの位置）
+            process: タスクの処理関数
+            key: タスクのキーを返す関数
+        """
+        while True:
+            with state.cond:
+                while True:
+                    if state.cancelled:
+                        return
+                    task = state.take(index)
+                    if task is not None:
+                        state.running += 1
+                        break
+                    if state.running == 0:
+                        # キューが空で処理中のタスクもない - スキャン完了
+                        state.cond.notify_all()
+                        return
+                    # 他のワーカーが新しいタスクを見つけるかもしれないので待つ
+                    state.cond.wait()
+
+            found = ()
+            failed = False
+            try:
+                found = process(task) or ()
+            except Exception as e:
+                failed = True
+                self._manager.debug_warning(f"スキャンタスクの処理でエラー: {e}")
+
+            with state.cond:
+                added = 0
+                if not state.cancelled:
+                    own = state.queues[index]
+                    for new_task in found:
+                        task_key = key(new_task)
+                        if task_key in state.seen:
+                            continue
+                        state.seen.add(task_key)
+                        own.append(new_task)
+                        added += 1
+                state.discovered += added
+                state.running -= 1
+                state.completed += 1
+                if failed:
+                    state.failed += 1
+                if state.running == 0 and not state.pending():
+                    state.cond.notify_all()
+                elif added:
+                    state.cond.notify(added)
+
+    def cancel(self, scope: Optional[Hashable] = None) -> None:
+        """
+        実行中のスキャンを中止する
+
+        キューに残ったタスクは破棄され、処理中のタスクが終わり次第runが戻る。
+
+        Args:
+            scope: 中止するスキャンの識別子（runに渡したもの）。Noneならすべてのスキャンを中止する
+        """
+        with self._lock:
+            states = [state for state in self._active if scope is None or state.scope == scope]
+        for state in states:
+            with state.cond:
+                state.cancelled = True
+                for task_queue in state.queues:
+                    task_queue.clear()
+                state.cond.notify_all()
+        if states:
+            self._manager.debug_info(f"{len(states)} 件のスキャンを中止しました")
+
+    def get_progress(self) -> Dict[str, int]:
+        """
+        実行中（なければ最後に実行した）スキャンの進捗を取得する
+
+        Returns:
+            discovered（見つかったタスク数）, completed（完了数）, running（処理中の数）,
+            pending（待ち数）, failed（エラー数）, workers（ワーカー数）の辞書
+        """
+        state = self._last
+        if state is None:
+            return {'discovered': 0, 'completed': 0, 'running': 0, 'pending': 0,
+                    'failed': 0, 'workers': self.max_workers}
+        with state.cond:
+            return {
+                'discovered': state.discovered,
+                'completed': state.completed,
+                'running': state.running,
+                'pending': state.pending(),
+                'failed': state.failed,
+                'workers': len(state.queues),
+            }
+
+    def shutdown(self) -> None:
+        """実行中のスキャンを中止し、スレッドプールを停止する"""
+        self.cancel()
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self._executor_workers = 0
+        if executor is not None:
+            executor.shutdown(wait=True)
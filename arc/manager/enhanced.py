@@ -5,8 +5,9 @@
 インターフェースを維持したスリム版を提供します。
 """
 
+import io
 import os
-from typing import List, Optional, Dict, Set, Any
+from typing import BinaryIO, List, Optional, Dict, Set, Any, Iterable, Iterator, Tuple
 
 from .manager import ArchiveManager
 from ..arc import EntryInfo, EntryType, EntryStatus
@@ -19,6 +20,9 @@ from .components.archive_processor import ArchiveProcessor
 from .components.entry_finalizer import EntryFinalizer
 from .components.root_entry_manager import RootEntryManager
 from .components.temp_file_manager import TempFileManager
+from .components.nested_archive_store import NestedArchiveStore
+from .components.persistent_index import PersistentEntryIndex
+from .components.scan_engine import ScanEngine
 
 class EnhancedArchiveManager(ArchiveManager):
     """
@@ -39,11 +43,14 @@ class EnhancedArchiveManager(ArchiveManager):
         
         # 分割した機能コンポーネントを初期化
         self._temp_file_manager = TempFileManager(self)  # 一時ファイル管理を先に初期化
+        self._nested_store = NestedArchiveStore(self)  # ネスト書庫の内容（一時ファイル管理を使用）
         self._entry_cache = EntryCacheManager(self)
         self._path_resolver = PathResolver(self)
+        self._scan_engine = ScanEngine(self)  # ネスト書庫の並列走査（スレッドプールはスキャン間で共有）
         self._archive_processor = ArchiveProcessor(self)
         self._entry_finalizer = EntryFinalizer(self)
         self._root_manager = RootEntryManager(self)
+        self._persistent_index = PersistentEntryIndex(self)
         
         # サポートされるアーカイブ拡張子のリスト
         self._archive_extensions = []
@@ -167,6 +174,10 @@ class EnhancedArchiveManager(ArchiveManager):
         Args:
             path: 設定するベースパス
         """
+        # 前のパスのスキャンとバックグラウンド展開はパスを切り替える前に止める
+        self._scan_engine.cancel()
+        self._archive_processor.cancel_background_expansion()
+
         # まず基底クラスのset_current_pathを呼び出して全ハンドラーに通知
         super().set_current_path(path)
         self.debug_info(f"現在のパスを設定: {path}")
@@ -193,6 +204,44 @@ class EnhancedArchiveManager(ArchiveManager):
         """
         return self._archive_processor.list_all_entries(path)
 
+    @property
+    def lazy_expansion(self) -> bool:
+        """ネスト書庫を遅延展開するかどうか（次のset_current_pathから有効）"""
+        return self._archive_processor.lazy_expansion
+
+    @lazy_expansion.setter
+    def lazy_expansion(self, value: bool) -> None:
+        """ネスト書庫を遅延展開するかどうかを設定する"""
+        self._archive_processor.lazy_expansion = value
+
+    def wait_for_expansion(self, timeout: Optional[float] = None) -> bool:
+        """
+        未展開のネスト書庫のバックグラウンド展開が完了するまで待つ
+
+        遅延展開では、set_current_path直後のエントリキャッシュにはネスト書庫の中身が
+        揃っていない（書庫エントリのステータスがSCANNINGになっている）。
+        すべてのエントリが必要な場合はこのメソッドで完了を待つ。
+
+        Args:
+            timeout: 最大待ち時間（秒）。Noneなら完了まで待つ
+
+        Returns:
+            完了した場合はTrue、タイムアウトした場合はFalse
+        """
+        return self._archive_processor.wait_for_expansion(timeout)
+
+    def get_scan_progress(self) -> Dict[str, int]:
+        """
+        ネスト書庫の並列走査の進捗を取得する
+        
+        遅延展開では、バックグラウンド展開（実行中でなければ最後に実行した展開）の進捗になる。
+        
+        Returns:
+            discovered（見つかった書庫数）, completed（処理済み数）, running（処理中の数）,
+            pending（待ち数）, failed（エラー数）, workers（ワーカー数）の辞書
+        """
+        return self._scan_engine.get_progress()
+
     def read_file(self, path: str) -> Optional[bytes]:
         """
         指定されたパスのファイルの内容を読み込む
@@ -224,7 +273,7 @@ class EnhancedArchiveManager(ArchiveManager):
             handler = self.get_handler(archive_path)
             if (handler):
                 try:
-                    # キャッシュされたバイトデータがある場合は、read_file_from_bytesを使用
+                    # キャッシュされた書庫データ（bytesまたはArchiveView）がある場合は、read_file_from_bytesを使用
                     if cached_bytes is not None:
                         self.debug_info(f"キャッシュされた書庫データから内部ファイルを抽出: {internal_path}")
                         content = handler.read_file_from_bytes(cached_bytes, internal_path)
@@ -253,6 +302,102 @@ class EnhancedArchiveManager(ArchiveManager):
         # 該当するファイルが見つからない場合はエラー
         raise FileNotFoundError(f"指定されたファイルは存在しません: {path}")
 
+    def get_stream(self, path: str) -> Optional[BinaryIO]:
+        """
+        指定されたパスのファイルを読み込み用のストリームとして開く
+        
+        read_fileと同じくネスト書庫を含めてパスを解決し、展開しながら読めるハンドラ（ZIPなど）では
+        ファイル全体をメモリに読み込まないストリームを返す。
+        
+        Args:
+            path: ストリームを取得するファイルのパス
+            
+        Returns:
+            読み込み用のストリーム（呼び出し元が閉じる）
+            
+        Raises:
+            FileNotFoundError: 指定されたパスが存在しない場合
+            IOError: ファイルの読み込みに失敗した場合
+        """
+        # パスの正規化（先頭のスラッシュを削除）
+        if path.startswith('/'):
+            path = path[1:]
+        
+        archive_path, internal_path, cached_bytes = self._path_resolver.resolve_file_source(path)
+        self.debug_info(f"ファイルストリーム取得: {path} -> {archive_path} -> {internal_path}")
+        
+        if archive_path and internal_path:
+            handler = self.get_handler(archive_path)
+            if handler:
+                try:
+                    # キャッシュされた書庫データ（bytesまたはArchiveView）がある場合はそれを開く
+                    source = cached_bytes if cached_bytes is not None else archive_path
+                    stream = handler.open_archive_file(source, internal_path)
+                except (IOError, PermissionError) as e:
+                    self.debug_error(f"ファイルストリーム取得エラー: {path} - {str(e)}")
+                    self._entry_cache.set_entry_status(path, EntryStatus.BROKEN)
+                    raise IOError(f"ファイル読み込みエラー: {path} - {str(e)}")
+                if stream is None:
+                    raise FileNotFoundError(f"指定されたファイルはアーカイブ内に存在しません: {path}")
+                return stream
+        
+        # キャッシュされたバイトデータがある場合は、そのままストリームにする
+        if cached_bytes is not None:
+            return io.BytesIO(cached_bytes)
+        
+        raise FileNotFoundError(f"指定されたファイルは存在しません: {path}")
+
+    def read_files(self, paths: Iterable[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        複数のファイルの内容をまとめて読み込む
+        
+        要求を親となる書庫（またはネスト書庫のデータ）ごとにまとめ、書庫ごとに
+        ハンドラのread_filesで1回だけ開いて格納順に読み込む。結果は読み込んだものから順に返すため、
+        返る順序は要求の順序と一致しない（書庫の出現順、書庫内は格納順）。
+        まとめて読めなかったファイルは1件ずつread_fileで読み直す。
+        
+        Args:
+            paths: 読み込むファイルのパスのリスト
+            
+        Yields:
+            (パス, 内容) のタプル。読み込みに失敗したファイルの内容はNone
+        """
+        # 書庫ごとに要求をまとめる（キー: (書庫パス, キャッシュデータのID)）
+        groups: Dict[Tuple[str, int], Tuple[ArchiveHandler, Any, Dict[str, List[str]]]] = {}
+        singles: List[str] = []
+        for path in paths:
+            norm_path = path.lstrip('/')
+            archive_path, internal_path, cached_bytes = self._path_resolver.resolve_file_source(norm_path)
+            handler = self.get_handler(archive_path) if archive_path and internal_path else None
+            if handler is None:
+                singles.append(path)
+                continue
+            key = (archive_path, id(cached_bytes))
+            if key not in groups:
+                source = cached_bytes if cached_bytes is not None else archive_path
+                groups[key] = (handler, source, {})
+            groups[key][2].setdefault(internal_path.replace('\\', '/'), []).append(path)
+        
+        for handler, source, pending in groups.values():
+            self.debug_info(f"{len(pending)} 件のファイルを一括読み込み: {source if isinstance(source, str) else 'memory'}")
+            try:
+                for internal_path, content in handler.read_files(source, list(pending)):
+                    for path in pending.pop(internal_path, ()):
+                        yield path, content
+            except Exception as e:
+                # ハンドラの例外で他の書庫や残りのファイルの結果を失わないよう、ここで止める
+                self.debug_warning(f"一括読み込みに失敗したため1件ずつ読み込みます: {e}")
+            # 読めなかったものはread_fileに任せる（エラー時のステータス更新もそちらで行う）
+            for remaining in pending.values():
+                singles.extend(remaining)
+        
+        for path in singles:
+            try:
+                yield path, self.read_file(path)
+            except (FileNotFoundError, IOError) as e:
+                self.debug_warning(f"ファイル読み込みエラー: {path} - {e}")
+                yield path, None
+    
     def update_entry_status(self, path: str, status: EntryStatus) -> bool:
         """
         指定されたパスのエントリのステータスを更新する
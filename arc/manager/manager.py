@@ -4,7 +4,7 @@
 複数のアーカイブハンドラを管理し、適切なハンドラに処理を委譲するマネージャー
 """
 import os
-from typing import List, Optional, BinaryIO, Dict, Any
+from typing import List, Optional, BinaryIO, Dict, Any, Iterable, Iterator, Tuple
 
 from ..arc import EntryInfo, EntryType
 from ..handler.handler import ArchiveHandler
@@ -88,6 +88,18 @@ class ArchiveManager:
         for handler in self.handlers:
             handler.set_current_path(path)
         
+    def close_handles(self) -> None:
+        """
+        全ハンドラが保持している書庫ハンドルを閉じる
+        
+        別のフォルダを開き直す場合やマネージャのリセット時に呼び出す
+        """
+        for handler in self.handlers:
+            try:
+                handler.close_handles()
+            except Exception as e:
+                self.debug_warning(f"ハンドルのクローズ中にエラー ({handler.__class__.__name__}): {e}")
+        
     def get_handler(self, path: str) -> Optional[ArchiveHandler]:
         """
         指定されたパスを処理できるハンドラを取得する
@@ -286,6 +298,25 @@ class ArchiveManager:
         # ハンドラにファイル読み込みを委譲
         return handler.read_file(path)
     
+    def read_files(self, paths: Iterable[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """
+        複数のファイルの内容を順に読み込む
+        
+        デフォルト実装は1件ずつread_fileを呼ぶ。
+        
+        Args:
+            paths: 読み込むファイルのパスのリスト
+            
+        Yields:
+            (パス, 内容) のタプル。読み込みに失敗したファイルの内容はNone
+        """
+        for path in paths:
+            try:
+                yield path, self.read_file(path)
+            except (FileNotFoundError, IOError) as e:
+                self.debug_warning(f"ファイル読み込みエラー: {path} - {e}")
+                yield path, None
+    
     def get_stream(self, path: str) -> Optional[BinaryIO]:
         """
         指定されたパスのファイルのストリームを取得する
@@ -8,23 +8,61 @@ from .base import BaseDecoder
 from .common import DecodingError
 from .interface import (
     decode_image,
+    decode_image_for_display,
+    decode_image_stream,
+    decode_image_stream_for_display,
+    probe_image,
     get_supported_image_extensions,
     get_decoder_manager,
     select_image_decoder  # 新しい関数をインポート
 )
-from .decoder import ImageDecoder
-from .cv2_decoder import CV2ImageDecoder
-from .mag_decoder import MAGImageDecoder
+from .decoder import ImageDecoder, DisplayImage, to_rgb_array
+from .cache import DecodedImageCache, get_decoded_image_cache, make_image_key
+from .registry import DecoderSpec
+from .batch import BatchDecoder
+from .tiled import TiledImage, open_tiled_image
+
+# 実体のデコーダークラスは cv2 や PIL をインポートするため、参照されたときに読み込む
+_LAZY_DECODERS = {
+    'CV2ImageDecoder': '.cv2_decoder',
+    'MAGImageDecoder': '.mag_decoder',
+    'GIFImageDecoder': '.gif_decoder',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_DECODERS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'BaseDecoder',
     'DecodingError',
     'decode_image',
+    'decode_image_for_display',
+    'decode_image_stream',
+    'decode_image_stream_for_display',
+    'probe_image',
     'get_supported_image_extensions',
     'get_decoder_manager',
     'select_image_decoder',  # 新しい関数をエクスポートリストに追加
     'ImageDecoder',
+    'DisplayImage',
+    'to_rgb_array',
+    'DecodedImageCache',
+    'get_decoded_image_cache',
+    'make_image_key',
+    'DecoderSpec',
+    'BatchDecoder',
+    'TiledImage',
+    'open_tiled_image',
     'CV2ImageDecoder',
     'MAGImageDecoder',
+    'GIFImageDecoder',
     'PIImageDecoder'  # PIデコーダーをエクスポートリストに追加
 ]
@@ -0,0 +1,282 @@
+"""
+一括デコードサービス
+
+複数の画像をプロセスプールで並列にデコードします。
+デコード結果の配列はパイプでピクル化して受け渡さず、呼び出し側のプロセスが
+確保した共有メモリ（multiprocessing.shared_memory）にワーカーが直接書き込みます。
+
+共有メモリの大きさはヘッダ解析（probe）で求めた元画像のサイズで確保します。
+ヘッダ解析に対応しない形式や、デコード結果が確保した大きさに収まらない場合は、
+その画像だけ通常のピクル化で受け渡します。
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Deque, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from logutils import log_print, DEBUG, INFO, WARNING
+from .probe import probe_image_header, MAX_PROBE_SIZE
+
+# ワーカーの戻り値: None（失敗）、共有メモリに書き込んだ配列の形状、ピクル化した配列
+_WorkerResult = Union[None, Tuple[int, ...], np.ndarray]
+
+
+def _decode_worker(name: str, data: bytes, target_size: Optional[Tuple[int, int]],
+                   shm_name: Optional[str], capacity: int) -> _WorkerResult:
+    """
+    ワーカープロセスで画像をデコードする
+
+    Args:
+        name: ファイル名（デコーダーの選択に使用）
+        data: 画像データ
+        target_size: 縮小デコードの目標サイズ
+        shm_name: 結果を書き込む共有メモリの名前（Noneならピクル化して返す）
+        capacity: 共有メモリに書き込めるバイト数
+
+    Returns:
+        共有メモリに書き込んだ場合は配列の形状、書き込めなかった場合は配列そのもの、
+        デコードに失敗した場合はNone
+    """
+    # ワーカープロセスごとにデコーダーマネージャーを1つ作って使い回す
+    from .interface import decode_image
+
+    array = decode_image(name, data, target_size)
+    if array is None:
+        return None
+    if shm_name is None or array.dtype != np.uint8 or array.nbytes > capacity:
+        return array
+    shm = SharedMemory(name=shm_name)
+    try:
+        np.ndarray(array.shape, dtype=np.uint8, buffer=shm.buf)[...] = array
+    finally:
+        shm.close()
+    return array.shape
+
+
+def _init_worker() -> None:
+    """ワーカープロセスの初期化（ログを警告以上に絞る）"""
+    from logutils import setup_logging
+    setup_logging(WARNING)
+
+
+def _warm_up_worker() -> None:
+    """ワーカープロセスで全デコーダーを読み込んでおく"""
+    from .interface import get_decoder_manager
+
+    manager = get_decoder_manager()
+    for ext in manager.get_supported_extensions():
+        manager.get_decoder_for_extension(ext)
+
+
+class BatchDecoder:
+    """
+    プロセスプールで画像を一括デコードするサービス
+
+    プロセスプールは最初の呼び出しで作成し、shutdownまで使い回す。shutdown後は
+    プロセスプールを作り直さず、decode_iterは何も返さない。
+    複数のスレッドから同時に呼び出してよい（中止はdecode_iterの呼び出しごとに管理する）。
+    GUIのスレッドを持つプロセスからforkしないよう、既定ではspawnでワーカーを起動する。
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, use_shared_memory: bool = True,
+                 start_method: str = 'spawn'):
+        """
+        一括デコードサービスを初期化する
+
+        Args:
+            max_workers: ワーカープロセス数。Noneなら物理コア数に合わせる
+            use_shared_memory: デコード結果を共有メモリで受け渡すかどうか
+                               （Falseなら配列をピクル化して受け渡す）
+            start_method: ワーカープロセスの起動方法（'spawn', 'forkserver', 'fork'）
+        """
+        if max_workers is None:
+            from proc.util import get_optimal_worker_count
+            max_workers = get_optimal_worker_count(cpu_intensive=True, memory_intensive=True)
+        self.max_workers = max(1, max_workers)
+        self.use_shared_memory = use_shared_memory
+        self._start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 実行中のdecode_iterごとの中止フラグ
+        self._cancel_tokens: Set[threading.Event] = set()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """shutdown済みかどうか"""
+        return self._closed
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        プロセスプールを取得する（初回は作成する）
+
+        Raises:
+            RuntimeError: shutdown済みの場合
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("一括デコードサービスは停止済みです")
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=get_context(self._start_method),
+                    initializer=_init_worker,
+                )
+                log_print(INFO, f"一括デコード用のプロセスプールを作成: {self.max_workers} プロセス")
+            return self._executor
+
+    def warm_up(self) -> None:
+        """すべてのワーカープロセスを起動してデコーダーを読み込んでおく"""
+        executor = self._get_executor()
+        futures = [executor.submit(_warm_up_worker) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def _submit(self, executor: ProcessPoolExecutor, name: str, data: bytes,
+                target_size: Optional[Tuple[int, int]]) -> Tuple[Future, Optional[SharedMemory]]:
+        """
+        1件のデコードをワーカーに渡す
+
+        ヘッダ解析で元画像のサイズが分かれば、その大きさの共有メモリを確保して渡す
+        （縮小デコードの結果は元画像より小さいので必ず収まる）。
+
+        Returns:
+            (Future, 確保した共有メモリ) のタプル
+        """
+        shm = None
+        if self.use_shared_memory:
+            info = probe_image_header(data[:MAX_PROBE_SIZE])
+            if info is not None and info[0] > 0 and info[1] > 0:
+                shm = SharedMemory(create=True, size=info[0] * info[1] * info[2])
+        try:
+            future = executor.submit(_decode_worker, name, data, target_size,
+                                     shm.name if shm else None, shm.size if shm else 0)
+        except BaseException:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            raise
+        return future, shm
+
+    def _collect(self, name: str, future: Future, shm: Optional[SharedMemory]) -> Optional[np.ndarray]:
+        """
+        デコード結果を受け取り、共有メモリを解放する
+
+        Returns:
+            デコードされた配列。失敗した場合はNone
+        """
+        try:
+            result = future.result()
+            if isinstance(result, tuple):
+                # 共有メモリから呼び出し側の配列に取り出す（共有メモリはすぐに解放する）
+                return np.ndarray(result, dtype=np.uint8, buffer=shm.buf).copy()
+            return result
+        except Exception as e:
+            log_print(WARNING, f"'{name}' の一括デコードに失敗しました: {e}")
+            return None
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def decode_iter(self, items: Iterable[Tuple[str, bytes]],
+                    target_size: Optional[Tuple[int, int]] = None) -> Iterator[Tuple[str, Optional[np.ndarray]]]:
+        """
+        画像を並列にデコードし、入力の順に結果を返す
+
+        同時にワーカーへ渡すのはワーカー数の2倍までとし、入力をすべて先読みしない。
+        cancelやshutdownで中止された場合は、ワーカーに渡し済みの画像の結果までで終わる。
+
+        Args:
+            items: (ファイル名, 画像データ) の列
+            target_size: 縮小デコードの目標サイズ (幅, 高さ)
+
+        Yields:
+            (ファイル名, デコードされた配列) のタプル。失敗した画像の配列はNone
+        """
+        cancelled = threading.Event()
+        with self._lock:
+            self._cancel_tokens.add(cancelled)
+        pending: Deque[Tuple[str, Future, Optional[SharedMemory]]] = deque()
+        max_pending = self.max_workers * 2
+        source = iter(items)
+        try:
+            try:
+                executor = self._get_executor()
+            except RuntimeError as e:
+                log_print(DEBUG, f"一括デコードを開始できません: {e}")
+                return
+            while True:
+                while len(pending) < max_pending and not cancelled.is_set():
+                    item = next(source, None)
+                    if item is None:
+                        break
+                    name, data = item
+                    try:
+                        submitted = self._submit(executor, name, data, target_size)
+                    except RuntimeError as e:
+                        # shutdownと競合した（停止したプロセスプールには渡せない）
+                        log_print(DEBUG, f"一括デコードを開始できません: {e}")
+                        cancelled.set()
+                        break
+                    pending.append((name,) + submitted)
+                if not pending:
+                    break
+                name, future, shm = pending.popleft()
+                yield name, self._collect(name, future, shm)
+        finally:
+            with self._lock:
+                self._cancel_tokens.discard(cancelled)
+            # 中断された場合も、確保した共有メモリを解放する
+            for name, future, shm in pending:
+                if not future.cancel():
+                    # 処理中のものは共有メモリへの書き込みが終わるまで待つ
+                    wait([future])
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+            if cancelled.is_set():
+                log_print(DEBUG, "一括デコードを中止しました")
+
+    def decode_all(self, items: Iterable[Tuple[str, bytes]],
+                   target_size: Optional[Tuple[int, int]] = None) -> List[Tuple[str, Optional[np.ndarray]]]:
+        """
+        画像を並列にデコードし、すべての結果をリストで返す
+
+        Args:
+            items: (ファイル名, 画像データ) の列
+            target_size: 縮小デコードの目標サイズ (幅, 高さ)
+
+        Returns:
+            入力の順の (ファイル名, デコードされた配列) のリスト
+        """
+        return list(self.decode_iter(items, target_size))
+
+    def cancel(self) -> None:
+        """実行中のすべてのdecode_iterを中止する（ワーカーに渡し済みの画像は処理が終わるまで待つ）"""
+        with self._lock:
+            tokens = list(self._cancel_tokens)
+        for token in tokens:
+            token.set()
+
+    def shutdown(self) -> None:
+        """プロセスプールを停止する（以後の呼び出しではプロセスプールを作らない）"""
+        with self._lock:
+            self._closed = True
+        self.cancel()
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "BatchDecoder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
@@ -0,0 +1,228 @@
+"""
+デコード済み画像のキャッシュ
+
+デコード結果（numpy配列）をプロセス全体で共有するLRUキャッシュです。
+ページの戻りや見開き表示の切り替え、プレビューの開き直しで同じ画像を表示するときに、
+デコードをやり直さずにキャッシュの配列をそのまま使います。
+
+キャッシュする配列はC連続にそろえてあり、QImageはコピーせずにこの配列のバッファを
+直接参照できます。配列は表示中の画像と共有されるため、利用側で書き換えないでください。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from logutils import log_print, DEBUG, INFO
+from .decoder import pixel_format_for_array
+
+# キャッシュの既定の上限（バイト）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class CachedImage(NamedTuple):
+    """キャッシュされたデコード結果"""
+    array: np.ndarray  # C連続の画像配列 (height, width[, channels])。書き換え禁止
+    decoder_name: str  # デコードに使用したデコーダーのクラス名
+    pixel_format: str = ''  # 配列の画素形式（PIXEL_FORMAT_*）
+
+    @property
+    def bytes_per_line(self) -> int:
+        """QImageに渡す1行あたりのバイト数"""
+        return self.array.strides[0]
+
+
+def make_image_key(path: str, data: Optional[bytes] = None, size: Optional[int] = None,
+                   mtime: Optional[float] = None, archive_path: Optional[str] = None,
+                   target_size: Optional[Tuple[int, int]] = None) -> Tuple[Hashable, ...]:
+    """
+    画像の内容を識別するキャッシュキーを作成する
+
+    更新日時が分かる場合は (書庫パス, エントリパス, サイズ, 更新日時) で識別し、
+    分からない場合はデータの内容ハッシュで識別する。
+
+    Args:
+        path: 画像のパス（書庫内のエントリパス、またはブラウザ上のパス）
+        data: 画像のバイトデータ（mtimeがない場合は必須）
+        size: データのサイズ（省略時はdataの長さ）
+        mtime: 更新日時
+        archive_path: 画像を含む書庫のパス
+        target_size: 縮小デコードに使った目標サイズ（元のサイズでデコードした場合はNone）
+
+    Returns:
+        キャッシュキー
+
+    Raises:
+        ValueError: mtimeとdataのどちらも指定されていない場合
+    """
+    if size is None and data is not None:
+        size = len(data)
+    if mtime is not None:
+        identity = ('mtime', mtime)
+    elif data is not None:
+        identity = ('blake2b', hashlib.blake2b(data, digest_size=16).digest())
+    else:
+        raise ValueError("キャッシュキーの作成には data か mtime が必要です")
+    return (archive_path or '', path, size, identity, target_size)
+
+
+class DecodedImageCache:
+    """
+    デコード済み画像のLRUキャッシュ
+
+    配列のバイト数の合計（または件数）が上限を超えると、最も長く使われていないものから破棄する。
+    スレッドセーフ。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: Optional[int] = None):
+        """
+        キャッシュを初期化する
+
+        Args:
+            max_bytes: キャッシュする配列のバイト数の上限（0以下ならキャッシュしない）
+            max_entries: キャッシュする件数の上限（Noneなら件数では制限しない。小さな画像を大量に
+                         キャッシュするサムネイルなどで使う）
+        """
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedImage]" = OrderedDict()
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        """キャッシュのバイト数の上限"""
+        return self._max_bytes
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """
+        キャッシュのバイト数の上限を変更する（超えた分はすぐに破棄する）
+
+        Args:
+            max_bytes: 新しい上限（0以下ならキャッシュを無効にする）
+        """
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict_locked()
+        log_print(INFO, f"デコード済み画像キャッシュの上限を {max_bytes // (1024 * 1024)}MB に設定しました")
+
+    def get(self, key: Hashable) -> Optional[CachedImage]:
+        """
+        キャッシュからデコード結果を取得する
+
+        Args:
+            key: make_image_keyで作成したキー
+
+        Returns:
+            キャッシュされたデコード結果。なければNone
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: Hashable, array: np.ndarray, decoder_name: str = "",
+            pixel_format: Optional[str] = None) -> CachedImage:
+        """
+        デコード結果をキャッシュに登録する
+
+        配列はC連続にそろえる（必要な場合のみコピー）。上限より大きい配列は登録しない。
+
+        Args:
+            key: make_image_keyで作成したキー
+            array: デコードされた画像配列
+            decoder_name: デコードに使用したデコーダーのクラス名
+            pixel_format: 配列の画素形式（省略時はRGB(A)としてチャンネル数から決める）
+
+        Returns:
+            登録した（または登録しなかった場合もQImageにそのまま渡せる）デコード結果
+        """
+        array = np.ascontiguousarray(array)
+        entry = CachedImage(array, decoder_name, pixel_format or pixel_format_for_array(array) or '')
+        nbytes = array.nbytes
+        with self._lock:
+            if nbytes > self._max_bytes:
+                return entry
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.array.nbytes
+            self._entries[key] = entry
+            self._total_bytes += nbytes
+            self._evict_locked()
+        return entry
+
+    def _evict_locked(self) -> None:
+        """上限を超えた分を古いものから破棄する（_lock取得済みで呼ぶこと）"""
+        while self._entries and (self._total_bytes > self._max_bytes or
+                                 (self._max_entries is not None and len(self._entries) > self._max_entries)):
+            _, old = self._entries.popitem(last=False)
+            self._total_bytes -= old.array.nbytes
+            self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        指定したキーのデコード結果を破棄する
+
+        Args:
+            key: 破棄するキー
+        """
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.array.nbytes
+
+    def clear(self) -> None:
+        """キャッシュをすべて破棄する"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        log_print(DEBUG, "デコード済み画像キャッシュをクリアしました")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得する
+
+        Returns:
+            entries（件数）, bytes（使用バイト数）, max_bytes（上限）, max_entries（件数の上限）,
+            hits（ヒット数）, misses（ミス数）, evictions（破棄数）の辞書
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self._max_bytes,
+                'max_entries': self._max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+            }
+
+
+# シングルトンインスタンス
+_decoded_image_cache = None
+_decoded_image_cache_lock = threading.Lock()
+
+
+def get_decoded_image_cache() -> DecodedImageCache:
+    """
+    プロセス全体で共有するデコード済み画像キャッシュを取得する
+
+    Returns:
+        DecodedImageCacheのインスタンス
+    """
+    global _decoded_image_cache
+    if _decoded_image_cache is None:
+        with _decoded_image_cache_lock:
+            if _decoded_image_cache is None:
+                _decoded_image_cache = DecodedImageCache()
+    return _decoded_image_cache
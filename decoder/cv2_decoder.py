@@ -4,12 +4,38 @@ OpenCV を使用した汎用画像デコーダー
 OpenCV（cv2）を使用して、様々な一般的な画像フォーマットに対応するデコーダー実装
 """
 
+import sys
 import cv2
 import numpy as np
 from io import BytesIO
-from typing import List, Optional, Tuple
+from typing import BinaryIO, List, Optional, Tuple
 
-from .decoder import ImageDecoder
+from .decoder import (
+    ImageDecoder, DisplayImage, select_reduction_factor, pixel_format_for_array,
+    PIXEL_FORMAT_GRAY8, PIXEL_FORMAT_BGR888, PIXEL_FORMAT_BGRA8888,
+)
+from .probe import probe_image_header, probe_jpeg_components, MAX_PROBE_SIZE
+from .registry import CV2_DECODER
+from .stream import peek_stream
+
+# 縮小率ごとのJPEG縮小デコード用フラグ（libjpegのDCTスケーリングで縮小しながらデコードする）
+# 通常のデコード（IMREAD_UNCHANGED）と同じく、EXIFの回転情報は適用しない
+_JPEG_REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2 | cv2.IMREAD_IGNORE_ORIENTATION,
+    4: cv2.IMREAD_REDUCED_COLOR_4 | cv2.IMREAD_IGNORE_ORIENTATION,
+    8: cv2.IMREAD_REDUCED_COLOR_8 | cv2.IMREAD_IGNORE_ORIENTATION,
+}
+# グレースケールのJPEG用（IMREAD_UNCHANGED と同じく1チャンネルのままデコードする）
+_JPEG_REDUCED_GRAYSCALE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2 | cv2.IMREAD_IGNORE_ORIENTATION,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4 | cv2.IMREAD_IGNORE_ORIENTATION,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8 | cv2.IMREAD_IGNORE_ORIENTATION,
+}
+
+
+def _is_streamable_png(head: bytes) -> bool:
+    """ストリームから読みながらデコードするPNGか（IHDRのビット深度が8以下。16ビットは imdecode と同じ配列にできない）"""
+    return head[:8] == b'\x89PNG\r\n\x1a\n' and len(head) >= 25 and head[24] <= 8
 
 
 class CV2ImageDecoder(ImageDecoder):
@@ -27,26 +53,16 @@ class CV2ImageDecoder(ImageDecoder):
         Returns:
             List[str]: サポートされている拡張子のリスト
         """
-        return [
-            '.bmp', '.dib',           # Windows ビットマップ
-            '.jpg', '.jpeg', '.jpe',  # JPEG ファイル
-            '.jp2',                   # JPEG 2000 ファイル
-            '.png',                   # Portable Network Graphics
-            '.webp',                  # WebP
-            '.pbm', '.pgm', '.ppm',   # Portable image format
-            '.pxm', '.pnm',           # Portable image format (拡張)
-            '.sr', '.ras',            # Sun rasters
-            '.tiff', '.tif',          # TIFF ファイル
-            '.exr',                   # OpenEXR 画像ファイル
-            '.hdr', '.pic'            # Radiance HDR
-        ]
+        return list(CV2_DECODER.extensions)
     
-    def decode(self, data: bytes) -> Optional[np.ndarray]:
+    def decode(self, data: bytes, target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
         """
         バイトデータを OpenCV を用いて numpy 配列の画像に変換する
         
         Args:
             data (bytes): デコードする画像のバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント。
+                         JPEGの場合は1/2, 1/4, 1/8に縮小しながらデコードする
             
         Returns:
             Optional[np.ndarray]: デコードされた画像の numpy 配列
@@ -54,30 +70,197 @@ class CV2ImageDecoder(ImageDecoder):
                                   デコードに失敗した場合は None
         """
         try:
-            # バイトデータを numpy 配列に変換
-            nparr = np.frombuffer(data, np.uint8)
-            # OpenCV で画像としてデコード (BGR 形式)
-            img = cv2.imdecode(nparr, cv2.IMREAD_UNCHANGED)
+            img = self._imdecode(data, target_size)
+            if img is None:
+                return None
+            return self._to_rgb(img)
+        except Exception as e:
+            print(f"画像デコードエラー: {e}")
+            return None
+    
+    def decode_stream(self, stream: BinaryIO,
+                      target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+        """
+        ストリームから画像をデコードする
+        
+        8ビット以下のPNGは、PILLOWでストリームを少しずつ読みながらデコードし、
+        圧縮データ全体をメモリに読み込まない（デコード結果は decode と同じ）。
+        それ以外の形式は imdecode がデータ全体を必要とするため、すべて読み込んで decode に渡す。
+        
+        Args:
+            stream: 画像データの先頭に位置する読み込み用のストリーム
+            target_size: 表示先のサイズ (幅, 高さ) のヒント
+            
+        Returns:
+            Optional[np.ndarray]: デコードされた画像の numpy 配列、失敗した場合は None
+        """
+        head, stream = peek_stream(stream, 33)
+        if _is_streamable_png(head):
+            try:
+                return self._decode_png_stream(stream)
+            except ImportError:
+                pass
+            except Exception as e:
+                print(f"画像デコードエラー: {e}")
+                return None
+        return self.decode(stream.read(), target_size)
+    
+    def decode_display_stream(self, stream: BinaryIO,
+                              target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+        """
+        ストリームから表示用の画像をデコードする
+        
+        8ビット以下のPNGは decode_stream と同じくストリームを少しずつ読みながらデコードし、
+        グレースケールは1チャンネルのまま返す（decode_display と同じくグレースケールのtRNSは無視する）。
+        それ以外の形式はすべて読み込んで decode_display に渡す。
+        
+        Args:
+            stream: 画像データの先頭に位置する読み込み用のストリーム
+            target_size: 表示先のサイズ (幅, 高さ) のヒント
             
+        Returns:
+            Optional[DisplayImage]: 画像配列と画素形式、デコードに失敗した場合は None
+        """
+        head, stream = peek_stream(stream, 33)
+        if _is_streamable_png(head):
+            try:
+                image = self._decode_png_stream(stream, keep_gray=True)
+                return DisplayImage(np.ascontiguousarray(image), pixel_format_for_array(image))
+            except ImportError:
+                pass
+            except Exception as e:
+                print(f"画像デコードエラー: {e}")
+                return None
+        return self.decode_display(stream.read(), target_size)
+    
+    def _decode_png_stream(self, stream: BinaryIO, keep_gray: bool = False) -> np.ndarray:
+        """
+        PILLOWでPNGをストリームから読みながらデコードする
+        
+        チャンネル数は imdecode の結果に合わせる（グレースケールはRGB、パレットとRGBは
+        tRNSがあればRGBA、グレースケールのtRNSは無視する）。
+        
+        Args:
+            stream: PNGデータの先頭に位置する読み込み用のストリーム
+            keep_gray: グレースケール（透過なし）を1チャンネルのまま返すかどうか
+            
+        Returns:
+            np.ndarray: RGB または RGBA の配列（keep_gray ならグレースケールの配列もある）
+            
+        Raises:
+            ImportError: PILLOWがインストールされていない場合
+        """
+        from PIL import Image
+        
+        with Image.open(stream, formats=['PNG']) as img:
+            if img.mode in ('LA', 'RGBA'):
+                mode = 'RGBA'
+            elif img.mode in ('P', 'RGB') and 'transparency' in img.info:
+                mode = 'RGBA'
+            elif keep_gray and img.mode in ('1', 'L'):
+                mode = 'L'
+            else:
+                mode = 'RGB'
+            if img.mode != mode:
+                img = img.convert(mode)
+            return np.array(img)
+    
+    def decode_display(self, data: bytes,
+                       target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+        """
+        バイトデータを OpenCV を用いて表示用の画像にデコードする
+        
+        8ビットの画像は imdecode の出力（BGR/BGRA/グレースケール）をそのまま返し、
+        RGBへの並べ替えのコピーを行わない。
+        
+        Args:
+            data (bytes): デコードする画像のバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント
+            
+        Returns:
+            Optional[DisplayImage]: 画像配列と画素形式、デコードに失敗した場合は None
+        """
+        try:
+            img = self._imdecode(data, target_size)
             if img is None:
                 return None
-                
-            # アルファチャンネルの有無を確認
-            if len(img.shape) == 2:  # グレースケール
-                # グレースケール画像を3チャンネルRGBに変換
-                img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
-            elif img.shape[2] == 3:  # BGR
-                # BGR から RGB に変換
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            elif img.shape[2] == 4:  # BGRA
-                # BGRA から RGBA に変換
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)
-                
-            return img
+            if img.dtype == np.uint8:
+                if len(img.shape) == 2:
+                    return DisplayImage(img, PIXEL_FORMAT_GRAY8)
+                if img.shape[2] == 3:
+                    return DisplayImage(img, PIXEL_FORMAT_BGR888)
+                if img.shape[2] == 4 and sys.byteorder == 'little':
+                    # BGRAの並びはリトルエンディアンのARGB32と同じ
+                    return DisplayImage(img, PIXEL_FORMAT_BGRA8888)
+            # 8ビット以外の画像などは decode と同じ変換を行う
+            img = self._to_rgb(img)
+            pixel_format = pixel_format_for_array(img)
+            if pixel_format is None:
+                return None
+            return DisplayImage(np.ascontiguousarray(img), pixel_format)
         except Exception as e:
             print(f"画像デコードエラー: {e}")
             return None
     
+    def _imdecode(self, data: bytes, target_size: Optional[Tuple[int, int]]) -> Optional[np.ndarray]:
+        """
+        imdecode でデコードする（OpenCV の並びのまま）
+        
+        Args:
+            data (bytes): 画像のバイトデータ
+            target_size: 表示先のサイズのヒント
+            
+        Returns:
+            Optional[np.ndarray]: BGR/BGRA/グレースケールの配列、失敗した場合は None
+        """
+        # バイトデータを numpy 配列に変換
+        nparr = np.frombuffer(data, np.uint8)
+        # OpenCV で画像としてデコード (BGR 形式)
+        return cv2.imdecode(nparr, self._get_imread_flags(data, target_size))
+    
+    def _to_rgb(self, img: np.ndarray) -> np.ndarray:
+        """
+        OpenCV の並びの配列を RGB/RGBA に変換する
+        
+        Args:
+            img (np.ndarray): imdecode の出力
+            
+        Returns:
+            np.ndarray: RGB または RGBA の配列
+        """
+        # アルファチャンネルの有無を確認
+        if len(img.shape) == 2:  # グレースケール
+            # グレースケール画像を3チャンネルRGBに変換
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+        elif img.shape[2] == 3:  # BGR
+            # BGR から RGB に変換
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        elif img.shape[2] == 4:  # BGRA
+            # BGRA から RGBA に変換
+            img = cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)
+        return img
+    
+    def _get_imread_flags(self, data: bytes, target_size: Optional[Tuple[int, int]]) -> int:
+        """
+        デコードに使うimdecodeのフラグを決める
+        
+        Args:
+            data (bytes): 画像のバイトデータ
+            target_size: 表示先のサイズのヒント
+            
+        Returns:
+            int: imdecodeのフラグ
+        """
+        if target_size and data[:3] == b'\xFF\xD8\xFF':
+            info = probe_image_header(data[:MAX_PROBE_SIZE])
+            if info is not None:
+                factor = select_reduction_factor(info[0], info[1], target_size)
+                if factor > 1:
+                    if probe_jpeg_components(data[:MAX_PROBE_SIZE]) == 1:
+                        return _JPEG_REDUCED_GRAYSCALE_FLAGS[factor]
+                    return _JPEG_REDUCED_FLAGS[factor]
+        return cv2.IMREAD_UNCHANGED
+    
     def get_image_info(self, data: bytes) -> Optional[Tuple[int, int, int]]:
         """
         画像の基本情報を取得する
@@ -89,6 +272,11 @@ class CV2ImageDecoder(ImageDecoder):
             Optional[Tuple[int, int, int]]: (幅, 高さ, チャンネル数) の形式の情報
                                            取得できない場合は None
         """
+        # ヘッダだけで分かる形式はデコードしない
+        info = probe_image_header(data[:MAX_PROBE_SIZE])
+        if info is not None:
+            return info
+        
         try:
             # バイトデータを numpy 配列に変換
             nparr = np.frombuffer(data, np.uint8)
@@ -4,11 +4,101 @@
 画像デコーダーが実装すべき基本インターフェース
 """
 
-from typing import List, Optional, Tuple
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
 import numpy as np
 
 from .base import BaseDecoder
 
+
+class ImageFrame(NamedTuple):
+    """アニメーション画像の1フレーム"""
+    index: int  # フレーム番号（0から）
+    image: np.ndarray  # 合成済みのフレーム画像（画像全体の大きさ）
+    duration: int  # 表示時間（ミリ秒）。静止画は0
+
+# 表示用デコードの画素形式（メモリ上のバイト順。表示側のQImageのフォーマットに対応する）
+PIXEL_FORMAT_GRAY8 = 'Grayscale8'
+PIXEL_FORMAT_RGB888 = 'RGB888'
+PIXEL_FORMAT_BGR888 = 'BGR888'
+PIXEL_FORMAT_RGBA8888 = 'RGBA8888'
+PIXEL_FORMAT_BGRA8888 = 'BGRA8888'  # リトルエンディアンのQImage.Format_ARGB32と同じ並び
+
+
+class DisplayImage(NamedTuple):
+    """表示用にデコードされた画像"""
+    array: np.ndarray  # C連続の画像配列 (height, width[, channels])
+    pixel_format: str  # 画素形式（PIXEL_FORMAT_*）
+
+
+def pixel_format_for_array(array: np.ndarray) -> Optional[str]:
+    """
+    decodeが返すRGB(A)の配列の画素形式を求める
+    
+    Args:
+        array: グレースケール、RGB、RGBAの画像配列
+        
+    Returns:
+        画素形式。対応していないチャンネル数の場合はNone
+    """
+    channels = 1 if array.ndim == 2 else array.shape[2]
+    return {1: PIXEL_FORMAT_GRAY8, 3: PIXEL_FORMAT_RGB888, 4: PIXEL_FORMAT_RGBA8888}.get(channels)
+
+
+def to_rgb_array(array: np.ndarray, pixel_format: Optional[str]) -> np.ndarray:
+    """
+    表示用の画素形式の配列を、decodeと同じRGB(A)の配列に変換する
+    
+    超解像処理など、RGB(A)の配列を前提とする処理に渡すときに使う。
+    すでにRGB(A)の場合はコピーせずにそのまま返す。
+    
+    Args:
+        array: 画像配列
+        pixel_format: 配列の画素形式（Noneならチャンネル数から判断する）
+        
+    Returns:
+        3チャンネル（RGB）または4チャンネル（RGBA）の配列
+    """
+    if pixel_format == PIXEL_FORMAT_BGR888:
+        return np.ascontiguousarray(array[:, :, ::-1])
+    if pixel_format == PIXEL_FORMAT_BGRA8888:
+        return np.ascontiguousarray(array[:, :, [2, 1, 0, 3]])
+    if array.ndim == 2:
+        return np.repeat(array[:, :, np.newaxis], 3, axis=2)
+    return array
+
+# 縮小デコードで使う縮小率の候補（大きい順）
+REDUCTION_FACTORS = (8, 4, 2)
+
+
+def select_reduction_factor(width: int, height: int,
+                            target_size: Optional[Tuple[int, int]]) -> int:
+    """
+    目標サイズに収めて表示するときに、画質を落とさずに使える縮小率を選ぶ
+    
+    画像を目標サイズ（幅, 高さ）に縦横比を保って収めた表示サイズを下回らない範囲で、
+    最も大きな縮小率を返す。
+    
+    Args:
+        width: 元画像の幅
+        height: 元画像の高さ
+        target_size: 目標サイズ (幅, 高さ)。Noneなら縮小しない
+        
+    Returns:
+        int: 縮小率（1, 2, 4, 8 のいずれか）
+    """
+    if not target_size or width <= 0 or height <= 0:
+        return 1
+    target_width, target_height = target_size
+    if target_width <= 0 or target_height <= 0:
+        return 1
+    # 収めたときの縮小倍率の逆数（幅と高さのうち余裕が大きい方）
+    limit = max(width / target_width, height / target_height)
+    for factor in REDUCTION_FACTORS:
+        if factor <= limit:
+            return factor
+    return 1
+
+
 class ImageDecoder(BaseDecoder):
     """
     画像デコーダーの基本クラス
@@ -26,18 +116,99 @@ class ImageDecoder(BaseDecoder):
         """
         return []
     
-    def decode(self, data: bytes) -> Optional[np.ndarray]:
+    def decode(self, data: bytes, target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
         """
         バイトデータから画像をデコード
         
         Args:
             data: デコードする画像のバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント。指定すると、デコーダーは
+                         収めて表示したサイズを下回らない範囲で縮小してデコードしてよい
+                         （縮小に対応しない形式や、縮小できない場合は元のサイズのまま）
             
         Returns:
             Optional[np.ndarray]: デコードされた画像のnumpy配列、失敗した場合はNone
         """
         raise NotImplementedError("子クラスでオーバーライドする必要があります")
     
+    def decode_stream(self, stream: BinaryIO,
+                      target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+        """
+        ストリームから画像をデコード
+        
+        書庫のget_streamが返すストリームを、バイト列に読み込まずに渡せる。
+        データを読みながらデコードできるデコーダーは、このメソッドをオーバーライドして
+        圧縮データ全体をメモリに保持しないようにする。既定では残りをすべて読み込んでdecodeに渡す。
+        ストリームは閉じない。
+        
+        Args:
+            stream: 画像データの先頭に位置する読み込み用のストリーム
+            target_size: 表示先のサイズ (幅, 高さ) のヒント（decodeと同じ）
+            
+        Returns:
+            Optional[np.ndarray]: デコードされた画像のnumpy配列、失敗した場合はNone
+        """
+        data = stream.read()
+        return self.decode(data) if target_size is None else self.decode(data, target_size=target_size)
+    
+    def decode_display(self, data: bytes,
+                       target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+        """
+        バイトデータから表示用の画像をデコード
+        
+        decodeと違い、RGB(A)への並べ替えやグレースケールの3チャンネル化を行わず、
+        表示側がそのまま扱える画素形式で返す。デコーダーの出力をそのまま表示に使えるデコーダーは
+        このメソッドをオーバーライドして、余分な変換のコピーを省く。
+        既定ではdecodeの結果をそのまま返す。
+        
+        Args:
+            data: デコードする画像のバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント（decodeと同じ）
+            
+        Returns:
+            Optional[DisplayImage]: 画像配列と画素形式、失敗した場合はNone
+        """
+        image = self.decode(data) if target_size is None else self.decode(data, target_size=target_size)
+        if image is None:
+            return None
+        pixel_format = pixel_format_for_array(image)
+        if pixel_format is None:
+            return None
+        return DisplayImage(np.ascontiguousarray(image), pixel_format)
+    
+    def decode_display_stream(self, stream: BinaryIO,
+                              target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+        """
+        ストリームから表示用の画像をデコード
+        
+        decode_stream の表示用の画素形式版（decode_display と同じ画素形式の扱い）。
+        既定では残りをすべて読み込んでdecode_displayに渡す。ストリームは閉じない。
+        
+        Args:
+            stream: 画像データの先頭に位置する読み込み用のストリーム
+            target_size: 表示先のサイズ (幅, 高さ) のヒント（decodeと同じ）
+            
+        Returns:
+            Optional[DisplayImage]: 画像配列と画素形式、失敗した場合はNone
+        """
+        return self.decode_display(stream.read(), target_size)
+    
+    def iter_frames(self, data: bytes) -> Iterator[ImageFrame]:
+        """
+        画像のフレームを順に返す
+        
+        アニメーションに対応しないデコーダーでは、decodeの結果を1フレームとして返す。
+        
+        Args:
+            data: デコードする画像のバイトデータ
+            
+        Yields:
+            ImageFrame: フレーム番号、フレーム画像、表示時間
+        """
+        image = self.decode(data)
+        if image is not None:
+            yield ImageFrame(0, image, 0)
+    
     def get_image_info(self, data: bytes) -> Optional[Tuple[int, int, int]]:
         """
         画像の基本情報を取得する
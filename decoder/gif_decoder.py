@@ -2,12 +2,15 @@
 PILLOWを使用したGIFデコーダー
 
 PILLOWライブラリを使用して、GIFファイル（アニメーション含む）をデコードする
-アニメーションGIFの場合は先頭フレームのみを表示する
+decodeは先頭フレームのみを返す。アニメーションGIFのフレームはGIFFrameStreamで
+必要になった時点で1フレームずつデコードする
 """
 
+import threading
 import numpy as np
+from collections import deque
 from io import BytesIO
-from typing import List, Optional, Tuple
+from typing import BinaryIO, Deque, Iterator, List, Optional, Tuple
 
 try:
     from PIL import Image
@@ -17,10 +20,139 @@ except ImportError:
     import warnings
     warnings.warn("PILLOWがインストールされていないため、GIFデコーダーは使用できません。pip install pillow でインストールしてください。")
 
-from .decoder import ImageDecoder
+from .decoder import ImageDecoder, ImageFrame, select_reduction_factor
+from .probe import probe_image_header, MAX_PROBE_SIZE
+from .registry import GIF_DECODER
 from .common import DecodingError
 
 
+# 表示時間が指定されていない（または極端に短い）フレームに使う表示時間（ミリ秒）
+# 主要なブラウザと同じく、10ミリ秒以下は100ミリ秒として扱う
+DEFAULT_FRAME_DURATION = 100
+MIN_FRAME_DURATION = 10
+
+
+class GIFFrameStream:
+    """
+    アニメーションGIFのフレームを遅延デコードするストリーム
+    
+    フレームは要求された時点でデコードし、直近の数フレームだけをリングバッファに保持する。
+    廃棄方法（disposal）に従ったフレームの合成はPILLOWのseekが行う。
+    前のフレームに戻る場合、バッファになければPILLOWが先頭から合成し直す。
+    """
+    
+    def __init__(self, data: bytes, buffer_size: int = 8):
+        """
+        ストリームを開く
+        
+        Args:
+            data: GIFファイルのバイトデータ
+            buffer_size: 合成済みフレームを保持する数
+            
+        Raises:
+            DecodingError: GIFとして開けない場合
+        """
+        try:
+            self._img = Image.open(BytesIO(data))
+            self._img.load()
+        except Exception as e:
+            raise DecodingError(f"GIFを開けませんでした: {str(e)}")
+        self._lock = threading.RLock()
+        self._frames: Deque[ImageFrame] = deque(maxlen=max(1, buffer_size))
+        self._frame_count: Optional[int] = None
+        # 出力の形式は先頭フレームに合わせる（途中で変わると表示側の扱いが面倒になるため）
+        self._mode = _get_output_mode(self._img)
+        self.width, self.height = self._img.size
+        self.loop = self._img.info.get('loop')  # 0なら無限ループ、Noneならループなし
+    
+    @property
+    def frame_count(self) -> int:
+        """フレーム数（初回はファイル全体のフレーム区切りを走査する）"""
+        if self._frame_count is None:
+            with self._lock:
+                self._frame_count = getattr(self._img, 'n_frames', 1)
+        return self._frame_count
+    
+    @property
+    def is_animated(self) -> bool:
+        """複数フレームを持つかどうか"""
+        return self.frame_count > 1
+    
+    def get_frame(self, index: int) -> ImageFrame:
+        """
+        指定したフレームを取得する
+        
+        Args:
+            index: フレーム番号
+            
+        Returns:
+            ImageFrame: 合成済みのフレーム
+            
+        Raises:
+            IndexError: フレーム番号が範囲外の場合
+            DecodingError: デコードに失敗した場合
+        """
+        with self._lock:
+            for frame in self._frames:
+                if frame.index == index:
+                    return frame
+            if self._img is None:
+                raise DecodingError("GIFストリームは閉じられています")
+            try:
+                self._img.seek(index)
+            except EOFError:
+                raise IndexError(f"フレーム番号が範囲外です: {index}")
+            try:
+                image = np.array(self._img.convert(self._mode))
+            except Exception as e:
+                raise DecodingError(f"GIFフレーム {index} のデコードに失敗しました: {str(e)}")
+            duration = self._img.info.get('duration') or 0
+            if duration <= MIN_FRAME_DURATION and self.is_animated:
+                duration = DEFAULT_FRAME_DURATION
+            frame = ImageFrame(index, image, duration)
+            self._frames.append(frame)
+            return frame
+    
+    def __iter__(self) -> Iterator[ImageFrame]:
+        """先頭から最後までフレームを順に返す"""
+        index = 0
+        while True:
+            try:
+                yield self.get_frame(index)
+            except IndexError:
+                return
+            index += 1
+    
+    def close(self) -> None:
+        """ストリームを閉じ、保持しているフレームを破棄する"""
+        with self._lock:
+            if self._img is not None:
+                self._img.close()
+                self._img = None
+            self._frames.clear()
+    
+    def __enter__(self) -> "GIFFrameStream":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _get_output_mode(img: "Image.Image") -> str:
+    """
+    デコード結果の画像モードを決める
+    
+    Args:
+        img: PILLOWの画像
+        
+    Returns:
+        str: 透過情報があれば 'RGBA'、なければ 'RGB'
+    """
+    if img.mode == 'RGBA' or 'transparency' in img.info:
+        return 'RGBA'
+    return 'RGB'
+
+
 class GIFImageDecoder(ImageDecoder):
     """
     PILLOWを使用したGIFデコーダー
@@ -42,53 +174,107 @@ class GIFImageDecoder(ImageDecoder):
         Returns:
             List[str]: サポートされている拡張子のリスト
         """
-        return ['.gif']
+        return list(GIF_DECODER.extensions)
     
-    def decode(self, data: bytes) -> Optional[np.ndarray]:
+    def decode(self, data: bytes, target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
         """
         バイトデータからGIF画像をデコードしてnumpy配列に変換する
         アニメーションGIFの場合は先頭フレームのみを返す
         
         Args:
             data (bytes): デコードする画像のバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント。指定すると、
+                         RGB/RGBAに変換した後に整数倍で縮小してから配列にする
             
         Returns:
             Optional[np.ndarray]: デコードされた画像のnumpy配列
                                   デコードに失敗した場合はNone
         """
+        with BytesIO(data) as buffer:
+            return self._decode_first_frame(buffer, target_size)
+    
+    def decode_stream(self, stream: BinaryIO,
+                      target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+        """
+        ストリームからGIF画像の先頭フレームをデコードする
+        
+        PILLOWがストリームから直接読み込むため、先頭フレームより後ろのデータは読まない
+        （シークできないストリームの場合はPILLOWが全体を読み込む）。
+        
+        Args:
+            stream: GIFデータの先頭に位置する読み込み用のストリーム
+            target_size: 表示先のサイズ (幅, 高さ) のヒント
+            
+        Returns:
+            Optional[np.ndarray]: デコードされた画像のnumpy配列
+        """
+        return self._decode_first_frame(stream, target_size)
+    
+    def _decode_first_frame(self, fp: BinaryIO, target_size: Optional[Tuple[int, int]]) -> Optional[np.ndarray]:
+        """
+        ファイルオブジェクトからGIFの先頭フレームをデコードする
+        
+        Args:
+            fp: GIFデータの読み込み用のファイルオブジェクト
+            target_size: 表示先のサイズ (幅, 高さ) のヒント
+            
+        Returns:
+            Optional[np.ndarray]: デコードされた画像のnumpy配列
+            
+        Raises:
+            DecodingError: デコードに失敗した場合
+        """
         try:
-            # PILLOWでデータを読み込み
-            with BytesIO(data) as buffer:
-                # 先頭フレームのみをロード
-                with Image.open(buffer) as img:
-                    # 画像が透過情報を持っているか確認
-                    has_transparency = img.info.get('transparency') is not None or 'transparency' in img.info
-                    
-                    # パレットモードで透過がある場合の特別処理
-                    if img.mode == 'P' and has_transparency:
-                        # パレットモードの場合、RGBAに変換して透過を保持
-                        img = img.convert('RGBA')
-                    elif img.mode == 'P':
-                        # 透過情報がないパレットモードはRGBに変換
-                        img = img.convert('RGB')
-                    elif img.mode != 'RGBA' and img.mode != 'RGB':
-                        # その他のモードは適切な形式に変換
-                        if has_transparency:
-                            img = img.convert('RGBA')
-                        else:
-                            img = img.convert('RGB')
-                    
-                    # numpy配列に変換
-                    img_array = np.array(img)
-                    
-                    # 単一フレームのみを返す
-                    return img_array
-                    
+            # 先頭フレームのみをロード
+            with Image.open(fp) as img:
+                # 透過情報があればRGBA、なければRGBに変換
+                mode = _get_output_mode(img)
+                if img.mode != mode:
+                    img = img.convert(mode)
+                
+                # 表示サイズに対して大きすぎる場合は縮小してから配列にする
+                # （GIFはdraftによる縮小デコードに対応していないため、デコード後に縮小する）
+                factor = select_reduction_factor(img.width, img.height, target_size)
+                if factor > 1:
+                    img = img.reduce(factor)
+                
+                # numpy配列に変換（単一フレームのみを返す）
+                return np.array(img)
+                
         except Exception as e:
             print(f"GIFデコードエラー: {e}")
             raise DecodingError(f"GIFのデコードに失敗しました: {str(e)}")
+    
+    def open_frames(self, data: bytes, buffer_size: int = 8) -> GIFFrameStream:
+        """
+        アニメーションGIFのフレームを遅延デコードするストリームを開く
         
-        return None
+        Args:
+            data (bytes): GIFのバイトデータ
+            buffer_size (int): 合成済みフレームを保持する数
+            
+        Returns:
+            GIFFrameStream: フレームストリーム（使い終わったらcloseすること）
+            
+        Raises:
+            DecodingError: GIFとして開けない場合
+        """
+        return GIFFrameStream(data, buffer_size)
+    
+    def iter_frames(self, data: bytes) -> Iterator[ImageFrame]:
+        """
+        GIFのフレームを先頭から順にデコードして返す
+        
+        すべてのフレームを一度に展開せず、1フレームずつデコードする。
+        
+        Args:
+            data (bytes): GIFのバイトデータ
+            
+        Yields:
+            ImageFrame: フレーム番号、合成済みのフレーム画像、表示時間（ミリ秒）
+        """
+        with GIFFrameStream(data, buffer_size=1) as stream:
+            yield from stream
     
     def get_image_info(self, data: bytes) -> Optional[Tuple[int, int, int]]:
         """
@@ -101,6 +287,11 @@ class GIFImageDecoder(ImageDecoder):
             Optional[Tuple[int, int, int]]: (幅, 高さ, チャンネル数) の形式の情報、
                                            取得できない場合は None
         """
+        # ヘッダだけで分かる形式はデコードしない
+        info = probe_image_header(data[:MAX_PROBE_SIZE])
+        if info is not None:
+            return info
+        
         try:
             # PILLOWでデータを読み込み
             with BytesIO(data) as buffer:
@@ -8,7 +8,8 @@
 import os
 import sys
 import logging
-from typing import Dict, List, Optional, Tuple, Union, Any, Set, Type
+import threading
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union, Any, Set, Type
 import numpy as np
 from pathlib import Path
 
@@ -21,119 +22,133 @@ from logutils import setup_logging, log_print, DEBUG, INFO, WARNING, ERROR
 
 # 基本デコーダーとイメージデコーダーをインポート
 from decoder.base import BaseDecoder
-from decoder.decoder import ImageDecoder
+from decoder.decoder import ImageDecoder, DisplayImage
 from decoder.common import DecodingError
+from decoder.probe import probe_image_header, is_probe_supported, PROBE_SIZE, MAX_PROBE_SIZE
+from decoder.stream import peek_stream
 
-# 実体デコーダー群のインポート
-# 注: 現在実装されているデコーダーのみをインポート
-try:
-    from decoder.mag_decoder import MAGImageDecoder
-    from decoder.cv2_decoder import CV2ImageDecoder
-    from decoder.gif_decoder import GIFImageDecoder  # GIFデコーダーを追加
-    # 将来的に他のデコーダーが実装されたらここに追加
-except ImportError as e:
-    log_print(WARNING, f"一部のデコーダーのインポートに失敗しました: {e}")
+# デコーダーの登録情報（デコーダー本体のモジュールは最初に使われたときにインポートする）
+from decoder.registry import DecoderSpec, BUILTIN_DECODERS, iter_plugin_specs, find_by_signature
 
 
 class DecoderManager:
     """
     各種デコーダーを管理し、適切なデコーダーにデコード処理を振り分けるマネージャークラス
+    
+    デコーダーは登録情報（DecoderSpec）だけを先に読み込み、実体のモジュールは
+    最初に使われたときにインポートする。インスタンスはデコーダーごとに1つだけ作り、使い回す。
+    デコーダーはファイル先頭のシグネチャで選び、拡張子はシグネチャで判定できない場合の手がかりに使う。
     """
     
-    def __init__(self):
-        """デコーダーマネージャーの初期化"""
-        # デコーダークラスとサポートする拡張子のマッピングを初期化
-        # ImageDecoderのサブクラスとして型情報を修正
-        self._decoders: Dict[Type[ImageDecoder], List[str]] = {}
-        self._ext_to_decoder: Dict[str, Type[ImageDecoder]] = {}
+    def __init__(self, load_plugins: bool = True):
+        """
+        デコーダーマネージャーの初期化
+        
+        Args:
+            load_plugins: エントリポイントに登録されたプラグインのデコーダーを読み込むかどうか
+        """
+        self._lock = threading.RLock()
+        # 登録順のデコーダー登録情報と、拡張子から登録情報へのマッピング
+        self._specs: List[DecoderSpec] = []
+        self._ext_to_spec: Dict[str, DecoderSpec] = {}
+        # 作成済みのデコーダーインスタンス（クラス名 → インスタンス）と、読み込みに失敗したデコーダー
+        self._instances: Dict[str, ImageDecoder] = {}
+        self._failed: Set[str] = set()
         
         # 利用可能なデコーダーを登録
-        self._register_decoders()
+        self._register_decoders(load_plugins)
         
         # フォールバック処理を削除 - バグ発見を早めるため
-        if not self._ext_to_decoder:
+        if not self._ext_to_spec:
             log_print(WARNING, "有効なデコーダーが登録されていません。対応するデコーダーをインポートしてください。")
         
         log_print(INFO, f"デコーダーマネージャーが初期化されました。サポート形式: {', '.join(self.get_supported_extensions())}")
     
-    def _register_decoders(self):
-        """利用可能なデコーダーを登録する"""
-        # デコーダークラスのリスト 
-        # 明示的に ImageDecoder のサブクラスとして処理
-        decoder_classes: List[Type[ImageDecoder]] = []
+    def _register_decoders(self, load_plugins: bool):
+        """
+        利用可能なデコーダーを登録する
         
-        # MAGImageDecoderの登録
-        try:
-            from decoder.mag_decoder import MAGImageDecoder
-            decoder_classes.append(MAGImageDecoder)
-            log_print(DEBUG, "MAGImageDecoderを登録候補に追加しました")
-        except ImportError as e:
-            log_print(WARNING, f"MAGImageDecoderが見つかりません: {e}")
+        Args:
+            load_plugins: プラグインのデコーダーも登録するかどうか
+        """
+        for spec in BUILTIN_DECODERS:
+            self.register_decoder(spec)
+        if load_plugins:
+            for spec in iter_plugin_specs():
+                self.register_decoder(spec)
+        log_print(DEBUG, f"登録されたデコーダー数: {len(self._specs)}")
+    
+    def register_decoder(self, spec: DecoderSpec) -> bool:
+        """
+        デコーダーを登録する（モジュールはまだインポートしない）
         
-        # CV2ImageDecoderの登録
-        try:
-            from decoder.cv2_decoder import CV2ImageDecoder
-            decoder_classes.append(CV2ImageDecoder)
-            log_print(DEBUG, "CV2ImageDecoderを登録候補に追加しました")
-        except ImportError as e:
-            log_print(WARNING, f"CV2ImageDecoderが見つかりません: {e}")
+        既に別のデコーダーに割り当てられている拡張子は、先に登録されたデコーダーが優先される。
         
-        # GIFImageDecoderの登録 - 新規追加
-        try:
-            from decoder.gif_decoder import GIFImageDecoder
-            decoder_classes.append(GIFImageDecoder)
-            log_print(DEBUG, "GIFImageDecoderを登録候補に追加しました")
-        except ImportError as e:
-            log_print(WARNING, f"GIFImageDecoderが見つかりません: {e}")
+        Args:
+            spec: デコーダーの登録情報
+            
+        Returns:
+            登録した場合はTrue、必要な外部モジュールがない場合や登録済みの場合はFalse
+        """
+        if not spec.is_available():
+            log_print(WARNING, f"{spec.name} に必要なモジュールが見つかりません: {', '.join(spec.requires)}")
+            return False
         
-        log_print(DEBUG, f"登録候補のデコーダー数: {len(decoder_classes)}")
+        with self._lock:
+            if any(registered.name == spec.name for registered in self._specs):
+                log_print(WARNING, f"デコーダー {spec.name} は既に登録されています")
+                return False
+            self._specs.append(spec)
+            
+            # 拡張子から対応するデコーダーへのマッピングを作成
+            for ext in spec.extensions:
+                # 小文字に正規化してドット付きに
+                norm_ext = ext.lower() if ext.startswith('.') else '.' + ext.lower()
+                if norm_ext not in self._ext_to_spec:
+                    self._ext_to_spec[norm_ext] = spec
+                    log_print(DEBUG, f"拡張子 '{norm_ext}' を {spec.name} に登録しました")
+                else:
+                    # 既に別のデコーダーが登録されている場合は警告
+                    log_print(WARNING, 
+                        f"拡張子 '{ext}' は既に {self._ext_to_spec[norm_ext].name} に"
+                        f"登録されていますが、{spec.name} も対応しています。"
+                        f"先に登録されたデコーダーが優先されます。"
+                    )
         
-        # 各デコーダーを登録（ImageDecoderのサブクラスである前提で処理）
-        for decoder_class in decoder_classes:
+        log_print(DEBUG, f"デコーダー {spec.name} を登録しました")
+        return True
+    
+    def _get_instance(self, spec: DecoderSpec) -> Optional[ImageDecoder]:
+        """
+        デコーダーのインスタンスを取得する（初回はモジュールをインポートして作成する）
+        
+        Args:
+            spec: デコーダーの登録情報
+            
+        Returns:
+            デコーダーのインスタンス。読み込みに失敗した場合はNone
+        """
+        instance = self._instances.get(spec.name)
+        if instance is not None:
+            return instance
+        
+        with self._lock:
+            instance = self._instances.get(spec.name)
+            if instance is not None or spec.name in self._failed:
+                return instance
             try:
+                decoder_class = spec.load_class()
                 # ImageDecoderのサブクラスか確認
-                if not issubclass(decoder_class, ImageDecoder):
-                    log_print(WARNING, f"{decoder_class.__name__} はImageDecoderを継承していないためスキップします")
-                    continue
-                
-                # インスタンスを作成して拡張子を取得
-                # ImageDecoderのサブクラスなので supported_extensions プロパティが必ず存在する
-                decoder_instance = decoder_class()
-                extensions = decoder_instance.supported_extensions
-                
-                # デバッグ出力
-                log_print(DEBUG, f"デコーダー {decoder_class.__name__} のサポート拡張子: {extensions}")
-                
-                # 有効な拡張子リストか確認
-                if isinstance(extensions, list) and extensions:
-                    self._decoders[decoder_class] = extensions
-                    
-                    # 拡張子から対応するデコーダーへのマッピングを作成
-                    for ext in extensions:
-                        # 小文字に正規化してドット付きに
-                        if not ext.startswith('.'):
-                            norm_ext = '.' + ext.lower()
-                        else:
-                            norm_ext = ext.lower()
-                            
-                        if norm_ext not in self._ext_to_decoder:
-                            self._ext_to_decoder[norm_ext] = decoder_class
-                            log_print(DEBUG, f"拡張子 '{norm_ext}' を {decoder_class.__name__} に登録しました")
-                        else:
-                            # 既に別のデコーダーが登録されている場合は警告
-                            log_print(WARNING, 
-                                f"拡張子 '{ext}' は既に {self._ext_to_decoder[norm_ext].__name__} に"
-                                f"登録されていますが、{decoder_class.__name__} も対応しています。"
-                                f"先に登録されたデコーダーが優先されます。"
-                            )
-                else:
-                    log_print(WARNING, f"デコーダー {decoder_class.__name__} からサポート拡張子を取得できませんでした")
-                
-                log_print(DEBUG, f"デコーダー {decoder_class.__name__} を登録しました")
+                if not (isinstance(decoder_class, type) and issubclass(decoder_class, ImageDecoder)):
+                    raise TypeError(f"{spec.name} はImageDecoderを継承していません")
+                instance = decoder_class()
             except Exception as e:
-                log_print(ERROR, f"デコーダー {decoder_class.__name__} の登録中にエラーが発生しました: {e}")
-                import traceback
-                traceback.print_exc()
+                log_print(ERROR, f"デコーダー {spec.name} の読み込みに失敗しました: {e}")
+                self._failed.add(spec.name)
+                return None
+            self._instances[spec.name] = instance
+            log_print(DEBUG, f"デコーダー {spec.name} を読み込みました")
+            return instance
     
     def get_supported_extensions(self) -> List[str]:
         """
@@ -142,10 +157,17 @@ class DecoderManager:
         Returns:
             サポートされている拡張子のリスト
         """
-        extensions = sorted(list(self._ext_to_decoder.keys()))
+        extensions = sorted(ext for ext, spec in self._ext_to_spec.items() if spec.name not in self._failed)
         log_print(DEBUG, f"サポートされている拡張子: {extensions}")
         return extensions
     
+    def _get_spec_for_extension(self, extension: str) -> Optional[DecoderSpec]:
+        """拡張子（ドットの有無、大文字小文字を問わない）に対応する登録情報を取得する"""
+        # 小文字に正規化し、先頭のドットを確保
+        if not extension.startswith('.'):
+            extension = '.' + extension
+        return self._ext_to_spec.get(extension.lower())
+    
     def get_decoder_for_extension(self, extension: str) -> Optional[Type[ImageDecoder]]:
         """
         指定された拡張子に対応するデコーダークラスを取得する
@@ -156,12 +178,9 @@ class DecoderManager:
         Returns:
             対応するデコーダークラス、見つからない場合はNone
         """
-        # 小文字に正規化し、先頭のドットを確保
-        if not extension.startswith('.'):
-            extension = '.' + extension
-        extension = extension.lower()
-        
-        return self._ext_to_decoder.get(extension)
+        spec = self._get_spec_for_extension(extension)
+        instance = self._get_instance(spec) if spec else None
+        return type(instance) if instance is not None else None
     
     def get_decoder_for_file(self, filename: str) -> Optional[Type[ImageDecoder]]:
         """
@@ -180,29 +199,59 @@ class DecoderManager:
             
         return self.get_decoder_for_extension(ext)
     
-    def decode_file(self, filename: str, data: bytes) -> Optional[np.ndarray]:
+    def select_decoder(self, filename: str, data: Optional[bytes] = None) -> Optional[ImageDecoder]:
+        """
+        ファイルに適したデコーダーのインスタンスを選ぶ
+        
+        データが与えられた場合は先頭のシグネチャで選び、拡張子と中身が食い違う
+        ファイルも正しいデコーダーで扱う。シグネチャで判定できない場合は拡張子で選ぶ。
+        
+        Args:
+            filename: ファイル名（拡張子を手がかりに使う）
+            data: 画像データ（先頭部分だけでもよい）
+            
+        Returns:
+            デコーダーのインスタンス（共有されるため状態を持たせないこと）、見つからない場合はNone
+        """
+        _, ext = os.path.splitext(filename.lower())
+        hint = self._get_spec_for_extension(ext) if ext else None
+        spec = hint
+        if data:
+            matched = find_by_signature(self._specs, data[:PROBE_SIZE], hint)
+            if matched is not None:
+                if hint is not None and matched is not hint:
+                    log_print(DEBUG, f"ファイル '{filename}' は拡張子と異なる形式です: {matched.name} でデコードします")
+                spec = matched
+        if spec is None:
+            return None
+        return self._get_instance(spec)
+    
+    def decode_file(self, filename: str, data: bytes,
+                    target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
         """
         ファイル名とバイトデータから画像をデコードし、numpy配列として返す
         
         Args:
-            filename: デコードするファイル名（拡張子から適切なデコーダーを選択）
+            filename: デコードするファイル名（シグネチャで判定できない場合に拡張子でデコーダーを選択）
             data: デコードするバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント。指定すると、収めて表示した
+                         サイズを下回らない範囲で縮小した画像が返ることがある
             
         Returns:
             デコードされた画像のnumpy配列、失敗した場合はNone
         """
-        # ファイル名から適切なデコーダーを取得
-        decoder_class = self.get_decoder_for_file(filename)
-        if not decoder_class:
+        # データの先頭とファイル名から適切なデコーダーを取得
+        decoder = self.select_decoder(filename, data)
+        if not decoder:
             log_print(ERROR, f"ファイル '{filename}' に対応するデコーダーが見つかりません")
             return None
         
         try:
-            # デコーダーのインスタンスを作成
-            decoder = decoder_class()
-            
             # データをデコードしてnumpy配列に変換
-            image_array = decoder.decode(data)
+            if target_size is None:
+                image_array = decoder.decode(data)
+            else:
+                image_array = decoder.decode(data, target_size=target_size)
             return image_array
             
         except DecodingError as e:
@@ -212,6 +261,146 @@ class DecoderManager:
             log_print(ERROR, f"予期しないエラーが発生しました: {e}")
             return None
     
+    def decode_stream(self, filename: str, stream: BinaryIO,
+                      target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+        """
+        ファイル名とストリームから画像をデコードし、numpy配列として返す
+        
+        先頭部分だけを読んでデコーダーを選び、ストリームをそのままデコーダーに渡す。
+        書庫のget_streamが返すストリームを使えば、展開しながらデコードできる形式
+        （PNG、GIFの先頭フレーム）は圧縮データ全体をメモリに読み込まない。
+        ストリームは閉じない（シークできないストリームは読み進めた位置のままになる）。
+        
+        Args:
+            filename: デコードするファイル名（シグネチャで判定できない場合に拡張子でデコーダーを選択）
+            stream: 画像データの先頭に位置する読み込み用のストリーム
+            target_size: 表示先のサイズ (幅, 高さ) のヒント（decode_fileと同じ）
+            
+        Returns:
+            デコードされた画像のnumpy配列、失敗した場合はNone
+        """
+        head, stream = peek_stream(stream, PROBE_SIZE)
+        decoder = self.select_decoder(filename, head)
+        if not decoder:
+            log_print(ERROR, f"ファイル '{filename}' に対応するデコーダーが見つかりません")
+            return None
+        
+        try:
+            if target_size is None:
+                return decoder.decode_stream(stream)
+            return decoder.decode_stream(stream, target_size=target_size)
+        except DecodingError as e:
+            log_print(ERROR, f"ファイル '{filename}' のデコード中にエラーが発生しました: {e}")
+            return None
+        except Exception as e:
+            log_print(ERROR, f"予期しないエラーが発生しました: {e}")
+            return None
+    
+    def decode_stream_for_display(self, filename: str, stream: BinaryIO,
+                                  target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+        """
+        ファイル名とストリームから画像を表示用の画素形式でデコードする
+        
+        decode_stream の表示用の画素形式版。ストリームは閉じない。
+        
+        Args:
+            filename: デコードするファイル名（シグネチャで判定できない場合に拡張子でデコーダーを選択）
+            stream: 画像データの先頭に位置する読み込み用のストリーム
+            target_size: 表示先のサイズ (幅, 高さ) のヒント（decode_fileと同じ）
+            
+        Returns:
+            画像配列と画素形式（DisplayImage）、失敗した場合はNone
+        """
+        head, stream = peek_stream(stream, PROBE_SIZE)
+        decoder = self.select_decoder(filename, head)
+        if not decoder:
+            log_print(ERROR, f"ファイル '{filename}' に対応するデコーダーが見つかりません")
+            return None
+        
+        try:
+            return decoder.decode_display_stream(stream, target_size)
+        except DecodingError as e:
+            log_print(ERROR, f"ファイル '{filename}' のデコード中にエラーが発生しました: {e}")
+            return None
+        except Exception as e:
+            log_print(ERROR, f"予期しないエラーが発生しました: {e}")
+            return None
+    
+    def decode_file_for_display(self, filename: str, data: bytes,
+                                target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+        """
+        ファイル名とバイトデータから画像を表示用の画素形式でデコードする
+        
+        Args:
+            filename: デコードするファイル名（シグネチャで判定できない場合に拡張子でデコーダーを選択）
+            data: デコードするバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント（decode_fileと同じ）
+            
+        Returns:
+            画像配列と画素形式（DisplayImage）、失敗した場合はNone
+        """
+        decoder = self.select_decoder(filename, data)
+        if not decoder:
+            log_print(ERROR, f"ファイル '{filename}' に対応するデコーダーが見つかりません")
+            return None
+        
+        try:
+            return decoder.decode_display(data, target_size)
+        except DecodingError as e:
+            log_print(ERROR, f"ファイル '{filename}' のデコード中にエラーが発生しました: {e}")
+            return None
+        except Exception as e:
+            log_print(ERROR, f"予期しないエラーが発生しました: {e}")
+            return None
+    
+    def probe(self, filename: str, data_or_stream: Union[bytes, BinaryIO]) -> Optional[Tuple[int, int, int]]:
+        """
+        画像をデコードせずに、幅・高さ・チャンネル数を取得する
+        
+        JPEG/PNG/GIF/BMP/WebP/MAGは先頭のヘッダだけを解析する（通常は先頭4KB、
+        JPEGのEXIFが大きい場合などは最大256KBまで読み進める）。
+        それ以外の形式は、シグネチャまたは拡張子で選んだデコーダーのget_image_infoに任せる。
+        
+        Args:
+            filename: ファイル名（ヘッダ解析に対応しない形式のデコーダー選択に使用）
+            data_or_stream: 画像のバイトデータ、または読み込み用のストリーム
+                            （ストリームは読み込み後に元の位置に戻す）
+            
+        Returns:
+            (幅, 高さ, チャンネル数) のタプル。取得できない場合はNone
+        """
+        if isinstance(data_or_stream, (bytes, bytearray, memoryview)):
+            data = data_or_stream
+            info = probe_image_header(data[:PROBE_SIZE])
+            if info is None and is_probe_supported(data[:PROBE_SIZE]) and len(data) > PROBE_SIZE:
+                info = probe_image_header(data[:MAX_PROBE_SIZE])
+            read_rest = lambda: bytes(data)
+        else:
+            stream = data_or_stream
+            start = stream.tell() if stream.seekable() else None
+            data = stream.read(PROBE_SIZE)
+            info = probe_image_header(data)
+            if info is None and is_probe_supported(data) and len(data) == PROBE_SIZE:
+                data += stream.read(MAX_PROBE_SIZE - len(data))
+                info = probe_image_header(data)
+            read_rest = lambda: data + stream.read()
+        
+        if info is None and not is_probe_supported(data[:PROBE_SIZE]):
+            # ヘッダ解析に対応しない形式はデコーダーに任せる
+            decoder = self.select_decoder(filename, data)
+            if decoder:
+                try:
+                    info = decoder.get_image_info(read_rest())
+                except Exception as e:
+                    log_print(ERROR, f"ファイル '{filename}' の画像情報取得中にエラーが発生しました: {e}")
+        
+        if not isinstance(data_or_stream, (bytes, bytearray, memoryview)) and start is not None:
+            data_or_stream.seek(start)
+        
+        if info is None:
+            log_print(DEBUG, f"ファイル '{filename}' の画像情報を取得できませんでした")
+        return info
+    
     def get_decoder_info(self) -> Dict[str, List[str]]:
         """
         登録されているすべてのデコーダーとそのサポート拡張子の情報を取得する
@@ -220,8 +409,9 @@ class DecoderManager:
             デコーダー名と対応する拡張子のリストを含む辞書
         """
         info = {}
-        for decoder_class, extensions in self._decoders.items():
-            info[decoder_class.__name__] = extensions
+        for spec in self._specs:
+            if spec.name not in self._failed:
+                info[spec.name] = list(spec.extensions)
         return info
 
 
@@ -241,19 +431,91 @@ def get_decoder_manager() -> DecoderManager:
     return _decoder_manager
 
 
-def decode_image(filename: str, data: bytes) -> Optional[np.ndarray]:
+def decode_image(filename: str, data: bytes,
+                 target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
     """
     ファイル名とバイトデータから画像をデコードするユーティリティ関数
     
     Args:
         filename: デコードするファイル名（拡張子から適切なデコーダーを選択）
         data: デコードするバイトデータ
+        target_size: 表示先のサイズ (幅, 高さ) のヒント（縮小デコード用）
+        
+    Returns:
+        デコードされた画像のnumpy配列、失敗した場合はNone
+    """
+    manager = get_decoder_manager()
+    return manager.decode_file(filename, data, target_size)
+
+
+def decode_image_stream(filename: str, stream: BinaryIO,
+                        target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+    """
+    ファイル名とストリームから画像をデコードするユーティリティ関数
+    
+    Args:
+        filename: デコードするファイル名
+        stream: 画像データの先頭に位置する読み込み用のストリーム（ArchiveManager.get_streamなど）
+        target_size: 表示先のサイズ (幅, 高さ) のヒント（縮小デコード用）
         
     Returns:
         デコードされた画像のnumpy配列、失敗した場合はNone
     """
     manager = get_decoder_manager()
-    return manager.decode_file(filename, data)
+    return manager.decode_stream(filename, stream, target_size)
+
+
+def decode_image_for_display(filename: str, data: bytes,
+                             target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+    """
+    ファイル名とバイトデータから画像を表示用の画素形式でデコードするユーティリティ関数
+    
+    返る配列はRGB(A)とは限らない（BGRなど）。画素形式に合わせてQImageを作ること。
+    
+    Args:
+        filename: デコードするファイル名
+        data: デコードするバイトデータ
+        target_size: 表示先のサイズ (幅, 高さ) のヒント（縮小デコード用）
+        
+    Returns:
+        画像配列と画素形式（DisplayImage）、失敗した場合はNone
+    """
+    manager = get_decoder_manager()
+    return manager.decode_file_for_display(filename, data, target_size)
+
+
+def decode_image_stream_for_display(filename: str, stream: BinaryIO,
+                                    target_size: Optional[Tuple[int, int]] = None) -> Optional[DisplayImage]:
+    """
+    ファイル名とストリームから画像を表示用の画素形式でデコードするユーティリティ関数
+    
+    返る配列はRGB(A)とは限らない（グレースケールなど）。画素形式に合わせてQImageを作ること。
+    
+    Args:
+        filename: デコードするファイル名
+        stream: 画像データの先頭に位置する読み込み用のストリーム（ArchiveManager.get_streamなど）
+        target_size: 表示先のサイズ (幅, 高さ) のヒント（縮小デコード用）
+        
+    Returns:
+        画像配列と画素形式（DisplayImage）、失敗した場合はNone
+    """
+    manager = get_decoder_manager()
+    return manager.decode_stream_for_display(filename, stream, target_size)
+
+
+def probe_image(filename: str, data_or_stream: Union[bytes, BinaryIO]) -> Optional[Tuple[int, int, int]]:
+    """
+    画像をデコードせずに幅・高さ・チャンネル数を取得するユーティリティ関数
+    
+    Args:
+        filename: ファイル名
+        data_or_stream: 画像のバイトデータ、または読み込み用のストリーム
+        
+    Returns:
+        (幅, 高さ, チャンネル数) のタプル。取得できない場合はNone
+    """
+    manager = get_decoder_manager()
+    return manager.probe(filename, data_or_stream)
 
 
 def get_supported_image_extensions() -> List[str]:
@@ -272,33 +534,28 @@ def get_supported_image_extensions() -> List[str]:
     return extensions
 
 
-def select_image_decoder(filepath: str) -> Optional[ImageDecoder]:
+def select_image_decoder(filepath: str, data: Optional[bytes] = None) -> Optional[ImageDecoder]:
     """
     ファイルパスからそのファイルに適切なデコーダーを選択してインスタンスを返す
     
     Args:
         filepath: デコードする画像ファイルのパス
+        data: 画像データ（指定するとファイル先頭のシグネチャでデコーダーを選ぶ）
         
     Returns:
-        選択されたImageDecoderのインスタンス、対応するデコーダーがない場合はNone
+        選択されたImageDecoderのインスタンス（共有インスタンス）、対応するデコーダーがない場合はNone
     """
     _, ext = os.path.splitext(filepath.lower())
-    if not ext:
+    if not ext and not data:
         log_print(WARNING, f"拡張子が指定されていません: {filepath}")
         return None
     
     manager = get_decoder_manager()
-    decoder_class = manager.get_decoder_for_extension(ext)
+    decoder = manager.select_decoder(filepath, data)
     
-    if decoder_class is None:
+    if decoder is None:
         log_print(WARNING, f"拡張子'{ext}'に対応するデコーダーが見つかりません: {filepath}")
-        return None
-    
-    try:
-        return decoder_class()
-    except Exception as e:
-        log_print(ERROR, f"デコーダーのインスタンス化に失敗しました: {e}")
-        return None
+    return decoder
 
 
 # テスト用のコード
@@ -7,9 +7,27 @@ https://www.vector.co.jp/soft/dl/pc/art/se004903.html のMAGBIBLE.txtの仕様
 """
 
 import numpy as np
-from typing import List, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 
-from .decoder import ImageDecoder
+from .decoder import ImageDecoder, select_reduction_factor
+from .registry import MAG_DECODER
+
+
+class _MagHeader(NamedTuple):
+    """MAGヘッダの解析結果"""
+    width: int
+    height: int
+    is_256color: bool
+    is_200line: bool
+    flag_a_offset: int
+    flag_b_offset: int
+    pixel_offset: int
+    palette: np.ndarray  # (色数, 3) のRGB配列
+
+
+# フラグ値ごとの参照先の相対位置（横はピクセル単位、縦はライン）。フラグ0は新しいピクセルデータ
+_COPY_DX = np.array([0, 1, 2, 4, 0, 1, 0, 1, 2, 0, 1, 2, 0, 1, 2, 0], dtype=np.int64)
+_COPY_DY = np.array([0, 0, 0, 0, 1, 1, 2, 2, 2, 4, 4, 4, 8, 8, 8, 16], dtype=np.int64)
 
 
 class MAGImageDecoder(ImageDecoder):
@@ -27,21 +45,28 @@ class MAGImageDecoder(ImageDecoder):
         Returns:
             List[str]: サポートされている拡張子のリスト
         """
-        return ['.mag']
+        return list(MAG_DECODER.extensions)
     
-    def decode(self, data: bytes) -> Optional[np.ndarray]:
+    def decode(self, data: bytes, target_size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
         """
         MAG形式のバイナリデータをデコードする
         
         Args:
             data (bytes): デコードする画像のバイトデータ
+            target_size: 表示先のサイズ (幅, 高さ) のヒント。指定すると、
+                         整数間隔でピクセルを間引いて縮小した画像を返す
             
         Returns:
             Optional[np.ndarray]: デコードされた画像の numpy 配列、失敗した場合は None
                                   形状は (height, width, channels) の順
         """
         try:
-            width, height, pixels = self._decode_mag(data)
+            step = 1
+            if target_size:
+                info = self.get_image_info(data)
+                if info is not None:
+                    step = select_reduction_factor(info[0], info[1], target_size)
+            width, height, pixels = self._decode_mag(data, step)
             return pixels  # すでに正しい形式 (height, width, 3) の numpy 配列
         except Exception as e:
             print(f"MAG画像デコードエラー: {e}")
@@ -106,15 +131,18 @@ class MAGImageDecoder(ImageDecoder):
             print(f"MAG画像情報取得エラー: {e}")
             return None
 
-    def _decode_mag(self, data: bytes) -> Tuple[int, int, np.ndarray]:
+    def _parse_mag_header(self, data: bytes) -> _MagHeader:
         """
-        MAG形式のバイナリデータを内部でデコードする
+        MAG形式のヘッダとパレットを解析する
         
         Args:
             data (bytes): MAG形式のバイナリデータ
         
         Returns:
-            Tuple[int, int, np.ndarray]: 幅、高さ、RGBピクセル配列
+            _MagHeader: 画像サイズ、各セクションの位置、パレット（(色数, 3) のRGB配列）
+        
+        Raises:
+            ValueError: ヘッダやパレットが不正な場合
         """
         if not data or len(data) < 16:
             raise ValueError("無効なMAGデータです: データが短すぎます")
@@ -138,10 +166,6 @@ class MAGImageDecoder(ImageDecoder):
         if offset + 32 > len(data):
             raise ValueError("無効なMAGデータです: ヘッダ領域が存在しません")
         
-        # 機種コード
-        machine_code = data[offset+1]
-        # 機種依存フラグ
-        dependent_flag = data[offset+2]
         # スクリーンモード
         screen_mode = data[offset+3]
         
@@ -155,33 +179,19 @@ class MAGImageDecoder(ImageDecoder):
         width = x2 - x1 + 1
         height = y2 - y1 + 1
         
-        # 各セクションのオフセット情報
-        flag_a_offset = int.from_bytes(data[offset+12:offset+16], byteorder='little')
-        flag_b_offset = int.from_bytes(data[offset+16:offset+20], byteorder='little')
-        flag_b_size = int.from_bytes(data[offset+20:offset+24], byteorder='little')
-        pixel_offset = int.from_bytes(data[offset+24:offset+28], byteorder='little')
-        pixel_size = int.from_bytes(data[offset+28:offset+32], byteorder='little')
-        
-        # オフセットはヘッダ先頭からの相対位置
-        flag_a_offset += offset
-        flag_b_offset += offset
-        pixel_offset += offset
+        # 各セクションのオフセット情報（ヘッダ先頭からの相対位置）
+        flag_a_offset = int.from_bytes(data[offset+12:offset+16], byteorder='little') + offset
+        flag_b_offset = int.from_bytes(data[offset+16:offset+20], byteorder='little') + offset
+        pixel_offset = int.from_bytes(data[offset+24:offset+28], byteorder='little') + offset
         
         # スクリーンモードの解析
         is_256color = (screen_mode & 0x80) != 0
         is_200line = (screen_mode & 0x01) != 0
-        is_8color = (screen_mode & 0x02) != 0
-        is_digital = (screen_mode & 0x04) != 0
-        
-        # ピクセルの単位サイズを計算（16色=4ドット、256色=2ドット）
-        pixel_unit = 2 if is_256color else 4
-        # 水平ピクセル数（仮想座標系の幅）
-        h_pixels = (width + pixel_unit - 1) // pixel_unit
         
         if width <= 0 or height <= 0 or width > 10000 or height > 10000:
             raise ValueError(f"無効な画像サイズ: {width}x{height}")
         
-        # パレットの読み込み
+        # パレットの読み込み（GRBの順で格納されている。値はそのまま使用する）
         palette_offset = offset + 32
         color_count = 256 if is_256color else 16
         palette_size = color_count * 3  # RGB各1バイト
@@ -189,16 +199,134 @@ class MAGImageDecoder(ImageDecoder):
         if palette_offset + palette_size > len(data):
             raise ValueError("無効なMAGデータです: パレットデータが存在しません")
         
-        # パレットを読み込む
-        palette = []
-        for i in range(color_count):
-            # GRBの順でパレットが格納されている
-            g = data[palette_offset + i * 3]
-            r = data[palette_offset + i * 3 + 1]
-            b = data[palette_offset + i * 3 + 2]
-            
-            # 値をそのまま使用する（スケール化なし）
-            palette.append((r, g, b))
+        grb = np.frombuffer(data, dtype=np.uint8, count=palette_size, offset=palette_offset).reshape(color_count, 3)
+        palette = grb[:, [1, 0, 2]]
+        
+        return _MagHeader(width, height, is_256color, is_200line,
+                          flag_a_offset, flag_b_offset, pixel_offset, palette)
+
+    def _decode_mag(self, data: bytes, step: int = 1) -> Tuple[int, int, np.ndarray]:
+        """
+        MAG形式のバイナリデータを内部でデコードする（NumPyによるベクトル化版）
+        
+        step が1なら _decode_mag_reference と同じ結果（データが欠けている場合の扱いを含む）を返す。
+        
+        Args:
+            data (bytes): MAG形式のバイナリデータ
+            step (int): 縦横のピクセルを間引く間隔（1なら間引かない）
+        
+        Returns:
+            Tuple[int, int, np.ndarray]: 幅、高さ、RGBピクセル配列
+        """
+        hdr = self._parse_mag_header(data)
+        width, height = hdr.width, hdr.height
+        buf = np.frombuffer(data, dtype=np.uint8)
+        data_len = len(buf)
+        
+        # ピクセルの単位サイズ（16色=4ドット、256色=2ドット）と水平ピクセル数
+        pixel_unit = 2 if hdr.is_256color else 4
+        h_pixels = (width + pixel_unit - 1) // pixel_unit
+        unit_count = h_pixels * height
+        
+        # フラグの展開: フラグAの1ビットがフラグ2つ分に対応し、
+        # ビットが1ならフラグBの次の1バイト（上位4ビット, 下位4ビット）を使う
+        pair_count = unit_count // 2
+        flag_a = buf[hdr.flag_a_offset:max(hdr.flag_a_offset, hdr.flag_b_offset)]
+        bits = np.unpackbits(flag_a)[:pair_count].astype(bool)
+        # ビットが1の位置ごとに、フラグBの何バイト目を使うか（フラグBが尽きたら以降は0）
+        b_index = np.cumsum(bits) - 1
+        b_available = max(0, data_len - hdr.flag_b_offset)
+        use_b = bits & (b_index < b_available)
+        flag_b = buf[hdr.flag_b_offset:hdr.flag_b_offset + b_available]
+        b_bytes = np.zeros(len(bits), dtype=np.uint8)
+        b_bytes[use_b] = flag_b[b_index[use_b]]
+        
+        flags = np.zeros(unit_count, dtype=np.uint8)
+        flags[0:len(bits) * 2:2] = b_bytes >> 4
+        flags[1:len(bits) * 2:2] = b_bytes & 0x0F
+        
+        # フラグのXOR差分を元に戻す（列ごとに上の行からの累積XOR）
+        flags = np.bitwise_xor.accumulate(flags.reshape(height, h_pixels), axis=0).ravel()
+        
+        # 各ピクセル単位の参照先を求める（フラグ0は自分自身、参照先が範囲外なら黒を表す番兵）
+        ys, xs = np.divmod(np.arange(unit_count, dtype=np.int64), h_pixels)
+        src_x = xs - _COPY_DX[flags]
+        src_y = ys - _COPY_DY[flags]
+        valid = (src_x >= 0) & (src_y >= 0)
+        sentinel = unit_count
+        ptr = np.full(unit_count + 1, sentinel, dtype=np.int64)
+        ptr[:unit_count] = np.where(valid, src_y * h_pixels + src_x, sentinel)
+        is_literal = flags == 0
+        ptr[:unit_count][is_literal] = np.nonzero(is_literal)[0]
+        
+        # 参照は必ずラスター順で前の位置を指すので、ポインタジャンプで連鎖の終点に収束する
+        while True:
+            next_ptr = ptr[ptr]
+            if np.array_equal(next_ptr, ptr):
+                break
+            ptr = next_ptr
+        
+        # フラグ0の位置は順にピクセルデータを2バイトずつ消費する（足りない分は黒）
+        literal_pos = np.nonzero(is_literal)[0]
+        word_count = len(literal_pos)
+        available_words = max(0, (data_len - hdr.pixel_offset) // 2)
+        read_words = min(word_count, available_words)
+        words = buf[hdr.pixel_offset:hdr.pixel_offset + read_words * 2].reshape(read_words, 2)
+        low, high = words[:, 0], words[:, 1]
+        if hdr.is_256color:
+            dots = np.stack([low, high], axis=1)
+        else:
+            dots = np.stack([low >> 4, low & 0x0F, high >> 4, high & 0x0F], axis=1)
+        
+        # ピクセル単位ごとのRGB（読めなかったデータと番兵は黒）
+        unit_rgb = np.zeros((unit_count + 1, pixel_unit, 3), dtype=np.uint8)
+        unit_rgb[literal_pos[:read_words]] = hdr.palette[dots]
+        
+        if step > 1:
+            # 出力するピクセルだけを参照先から取り出す（200ラインモードの縦2倍も同時に行う）
+            out_height = height * 2 if hdr.is_200line else height
+            rows = np.arange(0, out_height, step)
+            if hdr.is_200line:
+                rows //= 2
+            cols = np.arange(0, width, step)
+            units = ptr[rows[:, None] * h_pixels + cols[None, :] // pixel_unit]
+            pixels = unit_rgb[units, (cols % pixel_unit)[None, :]]
+            return len(cols), len(rows), pixels
+        
+        pixels = unit_rgb[ptr[:unit_count]].reshape(height, h_pixels * pixel_unit, 3)[:, :width]
+        pixels = np.ascontiguousarray(pixels)
+        
+        # 200ラインモードの場合、縦を2倍に拡大
+        if hdr.is_200line:
+            return width, height * 2, np.repeat(pixels, 2, axis=0)
+        
+        return width, height, pixels
+
+    def _decode_mag_reference(self, data: bytes) -> Tuple[int, int, np.ndarray]:
+        """
+        MAG形式のバイナリデータを1ピクセルずつ処理してデコードする（参照実装）
+        
+        ベクトル化版の正しさの確認用に残している。
+        
+        Args:
+            data (bytes): MAG形式のバイナリデータ
+        
+        Returns:
+            Tuple[int, int, np.ndarray]: 幅、高さ、RGBピクセル配列
+        """
+        hdr = self._parse_mag_header(data)
+        width, height = hdr.width, hdr.height
+        is_256color = hdr.is_256color
+        is_200line = hdr.is_200line
+        flag_a_offset = hdr.flag_a_offset
+        flag_b_offset = hdr.flag_b_offset
+        pixel_offset = hdr.pixel_offset
+        palette = [tuple(int(c) for c in rgb) for rgb in hdr.palette]
+        
+        # ピクセルの単位サイズを計算（16色=4ドット、256色=2ドット）
+        pixel_unit = 2 if is_256color else 4
+        # 水平ピクセル数（仮想座標系の幅）
+        h_pixels = (width + pixel_unit - 1) // pixel_unit
         
         # フラグの展開
         flag_a_size = flag_b_offset - flag_a_offset
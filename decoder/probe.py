@@ -0,0 +1,235 @@
+"""
+画像ヘッダの解析
+
+画像全体をデコードせずに、先頭数KBのヘッダだけから幅・高さ・チャンネル数を取得します。
+JPEG（SOFマーカー）、PNG（IHDR）、GIF、BMP、WebP、MAGに対応しています。
+チャンネル数は各デコーダーのdecodeが返す配列のチャンネル数に合わせています。
+"""
+
+import struct
+from typing import Optional, Tuple
+
+# ヘッダ解析で最初に読み込むバイト数
+PROBE_SIZE = 4096
+# ヘッダが見つからない場合に読み込みを広げる上限（JPEGの大きなEXIFなどに対応）
+MAX_PROBE_SIZE = 256 * 1024
+
+# フレームの寸法を持つJPEGのSOFマーカー（DHT, JPG, DACを除く）
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# 長さフィールドを持たないJPEGのマーカー（TEM, RST0-7, SOI, EOI）
+_JPEG_STANDALONE_MARKERS = frozenset([0x01] + list(range(0xD0, 0xDA)))
+
+
+def _find_jpeg_sof(data: bytes) -> Optional[int]:
+    """JPEGのSOFマーカーの位置を探す（見つからなければNone）"""
+    pos = 2
+    size = len(data)
+    while pos + 4 <= size:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # フィルバイト
+            pos += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            pos += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            return pos if pos + 10 <= size else None
+        if marker == 0xDA:
+            # SOFより先に画像データが始まった - 不正なJPEG
+            return None
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        pos += 2 + length
+    return None
+
+
+def _probe_jpeg(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """JPEGのSOFマーカーから画像情報を取得する（見つからなければNone）"""
+    pos = _find_jpeg_sof(data)
+    if pos is None:
+        return None
+    height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+    # グレースケールもRGBに変換してデコードされる
+    return width, height, 3
+
+
+def probe_jpeg_components(data: bytes) -> Optional[int]:
+    """
+    JPEGのSOFマーカーから色成分の数を取得する
+
+    probe_image_header はデコード後のチャンネル数を返すため、グレースケールのJPEGも3になる。
+    縮小デコードのフラグをグレースケールとカラーで選び分けるときに使う。
+
+    Args:
+        data: JPEGファイルの先頭部分
+
+    Returns:
+        色成分の数（グレースケールは1）。JPEGでない場合やSOFが見つからない場合はNone
+    """
+    if data[:3] != b'\xFF\xD8\xFF':
+        return None
+    try:
+        pos = _find_jpeg_sof(data)
+    except (struct.error, IndexError):
+        return None
+    return data[pos + 9] if pos is not None else None
+
+
+def _probe_png(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """PNGのIHDRチャンクから画像情報を取得する"""
+    if len(data) < 33 or data[12:16] != b'IHDR':
+        return None
+    width, height, _, color_type = struct.unpack('>IIBB', data[16:26])
+    # 0: グレー, 2: RGB, 3: パレット, 4: グレー+α, 6: RGBA（グレーはRGBに変換してデコードされる）
+    channels = {0: 3, 2: 3, 3: 3, 4: 4, 6: 4}.get(color_type)
+    if channels is None:
+        return None
+    if color_type in (2, 3):
+        # IDATより前にtRNSチャンクがあれば透過付きとしてデコードされる（グレーでは無視される）
+        pos = 33
+        while pos + 8 <= len(data):
+            length = struct.unpack('>I', data[pos:pos + 4])[0]
+            chunk_type = data[pos + 4:pos + 8]
+            if chunk_type == b'tRNS':
+                channels = 4
+                break
+            if chunk_type == b'IDAT':
+                break
+            pos += 12 + length
+    return width, height, channels
+
+
+def _probe_gif(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """GIFの論理画面記述子から画像情報を取得する"""
+    if len(data) < 10:
+        return None
+    width, height = struct.unpack('<HH', data[6:10])
+    # 最初の画像のグラフィック制御拡張に透過フラグがあればRGBAとしてデコードされる
+    return width, height, 4 if _gif_first_frame_transparent(data) else 3
+
+
+def _gif_first_frame_transparent(data: bytes) -> bool:
+    """
+    GIFの最初の画像の前にあるグラフィック制御拡張に透過フラグがあるかどうか
+
+    グローバルカラーテーブルを飛ばしてから拡張ブロックを順にたどるため、
+    パレットや圧縮データの中の同じ並びのバイトを拡張と取り違えない。
+    """
+    if len(data) < 13:
+        return False
+    pos = 13
+    if data[10] & 0x80:
+        # グローバルカラーテーブル（3バイト × 2^(サイズ+1) 色）
+        pos += 3 * (2 << (data[10] & 0x07))
+    while pos + 2 <= len(data):
+        if data[pos] != 0x21:
+            # 画像記述子（0x2C）、トレーラ（0x3B）または不正なデータ
+            return False
+        if data[pos + 1] == 0xF9:
+            return pos + 4 <= len(data) and data[pos + 2] == 4 and bool(data[pos + 3] & 0x01)
+        # その他の拡張はサブブロックを飛ばす（長さ0のブロックで終わる）
+        pos += 2
+        while pos < len(data) and data[pos] != 0:
+            pos += 1 + data[pos]
+        pos += 1
+    return False
+
+
+def _probe_bmp(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """BMPの情報ヘッダから画像情報を取得する"""
+    if len(data) < 26:
+        return None
+    header_size = struct.unpack('<I', data[14:18])[0]
+    if header_size == 12:
+        # OS/2形式（BITMAPCOREHEADER）
+        width, height = struct.unpack('<HH', data[18:22])
+    elif header_size >= 40:
+        width, height = struct.unpack('<ii', data[18:26])
+        # 高さが負の場合はトップダウン形式
+        height = abs(height)
+    else:
+        return None
+    # 32ビットBMPのアルファはOpenCVのデコードでは使われない
+    return width, height, 3
+
+
+def _probe_webp(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """WebPのVP8/VP8L/VP8Xチャンクから画像情報を取得する"""
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        # フレームタグ(3バイト)とスタートコード(9D 01 2A)の後に14ビットの幅と高さ
+        if data[23:26] != b'\x9d\x01\x2a':
+            return None
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF, 3
+    if chunk == b'VP8L':
+        if data[20] != 0x2F:
+            return None
+        bits = struct.unpack('<I', data[21:25])[0]
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+        has_alpha = (bits >> 28) & 0x01
+        return width, height, 4 if has_alpha else 3
+    if chunk == b'VP8X':
+        flags = data[20]
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height, 4 if flags & 0x10 else 3
+    return None
+
+
+def _probe_mag(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """MAGのヘッダから画像情報を取得する"""
+    from .mag_decoder import MAGImageDecoder
+    return MAGImageDecoder().get_image_info(data)
+
+
+def probe_image_header(data: bytes) -> Optional[Tuple[int, int, int]]:
+    """
+    画像の先頭部分だけを解析して、幅・高さ・チャンネル数を取得する
+
+    形式はファイル先頭のシグネチャで判定する。
+
+    Args:
+        data: 画像ファイルの先頭部分（通常はPROBE_SIZEバイト程度）
+
+    Returns:
+        (幅, 高さ, チャンネル数) のタプル。対応していない形式や、
+        与えられた範囲にヘッダが含まれていない場合はNone
+    """
+    try:
+        if data[:3] == b'\xFF\xD8\xFF':
+            return _probe_jpeg(data)
+        if data[:8] == b'\x89PNG\r\n\x1a\n':
+            return _probe_png(data)
+        if data[:6] in (b'GIF87a', b'GIF89a'):
+            return _probe_gif(data)
+        if data[:2] == b'BM':
+            return _probe_bmp(data)
+        if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+            return _probe_webp(data)
+        if data[:8] in (b'MAKI02  ', b'MAKI03  '):
+            return _probe_mag(data)
+    except (struct.error, IndexError):
+        pass
+    return None
+
+
+def is_probe_supported(data: bytes) -> bool:
+    """
+    先頭のシグネチャがヘッダ解析に対応した形式かどうかを判定する
+
+    Args:
+        data: 画像ファイルの先頭部分
+
+    Returns:
+        対応している形式ならTrue
+    """
+    return (data[:3] == b'\xFF\xD8\xFF' or data[:8] == b'\x89PNG\r\n\x1a\n'
+            or data[:6] in (b'GIF87a', b'GIF89a') or data[:2] == b'BM'
+            or (data[:4] == b'RIFF' and data[8:12] == b'WEBP')
+            or data[:8] in (b'MAKI02  ', b'MAKI03  '))
@@ -0,0 +1,203 @@
+"""
+デコーダーレジストリ
+
+デコーダーの登録情報（モジュール名、クラス名、対応拡張子、ファイル先頭のシグネチャ）を定義します。
+登録情報だけでは cv2 や PIL などの重いモジュールをインポートせず、
+デコーダーのモジュールは最初に使われたときにインポートします。
+
+外部パッケージは、エントリポイントグループ "supraview.decoders" に
+DecoderSpec（またはDecoderSpecを返す関数）を登録することでデコーダーを追加できます。
+エントリポイントの参照先は軽量なモジュールに置き、デコーダー本体は
+DecoderSpec.module で指定したモジュールに分けてください。
+
+    # setup.py の例
+    entry_points={
+        "supraview.decoders": [
+            "pi = supraview_pi.spec:PI_DECODER",
+        ],
+    }
+"""
+
+import importlib
+import importlib.util
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from logutils import log_print, DEBUG, WARNING
+
+# プラグインのエントリポイントグループ名
+ENTRY_POINT_GROUP = "supraview.decoders"
+
+# シグネチャ: (オフセット, バイト列) の組をすべて満たすときに一致とみなす
+Signature = Tuple[Tuple[int, bytes], ...]
+
+
+class DecoderSpec(NamedTuple):
+    """デコーダーの登録情報"""
+    module: str  # デコーダークラスを定義しているモジュール名
+    class_name: str  # デコーダークラス名（ImageDecoderのサブクラス）
+    extensions: Tuple[str, ...]  # 対応する拡張子（ドット付き、小文字）
+    signatures: Tuple[Signature, ...] = ()  # ファイル先頭のシグネチャ
+    requires: Tuple[str, ...] = ()  # 必要な外部モジュール（インストール確認のみ行う）
+
+    @property
+    def name(self) -> str:
+        """デコーダー名（クラス名）"""
+        return self.class_name
+
+    def matches(self, data: bytes) -> bool:
+        """
+        データの先頭がこのデコーダーのシグネチャに一致するか判定する
+
+        Args:
+            data: 画像データ（先頭部分だけでもよい）
+
+        Returns:
+            いずれかのシグネチャに一致すればTrue
+        """
+        for signature in self.signatures:
+            if all(data[offset:offset + len(magic)] == magic for offset, magic in signature):
+                return True
+        return False
+
+    def is_available(self) -> bool:
+        """必要な外部モジュールがインストールされているか（インポートせずに確認する）"""
+        for name in self.requires:
+            try:
+                if importlib.util.find_spec(name) is None:
+                    return False
+            except (ImportError, ValueError):
+                return False
+        return True
+
+    def load_class(self) -> type:
+        """
+        デコーダーのモジュールをインポートしてクラスを取得する
+
+        Returns:
+            デコーダークラス
+
+        Raises:
+            ImportError: モジュールまたはクラスが見つからない場合
+        """
+        module = importlib.import_module(self.module)
+        try:
+            return getattr(module, self.class_name)
+        except AttributeError:
+            raise ImportError(f"{self.module} に {self.class_name} が定義されていません")
+
+
+def _sig(*parts: Tuple[int, bytes]) -> Signature:
+    """シグネチャを作成する"""
+    return tuple(parts)
+
+
+# 組み込みデコーダーの登録情報（デコーダーの supported_extensions もここの拡張子を返す）
+MAG_DECODER = DecoderSpec(
+    module='decoder.mag_decoder',
+    class_name='MAGImageDecoder',
+    extensions=('.mag',),
+    signatures=(_sig((0, b'MAKI02  ')), _sig((0, b'MAKI03  '))),
+)
+
+CV2_DECODER = DecoderSpec(
+    module='decoder.cv2_decoder',
+    class_name='CV2ImageDecoder',
+    extensions=(
+        '.bmp', '.dib',           # Windows ビットマップ
+        '.jpg', '.jpeg', '.jpe',  # JPEG ファイル
+        '.jp2',                   # JPEG 2000 ファイル
+        '.png',                   # Portable Network Graphics
+        '.webp',                  # WebP
+        '.pbm', '.pgm', '.ppm',   # Portable image format
+        '.pxm', '.pnm',           # Portable image format (拡張)
+        '.sr', '.ras',            # Sun rasters
+        '.tiff', '.tif',          # TIFF ファイル
+        '.exr',                   # OpenEXR 画像ファイル
+        '.hdr', '.pic',           # Radiance HDR
+    ),
+    signatures=(
+        _sig((0, b'\xFF\xD8\xFF')),  # JPEG
+        _sig((0, b'\x89PNG\r\n\x1a\n')),  # PNG
+        _sig((0, b'BM')),  # BMP
+        _sig((0, b'RIFF'), (8, b'WEBP')),  # WebP
+        _sig((0, b'II*\x00')), _sig((0, b'MM\x00*')),  # TIFF
+        _sig((0, b'\x00\x00\x00\x0cjP  \r\n\x87\n')),  # JPEG 2000 (JP2)
+        _sig((0, b'\xFF\x4F\xFF\x51')),  # JPEG 2000 (コードストリーム)
+        _sig((0, b'\x59\xA6\x6A\x95')),  # Sun raster
+        _sig((0, b'\x76\x2F\x31\x01')),  # OpenEXR
+        _sig((0, b'#?RADIANCE')), _sig((0, b'#?RGBE')),  # Radiance HDR
+    ),
+    requires=('cv2',),
+)
+
+GIF_DECODER = DecoderSpec(
+    module='decoder.gif_decoder',
+    class_name='GIFImageDecoder',
+    extensions=('.gif',),
+    signatures=(_sig((0, b'GIF87a')), _sig((0, b'GIF89a'))),
+    requires=('PIL',),
+)
+
+# 組み込みデコーダーの一覧（先に登録されたものが拡張子の割り当てで優先される）
+BUILTIN_DECODERS: Tuple[DecoderSpec, ...] = (MAG_DECODER, CV2_DECODER, GIF_DECODER)
+
+
+def iter_plugin_specs() -> Iterator[DecoderSpec]:
+    """
+    エントリポイントに登録されたプラグインのデコーダー登録情報を列挙する
+
+    エントリポイントの値は DecoderSpec、または DecoderSpec（のリスト）を返す関数とする。
+    読み込めないプラグインは警告を出して読み飛ばす。
+
+    Yields:
+        DecoderSpec: プラグインのデコーダー登録情報
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return
+    try:
+        eps = entry_points()
+        group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, 'select') else eps.get(ENTRY_POINT_GROUP, [])
+    except Exception as e:
+        log_print(WARNING, f"デコーダープラグインの検索に失敗しました: {e}")
+        return
+
+    for ep in group:
+        try:
+            value: Union[DecoderSpec, Callable[[], object]] = ep.load()
+            if not isinstance(value, DecoderSpec) and callable(value):
+                value = value()
+            specs = [value] if isinstance(value, DecoderSpec) else list(value)
+        except Exception as e:
+            log_print(WARNING, f"デコーダープラグイン '{ep.name}' を読み込めませんでした: {e}")
+            continue
+        for spec in specs:
+            if isinstance(spec, DecoderSpec):
+                log_print(DEBUG, f"デコーダープラグイン '{ep.name}' から {spec.name} を見つけました")
+                yield spec
+            else:
+                log_print(WARNING, f"デコーダープラグイン '{ep.name}' の値がDecoderSpecではありません: {spec!r}")
+
+
+def find_by_signature(specs: List[DecoderSpec], data: bytes,
+                      hint: Optional[DecoderSpec] = None) -> Optional[DecoderSpec]:
+    """
+    データの先頭のシグネチャからデコーダーを選ぶ
+
+    拡張子から選んだデコーダー（hint）がシグネチャに一致する場合はそれを優先する。
+
+    Args:
+        specs: 候補のデコーダー登録情報（優先順）
+        data: 画像データ（先頭部分だけでもよい）
+        hint: 拡張子から選んだデコーダー登録情報
+
+    Returns:
+        シグネチャが一致したデコーダー登録情報。一致するものがなければNone
+    """
+    if hint is not None and hint.matches(data):
+        return hint
+    for spec in specs:
+        if spec.matches(data):
+            return spec
+    return None
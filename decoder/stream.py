@@ -0,0 +1,65 @@
+"""
+ストリームからのデコード用ユーティリティ
+
+書庫のget_streamが返すストリームは、展開しながら読み進めるもの（シーク不可、
+または後方へのシークで展開し直しになるもの）がある。ここでは先頭部分を読んでも
+ストリームを先頭から読み直せるようにする補助を提供します。
+"""
+
+import io
+from typing import BinaryIO, Tuple
+
+
+class _PrefixedStream(io.RawIOBase):
+    """先に読んだ先頭部分を、元のストリームの前に戻して読めるようにするストリーム"""
+
+    def __init__(self, head: bytes, stream: BinaryIO):
+        super().__init__()
+        self._head = memoryview(head)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._head:
+            size = min(len(buffer), len(self._head))
+            buffer[:size] = self._head[:size]
+            self._head = self._head[size:]
+            return size
+        return self._stream.readinto(buffer) if hasattr(self._stream, 'readinto') else self._read_fallback(buffer)
+
+    def _read_fallback(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            super().close()
+
+
+def peek_stream(stream: BinaryIO, size: int) -> Tuple[bytes, BinaryIO]:
+    """
+    ストリームの先頭部分を読み、先頭から読み直せるストリームと一緒に返す
+
+    シーク可能なストリームは読んだ後に元の位置に戻す。シークできないストリームは、
+    読んだ部分を前に付け足したストリームで包んで返す（返したストリームを閉じると元のストリームも閉じる）。
+
+    Args:
+        stream: 読み込み用のストリーム
+        size: 読み込むバイト数
+
+    Returns:
+        (先頭部分, 先頭から読み直せるストリーム) のタプル
+    """
+    if stream.seekable():
+        start = stream.tell()
+        head = stream.read(size)
+        stream.seek(start)
+        return head, stream
+    head = stream.read(size)
+    return head, io.BufferedReader(_PrefixedStream(head, stream))
+
@@ -0,0 +1,393 @@
+"""
+タイル表示用の大きな画像
+
+スキャン画像などの非常に大きな画像（例: 20000x15000）を、画像全体のQPixmapを作らずに
+表示するための仕組みです。最初に縮小したプレビューだけをデコードして表示し、
+プレビューの解像度を超えて拡大表示するときは、ビューポートに見えている範囲の
+タイル（TILE_SIZE四方）だけを元の解像度の配列から切り出して表示します。
+
+- プレビューはJPEGなら縮小デコード（IMREAD_REDUCED_*）で作るため、元の解像度の
+  配列は拡大表示が必要になるまでデコードしない。縮小デコードできない形式は
+  最初のデコード結果を元の解像度の配列としてそのまま使う。
+- 拡大率が1未満のときは2のべき乗（レベル）で縮小したタイルを作る。
+- タイルはバイト数の上限付きのLRUキャッシュ（DecodedImageCache）に保存し、
+  同じ内容の画像であれば開き直してもタイルを使い回す。
+
+cv2はタイルの縮小に使うため、最初に必要になったときにインポートします。
+"""
+
+import math
+import queue
+import threading
+from typing import Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from logutils import log_print, DEBUG, INFO, WARNING
+from .decoder import DisplayImage
+from .cache import DecodedImageCache, make_image_key
+
+# タイルの一辺のピクセル数（表示する解像度での大きさ）
+TILE_SIZE = 512
+# タイル表示にする画像の画素数の下限
+TILED_MIN_PIXELS = 40 * 1000 * 1000
+# プレビューの目標サイズ (幅, 高さ)
+PREVIEW_SIZE = (2048, 2048)
+# タイルキャッシュの既定の上限（バイト）
+DEFAULT_TILE_CACHE_BYTES = 128 * 1024 * 1024
+
+# タイルの識別子: (レベル, 列, 行)
+TileKey = Tuple[int, int, int]
+
+
+def level_for_scale(scale: float) -> int:
+    """
+    表示倍率に使うタイルのレベル（縮小率）を選ぶ
+
+    表示倍率を下回らない解像度のうち、最も小さいもの（2のべき乗の縮小率で最大のもの）を返す。
+
+    Args:
+        scale: 元の解像度に対する表示倍率
+
+    Returns:
+        int: レベル（1, 2, 4, 8, ...）。表示倍率が1以上なら1
+    """
+    if scale >= 1.0 or scale <= 0.0:
+        return 1
+    return 1 << int(math.floor(math.log2(1.0 / scale)))
+
+
+def _resize(array: np.ndarray, width: int, height: int) -> np.ndarray:
+    """配列を指定したサイズに縮小する（平均画素法）"""
+    import cv2
+    # 整数倍の縮小はOpenCVの高速な経路になるため、先に整数倍で縮小してから目標サイズにそろえる
+    factor = min(array.shape[1] // width, array.shape[0] // height)
+    if factor >= 2 and (array.shape[1], array.shape[0]) != (width * factor, height * factor):
+        array = cv2.resize(array, (0, 0), fx=1.0 / factor, fy=1.0 / factor, interpolation=cv2.INTER_AREA)
+    return cv2.resize(array, (width, height), interpolation=cv2.INTER_AREA)
+
+
+class TiledImage:
+    """
+    プレビューとタイルで表示する大きな画像
+
+    元の解像度の配列は load_full（または最初の get_tile）で一度だけデコードし、
+    release するまで保持する。スレッドセーフ。
+    """
+
+    def __init__(self, name: str, data: bytes, width: int, height: int, preview: DisplayImage,
+                 full: Optional[DisplayImage] = None, cache: Optional[DecodedImageCache] = None,
+                 key: Optional[Hashable] = None):
+        """
+        タイル表示用の画像を初期化する
+
+        Args:
+            name: ファイル名（デコーダーの選択に使用）
+            data: 画像データ（元の解像度の配列をデコードするまで保持する）
+            width: 元画像の幅
+            height: 元画像の高さ
+            preview: 縮小したプレビュー
+            full: デコード済みの元の解像度の配列（なければ必要になったときにデコードする）
+            cache: タイルキャッシュ（省略時はプロセス全体で共有するキャッシュ）
+            key: タイルキャッシュで画像を識別するキー（省略時はデータの内容から作る）
+        """
+        self.name = name
+        self.width = width
+        self.height = height
+        self.preview = preview
+        self._data = data if full is None else None
+        self._full = full
+        self._cache = cache if cache is not None else get_tile_cache()
+        self._key = key if key is not None else make_image_key(name, data)
+        self._lock = threading.Lock()
+        self._released = False
+
+    @property
+    def pixel_format(self) -> str:
+        """プレビューとタイルの画素形式"""
+        return self.preview.pixel_format
+
+    @property
+    def preview_scale(self) -> float:
+        """元の解像度に対するプレビューの倍率"""
+        return self.preview.array.shape[1] / self.width
+
+    @property
+    def has_full(self) -> bool:
+        """元の解像度の配列がデコード済みかどうか"""
+        return self._full is not None
+
+    @property
+    def released(self) -> bool:
+        """release 済みかどうか（キャッシュにないタイルはもう作れない）"""
+        return self._released
+
+    def needs_tiles(self, scale: float) -> bool:
+        """
+        指定した表示倍率でタイルが必要か（プレビューの解像度では足りないか）
+
+        Args:
+            scale: 元の解像度に対する表示倍率
+
+        Returns:
+            プレビューを拡大して表示することになる場合はTrue
+        """
+        return scale > self.preview_scale * 1.001
+
+    def load_full(self) -> bool:
+        """
+        元の解像度の配列をデコードする（デコード済みなら何もしない）
+
+        Returns:
+            元の解像度の配列が使える場合はTrue
+        """
+        with self._lock:
+            if self._full is not None:
+                return True
+            if self._released or self._data is None:
+                return False
+            from .interface import decode_image_for_display
+            log_print(INFO, f"タイル表示: 元の解像度でデコードします: '{self.name}' ({self.width}x{self.height})")
+            full = decode_image_for_display(self.name, self._data)
+            # 失敗した場合も画像データを手放し、タイルを要求されるたびにデコードし直さない
+            if full is None:
+                log_print(WARNING, f"タイル表示: 元の解像度でデコードできませんでした: '{self.name}'")
+                self._data = None
+                return False
+            if full.pixel_format != self.pixel_format or full.array.shape[:2] != (self.height, self.width):
+                log_print(WARNING, f"タイル表示: デコード結果がプレビューと一致しません: '{self.name}'")
+                self._data = None
+                return False
+            self._full = full
+            self._data = None
+            return True
+
+    def grid_size(self, level: int) -> Tuple[int, int]:
+        """
+        レベルごとのタイルの列数と行数
+
+        Args:
+            level: タイルのレベル
+
+        Returns:
+            (列数, 行数)
+        """
+        span = TILE_SIZE * level
+        return (self.width + span - 1) // span, (self.height + span - 1) // span
+
+    def tile_rect(self, level: int, col: int, row: int) -> Tuple[int, int, int, int]:
+        """
+        タイルが覆う範囲を元の解像度の座標で求める
+
+        Args:
+            level: タイルのレベル
+            col: 列
+            row: 行
+
+        Returns:
+            (x, y, 幅, 高さ)
+        """
+        span = TILE_SIZE * level
+        x, y = col * span, row * span
+        return x, y, min(span, self.width - x), min(span, self.height - y)
+
+    def tiles_in_rect(self, level: int, x: float, y: float, width: float, height: float) -> List[TileKey]:
+        """
+        元の解像度の座標の矩形に重なるタイルを列挙する
+
+        Args:
+            level: タイルのレベル
+            x, y, width, height: 矩形（元の解像度の座標）
+
+        Returns:
+            (レベル, 列, 行) のリスト（上の行から順に並ぶ）
+        """
+        span = TILE_SIZE * level
+        cols, rows = self.grid_size(level)
+        col0 = max(0, int(x // span))
+        row0 = max(0, int(y // span))
+        col1 = min(cols - 1, int(math.ceil((x + width) / span)) - 1)
+        row1 = min(rows - 1, int(math.ceil((y + height) / span)) - 1)
+        return [(level, col, row) for row in range(row0, row1 + 1) for col in range(col0, col1 + 1)]
+
+    def peek_tile(self, tile: TileKey) -> Optional[np.ndarray]:
+        """
+        キャッシュにあるタイルを取得する（デコードや切り出しはしない）
+
+        Args:
+            tile: (レベル, 列, 行)
+
+        Returns:
+            タイルの配列。キャッシュになければNone
+        """
+        entry = self._cache.get((self._key,) + tile)
+        return entry.array if entry is not None else None
+
+    def get_tile(self, tile: TileKey) -> Optional[np.ndarray]:
+        """
+        タイルを取得する（キャッシュになければ元の解像度の配列から作る）
+
+        元の解像度の配列がまだなければデコードするため、時間がかかることがある。
+        UIスレッドからは peek_tile を使い、get_tile は TileLoader などの別スレッドで呼ぶこと。
+
+        Args:
+            tile: (レベル, 列, 行)
+
+        Returns:
+            タイルの配列（C連続、プレビューと同じ画素形式）。作れなかった場合はNone
+        """
+        array = self.peek_tile(tile)
+        if array is not None:
+            return array
+        if not self.load_full():
+            return None
+        full = self._full  # release と並行して呼ばれても配列を保持しておく
+        level, col, row = tile
+        x, y, w, h = self.tile_rect(level, col, row)
+        if full is None or w <= 0 or h <= 0:
+            return None
+        region = full.array[y:y + h, x:x + w]
+        if level > 1:
+            region = _resize(region, max(1, (w + level - 1) // level), max(1, (h + level - 1) // level))
+        return self._cache.put((self._key,) + tile, region, "TiledImage", self.pixel_format).array
+
+    def release(self) -> None:
+        """元の解像度の配列と画像データを解放する（キャッシュ済みのタイルは残る）"""
+        with self._lock:
+            self._released = True
+            self._full = None
+            self._data = None
+
+
+def open_tiled_image(name: str, data: bytes, min_pixels: int = TILED_MIN_PIXELS,
+                     preview_size: Tuple[int, int] = PREVIEW_SIZE,
+                     info: Optional[Tuple[int, int, int]] = None,
+                     key: Optional[Hashable] = None) -> Optional[TiledImage]:
+    """
+    大きな画像をタイル表示用に開く
+
+    ヘッダ解析で求めた画素数が min_pixels 未満の画像は対象外としてNoneを返す
+    （呼び出し側は通常どおり画像全体をデコードする）。
+
+    Args:
+        name: ファイル名
+        data: 画像データ
+        min_pixels: タイル表示にする画素数の下限
+        preview_size: プレビューの目標サイズ (幅, 高さ)
+        info: ヘッダ解析済みの (幅, 高さ, チャンネル数)（省略時は解析する）
+        key: タイルキャッシュで画像を識別するキー（省略時はデータの内容から作る）
+
+    Returns:
+        TiledImage。対象外の画像やデコードできない場合はNone
+    """
+    from .interface import decode_image_for_display, probe_image
+
+    if info is None:
+        info = probe_image(name, data)
+    if info is None or info[0] * info[1] < min_pixels:
+        return None
+    width, height = info[0], info[1]
+
+    decoded = decode_image_for_display(name, data, preview_size)
+    if decoded is None:
+        return None
+    decoded_height, decoded_width = decoded.array.shape[:2]
+    if (decoded_width, decoded_height) == (width, height):
+        # 縮小デコードできない形式は、デコード結果を元の解像度の配列として使い、プレビューは縮小して作る
+        ratio = min(preview_size[0] / width, preview_size[1] / height, 1.0)
+        preview_array = _resize(decoded.array, max(1, round(width * ratio)), max(1, round(height * ratio)))
+        preview = DisplayImage(np.ascontiguousarray(preview_array), decoded.pixel_format)
+        full = decoded
+    else:
+        preview = DisplayImage(np.ascontiguousarray(decoded.array), decoded.pixel_format)
+        full = None
+    log_print(DEBUG, f"タイル表示: '{name}' {width}x{height}, プレビュー "
+                     f"{preview.array.shape[1]}x{preview.array.shape[0]} (元の解像度の配列: {'あり' if full else '未デコード'})")
+    return TiledImage(name, data, width, height, preview, full, key=key)
+
+
+class TileLoader:
+    """
+    タイルを別スレッドで作るローダー
+
+    request で渡したタイルを1本のワーカースレッドで順に作り、作り終えるたびに
+    コールバックをワーカースレッドから呼ぶ。新しい request は、まだ作り始めていない
+    以前の要求を置き換える（スクロールで見えなくなったタイルは作らない）。
+    """
+
+    def __init__(self, on_loaded: Callable[[TiledImage, TileKey], None]):
+        """
+        ローダーを初期化する
+
+        Args:
+            on_loaded: タイルを作り終えたときに呼ぶ関数 (画像, タイル)。ワーカースレッドから呼ばれる
+        """
+        self._on_loaded = on_loaded
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[TiledImage, TileKey]] = []
+        self._wakeup: "queue.Queue[bool]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def request(self, image: TiledImage, tiles: List[TileKey]) -> None:
+        """
+        タイルの作成を要求する（未処理の以前の要求は破棄する）
+
+        Args:
+            image: タイルを作る画像
+            tiles: 作るタイル（先頭から順に作る）
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._pending = [(image, tile) for tile in tiles]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="TileLoader", daemon=True)
+                self._thread.start()
+        self._wakeup.put(True)
+
+    def cancel(self) -> None:
+        """未処理の要求を破棄する"""
+        with self._lock:
+            self._pending = []
+
+    def stop(self) -> None:
+        """ワーカースレッドを停止する（作成中のタイルは作り終えてから止まる。完了は待たない）"""
+        with self._lock:
+            self._stopped = True
+            self._pending = []
+        self._wakeup.put(False)
+
+    def _run(self) -> None:
+        """ワーカースレッドの処理"""
+        while self._wakeup.get():
+            while True:
+                with self._lock:
+                    if self._stopped or not self._pending:
+                        break
+                    image, tile = self._pending.pop(0)
+                try:
+                    if image.get_tile(tile) is not None:
+                        self._on_loaded(image, tile)
+                except Exception as e:
+                    log_print(WARNING, f"タイルの作成に失敗しました: {tile}: {e}")
+
+
+# シングルトンインスタンス
+_tile_cache = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache() -> DecodedImageCache:
+    """
+    プロセス全体で共有するタイルキャッシュを取得する
+
+    Returns:
+        DecodedImageCacheのインスタンス（上限は DEFAULT_TILE_CACHE_BYTES）
+    """
+    global _tile_cache
+    if _tile_cache is None:
+        with _tile_cache_lock:
+            if _tile_cache is None:
+                _tile_cache = DecodedImageCache(DEFAULT_TILE_CACHE_BYTES)
+    return _tile_cache
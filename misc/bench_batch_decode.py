@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+一括デコードサービスのベンチマーク
+
+JPEG/PNG/MAGを混ぜた画像（デフォルト1000枚）をメモリ上に生成し、
+BatchDecoderのプロセス数（デフォルト 1..CPU数）を変えてデコードにかかる時間を計測する。
+比較のため、同じ画像をGUIプロセスと同じく1スレッドで順にデコードした時間と、
+結果を共有メモリではなくピクル化で受け渡した場合の時間も表示する。
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from PIL import Image
+    from logutils import setup_logging, CRITICAL
+    from decoder.interface import decode_image
+    from decoder.batch import BatchDecoder
+    from check_mag import make_mag
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+def make_photo(rng: np.random.Generator, width: int, height: int) -> np.ndarray:
+    """写真に近い（なめらかな変化と細かいノイズを持つ）RGB画像を作成する"""
+    y, x = np.mgrid[0:height, 0:width]
+    phase = rng.uniform(0, 2 * np.pi, 3)
+    base = np.stack([np.sin(x / rng.uniform(20, 80) + y / rng.uniform(20, 80) + p) for p in phase], axis=2)
+    noise = rng.normal(0, 0.08, (height, width, 3))
+    return np.clip((base * 0.45 + 0.5 + noise) * 255, 0, 255).astype(np.uint8)
+
+
+def build_corpus(count: int, unique: int, width: int, height: int):
+    """
+    JPEG/PNG/MAGを順に混ぜた画像の一覧を作成する
+
+    生成に時間がかかるため、unique枚の画像を作って繰り返し使う。
+
+    Args:
+        count: 画像の枚数
+        unique: 実際に生成する画像の枚数
+        width: JPEG/PNGの幅（MAGは640x400固定）
+        height: JPEG/PNGの高さ
+
+    Returns:
+        (ファイル名, 画像データ) のリスト
+    """
+    rng = np.random.default_rng(0)
+    mag_rng = random.Random(0)
+    samples = []
+    for i in range(unique):
+        kind = i % 3
+        if kind == 2:
+            samples.append(('mag', make_mag(mag_rng, 640, 400, i % 2 == 0, flag_density=0.6)))
+            continue
+        buf = io.BytesIO()
+        Image.fromarray(make_photo(rng, width, height)).save(buf, 'JPEG' if kind == 0 else 'PNG', quality=90)
+        samples.append(('jpg' if kind == 0 else 'png', buf.getvalue()))
+    return [(f"{i:05d}.{samples[i % unique][0]}", samples[i % unique][1]) for i in range(count)]
+
+
+def run_sequential(items) -> float:
+    """1スレッドで順にデコードした時間（秒）"""
+    start = time.perf_counter()
+    for name, data in items:
+        decode_image(name, data)
+    return time.perf_counter() - start
+
+
+def run_batch(items, workers: int, use_shared_memory: bool, check) -> float:
+    """
+    BatchDecoderでデコードした時間（秒）。プロセスの起動時間は含めない
+
+    Args:
+        items: (ファイル名, 画像データ) のリスト
+        workers: プロセス数
+        use_shared_memory: 共有メモリで受け渡すかどうか
+        check: 結果の検証に使う、先頭の画像ごとのデコード結果の辞書
+    """
+    with BatchDecoder(workers, use_shared_memory=use_shared_memory) as decoder:
+        decoder.warm_up()
+        start = time.perf_counter()
+        for name, array in decoder.decode_iter(items):
+            expected = check.get(name)
+            if expected is not None and not np.array_equal(array, expected):
+                print(f"エラー: {name} のデコード結果が一致しません")
+                sys.exit(1)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一括デコードサービスのベンチマーク")
+    parser.add_argument("--count", type=int, default=1000, help="デコードする画像の枚数")
+    parser.add_argument("--unique", type=int, default=60, help="実際に生成する画像の枚数")
+    parser.add_argument("--width", type=int, default=1024, help="JPEG/PNGの幅")
+    parser.add_argument("--height", type=int, default=768, help="JPEG/PNGの高さ")
+    parser.add_argument("--workers", type=str, default=None, help="プロセス数（カンマ区切り、デフォルトは1..CPU数）")
+    args = parser.parse_args()
+
+    setup_logging(CRITICAL)
+    cpu = os.cpu_count() or 1
+    workers_list = [int(w) for w in args.workers.split(',') if w] if args.workers else list(range(1, cpu + 1))
+
+    items = build_corpus(args.count, args.unique, args.width, args.height)
+    total_mb = sum(len(data) for _, data in items) / 2**20
+    check = {name: decode_image(name, data) for name, data in items[:args.unique]}
+
+    print("=" * 70)
+    print(f"一括デコード ベンチマーク ({args.count} 枚, JPEG/PNG {args.width}x{args.height}, "
+          f"MAG 640x400, 入力 {total_mb:.0f}MB, CPU {cpu})")
+    print("=" * 70)
+    print(f"{'方式':<24} {'時間(s)':>10} {'枚/秒':>10} {'速度比':>8}")
+
+    baseline = run_sequential(items)
+    print(f"{'1スレッド (GUIプロセス)':<24} {baseline:>10.2f} {args.count / baseline:>10.1f} {1.0:>7.2f}x")
+    for workers in workers_list:
+        for use_shm in (True, False):
+            elapsed = run_batch(items, workers, use_shm, check)
+            label = f"{workers} プロセス ({'共有メモリ' if use_shm else 'ピクル'})"
+            print(f"{label:<24} {elapsed:>10.2f} {args.count / elapsed:>10.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+表示用デコード（画素形式を保ったままのQImage化）のベンチマーク
+
+従来の経路（decodeでRGB(A)に並べ替えた配列からQImageを作る）と、
+表示用デコード（decode_display。OpenCVのBGR/BGRA/グレースケールの配列をそのまま
+QImageが参照する）について、1ページあたりの時間と、デコード中に確保される
+画像全体の大きさのバッファの数（コピー回数）を比較する。
+
+コピー回数は tracemalloc で計測したメモリ確保量のピークを画像1枚分のバイト数で割って求める
+（NumPy / OpenCV の配列の確保は tracemalloc で追跡される）。
+PySide6 がインストールされている場合は QPixmap への変換までの時間も計測する。
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from PIL import Image
+    from logutils import setup_logging, CRITICAL
+    from decoder import decode_image, decode_image_for_display, to_rgb_array
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+def make_samples(width: int, height: int):
+    """
+    計測に使う画像（カラーJPEG、グレースケールJPEG、RGB PNG、RGBA PNG）を作成する
+
+    Returns:
+        (ファイル名, 画像データ) のリスト
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = (np.sin(x / 37.0) + np.cos(y / 23.0)) * 60 + 128
+    rgb = np.clip(np.stack([base, base[::-1], base[:, ::-1]], axis=2)
+                  + rng.normal(0, 6, (height, width, 3)), 0, 255).astype(np.uint8)
+    rgba = np.dstack([rgb, np.full((height, width), 200, np.uint8)])
+    samples = []
+    for name, array, fmt in (('color.jpg', rgb, 'JPEG'), ('gray.jpg', rgb[:, :, 0], 'JPEG'),
+                             ('rgb.png', rgb, 'PNG'), ('rgba.png', rgba, 'PNG')):
+        buf = io.BytesIO()
+        Image.fromarray(array).save(buf, fmt, quality=90)
+        samples.append((name, buf.getvalue()))
+    return samples
+
+
+def legacy_pipeline(name: str, data: bytes):
+    """従来の経路: RGB(A)でデコードし、キャッシュ登録と同じくC連続にそろえる"""
+    array = np.ascontiguousarray(decode_image(name, data))
+    return array, None
+
+
+def display_pipeline(name: str, data: bytes):
+    """表示用デコードの経路: デコーダーの出力の画素形式のまま使う"""
+    decoded = decode_image_for_display(name, data)
+    return decoded.array, decoded.pixel_format
+
+
+def measure_time(pipeline, name: str, data: bytes, repeat: int, to_pixmap=None) -> float:
+    """1枚あたりの最短時間（ミリ秒）を計測する"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        array, pixel_format = pipeline(name, data)
+        if to_pixmap is not None:
+            to_pixmap(array, pixel_format)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def measure_copies(pipeline, name: str, data: bytes) -> float:
+    """デコード中に確保したメモリのピークを、表示する画像1枚分のバイト数で割った値"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        array, _ = pipeline(name, data)
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    height, width = array.shape[:2]
+    channels = 1 if array.ndim == 2 else array.shape[2]
+    # 従来の経路のグレースケールは3チャンネルに広げられるため、元の1枚分（1チャンネル）を基準にする
+    frame_bytes = height * width * (channels if name != 'gray.jpg' else 1)
+    return peak / frame_bytes
+
+
+def get_pixmap_converter():
+    """PySide6があればQPixmapへの変換関数を返す（なければNone）"""
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtGui import QGuiApplication
+        from app.viewer.widgets.preview.image_processor import array_to_pixmap
+    except ImportError:
+        return None
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+    get_pixmap_converter.app = app
+    return array_to_pixmap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="表示用デコードのベンチマーク")
+    parser.add_argument("--width", type=int, default=2480, help="画像の幅")
+    parser.add_argument("--height", type=int, default=3508, help="画像の高さ")
+    parser.add_argument("--repeat", type=int, default=10, help="計測の繰り返し回数（最短時間を採用）")
+    args = parser.parse_args()
+
+    setup_logging(CRITICAL)
+    samples = make_samples(args.width, args.height)
+    to_pixmap = get_pixmap_converter()
+
+    print("=" * 70)
+    print(f"表示用デコード ベンチマーク ({args.width}x{args.height}, 繰り返し {args.repeat} 回)")
+    print("=" * 70)
+    print(f"{'画像':<10} {'経路':<8} {'形式':<10} {'デコード(ms)':>12} {'QPixmap(ms)':>12} {'コピー':>8}")
+
+    for name, data in samples:
+        legacy_array, _ = legacy_pipeline(name, data)
+        display_array, pixel_format = display_pipeline(name, data)
+        if not np.array_equal(legacy_array, to_rgb_array(display_array, pixel_format)):
+            print(f"エラー: {name} のデコード結果が一致しません")
+            sys.exit(1)
+
+        for label, pipeline in (('従来', legacy_pipeline), ('表示用', display_pipeline)):
+            _, fmt = pipeline(name, data)
+            decode_ms = measure_time(pipeline, name, data, args.repeat)
+            pixmap_ms = (f"{measure_time(pipeline, name, data, args.repeat, to_pixmap):>12.2f}"
+                         if to_pixmap is not None else f"{'-':>12}")
+            copies = measure_copies(pipeline, name, data)
+            print(f"{name:<10} {label:<8} {fmt or 'RGB(A)':<10} {decode_ms:>12.2f} {pixmap_ms} {copies:>7.1f}x")
+
+    if to_pixmap is None:
+        print("\nPySide6がインストールされていないため、QPixmapへの変換は計測していません")
+    print("コピー: デコード中に確保したメモリのピーク（画像1枚分を1.0とする）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+EntryCacheManager.list_entries のマイクロベンチマーク
+
+キャッシュ全体のエントリ数を変えながら、1ディレクトリの一覧取得にかかる時間を計測する。
+従来方式（全キーをstartswithで走査）と親子インデックス方式を比較する。
+"""
+import os
+import sys
+import time
+import argparse
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from arc.arc import EntryInfo, EntryType
+    from arc.manager.components.entry_cache import EntryCacheManager
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+class _QuietManager:
+    """ログを出力しないダミーのマネージャー（計測からログ出力のコストを除くため）"""
+
+    def debug_debug(self, *args, **kwargs):
+        pass
+
+    debug_info = debug_warning = debug_error = debug_debug
+
+
+def build_cache(total: int, dir_size: int) -> EntryCacheManager:
+    """
+    指定したエントリ数の合成ツリーをキャッシュに登録する
+
+    Args:
+        total: 登録するファイルエントリの総数
+        dir_size: 1ディレクトリあたりのファイル数
+
+    Returns:
+        エントリを登録したEntryCacheManager
+    """
+    cache = EntryCacheManager(_QuietManager())
+    cache.add_entry_to_cache(EntryInfo(name="root", path="/root", rel_path="", type=EntryType.DIRECTORY))
+    dir_count = max(1, total // dir_size)
+    for d in range(dir_count):
+        dir_key = f"vol{d // 100:03d}/ch{d:05d}"
+        for key in (f"vol{d // 100:03d}", dir_key):
+            if key not in cache.get_all_entries():
+                cache.add_entry_to_cache(EntryInfo(name=key.rsplit('/', 1)[-1], path=f"/root/{key}",
+                                                   rel_path=key, type=EntryType.DIRECTORY))
+        for i in range(dir_size):
+            key = f"{dir_key}/{i:04d}.jpg"
+            cache.add_entry_to_cache(EntryInfo(name=f"{i:04d}.jpg", path=f"/root/{key}",
+                                               rel_path=key, type=EntryType.FILE, size=1024))
+    return cache
+
+
+def list_entries_linear(cache: EntryCacheManager, norm_path: str) -> list:
+    """
+    従来方式の一覧取得（全キーを走査してstartswithで判定する）
+
+    Args:
+        cache: 対象のキャッシュ
+        norm_path: 一覧を取得するディレクトリのキー
+
+    Returns:
+        直接の子エントリのリスト
+    """
+    result = []
+    seen_paths = set()
+    prefix = f"{norm_path}/"
+    for child_key, child_entry in cache.get_all_entries().items():
+        if child_key != norm_path and child_key.startswith(prefix):
+            rest_path = child_key[len(prefix):]
+            if '/' not in rest_path and child_entry.path not in seen_paths:
+                result.append(child_entry)
+                seen_paths.add(child_entry.path)
+    return result
+
+
+def measure(func, repeat: int) -> float:
+    """関数をrepeat回実行した1回あたりの平均時間（ミリ秒）を返す"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000.0 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EntryCacheManager.list_entries のベンチマーク")
+    parser.add_argument("--sizes", type=str, default="10000,50000,200000",
+                        help="キャッシュの総エントリ数（カンマ区切り）")
+    parser.add_argument("--dir-size", type=int, default=100, help="1ディレクトリあたりのファイル数")
+    parser.add_argument("--repeat", type=int, default=20, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+
+    print("=" * 70)
+    print(f"list_entries ベンチマーク (ディレクトリあたり {args.dir_size} ファイル, {args.repeat} 回平均)")
+    print("=" * 70)
+    print(f"{'総エントリ数':>12} {'従来方式(ms)':>14} {'インデックス(ms)':>16} {'倍率':>8}")
+
+    for total in sizes:
+        cache = build_cache(total, args.dir_size)
+        target = "vol000/ch00000"
+        expected = list_entries_linear(cache, target)
+        actual = cache.list_entries(target)
+        if [e.path for e in expected] != [e.path for e in actual]:
+            print(f"エラー: 一覧結果が一致しません ({total} エントリ)")
+            sys.exit(1)
+
+        linear_ms = measure(lambda: list_entries_linear(cache, target), args.repeat)
+        indexed_ms = measure(lambda: cache.list_entries(target), args.repeat)
+        ratio = linear_ms / indexed_ms if indexed_ms > 0 else float('inf')
+        print(f"{len(cache.get_all_entries()):>12} {linear_ms:>14.3f} {indexed_ms:>16.3f} {ratio:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+EntryInfo のメモリ使用量ベンチマーク
+
+合成ツリー（デフォルト50万エントリ）のEntryInfoを生成し、1エントリあたりのバイト数を計測する。
+従来の辞書ベースの実装（インスタンス辞書と空のattrs辞書を持つ）と、現在の __slots__ 版を比較し、
+エントリキャッシュに登録した状態の使用量と、主な属性の読み出し時間も表示する。
+"""
+import os
+import sys
+import gc
+import time
+import datetime
+import argparse
+import tracemalloc
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from arc.arc import EntryInfo, EntryType, EntryStatus
+    from arc.manager.components.entry_cache import EntryCacheManager
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+class _QuietManager:
+    """ログを出力しないダミーのマネージャー（計測からログ出力のコストを除くため）"""
+
+    def debug_debug(self, *args, **kwargs):
+        pass
+
+    debug_info = debug_warning = debug_error = debug_debug
+
+
+class LegacyEntryInfo:
+    """比較用: __slots__ 導入前の辞書ベースのEntryInfo"""
+
+    def __init__(self, name, path="", rel_path=None, type=EntryType.FILE, size=0,
+                 modified_time=None, created_time=None, is_hidden=False, name_in_arc=None,
+                 attrs=None, abs_path="", status=EntryStatus.READY):
+        self.name = name
+        self.path = path
+        self.rel_path = rel_path
+        self.type = type
+        self.size = size
+        self.modified_time = modified_time
+        self.created_time = created_time
+        self.is_hidden = is_hidden
+        self.name_in_arc = name if name_in_arc is None else name_in_arc
+        self.attrs = attrs or {}
+        self.abs_path = abs_path if abs_path else path
+        self.status = status
+
+
+def iter_specs(total: int, arc_size: int):
+    """
+    合成ツリーのエントリ引数を生成する
+
+    フォルダ内の書庫（1書庫あたりarc_size枚の画像）を想定し、
+    ハンドラが返すエントリと同じように文字列と日時を個別に生成する。
+
+    Args:
+        total: 生成するファイルエントリの総数
+        arc_size: 1書庫あたりのファイル数
+
+    Yields:
+        EntryInfoのキーワード引数の辞書
+    """
+    base = "/data/comics"
+    for i in range(total):
+        arc_no, page = divmod(i, arc_size)
+        rel_path = f"series{arc_no // 50:04d}/vol{arc_no:06d}.zip/images/{page:04d}.jpg"
+        yield dict(
+            name=f"{page:04d}.jpg",
+            path=f"{base}/{rel_path}",
+            rel_path=rel_path,
+            type=EntryType.FILE,
+            size=100000 + page,
+            modified_time=datetime.datetime(2020, 1, 1 + arc_no % 28, page % 24, page % 60),
+            name_in_arc=f"images/{page:04d}.jpg",
+            abs_path=f"{base}/{rel_path}",
+        )
+
+
+def measure_objects(cls, total: int, arc_size: int):
+    """
+    エントリを生成して保持したときの1エントリあたりのバイト数を計測する
+
+    Args:
+        cls: 生成するクラス
+        total: エントリ数
+        arc_size: 1書庫あたりのファイル数
+
+    Returns:
+        (1エントリあたりのバイト数, 生成したエントリのリスト)
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entries = [cls(**spec) for spec in iter_specs(total, arc_size)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / total, entries
+
+
+def measure_cache(total: int, arc_size: int) -> float:
+    """
+    エントリキャッシュに登録したときの1エントリあたりのバイト数を計測する
+
+    Args:
+        total: エントリ数
+        arc_size: 1書庫あたりのファイル数
+
+    Returns:
+        1エントリあたりのバイト数（キャッシュ辞書と親子インデックスを含む）
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cache = EntryCacheManager(_QuietManager())
+    for spec in iter_specs(total, arc_size):
+        cache.add_entry_to_cache(EntryInfo(**spec))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del cache
+    return (after - before) / total
+
+
+def measure_access(entries: list) -> float:
+    """主な属性（path, rel_path, name, type）を全エントリから読み出す時間（ミリ秒）"""
+    start = time.perf_counter()
+    for entry in entries:
+        entry.path, entry.rel_path, entry.name, entry.type
+    return (time.perf_counter() - start) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EntryInfo のメモリ使用量ベンチマーク")
+    parser.add_argument("--entries", type=int, default=500000, help="生成するエントリ数")
+    parser.add_argument("--arc-size", type=int, default=200, help="1書庫あたりのファイル数")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"EntryInfo メモリベンチマーク ({args.entries} エントリ, 1書庫あたり {args.arc_size} ファイル)")
+    print("=" * 70)
+
+    legacy_bytes, legacy_entries = measure_objects(LegacyEntryInfo, args.entries, args.arc_size)
+    legacy_ms = measure_access(legacy_entries)
+    del legacy_entries
+
+    compact_bytes, compact_entries = measure_objects(EntryInfo, args.entries, args.arc_size)
+    compact_ms = measure_access(compact_entries)
+    sample = next(iter_specs(1, args.arc_size))
+    entry = compact_entries[0]
+    if (entry.path, entry.rel_path, entry.name, entry.name_in_arc, entry.abs_path) != \
+            (sample['path'], sample['rel_path'], sample['name'], sample['name_in_arc'], sample['abs_path']):
+        print("エラー: 属性の値が一致しません")
+        sys.exit(1)
+    del compact_entries
+
+    cache_bytes = measure_cache(args.entries, args.arc_size)
+
+    print(f"{'実装':<28} {'バイト/エントリ':>14} {'合計(MB)':>10} {'属性読み出し(ms)':>18}")
+    print(f"{'従来 (辞書ベース)':<28} {legacy_bytes:>14.1f} {legacy_bytes * args.entries / 2**20:>10.1f} {legacy_ms:>18.1f}")
+    print(f"{'__slots__ 版':<28} {compact_bytes:>14.1f} {compact_bytes * args.entries / 2**20:>10.1f} {compact_ms:>18.1f}")
+    print(f"{'__slots__ 版 + キャッシュ登録':<28} {cache_bytes:>14.1f} {cache_bytes * args.entries / 2**20:>10.1f} {'-':>18}")
+    print(f"削減率: {(1 - compact_bytes / legacy_bytes) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+MAGデコーダーのベンチマーク
+
+生成したMAG画像（デフォルト 640x400, 16色と256色）を、参照実装（1ピクセルずつのループ）と
+ベクトル化版でデコードし、1秒あたりのピクセル数を比較する。
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from decoder.mag_decoder import MAGImageDecoder
+    from check_mag import make_mag
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+def measure(func, data: bytes, repeat: int) -> float:
+    """関数をrepeat回実行した1回あたりの最短時間（秒）を返す"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MAGデコーダーのベンチマーク")
+    parser.add_argument("--width", type=int, default=640, help="画像の幅")
+    parser.add_argument("--height", type=int, default=400, help="画像の高さ")
+    parser.add_argument("--density", type=float, default=0.6, help="フラグAのビットが1になる確率")
+    parser.add_argument("--repeat", type=int, default=5, help="ベクトル化版の計測回数（最短時間を採用）")
+    args = parser.parse_args()
+
+    decoder = MAGImageDecoder()
+    rng = random.Random(0)
+    pixels = args.width * args.height
+
+    print("=" * 70)
+    print(f"MAGデコーダー ベンチマーク ({args.width}x{args.height}, フラグ密度 {args.density})")
+    print("=" * 70)
+    print(f"{'モード':<8} {'参照実装(ms)':>14} {'ベクトル化(ms)':>16} {'Mピクセル/秒':>14} {'倍率':>8}")
+
+    for is_256color in (False, True):
+        data = make_mag(rng, args.width, args.height, is_256color, flag_density=args.density)
+        if not np.array_equal(decoder._decode_mag_reference(data)[2], decoder._decode_mag(data)[2]):
+            print("エラー: デコード結果が一致しません")
+            sys.exit(1)
+        # 参照実装は遅いので1回だけ計測する
+        reference = measure(decoder._decode_mag_reference, data, 1)
+        vectorized = measure(decoder._decode_mag, data, args.repeat)
+        mode = '256色' if is_256color else '16色'
+        print(f"{mode:<8} {reference * 1000:>14.1f} {vectorized * 1000:>16.2f} "
+              f"{pixels / vectorized / 1e6:>14.1f} {reference / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
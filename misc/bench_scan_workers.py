@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+ネスト書庫の並列スキャンのベンチマーク
+
+ZIPの中にZIPが入った合成ツリーを一時ディレクトリに作成し、遅延展開を無効にした
+EnhancedArchiveManager.set_current_path（全ネスト書庫の走査）にかかる時間を、
+スキャンエンジンのワーカー数（デフォルト 1/2/4/8）を変えて計測する。
+"""
+import os
+import io
+import sys
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import tempfile
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from logutils import setup_logging, CRITICAL
+    from arc.interface import create_archive_manager
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+def build_nested_zip(depth: int, fanout: int, files: int, file_size: int, rng: random.Random) -> bytes:
+    """
+    ネストしたZIPのデータを作成する
+
+    Args:
+        depth: この書庫の下に続くネストの深さ（0なら画像だけを含む）
+        fanout: 1書庫あたりの子書庫の数
+        files: 1書庫あたりの画像ファイル数
+        file_size: 画像ファイル1つのサイズ
+        rng: 乱数生成器
+
+    Returns:
+        ZIPデータ
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i in range(files):
+            zf.writestr(f"img/{i:04d}.jpg", rng.randbytes(file_size // 2) + bytes(file_size // 2))
+        if depth > 0:
+            for i in range(fanout):
+                zf.writestr(f"nested/{i:02d}.zip", build_nested_zip(depth - 1, fanout, files, file_size, rng))
+    return buf.getvalue()
+
+
+def build_tree(root: str, archives: int, depth: int, fanout: int, files: int, file_size: int) -> int:
+    """
+    合成ツリーを作成する
+
+    Args:
+        root: 作成先のディレクトリ
+        archives: フォルダ直下の書庫数
+        depth: ネストの深さ
+        fanout: 1書庫あたりの子書庫の数
+        files: 1書庫あたりの画像ファイル数
+        file_size: 画像ファイル1つのサイズ
+
+    Returns:
+        ツリー内の書庫の総数（フォルダ直下の書庫を含む）
+    """
+    rng = random.Random(0)
+    for i in range(archives):
+        with open(os.path.join(root, f"vol{i:03d}.zip"), 'wb') as f:
+            f.write(build_nested_zip(depth, fanout, files, file_size, rng))
+    per_archive = sum(fanout ** d for d in range(depth + 1))
+    return archives * per_archive
+
+
+def run_scan(root: str, workers: int):
+    """
+    指定したワーカー数でフォルダ全体を走査する
+
+    Args:
+        root: 走査するフォルダ
+        workers: スキャンエンジンのワーカー数
+
+    Returns:
+        (経過時間（秒）, エントリキーの集合, 進捗情報)
+    """
+    manager = create_archive_manager()
+    manager.lazy_expansion = False
+    manager._persistent_index.enabled = False
+    manager._scan_engine.max_workers = workers
+    start = time.perf_counter()
+    manager.set_current_path(root)
+    elapsed = time.perf_counter() - start
+    keys = set(manager.get_entry_cache().keys())
+    progress = manager.get_scan_progress()
+    manager._scan_engine.shutdown()
+    return elapsed, keys, progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ネスト書庫の並列スキャンのベンチマーク")
+    parser.add_argument("--workers", type=str, default="1,2,4,8", help="ワーカー数（カンマ区切り）")
+    parser.add_argument("--archives", type=int, default=4, help="フォルダ直下の書庫数")
+    parser.add_argument("--depth", type=int, default=3, help="ネストの深さ")
+    parser.add_argument("--fanout", type=int, default=3, help="1書庫あたりの子書庫の数")
+    parser.add_argument("--files", type=int, default=20, help="1書庫あたりの画像ファイル数")
+    parser.add_argument("--file-size", type=int, default=64 * 1024, help="画像ファイル1つのサイズ（バイト）")
+    parser.add_argument("--repeat", type=int, default=3, help="計測の繰り返し回数（最短時間を採用）")
+    args = parser.parse_args()
+
+    # ハンドラやマネージャーのログ出力を計測から除く
+    setup_logging(CRITICAL)
+    workers_list = [int(w) for w in args.workers.split(',') if w]
+
+    root = tempfile.mkdtemp(prefix="bench_scan_")
+    try:
+        total = build_tree(root, args.archives, args.depth, args.fanout, args.files, args.file_size)
+        print("=" * 70)
+        print(f"ネスト書庫スキャン ベンチマーク (書庫 {total} 個, 深さ {args.depth}, "
+              f"子書庫 {args.fanout} 個/書庫, CPU {os.cpu_count()})")
+        print("=" * 70)
+        print(f"{'ワーカー数':>10} {'時間(s)':>10} {'書庫/秒':>10} {'エントリ数':>10} {'速度比':>8}")
+
+        baseline = None
+        expected = None
+        for workers in workers_list:
+            best = None
+            for _ in range(args.repeat):
+                elapsed, keys, progress = run_scan(root, workers)
+                if expected is None:
+                    expected = keys
+                elif keys != expected:
+                    print(f"エラー: ワーカー数 {workers} でエントリが一致しません")
+                    sys.exit(1)
+                best = elapsed if best is None else min(best, elapsed)
+            baseline = baseline or best
+            rate = progress['completed'] / best if best > 0 else 0.0
+            print(f"{workers:>10} {best:>10.3f} {rate:>10.1f} {len(expected):>10} {baseline / best:>7.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
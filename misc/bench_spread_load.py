@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+見開き読み込みのベンチマーク
+
+見開きの2ページ（JPEG）を格納したZIPを一時ディレクトリに作成し、
+1ページずつ read_file で取り出してデコードする従来の経路と、
+read_files で2ページをまとめて取り出し、取り出せたページから2本のスレッドで
+並列にデコードする経路（プレビューの非同期読み込みと同じ流れ）の時間を比較する。
+
+並列デコードの効果はCPUのコア数に依存する（1コアでは取り出しをまとめた分だけ速くなる）。
+"""
+import os
+import sys
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import cv2
+    from logutils import setup_logging, CRITICAL
+    from arc.interface import create_archive_manager
+    from decoder import decode_image_for_display
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+def make_jpeg(width: int, height: int, seed: int) -> bytes:
+    """スキャン画像に見立てたJPEGを作成する"""
+    rng = np.random.default_rng(seed)
+    x = np.arange(width, dtype=np.uint32)[np.newaxis, :]
+    y = np.arange(height, dtype=np.uint32)[:, np.newaxis]
+    array = np.empty((height, width, 3), np.uint8)
+    array[:, :, 0] = (x >> 2) & 255
+    array[:, :, 1] = (y >> 2) & 255
+    array[:, :, 2] = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    ok, buf = cv2.imencode('.jpg', array, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    if not ok:
+        raise RuntimeError("JPEGにエンコードできませんでした")
+    return buf.tobytes()
+
+
+def load_serial(manager, paths, executor):
+    """従来の経路: 1ページずつ取り出してデコードする"""
+    return [decode_image_for_display(path, manager.read_file(path)) for path in paths]
+
+
+def load_parallel(manager, paths, executor):
+    """見開きの経路: まとめて取り出し、取り出せたページから並列にデコードする"""
+    futures = {path: executor.submit(decode_image_for_display, path, data)
+               for path, data in manager.read_files(paths)}
+    return [futures[path].result() for path in paths]
+
+
+def measure(func, manager, paths, executor, repeat: int):
+    """最短時間（秒）と結果を返す"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(manager, paths, executor)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="見開き読み込みのベンチマーク")
+    parser.add_argument("--width", type=int, default=2480, help="ページの幅")
+    parser.add_argument("--height", type=int, default=3508, help="ページの高さ")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数（最短時間を採用）")
+    args = parser.parse_args()
+
+    setup_logging(CRITICAL)
+    root = tempfile.mkdtemp(prefix="bench_spread_")
+    try:
+        pages = {f"{i:03d}.jpg": make_jpeg(args.width, args.height, i) for i in (1, 2)}
+        for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            name = "stored.zip" if compression == zipfile.ZIP_STORED else "deflated.zip"
+            with zipfile.ZipFile(os.path.join(root, name), 'w', compression) as zf:
+                for page, data in pages.items():
+                    zf.writestr(page, data)
+
+        manager = create_archive_manager()
+        # 一時フォルダの書庫をユーザーの永続インデックスに書き込まない
+        manager._persistent_index.enabled = False
+        manager.set_current_path(root)
+
+        print("=" * 70)
+        print(f"見開き読み込み ベンチマーク (JPEG {args.width}x{args.height} x 2ページ, "
+              f"CPU {os.cpu_count()}コア)")
+        print("=" * 70)
+        print(f"{'書庫':<14} {'経路':<24} {'時間(ms)':>10} {'比':>8}")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for name in ("stored.zip", "deflated.zip"):
+                paths = [f"{name}/{page}" for page in pages]
+                serial, expected = measure(load_serial, manager, paths, executor, args.repeat)
+                parallel, result = measure(load_parallel, manager, paths, executor, args.repeat)
+                for a, b in zip(expected, result):
+                    if not np.array_equal(a.array, b.array):
+                        print(f"エラー: {name} のデコード結果が一致しません")
+                        sys.exit(1)
+                print(f"{name:<14} {'1ページずつ':<24} {serial * 1000:>10.1f} {1.0:>8.2f}")
+                print(f"{'':<14} {'まとめて取り出し+並列':<24} {parallel * 1000:>10.1f} {parallel / serial:>8.2f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
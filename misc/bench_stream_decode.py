@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+ストリームからのデコードのベンチマーク
+
+大きなPNGを格納したZIPを一時ディレクトリに作成し、
+read_file でバイト列に読み込んでから decode_image でデコードする従来の経路と、
+get_stream のストリームを decode_image_stream に渡す経路について、
+時間とメモリ確保量のピーク（tracemalloc）を比較する。
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from PIL import Image
+    from logutils import setup_logging, CRITICAL
+    from arc.interface import create_archive_manager
+    from decoder import decode_image, decode_image_stream
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+def make_png(width: int, height: int) -> bytes:
+    """圧縮しにくい（ノイズを含む）RGBのPNGを作成する"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.dstack([(x * 7 + y * 3) % 256, (x * y) % 251, (x ^ y) % 256])
+    array = np.clip(base + rng.integers(0, 60, (height, width, 3)), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(array).save(buf, 'PNG', compress_level=1)
+    return buf.getvalue()
+
+
+def run_bytes(manager, path: str):
+    """従来の経路: ファイル全体を読み込んでからデコードする"""
+    data = manager.read_file(path)
+    return decode_image(path, data)
+
+
+def run_stream(manager, path: str):
+    """ストリームの経路: 展開しながらデコードする"""
+    stream = manager.get_stream(path)
+    try:
+        return decode_image_stream(path, stream)
+    finally:
+        stream.close()
+
+
+def measure(func, manager, path: str, repeat: int):
+    """
+    最短時間（秒）とメモリ確保量のピーク（バイト）を計測する
+
+    Returns:
+        (時間, ピーク, デコード結果)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(manager, path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del result
+    tracemalloc.start()
+    try:
+        result = func(manager, path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ストリームからのデコードのベンチマーク")
+    parser.add_argument("--width", type=int, default=4000, help="PNGの幅")
+    parser.add_argument("--height", type=int, default=3000, help="PNGの高さ")
+    parser.add_argument("--repeat", type=int, default=3, help="計測の繰り返し回数（最短時間を採用）")
+    args = parser.parse_args()
+
+    setup_logging(CRITICAL)
+    root = tempfile.mkdtemp(prefix="bench_stream_")
+    try:
+        png = make_png(args.width, args.height)
+        with zipfile.ZipFile(os.path.join(root, "book.zip"), 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("page.png", png)
+        with open(os.path.join(root, "page.png"), 'wb') as f:
+            f.write(png)
+
+        manager = create_archive_manager()
+        # 一時フォルダの書庫をユーザーの永続インデックスに書き込まない
+        manager._persistent_index.enabled = False
+        manager.set_current_path(root)
+
+        print("=" * 70)
+        print(f"ストリームデコード ベンチマーク (PNG {args.width}x{args.height}, "
+              f"{len(png) / 2**20:.1f}MB, 展開後 {args.width * args.height * 3 / 2**20:.1f}MB)")
+        print("=" * 70)
+        print(f"{'ファイル':<18} {'経路':<12} {'時間(s)':>10} {'ピーク(MB)':>12}")
+        for path in ("book.zip/page.png", "page.png"):
+            reference = None
+            for label, func in (("read_file", run_bytes), ("get_stream", run_stream)):
+                elapsed, peak, result = measure(func, manager, path, args.repeat)
+                if reference is None:
+                    reference = result
+                elif not np.array_equal(reference, result):
+                    print(f"エラー: {path} のデコード結果が一致しません")
+                    sys.exit(1)
+                print(f"{path:<18} {label:<12} {elapsed:>10.3f} {peak / 2**20:>12.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+サムネイル抽出のベンチマーク
+
+多数の小さなJPEGを格納したZIPを一時ディレクトリに作成し、リストの途中までスクロールした状態
+（表示中のファイルがリストの後ろの方にある状態）で、表示中のファイルがすべて抽出・デコード
+されるまでの時間を比較する。
+
+- 従来の経路: リストの先頭から1ファイルずつ extract_item で抽出してデコードする
+- 新しい経路: ThumbnailExtractor に表示中のファイルを優先させ、並列にまとめて抽出してデコードする
+
+サムネイル生成（デコードと縮小）はどちらも抽出したスレッドでそのまま行う。
+--processes に2以上を指定すると、アプリと同じくデコードを BatchDecoder のワーカープロセスで行う
+（効果はCPUのコア数に依存する）。
+"""
+import os
+import sys
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import cv2
+    from logutils import setup_logging, CRITICAL
+    from decoder import decode_image_for_display, BatchDecoder
+    from app.viewer.models.archive_manager_wrapper import ArchiveManagerWrapper
+    from app.viewer.widgets.thumbnail_generator import ThumbnailExtractor
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+# サムネイルのサイズ
+THUMBNAIL_SIZE = (64, 64)
+
+# デコードに使う一括デコードサービス（Noneならスレッドでデコードする）
+batch_decoder = None
+
+
+def make_jpeg(width: int, height: int, seed: int) -> bytes:
+    """写真に見立てたJPEGを作成する"""
+    rng = np.random.default_rng(seed)
+    array = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    array = cv2.resize(array, (width, height), interpolation=cv2.INTER_LINEAR)
+    ok, buf = cv2.imencode('.jpg', array, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    if not ok:
+        raise RuntimeError("JPEGにエンコードできませんでした")
+    return buf.tobytes()
+
+
+def make_thumbnail(name: str, data: bytes) -> None:
+    """サムネイルを作成する（縮小デコードして縮小する）"""
+    if batch_decoder is not None:
+        _, array = batch_decoder.decode_all([(name, data)], THUMBNAIL_SIZE)[0]
+    else:
+        array = decode_image_for_display(name, data, THUMBNAIL_SIZE).array
+    height, width = array.shape[:2]
+    scale = min(THUMBNAIL_SIZE[0] / width, THUMBNAIL_SIZE[1] / height)
+    cv2.resize(array, (max(1, round(width * scale)), max(1, round(height * scale))),
+               interpolation=cv2.INTER_AREA)
+
+
+def run_sequential(manager, names, visible) -> float:
+    """従来の経路: 先頭から順に抽出し、表示中のファイルがそろうまでの時間（秒）を返す"""
+    remaining = set(visible)
+    start = time.perf_counter()
+    for name in names:
+        data = manager.extract_item(name)
+        make_thumbnail(name, data)
+        remaining.discard(name)
+        if not remaining:
+            break
+    return time.perf_counter() - start
+
+
+def run_prioritized(manager, names, visible, directory: str, workers: int) -> float:
+    """新しい経路: 表示中のファイルを優先して並列に抽出し、表示中のファイルがそろうまでの時間（秒）を返す"""
+    remaining = set(visible)
+    lock = threading.Lock()
+    done = threading.Event()
+    cancelled = [False]
+
+    def on_file_extracted(name, data):
+        make_thumbnail(name, data)
+        with lock:
+            remaining.discard(name)
+            if not remaining:
+                cancelled[0] = True
+                done.set()
+
+    start = time.perf_counter()
+    extractor = ThumbnailExtractor(manager, names, directory, max_workers=workers)
+    extractor.prioritize(visible)
+    extractor.extract_files(on_file_extracted, is_cancelled=lambda: cancelled[0])
+    done.wait()
+    return time.perf_counter() - start
+
+
+def run_folder(manager, names, directory: str, workers: int) -> float:
+    """フォルダ全体のサムネイルを作り終えるまでの時間（秒）を返す"""
+    start = time.perf_counter()
+    extractor = ThumbnailExtractor(manager, names, directory, max_workers=workers)
+    extractor.extract_files(make_thumbnail)
+    return time.perf_counter() - start
+
+
+def main():
+    global batch_decoder
+    parser = argparse.ArgumentParser(description="サムネイル抽出のベンチマーク")
+    parser.add_argument("--files", type=int, default=3000, help="ZIPに格納するファイル数")
+    parser.add_argument("--visible", type=int, default=48, help="表示中のファイル数")
+    parser.add_argument("--offset", type=int, default=2000, help="表示中の先頭のファイルの位置")
+    parser.add_argument("--size", type=int, default=800, help="画像の幅（高さは1.4倍）")
+    parser.add_argument("--workers", type=int, default=ThumbnailExtractor.DEFAULT_WORKERS,
+                        help="抽出を並列に行うスレッド数")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="デコードに使うワーカープロセス数（1ならスレッドでデコードする）")
+    parser.add_argument("--folder", action="store_true", help="フォルダ全体を作り終えるまでの時間も計測する")
+    args = parser.parse_args()
+
+    setup_logging(CRITICAL)
+    root = tempfile.mkdtemp(prefix="bench_thumb_")
+    try:
+        images = [make_jpeg(args.size, int(args.size * 1.4), seed) for seed in range(16)]
+        names = [f"{i:05d}.jpg" for i in range(args.files)]
+        with zipfile.ZipFile(os.path.join(root, "photos.zip"), 'w', zipfile.ZIP_STORED) as zf:
+            for i, name in enumerate(names):
+                zf.writestr(f"photos/{name}", images[i % len(images)])
+
+        directory = "photos.zip/photos"
+        manager = ArchiveManagerWrapper()
+        # 一時フォルダの書庫をユーザーの永続インデックスに書き込まない
+        manager._manager._persistent_index.enabled = False
+        manager.open(root)
+        manager.change_directory(directory)
+        offset = min(args.offset, max(0, args.files - args.visible))
+        visible = names[offset:offset + args.visible]
+
+        if args.processes > 1:
+            batch_decoder = BatchDecoder(max_workers=args.processes)
+            batch_decoder.warm_up()
+
+        print("=" * 70)
+        print(f"サムネイル抽出 ベンチマーク ({args.files}ファイル, 表示中 {len(visible)}ファイル "
+              f"[{offset}〜], デコード {args.processes}プロセス, CPU {os.cpu_count()}コア)")
+        print("=" * 70)
+        sequential = run_sequential(manager, names, visible)
+        prioritized = run_prioritized(manager, names, visible, directory, args.workers)
+        print(f"{'経路':<30} {'表示中がそろうまで(ms)':>22}")
+        print(f"{'先頭から1ファイルずつ':<30} {sequential * 1000:>22.1f}")
+        print(f"{'表示中を優先して並列に抽出':<30} {prioritized * 1000:>22.1f}")
+        if args.folder:
+            folder = run_folder(manager, names, directory, args.workers)
+            print(f"{'フォルダ全体（並列に抽出）':<30} {folder * 1000:>22.1f}")
+    finally:
+        if batch_decoder is not None:
+            batch_decoder.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
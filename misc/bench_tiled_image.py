@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+タイル表示のベンチマーク
+
+大きな画像（既定 20000x15000）について、画像全体をデコードする従来の経路と、
+タイル表示（open_tiled_image でプレビューだけをデコードし、原寸表示では
+ビューポートに見えている範囲のタイルだけを作る）の経路を比較する。
+
+- 最初の表示まで: 従来は画像全体のデコード、タイル表示はプレビューのデコード
+- 原寸表示: タイル表示でビューポート（既定 1920x1080）に見えているタイルを作るまで
+  （JPEGはここで初めて元の解像度でデコードする）
+
+メモリ確保量のピークは tracemalloc で計測する（NumPy / OpenCV の配列の確保は追跡される）。
+従来の経路では、これに加えて表示用のQPixmap（画像全体、1画素4バイト）が必要になる。
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+# パスの追加（親ディレクトリをインポートパスに含める）
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import cv2
+    from logutils import setup_logging, CRITICAL
+    from decoder import decode_image_for_display
+    from decoder.tiled import TiledImage, open_tiled_image, TILE_SIZE
+except ImportError as e:
+    print(f"エラー: モジュールのインポートに失敗しました: {e}")
+    sys.exit(1)
+
+
+def make_image(width: int, height: int, ext: str) -> bytes:
+    """スキャン画像に見立てた画像を作成する"""
+    x = np.arange(width, dtype=np.uint32)[np.newaxis, :]
+    y = np.arange(height, dtype=np.uint32)[:, np.newaxis]
+    array = np.empty((height, width, 3), np.uint8)
+    array[:, :, 0] = (x >> 3) & 255
+    array[:, :, 1] = (y >> 3) & 255
+    for row in range(0, height, 1024):
+        array[row:row + 1024, :, 2] = ((x + y[row:row + 1024]) >> 4) & 255
+    params = [cv2.IMWRITE_JPEG_QUALITY, 90] if ext == '.jpg' else []
+    ok, buf = cv2.imencode(ext, array, params)
+    if not ok:
+        raise RuntimeError(f"{ext} にエンコードできませんでした")
+    return buf.tobytes()
+
+
+def measure(func):
+    """
+    時間（秒）とメモリ確保量のピーク（バイト）を計測する
+
+    Returns:
+        (時間, ピーク, 結果)
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def viewport_tiles(image: TiledImage, width: int, height: int):
+    """画像の中央に置いたビューポートに見えるタイルをすべて作る"""
+    x = max(0, (image.width - width) // 2)
+    y = max(0, (image.height - height) // 2)
+    tiles = image.tiles_in_rect(1, x, y, width, height)
+    for tile in tiles:
+        image.get_tile(tile)
+    return tiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="タイル表示のベンチマーク")
+    parser.add_argument("--width", type=int, default=20000, help="画像の幅")
+    parser.add_argument("--height", type=int, default=15000, help="画像の高さ")
+    parser.add_argument("--viewport", type=str, default="1920x1080", help="原寸表示のビューポートのサイズ")
+    args = parser.parse_args()
+
+    setup_logging(CRITICAL)
+    view_width, view_height = (int(v) for v in args.viewport.split('x'))
+
+    print("=" * 70)
+    print(f"タイル表示 ベンチマーク ({args.width}x{args.height}, ビューポート {view_width}x{view_height}, "
+          f"タイル {TILE_SIZE}px)")
+    print("=" * 70)
+    print(f"{'画像':<8} {'経路':<22} {'時間(s)':>10} {'ピーク(MB)':>12} {'QPixmap(MB)':>12}")
+
+    for ext in ('.jpg', '.png'):
+        name = f"scan{ext}"
+        data = make_image(args.width, args.height, ext)
+        pixmap_mb = args.width * args.height * 4 / 2**20
+
+        elapsed, peak, full = measure(lambda: decode_image_for_display(name, data))
+        full_array = full.array
+        del full
+        print(f"{name:<8} {'従来（全体をデコード）':<22} {elapsed:>10.3f} {peak / 2**20:>12.1f} {pixmap_mb:>12.1f}")
+
+        elapsed, peak, tiled = measure(lambda: open_tiled_image(name, data))
+        preview = tiled.preview.array
+        print(f"{'':<8} {'タイル（プレビュー）':<22} {elapsed:>10.3f} {peak / 2**20:>12.1f} "
+              f"{preview.shape[0] * preview.shape[1] * 4 / 2**20:>12.1f}")
+
+        elapsed, peak, tiles = measure(lambda: viewport_tiles(tiled, view_width, view_height))
+        print(f"{'':<8} {f'タイル（原寸 {len(tiles)}枚）':<22} {elapsed:>10.3f} {peak / 2**20:>12.1f} {'-':>12}")
+
+        # タイルが元の解像度の配列と一致することを確認する
+        level, col, row = tiles[0]
+        x, y, w, h = tiled.tile_rect(level, col, row)
+        if not np.array_equal(tiled.get_tile(tiles[0]), full_array[y:y + h, x:x + w]):
+            print(f"エラー: {name} のタイルが元の画像と一致しません")
+            sys.exit(1)
+        tiled.release()
+        del full_array
+
+    print("QPixmap: 表示用に作るQPixmapの大きさ（1画素4バイトとして計算）")
+    print("タイル（原寸）のピーク: JPEGは元の解像度のデコードを含む。PNGはプレビューの作成時にデコード済み")
+
+
+if __name__ == "__main__":
+    main()